@@ -0,0 +1,403 @@
+import tempfile
+
+import numpy as np
+
+from hilo_mpc import NMPC, LMPC, ApproximateMPC
+
+from .common import LIBRARY_MODELS, QUIET_NLP_OPTIONS, double_integrator, library_model
+
+
+NMPC_MODELS = ['ecoli_D1210_fedbatch', 'scerevisiae_SEY2102_fedbatch']
+INTEGRATION_METHODS = ['collocation', 'rk4', 'cvodes', 'idas', 'discrete']
+
+
+def _nmpc(name, method, horizon, solver='ipopt', nlp_options=None):
+    """
+
+    :param name:
+    :param method:
+    :param horizon:
+    :param solver:
+    :param nlp_options:
+    :return:
+    """
+    model = library_model(name)
+    if method == 'discrete':
+        model = model.discretize('rk4')
+        model.setup(dt=1.)
+
+    x0 = LIBRARY_MODELS[name]['x0']
+    u0 = LIBRARY_MODELS[name]['u0']
+
+    nmpc = NMPC(model)
+    nmpc.horizon = horizon
+    nmpc.quad_stage_cost.add_states(names=model.dynamical_state_names[2], weights=1., ref=1.)
+    nmpc.quad_stage_cost.add_inputs(names=model.input_names, weights=model.n_u * [.1])
+    nmpc.set_box_constraints(x_lb=model.n_x * [0.], u_lb=model.n_u * [0.], u_ub=model.n_u * [.1])
+    nmpc.set_initial_guess(x_guess=x0, u_guess=u0)
+    options = {'integration_method': method, 'solver': solver}
+    options.update(QUIET_NLP_OPTIONS)
+    if nlp_options is not None:
+        options.update(nlp_options)
+    nmpc.set_nlp_options(options)
+    return nmpc, x0
+
+
+class NMPCSetup:
+    """"""
+    params = (NMPC_MODELS, INTEGRATION_METHODS, [10, 20, 40])
+    param_names = ['model', 'integration_method', 'horizon']
+    timeout = 300.
+
+    def setup(self, name, method, horizon):
+        """
+
+        :param name:
+        :param method:
+        :param horizon:
+        :return:
+        """
+        self.nmpc, _ = _nmpc(name, method, horizon)
+
+    def time_setup(self, name, method, horizon):
+        """
+
+        :param name:
+        :param method:
+        :param horizon:
+        :return:
+        """
+        self.nmpc.setup()
+
+    def peakmem_setup(self, name, method, horizon):
+        """
+
+        :param name:
+        :param method:
+        :param horizon:
+        :return:
+        """
+        self.nmpc.setup()
+
+
+class NMPCOptimize:
+    """"""
+    params = (NMPC_MODELS, INTEGRATION_METHODS, [10, 20, 40])
+    param_names = ['model', 'integration_method', 'horizon']
+    timeout = 600.
+
+    def setup(self, name, method, horizon):
+        """
+
+        :param name:
+        :param method:
+        :param horizon:
+        :return:
+        """
+        self.nmpc, self.x0 = _nmpc(name, method, horizon)
+        self.nmpc.setup()
+
+    def time_optimize(self, name, method, horizon):
+        """
+
+        :param name:
+        :param method:
+        :param horizon:
+        :return:
+        """
+        self.nmpc.optimize(self.x0)
+
+    def track_iterations(self, name, method, horizon):
+        """
+
+        :param name:
+        :param method:
+        :param horizon:
+        :return:
+        """
+        self.nmpc.optimize(self.x0)
+        return self.nmpc.n_iterations
+
+
+class NMPCOptimizeDebugger:
+    """
+    Overhead of the IPOPT debugger when storing all iterates, storing every 5th iterate of the inputs in single
+    precision and storing the iterates in a memory-mapped file
+    """
+    params = (['ecoli_D1210_fedbatch'], [40, 160], ['full', 'reduced', 'mmap'])
+    param_names = ['model', 'horizon', 'storage']
+    timeout = 300.
+
+    def setup(self, name, horizon, storage):
+        """
+
+        :param name:
+        :param horizon:
+        :param storage:
+        :return:
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        if storage == 'full':
+            debugger_options = {}
+        elif storage == 'reduced':
+            debugger_options = {'record_every': 5, 'dtype': np.float32, 'variables': ['u']}
+        else:
+            debugger_options = {'buffer_size': 100, 'file_name': f'{self.directory.name}/debugger'}
+        self.nmpc, self.x0 = _nmpc(name, 'collocation', horizon, nlp_options={
+            'ipopt_debugger': True,
+            'ipopt_debugger_options': debugger_options
+        })
+        self.nmpc.setup()
+
+    def teardown(self, name, horizon, storage):
+        """
+
+        :param name:
+        :param horizon:
+        :param storage:
+        :return:
+        """
+        self.directory.cleanup()
+
+    def time_optimize(self, name, horizon, storage):
+        """
+
+        :param name:
+        :param horizon:
+        :param storage:
+        :return:
+        """
+        self.nmpc.optimize(self.x0)
+
+    def peakmem_optimize(self, name, horizon, storage):
+        """
+
+        :param name:
+        :param horizon:
+        :param storage:
+        :return:
+        """
+        self.nmpc.optimize(self.x0)
+
+
+class NMPCOptimizeCompiled:
+    """
+    NMPC with the functions evaluated by the NLP solver compiled to C code
+
+    Compare with NMPCOptimize (integration methods relying on SUNDIALS cannot be code-generated).
+    """
+    params = (NMPC_MODELS, ['collocation', 'rk4', 'discrete'], [10, 20, 40], ['jit', 'aot'])
+    param_names = ['model', 'integration_method', 'horizon', 'method']
+    timeout = 600.
+
+    def setup(self, name, method, horizon, compilation):
+        """
+
+        :param name:
+        :param method:
+        :param horizon:
+        :param compilation:
+        :return:
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.nmpc, self.x0 = _nmpc(name, method, horizon)
+        self.nmpc.set_compiler(compilation, 'shell' if compilation == 'jit' else 'gcc')
+        self.nmpc.setup(c_code=True, gen_path=self.directory.name + '/')
+
+    def time_optimize(self, name, method, horizon, compilation):
+        """
+
+        :param name:
+        :param method:
+        :param horizon:
+        :param compilation:
+        :return:
+        """
+        self.nmpc.optimize(self.x0)
+
+
+class NMPCLoad:
+    """
+    Restoring a set-up NMPC from a file
+
+    Compare with NMPCSetup and the setup of NMPCOptimizeCompiled (ahead-of-time compilation).
+    """
+    params = (NMPC_MODELS, [40, 160], ['none', 'aot'])
+    param_names = ['model', 'horizon', 'compilation']
+    timeout = 600.
+
+    def setup(self, name, horizon, compilation):
+        """
+
+        :param name:
+        :param horizon:
+        :param compilation:
+        :return:
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = self.directory.name + '/nmpc.pkl'
+        nmpc, self.x0 = _nmpc(name, 'collocation', horizon)
+        if compilation == 'aot':
+            nmpc.set_compiler(compilation, 'gcc')
+            nmpc.setup(c_code=True, gen_path=self.directory.name + '/')
+        else:
+            nmpc.setup()
+        nmpc.save(self.file)
+
+    def time_load(self, name, horizon, compilation):
+        """
+
+        :param name:
+        :param horizon:
+        :param compilation:
+        :return:
+        """
+        NMPC.load(self.file)
+
+
+class NMPCOptimizeStructured:
+    """
+    NMPC solved by the structure-exploiting interior-point solver fatrop
+
+    Compare with NMPCOptimize, which solves the same problems with IPOPT and its general sparse linear solver.
+    """
+    params = (NMPC_MODELS, ['collocation', 'rk4', 'discrete'], [20, 40, 80, 160], ['ipopt', 'fatrop'])
+    param_names = ['model', 'integration_method', 'horizon', 'solver']
+    timeout = 600.
+
+    def setup(self, name, method, horizon, solver):
+        """
+
+        :param name:
+        :param method:
+        :param horizon:
+        :param solver:
+        :return:
+        """
+        self.nmpc, self.x0 = _nmpc(name, method, horizon, solver=solver)
+        self.nmpc.setup()
+
+    def time_optimize(self, name, method, horizon, solver):
+        """
+
+        :param name:
+        :param method:
+        :param horizon:
+        :param solver:
+        :return:
+        """
+        self.nmpc.optimize(self.x0)
+
+
+class LMPCOptimize:
+    """"""
+    params = [10, 20, 40, 80]
+    param_names = ['horizon']
+
+    def setup(self, horizon):
+        """
+
+        :param horizon:
+        :return:
+        """
+        model = double_integrator()
+        lmpc = LMPC(model)
+        lmpc.Q = np.eye(2)
+        lmpc.R = 1
+        lmpc.horizon = horizon
+        lmpc.set_initial_guess(x_guess=[1., 1.], u_guess=[0.])
+        lmpc.set_box_constraints(x_lb=[-5, -5], x_ub=[5, 5], u_lb=[-1], u_ub=[1])
+        self.lmpc = lmpc
+
+    def time_setup(self, horizon):
+        """
+
+        :param horizon:
+        :return:
+        """
+        self.lmpc.setup()
+
+    def time_optimize(self, horizon):
+        """
+
+        :param horizon:
+        :return:
+        """
+        if not self.lmpc.is_setup():
+            self.lmpc.setup()
+        self.lmpc.optimize(x0=[1., 1.])
+
+
+class ExplicitLMPCOptimize:
+    """
+    The explicit solution of the LMPC is computed offline, so online only the critical region containing the state
+    needs to be located
+    """
+    params = [5, 10]
+    param_names = ['horizon']
+    timeout = 300.
+
+    def setup(self, horizon):
+        """
+
+        :param horizon:
+        :return:
+        """
+        model = double_integrator()
+        lmpc = LMPC(model)
+        lmpc.Q = np.eye(2)
+        lmpc.R = 1
+        lmpc.horizon = horizon
+        lmpc.set_box_constraints(x_lb=[-5, -5], x_ub=[5, 5], u_lb=[-1], u_ub=[1])
+        lmpc.setup(nlp_solver='explicit')
+        self.lmpc = lmpc
+
+    def time_optimize(self, horizon):
+        """
+
+        :param horizon:
+        :return:
+        """
+        self.lmpc.optimize(x0=[1., 1.])
+
+    def time_evaluate(self, horizon):
+        """
+
+        :param horizon:
+        :return:
+        """
+        self.lmpc.explicit_solution([1., 1.])
+
+
+class ApproximateMPCSample:
+    """
+    Generation of the training data of an approximate MPC, i.e. solving the NMPC for Latin hypercube samples of the
+    initial states on a pool of worker processes
+    """
+    params = [1, 2, 4]
+    param_names = ['processes']
+    timeout = 300.
+
+    def setup(self, processes):
+        """
+
+        :param processes:
+        :return:
+        """
+        model = double_integrator()
+        nmpc = NMPC(model)
+        nmpc.horizon = 20
+        nmpc.quad_stage_cost.add_states(names=model.dynamical_state_names, weights=[1., 1.], ref=[0., 0.])
+        nmpc.quad_stage_cost.add_inputs(names=model.input_names, weights=[.1])
+        nmpc.set_box_constraints(x_lb=[-5., -5.], x_ub=[5., 5.], u_lb=[-1.], u_ub=[1.])
+        nmpc.set_nlp_options(QUIET_NLP_OPTIONS)
+        nmpc.setup()
+        self.ampc = ApproximateMPC(nmpc)
+
+    def time_sample(self, processes):
+        """
+
+        :param processes:
+        :return:
+        """
+        self.ampc.sample(200, [-5., -5.], [5., 5.], seed=0, processes=processes, batch_size=25)
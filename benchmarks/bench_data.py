@@ -0,0 +1,96 @@
+import tempfile
+
+import numpy as np
+
+from hilo_mpc.util.data import ChunkedDataSet, DataSet, EuclideanDistanceFilter
+
+
+class SelectTrainData:
+    """"""
+    params = ([1000, 10000, 100000], [2, 4])
+    param_names = ['n_samples', 'n_features']
+    timeout = 300.
+
+    def setup(self, n_samples, n_features):
+        """
+
+        :param n_samples:
+        :param n_features:
+        :return:
+        """
+        rng = np.random.default_rng(0)
+        features = rng.uniform(size=(n_features, n_samples))
+        data_set = DataSet([f'x_{k}' for k in range(n_features)], ['y'], plot_backend='bokeh')
+        data_set.set_data(features, features.sum(axis=0, keepdims=True))
+        self.data_set = data_set
+        self.features = features
+
+    def time_euclidean_distance(self, n_samples, n_features):
+        """
+
+        :param n_samples:
+        :param n_features:
+        :return:
+        """
+        self.data_set.select_train_data('euclidean_distance', distance_threshold=.05)
+
+    def time_euclidean_distance_streaming(self, n_samples, n_features):
+        """
+
+        :param n_samples:
+        :param n_features:
+        :return:
+        """
+        data_filter = EuclideanDistanceFilter(.05)
+        for chunk in np.array_split(self.features, 100, axis=1):
+            data_filter.update(chunk)
+
+
+class ChunkedStorage:
+    """"""
+    params = ([100000, 1000000], [10000, 100000])
+    param_names = ['n_samples', 'chunk_size']
+    timeout = 300.
+
+    def setup(self, n_samples, chunk_size):
+        """
+
+        :param n_samples:
+        :param chunk_size:
+        :return:
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.features = rng.uniform(size=(4, n_samples))
+        self.labels = self.features.sum(axis=0, keepdims=True)
+        self.data_set = ChunkedDataSet([f'x_{k}' for k in range(4)], ['y'], self.directory.name, chunk_size=chunk_size)
+
+    def teardown(self, n_samples, chunk_size):
+        """
+
+        :param n_samples:
+        :param chunk_size:
+        :return:
+        """
+        self.directory.cleanup()
+
+    def time_add_data(self, n_samples, chunk_size):
+        """
+
+        :param n_samples:
+        :param chunk_size:
+        :return:
+        """
+        self.data_set.add_data(self.features, self.labels)
+
+    def peakmem_iterate_chunks(self, n_samples, chunk_size):
+        """
+
+        :param n_samples:
+        :param chunk_size:
+        :return:
+        """
+        self.data_set.add_data(self.features, self.labels)
+        x_data, _ = self.data_set.raw_data
+        for chunk in x_data.iter_chunks():
+            chunk.sum()
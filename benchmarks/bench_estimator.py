@@ -0,0 +1,390 @@
+import casadi as ca
+
+from hilo_mpc import MHE, KF, EKF, UKF, PF, EnKF, Model
+
+from .common import growth_model, library_model, linear_two_tank, nonlinear_two_tank
+
+
+def _mhe(horizon, arrival_guess_update='smoothing'):
+    """
+
+    :param horizon:
+    :param arrival_guess_update:
+    :return:
+    """
+    model = library_model('scerevisiae_SEY2102_fedbatch', dt=.5)
+    x0 = model.solution.get_by_id('x:0')
+
+    mhe = MHE(model)
+    mhe.horizon = horizon
+    mhe.quad_arrival_cost.add_states(weights=model.n_x * [1.], guess=x0)
+    mhe.quad_stage_cost.add_measurements(weights=model.n_y * [10.])
+    mhe.set_box_constraints(x_lb=model.n_x * [0.])
+    mhe.set_nlp_options({'print_level': 0, 'arrival_guess_update': arrival_guess_update})
+    return mhe, model
+
+
+def _kalman_filter(kind):
+    """
+
+    :param kind:
+    :return:
+    """
+    if kind == 'KF':
+        estimator = KF(linear_two_tank(), plot_backend='bokeh')
+    elif kind == 'EKF':
+        estimator = EKF(growth_model(), plot_backend='bokeh')
+    elif kind == 'UKF':
+        estimator = UKF(growth_model(), plot_backend='bokeh')
+    else:
+        raise ValueError(f"Filter '{kind}' not recognized")
+    return estimator
+
+
+class MHESetup:
+    """"""
+    params = [5, 10, 20, 40]
+    param_names = ['horizon']
+
+    def setup(self, horizon):
+        """
+
+        :param horizon:
+        :return:
+        """
+        self.mhe, _ = _mhe(horizon)
+
+    def time_setup(self, horizon):
+        """
+
+        :param horizon:
+        :return:
+        """
+        self.mhe.setup()
+
+    def peakmem_setup(self, horizon):
+        """
+
+        :param horizon:
+        :return:
+        """
+        self.mhe.setup()
+
+
+class MHEEstimate:
+    """
+    The filtering update of the arrival cost summarizes the measurements before the horizon, such that shorter horizons
+    can be used
+    """
+    params = ([5, 10, 20, 40], ['smoothing', 'filtering'])
+    param_names = ['horizon', 'arrival_guess_update']
+    timeout = 300.
+
+    def setup(self, horizon, arrival_guess_update):
+        """
+
+        :param horizon:
+        :param arrival_guess_update:
+        :return:
+        """
+        mhe, model = _mhe(horizon, arrival_guess_update=arrival_guess_update)
+        mhe.setup()
+        for _ in range(horizon + 1):
+            model.simulate(u=.01)
+            mhe.add_measurements(model.solution['y:f'], u_meas=.01)
+        self.mhe = mhe
+
+    def time_estimate(self, horizon, arrival_guess_update):
+        """
+
+        :param horizon:
+        :param arrival_guess_update:
+        :return:
+        """
+        self.mhe.estimate()
+
+
+class MHEAddMeasurements:
+    """
+    The measurements are written into preallocated windows, so the overhead per measurement does not depend on the
+    horizon length
+    """
+    params = [5, 20, 80]
+    param_names = ['horizon']
+    timeout = 300.
+
+    def setup(self, horizon):
+        """
+
+        :param horizon:
+        :return:
+        """
+        mhe, model = _mhe(horizon)
+        mhe.setup()
+        model.simulate(u=.01)
+        self.mhe = mhe
+        self.y = model.solution['y:f']
+
+    def time_add_measurements(self, horizon):
+        """
+
+        :param horizon:
+        :return:
+        """
+        for _ in range(100):
+            self.mhe.add_measurements(self.y, u_meas=.01)
+
+
+def _reactor_cascade(n_x):
+    """
+    Cascade of n_x stirred tanks with second-order reaction, where the concentration in every fourth tank is measured
+
+    :param n_x:
+    :return:
+    """
+    model = Model(plot_backend='bokeh', discrete=True)
+    x = model.set_dynamical_states([f'c_{k}' for k in range(n_x)])
+    u = model.set_inputs('c_in')
+    model.set_measurements([f'y_{k}' for k in range(0, n_x, 4)])
+    inflow = ca.vertcat(u, x[:-1])
+    model.set_dynamical_equations(x + .1 * (inflow - x) - .05 * x ** 2)
+    model.set_measurement_equations(x[::4])
+    model.setup(dt=1.)
+    return model
+
+
+class KalmanFilterSetup:
+    """"""
+    params = ['KF', 'EKF', 'UKF']
+    param_names = ['filter']
+
+    def setup(self, kind):
+        """
+
+        :param kind:
+        :return:
+        """
+        self.estimator = _kalman_filter(kind)
+
+    def time_setup(self, kind):
+        """
+
+        :param kind:
+        :return:
+        """
+        self.estimator.setup()
+
+
+class KalmanFilterEstimate:
+    """"""
+    params = (['KF', 'EKF', 'UKF'], [1, 10, 100])
+    param_names = ['filter', 'steps']
+
+    def setup(self, kind, steps):
+        """
+
+        :param kind:
+        :param steps:
+        :return:
+        """
+        estimator = _kalman_filter(kind)
+        estimator.setup()
+        if kind == 'KF':
+            estimator.Q = [.01, .01]
+            estimator.R = .064
+            estimator.set_initial_guess([.8, 0.])
+            estimator.set_initial_parameter_values([.5, .4])
+            self.args = {'y': .4, 'u': .8, 'p': [.5, .4]}
+        else:
+            estimator.Q = 10.
+            estimator.R = 1.
+            estimator.set_initial_guess(9.)
+            self.args = {'y': 2.59109}
+        self.estimator = estimator
+
+    def time_estimate(self, kind, steps):
+        """
+
+        :param kind:
+        :param steps:
+        :return:
+        """
+        for _ in range(steps):
+            self.estimator.estimate(**self.args)
+
+
+class KalmanFilterVariantsEstimate:
+    """
+    KF on the linear two tank model with the standard and Joseph form of the covariance update and as steady-state
+    filter
+
+    The steady-state filter solves the algebraic Riccati equation once and only propagates the mean afterwards.
+    """
+    params = (['standard', 'joseph_form', 'steady_state'], [10, 100])
+    param_names = ['variant', 'steps']
+
+    def setup(self, variant, steps):
+        """
+
+        :param variant:
+        :param steps:
+        :return:
+        """
+        kwargs = {variant: True} if variant != 'standard' else {}
+        kf = KF(linear_two_tank(), plot_backend='bokeh', **kwargs)
+        kf.setup()
+        kf.Q = [.01, .01]
+        kf.R = .064
+        kf.set_initial_guess([.8, 0.])
+        kf.set_initial_parameter_values([.5, .4])
+        self.kf = kf
+
+    def time_estimate(self, variant, steps):
+        """
+
+        :param variant:
+        :param steps:
+        :return:
+        """
+        for _ in range(steps):
+            self.kf.estimate(y=.4, u=.8, p=[.5, .4])
+
+
+class UnscentedKalmanFilterEstimate:
+    """
+    UKF on a cascade of stirred tanks with increasing number of states
+
+    The sigma points are propagated by a mapped model function. The square-root form propagates the Cholesky factor of
+    the error covariance matrix instead of the error covariance matrix itself.
+    """
+    params = ([10, 20, 40], [False, True])
+    param_names = ['n_x', 'square_root_form']
+    timeout = 300.
+
+    def setup(self, n_x, square_root_form):
+        """
+
+        :param n_x:
+        :param square_root_form:
+        :return:
+        """
+        model = _reactor_cascade(n_x)
+        ukf = UKF(model, alpha=1., square_root_form=square_root_form, plot_backend='bokeh')
+        ukf.setup()
+        ukf.Q = n_x * [.001]
+        ukf.R = model.n_y * [.01]
+        ukf.set_initial_guess(n_x * [.5])
+        self.ukf = ukf
+        self.y = model.n_y * [.4]
+
+    def time_estimate(self, n_x, square_root_form):
+        """
+
+        :param n_x:
+        :param square_root_form:
+        :return:
+        """
+        for _ in range(10):
+            self.ukf.estimate(y=self.y, u=1.)
+
+
+class EnsembleKalmanFilterEstimate:
+    """
+    EnKF on a cascade of stirred tanks with increasing number of states
+
+    The ensemble is propagated by a mapped model function. Without localization the analysis step is carried out in the
+    space of the ensemble members, so the cost per step grows linearly with the number of states (compare
+    UnscentedKalmanFilterEstimate). With localization the tapered covariances between states and measurements are formed.
+    """
+    params = ([40, 200, 800], [20, 80], [False, True])
+    param_names = ['n_x', 'ensemble_size', 'localization']
+    timeout = 300.
+
+    def setup(self, n_x, ensemble_size, localization):
+        """
+
+        :param n_x:
+        :param ensemble_size:
+        :param localization:
+        :return:
+        """
+        model = _reactor_cascade(n_x)
+        enkf = EnKF(model, ensemble_size=ensemble_size, seed=0, plot_backend='bokeh')
+        if localization:
+            enkf.set_localization(8.)
+        enkf.setup()
+        enkf.Q = n_x * [.001]
+        enkf.R = model.n_y * [.01]
+        enkf.set_initial_guess(n_x * [.5], P0=n_x * [.01])
+        self.enkf = enkf
+        self.y = model.n_y * [.4]
+
+    def time_estimate(self, n_x, ensemble_size, localization):
+        """
+
+        :param n_x:
+        :param ensemble_size:
+        :param localization:
+        :return:
+        """
+        for _ in range(10):
+            self.enkf.estimate(y=self.y, u=1.)
+
+
+class ParticleFilterSetup:
+    """"""
+    params = [15, 100, 1000]
+    param_names = ['sample_size']
+
+    def setup(self, sample_size):
+        """
+
+        :param sample_size:
+        :return:
+        """
+        self.pf = PF(nonlinear_two_tank(), plot_backend='bokeh')
+        self.pf.sample_size = sample_size
+
+    def time_setup(self, sample_size):
+        """
+
+        :param sample_size:
+        :return:
+        """
+        self.pf.setup()
+
+
+class ParticleFilterEstimate:
+    """"""
+    params = [15, 100, 1000]
+    param_names = ['sample_size']
+
+    def setup(self, sample_size):
+        """
+
+        :param sample_size:
+        :return:
+        """
+        pf = PF(nonlinear_two_tank(), plot_backend='bokeh')
+        pf.sample_size = sample_size
+        pf.setup()
+        pf.Q = [.01, .01]
+        pf.R = .01
+        pf.set_initial_guess([10., 10.], P0=[.1, .1])
+        self.pf = pf
+
+    def time_estimate(self, sample_size):
+        """
+
+        :param sample_size:
+        :return:
+        """
+        self.pf.estimate(y=10., u=1.5)
+
+    def peakmem_estimate(self, sample_size):
+        """
+
+        :param sample_size:
+        :return:
+        """
+        self.pf.estimate(y=10., u=1.5)
@@ -0,0 +1,163 @@
+import numpy as np
+
+from hilo_mpc import GP
+
+from .common import training_data
+
+
+class GPFit:
+    """"""
+    params = [10, 20, 50]
+    param_names = ['n_train']
+    timeout = 300.
+
+    def setup(self, n_train):
+        """
+
+        :param n_train:
+        :return:
+        """
+        X, y = training_data(n_train)
+        gp = GP(['x'], ['y'], solver='ipopt')
+        gp.set_training_data(X, y)
+        self.gp = gp
+
+    def time_setup(self, n_train):
+        """
+
+        :param n_train:
+        :return:
+        """
+        self.gp.setup()
+
+    def time_fit_model(self, n_train):
+        """
+
+        :param n_train:
+        :return:
+        """
+        if not self.gp.is_setup():
+            self.gp.setup()
+        self.gp.fit_model()
+
+    def peakmem_fit_model(self, n_train):
+        """
+
+        :param n_train:
+        :return:
+        """
+        if not self.gp.is_setup():
+            self.gp.setup()
+        self.gp.fit_model()
+
+
+class GPFitSciPy:
+    """
+    Hyperparameter optimization with the gradient-based solvers of SciPy
+    """
+    params = ([20, 50], ['BFGS', 'Newton-CG', 'L-BFGS-B'])
+    param_names = ['n_train', 'solver']
+    timeout = 300.
+
+    def setup(self, n_train, solver):
+        """
+
+        :param n_train:
+        :param solver:
+        :return:
+        """
+        X, y = training_data(n_train)
+        gp = GP(['x'], ['y'], solver=solver)
+        gp.set_training_data(X, y)
+        gp.setup()
+        self.gp = gp
+
+    def time_fit_model(self, n_train, solver):
+        """
+
+        :param n_train:
+        :param solver:
+        :return:
+        """
+        self.gp.fit_model()
+
+
+class GPFitRestarts:
+    """
+    Hyperparameter optimization with restarts from random initial guesses, serially and on a process pool
+    """
+    params = ([50], [1, 2, 4])
+    param_names = ['n_train', 'processes']
+    timeout = 300.
+
+    def setup(self, n_train, processes):
+        """
+
+        :param n_train:
+        :param processes:
+        :return:
+        """
+        X, y = training_data(n_train)
+        gp = GP(['x'], ['y'], solver='ipopt')
+        gp.set_training_data(X, y)
+        gp.setup()
+        self.gp = gp
+
+    def time_fit_model(self, n_train, processes):
+        """
+
+        :param n_train:
+        :param processes:
+        :return:
+        """
+        self.gp.fit_model(restarts=7, processes=processes, seed=0)
+
+
+class GPPredict:
+    """
+    Prediction of the marginal variances in batches compared to the point-wise evaluation of the CasADi graph, which
+    factorizes the covariance matrix of the training data for every query point
+    """
+    params = ([20, 50], [100, 500, 10000])
+    param_names = ['n_train', 'n_query']
+
+    def setup(self, n_train, n_query):
+        """
+
+        :param n_train:
+        :param n_query:
+        :return:
+        """
+        X, y = training_data(n_train)
+        gp = GP(['x'], ['y'], solver='ipopt')
+        gp.set_training_data(X, y)
+        gp.setup()
+        self.gp = gp
+        self.X_query = np.linspace(-2., 2., n_query).reshape(1, -1)
+
+    def time_predict(self, n_train, n_query):
+        """
+
+        :param n_train:
+        :param n_query:
+        :return:
+        """
+        self.gp.predict(self.X_query)
+
+    def time_predict_pointwise(self, n_train, n_query):
+        """
+
+        :param n_train:
+        :param n_query:
+        :return:
+        """
+        self.gp._function(self.X_query, self.gp._gp_args['x0'], self.gp._gp_args['p'])
+
+    def peakmem_predict(self, n_train, n_query):
+        """
+
+        :param n_train:
+        :param n_query:
+        :return:
+        """
+        self.gp.predict(self.X_query)
@@ -0,0 +1,50 @@
+import subprocess
+import sys
+
+
+STATEMENTS = {
+    'package': 'import hilo_mpc',
+    'Model': 'from hilo_mpc import Model',
+    'NMPC': 'from hilo_mpc import NMPC',
+    'PF': 'from hilo_mpc import PF',
+    'GP': 'from hilo_mpc import GP',
+    'everything': 'from hilo_mpc import *'
+}
+
+
+class Import:
+    """
+    Cold start of a fresh interpreter importing (parts of) HILO-MPC
+
+    The interpreter start-up itself is benchmarked separately as reference.
+    """
+    params = list(STATEMENTS)
+    param_names = ['statement']
+
+    def time_import(self, statement):
+        """
+
+        :param statement:
+        :return:
+        """
+        subprocess.run([sys.executable, '-c', STATEMENTS[statement]], check=True)
+
+    def track_modules(self, statement):
+        """
+
+        :param statement:
+        :return:
+        """
+        code = f"import sys; {STATEMENTS[statement]}; print(len(sys.modules))"
+        output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+        return int(output.split()[-1])
+
+
+class InterpreterStartup:
+    """"""
+    def time_startup(self):
+        """
+
+        :return:
+        """
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
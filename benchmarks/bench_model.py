@@ -0,0 +1,316 @@
+import os
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from hilo_mpc import Model, SeriesWriter
+
+from .common import LIBRARY_MODELS, double_integrator, library_model, linear_two_tank, simulation_args
+
+
+class ModelSetup:
+    """"""
+    params = list(LIBRARY_MODELS)
+    param_names = ['model']
+
+    def setup(self, name):
+        """
+
+        :param name:
+        :return:
+        """
+        self.model = library_model(name, setup=False)
+
+    def time_setup(self, name):
+        """
+
+        :param name:
+        :return:
+        """
+        self.model.setup(dt=1.)
+
+    def peakmem_setup(self, name):
+        """
+
+        :param name:
+        :return:
+        """
+        self.model.setup(dt=1.)
+
+
+class ModelSimulate:
+    """"""
+    params = (list(LIBRARY_MODELS), [1, 10, 100])
+    param_names = ['model', 'steps']
+
+    def setup(self, name, steps):
+        """
+
+        :param name:
+        :param steps:
+        :return:
+        """
+        self.model = library_model(name)
+        self.args = simulation_args(name, steps=steps)
+
+    def time_simulate(self, name, steps):
+        """
+
+        :param name:
+        :param steps:
+        :return:
+        """
+        self.model.simulate(**self.args)
+
+    def time_simulate_stepwise(self, name, steps):
+        """
+
+        :param name:
+        :param steps:
+        :return:
+        """
+        args = simulation_args(name)
+        for _ in range(steps):
+            self.model.simulate(**args)
+
+    def peakmem_simulate(self, name, steps):
+        """
+
+        :param name:
+        :param steps:
+        :return:
+        """
+        self.model.simulate(**self.args)
+
+
+class ModelSimulateLinear:
+    """
+    Simulation of linear time-invariant models in closed form and by the integrator
+    """
+    params = (['linear_two_tank', 'double_integrator'], [10, 1000, 10000], [True, False])
+    param_names = ['model', 'steps', 'closed_form']
+    timeout = 300.
+
+    def setup(self, name, steps, closed_form):
+        """
+
+        :param name:
+        :param steps:
+        :param closed_form:
+        :return:
+        """
+        if name == 'linear_two_tank':
+            self.model = linear_two_tank()
+        else:
+            self.model = double_integrator()
+        self.u = np.sin(np.arange(steps) / 10.).reshape(1, -1)
+
+    def time_simulate(self, name, steps, closed_form):
+        """
+
+        :param name:
+        :param steps:
+        :param closed_form:
+        :return:
+        """
+        self.model.simulate(u=self.u, steps=self.u.shape[1], closed_form=closed_form)
+
+    def time_simulate_stepwise(self, name, steps, closed_form):
+        """
+
+        :param name:
+        :param steps:
+        :param closed_form:
+        :return:
+        """
+        for k in range(min(steps, 100)):
+            self.model.simulate(u=self.u[0, k], closed_form=closed_form)
+
+
+def _reactor_chain(n_x):
+    """
+
+    :param n_x:
+    :return:
+    """
+    model = Model(plot_backend='bokeh')
+    x = model.set_dynamical_states([f'c_{k}' for k in range(n_x)])
+    u = model.set_inputs('F')
+    k = model.set_parameters('k')
+    model.set_measurements('y')
+    inflow = [u] + [x[i] for i in range(n_x - 1)]
+    model.set_dynamical_equations([inflow[i] - x[i] - k * x[i] ** 2 for i in range(n_x)])
+    model.set_measurement_equations(x[-1])
+    model.setup(dt=1.)
+    return model
+
+
+class ModelCopy:
+    """
+    Copies of a set-up model that share the symbolic structure and the functions of the original model
+    """
+    params = [2, 20, 200]
+    param_names = ['n_x']
+    timeout = 300.
+
+    def setup(self, n_x):
+        """
+
+        :param n_x:
+        :return:
+        """
+        self.model = _reactor_chain(n_x)
+
+    def time_copy(self, n_x):
+        """
+
+        :param n_x:
+        :return:
+        """
+        self.model.copy(setup=True)
+
+    def time_copy_without_setup(self, n_x):
+        """
+
+        :param n_x:
+        :return:
+        """
+        self.model.copy(setup=False)
+
+    def time_copy_and_rebuild(self, n_x):
+        """
+
+        :param n_x:
+        :return:
+        """
+        self.model.copy(setup=True, dt=2.)
+
+
+class SeriesLookup:
+    """"""
+    params = ['ecoli_D1210_fedbatch', 'scerevisiae_SEY2102_fedbatch']
+    param_names = ['model']
+
+    def setup(self, name):
+        """
+
+        :param name:
+        :return:
+        """
+        model = library_model(name)
+        model.simulate(**simulation_args(name, steps=10))
+        self.solution = model.solution
+        self.name = model.dynamical_state_names[-1]
+        self.key = self.solution.get_key('x:f')
+
+    def time_get_by_id(self, name):
+        """
+
+        :param name:
+        :return:
+        """
+        for _ in range(1000):
+            self.solution.get_by_id('x:f')
+
+    def time_get_by_key(self, name):
+        """
+
+        :param name:
+        :return:
+        """
+        for _ in range(1000):
+            self.solution.get_by_id(self.key)
+
+    def time_get_by_name(self, name):
+        """
+
+        :param name:
+        :return:
+        """
+        for _ in range(1000):
+            self.solution[self.name]
+
+
+class SeriesExport:
+    """
+    Export of long solution histories to a .mat file and to memory-mappable columnar files
+    """
+    params = [1000, 10000]
+    param_names = ['steps']
+    timeout = 300.
+
+    def setup(self, steps):
+        """
+
+        :param steps:
+        :return:
+        """
+        model = linear_two_tank()
+        u = np.sin(np.arange(steps) / 10.).reshape(1, -1)
+        model.simulate(u=u, steps=steps)
+        self.solution = model.solution
+        self.model = linear_two_tank()
+        self.u = np.split(u, 10, axis=1)
+        self.directory = TemporaryDirectory()
+
+    def teardown(self, steps):
+        """
+
+        :param steps:
+        :return:
+        """
+        self.directory.cleanup()
+
+    def time_to_mat(self, steps):
+        """
+
+        :param steps:
+        :return:
+        """
+        self.solution.to_mat('t', 'x', 'u', file_name=os.path.join(self.directory.name, 'data.mat'))
+
+    def time_to_file(self, steps):
+        """
+
+        :param steps:
+        :return:
+        """
+        self.solution.to_file('t', 'x', 'u', file_name=os.path.join(self.directory.name, 'data'))
+
+    def time_export_during_run_to_mat(self, steps):
+        """
+
+        :param steps:
+        :return:
+        """
+        file_name = os.path.join(self.directory.name, 'run.mat')
+        for u in self.u:
+            self.model.simulate(u=u, steps=u.shape[1])
+            self.model.solution.to_mat('t', 'x', 'u', file_name=file_name)
+
+    def time_export_during_run_to_file(self, steps):
+        """
+
+        :param steps:
+        :return:
+        """
+        with SeriesWriter(os.path.join(self.directory.name, 'run')) as writer:
+            for u in self.u:
+                self.model.simulate(u=u, steps=u.shape[1])
+                writer.write(self.model.solution, 't', 'x', 'u')
+
+    def peakmem_to_mat(self, steps):
+        """
+
+        :param steps:
+        :return:
+        """
+        self.solution.to_mat('t', 'x', 'u', file_name=os.path.join(self.directory.name, 'data.mat'))
+
+    def peakmem_to_file(self, steps):
+        """
+
+        :param steps:
+        :return:
+        """
+        self.solution.to_file('t', 'x', 'u', file_name=os.path.join(self.directory.name, 'data'))
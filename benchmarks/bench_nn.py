@@ -0,0 +1,169 @@
+import numpy as np
+
+from hilo_mpc import ANN, Dense, Model, NMPC
+
+
+def _ann(n_features, width, depth, seed=0, features=None, labels=None, use_sx=None, embedding=None):
+    """
+
+    :param n_features:
+    :param width:
+    :param depth:
+    :param seed:
+    :param features:
+    :param labels:
+    :param use_sx:
+    :param embedding:
+    :return:
+    """
+    rng = np.random.default_rng(seed)
+    if features is None:
+        features = [f'x_{k}' for k in range(n_features)]
+    if labels is None:
+        labels = ['y']
+    ann = ANN(features, labels, use_sx=use_sx, embedding=embedding)
+    shapes = [n_features] + depth * [width] + [len(labels)]
+    for _ in range(depth):
+        ann.add_layers(Dense(width, activation='tanh'))
+    weights = [rng.normal(scale=1. / np.sqrt(shapes[k]), size=(shapes[k + 1], shapes[k])) for k in
+               range(len(shapes) - 1)]
+    bias = [rng.normal(size=shapes[k + 1]) for k in range(len(shapes) - 1)]
+    ann.build_graph(weights=weights, bias=bias)
+    return ann
+
+
+def _hybrid_nmpc(ann):
+    """
+
+    :param ann:
+    :return:
+    """
+    model = Model(discrete=True)
+    x = model.set_dynamical_states(['x_1', 'x_2'])
+    u = model.set_inputs('u')
+    model.set_dynamical_equations([x[0] + .1 * x[1], x[1] + .1 * u])
+    model += ann
+    model.setup(dt=.1)
+
+    nmpc = NMPC(model)
+    nmpc.horizon = 20
+    nmpc.quad_stage_cost.add_states(names=['x_1', 'x_2'], weights=[1., 1.], ref=[0., 0.])
+    nmpc.quad_stage_cost.add_inputs(names='u', weights=.1)
+    nmpc.set_box_constraints(u_lb=[-1.], u_ub=[1.])
+    nmpc.setup(options={'print_level': 0})
+    return nmpc
+
+
+class ANNPredict:
+    """
+    Prediction of a batch of query points with the vectorized NumPy forward pass compared to the mapped CasADi graph
+    """
+    params = ([1000, 100000], [16, 64])
+    param_names = ['n_query', 'width']
+    timeout = 300.
+
+    def setup(self, n_query, width):
+        """
+
+        :param n_query:
+        :param width:
+        :return:
+        """
+        self.ann = _ann(4, width, 2)
+        self.X = np.random.default_rng(1).normal(size=(4, n_query))
+        self.mapped = self.ann._function.map(n_query)
+
+    def time_predict(self, n_query, width):
+        """
+
+        :param n_query:
+        :param width:
+        :return:
+        """
+        self.ann.predict(self.X)
+
+    def time_predict_casadi_map(self, n_query, width):
+        """
+
+        :param n_query:
+        :param width:
+        :return:
+        """
+        self.mapped(self.X)
+
+
+class ANNInNMPC:
+    """
+    Setup and solution of an NMPC with a hybrid model whose neural network is embedded element-wise (SX) or as a single
+    call node of matrix-vector products (MX)
+    """
+    params = ([16, 64, 256], [True, False])
+    param_names = ['width', 'use_sx']
+    timeout = 600.
+
+    def setup(self, width, use_sx):
+        """
+
+        :param width:
+        :param use_sx:
+        :return:
+        """
+        self.ann = _ann(3, width, 3, features=['x_1', 'x_2', 'u'], labels=['d_1', 'd_2'], use_sx=use_sx)
+        self.nmpc = _hybrid_nmpc(self.ann)
+
+    def time_setup(self, width, use_sx):
+        """
+
+        :param width:
+        :param use_sx:
+        :return:
+        """
+        _hybrid_nmpc(self.ann)
+
+    def time_optimize(self, width, use_sx):
+        """
+
+        :param width:
+        :param use_sx:
+        :return:
+        """
+        self.nmpc.optimize([1., 0.])
+
+
+class LearnedEmbedding:
+    """
+    Setup and solution of an NMPC with a hybrid model whose (SX) neural network is substituted as an expression,
+    embedded as an opaque function call or evaluated by a callback
+    """
+    params = ([16, 64], ['expression', 'function', 'callback'])
+    param_names = ['width', 'embedding']
+    timeout = 600.
+
+    def setup(self, width, embedding):
+        """
+
+        :param width:
+        :param embedding:
+        :return:
+        """
+        self.ann = _ann(3, width, 3, features=['x_1', 'x_2', 'u'], labels=['d_1', 'd_2'], use_sx=True,
+                        embedding=embedding)
+        self.nmpc = _hybrid_nmpc(self.ann)
+
+    def time_setup(self, width, embedding):
+        """
+
+        :param width:
+        :param embedding:
+        :return:
+        """
+        _hybrid_nmpc(self.ann)
+
+    def time_optimize(self, width, embedding):
+        """
+
+        :param width:
+        :param embedding:
+        :return:
+        """
+        self.nmpc.optimize([1., 0.])
@@ -0,0 +1,159 @@
+import warnings
+
+import numpy as np
+
+from hilo_mpc import Model
+from hilo_mpc.library import models
+
+
+warnings.filterwarnings('ignore')
+
+# Library models together with operating points that are used throughout the benchmarks. Values are not meant to be
+# physically meaningful, they only need to result in well-posed simulations and optimization problems.
+LIBRARY_MODELS = {
+    'cstr_schaffner_and_zeitz': {
+        'factory': models.cstr_schaffner_and_zeitz,
+        'x0': [.1, .1],
+        'u0': [0.],
+        'p0': [.5, .5, 1., 1., 1., 1.]
+    },
+    'cstr_seborg': {
+        'factory': models.cstr_seborg,
+        'x0': [.5, 350., 300.],
+        'u0': [300.],
+        'p0': [100., 100., 1., 350., 7.2e10, 8750., 5e4, 1000., .239, 239., 1.]
+    },
+    'ecoli_D1210_conti': {
+        'factory': models.ecoli_D1210_conti,
+        'x0': [1., 10., 0., 0.],
+        'u0': [.01, .01],
+        'p0': [100., 4., .1, .2, .01]
+    },
+    'ecoli_D1210_fedbatch': {
+        'factory': models.ecoli_D1210_fedbatch,
+        'x0': [.1, 40., 0., 0., 1., 0., 1.],
+        'u0': [0., 0.],
+        'p0': []
+    },
+    'scerevisiae_SEY2102_fedbatch': {
+        'factory': models.scerevisiae_SEY2102_fedbatch,
+        'x0': [1., 5., 0., 0., 1.],
+        'u0': [0.],
+        'p0': []
+    }
+}
+
+# Options passed to every optimizer, so that solver output does not end up in the timings
+QUIET_NLP_OPTIONS = {'print_level': 0}
+
+
+def library_model(name, dt=1., setup=True):
+    """
+
+    :param name:
+    :param dt:
+    :param setup:
+    :return:
+    """
+    model = LIBRARY_MODELS[name]['factory']()
+    if setup:
+        model.setup(dt=dt)
+        model.set_initial_conditions(x0=LIBRARY_MODELS[name]['x0'])
+        if model.n_p > 0:
+            model.set_initial_parameter_values(LIBRARY_MODELS[name]['p0'])
+    return model
+
+
+def simulation_args(name, steps=1):
+    """
+
+    :param name:
+    :param steps:
+    :return:
+    """
+    args = {'steps': steps}
+    if LIBRARY_MODELS[name]['u0']:
+        args['u'] = LIBRARY_MODELS[name]['u0']
+    if LIBRARY_MODELS[name]['p0']:
+        args['p'] = LIBRARY_MODELS[name]['p0']
+    return args
+
+
+def double_integrator(dt=.5):
+    """
+
+    :param dt:
+    :return:
+    """
+    model = Model(plot_backend='bokeh', discrete=True)
+    model.A = np.array([[1, model.dt], [0, 1]])
+    model.B = np.array([[model.dt ** 2 / 2], [model.dt]])
+    model.setup(dt=dt)
+    model.set_initial_conditions(x0=[1., 1.])
+    return model
+
+
+def linear_two_tank(dt=1.):
+    """
+
+    :param dt:
+    :return:
+    """
+    model = Model(plot_backend='bokeh')
+    equations = """
+    dx_1/dt = -k_1*x_1(t) + u(k)
+    dx_2/dt = k_1*x_1(t) - k_2*x_2(t)
+    y(k) = x_2(t)
+    """
+    model.set_equations(equations=equations)
+    model.setup(dt=dt)
+    model.set_initial_conditions([.8, 0.])
+    model.set_initial_parameter_values([.5, .4])
+    return model
+
+
+def growth_model(dt=1.):
+    """
+
+    :param dt:
+    :return:
+    """
+    model = Model(plot_backend='bokeh', discrete=True)
+    model.set_dynamical_states('x')
+    model.set_measurements('y')
+    model.set_dynamical_equations('x/2 + 25*dt*x/(1 + x^2)')
+    model.set_measurement_equations('x^2/20')
+    model.setup(dt=dt)
+    model.set_initial_conditions(x0=.1)
+    return model
+
+
+def nonlinear_two_tank(dt=1.):
+    """
+
+    :param dt:
+    :return:
+    """
+    model = Model(plot_backend='bokeh')
+    equations = """
+    dx_1/dt = -.5*sqrt(x_1(t)) + u(k)
+    dx_2/dt = .5*sqrt(x_1(t)) - .4*sqrt(x_2(t))
+    y(k) = x_2(t)
+    """
+    model.set_equations(equations=equations)
+    model.setup(dt=dt)
+    model.set_initial_conditions([10., 10.])
+    return model
+
+
+def training_data(n_samples, seed=0):
+    """
+
+    :param n_samples:
+    :param seed:
+    :return:
+    """
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(-2., 2., size=(1, n_samples))
+    y = np.sin(2. * X) + .1 * rng.standard_normal((1, n_samples))
+    return X, y
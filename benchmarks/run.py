@@ -0,0 +1,270 @@
+"""
+Minimal runner for the benchmark suite
+
+The benchmarks follow the conventions of airspeed velocity (asv), i.e. every class in a module named ``bench_*.py``
+defines ``params``/``param_names`` and a ``setup`` method, and every method starting with ``time_``, ``peakmem_`` or
+``track_`` is a benchmark. They can be run with asv (see asv.conf.json in the root directory) or without any additional
+dependencies by this runner::
+
+    python -m benchmarks.run                                   # run everything
+    python -m benchmarks.run -k NMPC -k rk4                    # only benchmarks matching all patterns
+    python -m benchmarks.run --save-baseline baseline.json     # store results as new baseline
+    python -m benchmarks.run --baseline baseline.json          # compare against stored baseline
+
+Timings are given in seconds (minimum over all repeats), memory in MiB (peak resident set size of a separate process
+running the benchmark including its setup, and peak of Python-level allocations measured by tracemalloc).
+
+Timings depend on the machine, so no baseline is part of the repository. To check a change for regressions, store a
+baseline on the commit the change is based on and compare against it on the same machine::
+
+    git stash && python -m benchmarks.run --save-baseline .benchmarks/baseline.json && git stash pop
+    python -m benchmarks.run --baseline .benchmarks/baseline.json
+
+If the baseline file doesn't exist, the comparison is skipped.
+"""
+
+import argparse
+import importlib
+import inspect
+import itertools
+import json
+import multiprocessing
+import pathlib
+import platform
+import queue as queue_module
+import statistics
+import sys
+import time
+import tracemalloc
+
+
+PREFIXES = ('time_', 'peakmem_', 'track_')
+
+
+def _normalize_params(cls):
+    """
+
+    :param cls:
+    :return:
+    """
+    params = getattr(cls, 'params', [])
+    param_names = getattr(cls, 'param_names', [])
+    if not param_names:
+        return [], [()]
+    if len(param_names) == 1:
+        params = [params]
+    return list(param_names), list(itertools.product(*params))
+
+
+def discover(patterns=None):
+    """
+
+    :param patterns:
+    :return:
+    """
+    if patterns is None:
+        patterns = []
+
+    directory = pathlib.Path(__file__).parent
+    benchmarks = []
+    for path in sorted(directory.glob('bench_*.py')):
+        module = importlib.import_module(f'{__package__}.{path.stem}')
+        for cls_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            param_names, combinations = _normalize_params(cls)
+            for method in sorted(name for name in vars(cls) if name.startswith(PREFIXES)):
+                for combination in combinations:
+                    arguments = ', '.join(f'{k}={v}' for k, v in zip(param_names, combination))
+                    key = f'{path.stem}.{cls_name}.{method}({arguments})'
+                    if all(pattern in key for pattern in patterns):
+                        benchmarks.append((key, module.__name__, cls_name, method, combination))
+    return benchmarks
+
+
+def _instantiate(module_name, cls_name, params):
+    """
+
+    :param module_name:
+    :param cls_name:
+    :param params:
+    :return:
+    """
+    cls = getattr(importlib.import_module(module_name), cls_name)
+    obj = cls()
+    if hasattr(obj, 'setup'):
+        obj.setup(*params)
+    return obj
+
+
+def _peakmem_worker(module_name, cls_name, method, params, queue):
+    """
+
+    :param module_name:
+    :param cls_name:
+    :param method:
+    :param params:
+    :param queue:
+    :return:
+    """
+    import resource
+
+    try:
+        obj = _instantiate(module_name, cls_name, params)
+        tracemalloc.start()
+        getattr(obj, method)(*params)
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    except Exception as e:
+        queue.put(e)
+        return
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # NOTE: ru_maxrss is given in kilobytes on Linux and in bytes on macOS
+    if platform.system() != 'Darwin':
+        max_rss *= 1024
+    queue.put((max_rss / 2 ** 20, python_peak / 2 ** 20))
+
+
+def run_benchmark(module_name, cls_name, method, params, repeat=3):
+    """
+
+    :param module_name:
+    :param cls_name:
+    :param method:
+    :param params:
+    :param repeat:
+    :return:
+    """
+    if method.startswith('time_'):
+        samples = []
+        for _ in range(repeat):
+            obj = _instantiate(module_name, cls_name, params)
+            start = time.perf_counter()
+            getattr(obj, method)(*params)
+            samples.append(time.perf_counter() - start)
+        return {'value': min(samples), 'median': statistics.median(samples), 'unit': 's'}
+    elif method.startswith('peakmem_'):
+        if platform.system() == 'Windows':
+            # NOTE: The resource module is not available on Windows, so we fall back to tracemalloc in this process
+            obj = _instantiate(module_name, cls_name, params)
+            tracemalloc.start()
+            getattr(obj, method)(*params)
+            _, python_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return {'value': python_peak / 2 ** 20, 'unit': 'MiB'}
+        context = multiprocessing.get_context('spawn')
+        queue = context.Queue()
+        process = context.Process(target=_peakmem_worker, args=(module_name, cls_name, method, params, queue))
+        process.start()
+        # NOTE: If the worker dies without putting a result on the queue (e.g. killed by the OOM killer or a crash in
+        #  native code), a blocking get would never return, so we poll the queue while the worker is alive.
+        while True:
+            try:
+                result = queue.get(timeout=1.)
+                break
+            except queue_module.Empty:
+                if not process.is_alive():
+                    try:
+                        result = queue.get(timeout=1.)
+                        break
+                    except queue_module.Empty:
+                        raise RuntimeError(f"Benchmark process exited with code {process.exitcode} without a "
+                                           f"result") from None
+        process.join()
+        if isinstance(result, Exception):
+            raise result
+        max_rss, python_peak = result
+        return {'value': max_rss, 'python': python_peak, 'unit': 'MiB'}
+    else:
+        obj = _instantiate(module_name, cls_name, params)
+        return {'value': getattr(obj, method)(*params), 'unit': ''}
+
+
+def compare(results, baseline, factor=1.1):
+    """
+
+    :param results:
+    :param baseline:
+    :param factor:
+    :return:
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline or result.get('value') is None or baseline[key].get('value') in (None, 0):
+            continue
+        if result['unit'] not in ('s', 'MiB'):
+            continue
+        ratio = result['value'] / baseline[key]['value']
+        result['ratio'] = ratio
+        if ratio > factor:
+            regressions.append((key, baseline[key]['value'], result['value'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    """
+
+    :param argv:
+    :return:
+    """
+    parser = argparse.ArgumentParser(description="Run the HILO-MPC benchmark suite")
+    parser.add_argument('-k', dest='patterns', action='append', default=[],
+                        help="only run benchmarks whose name contains the pattern (can be given multiple times)")
+    parser.add_argument('--repeat', type=int, default=3, help="number of repeats for timing benchmarks")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="compare results against this JSON file")
+    parser.add_argument('--save-baseline', help="write results to this JSON file to be used as baseline later on")
+    parser.add_argument('--factor', type=float, default=1.1,
+                        help="ratio to the baseline above which a result is reported as regression")
+    parser.add_argument('--list', action='store_true', help="only list the benchmarks")
+    args = parser.parse_args(argv)
+
+    benchmarks = discover(args.patterns)
+    if args.list:
+        for key, *_ in benchmarks:
+            print(key)
+        return 0
+
+    results = {}
+    for key, module_name, cls_name, method, params in benchmarks:
+        try:
+            result = run_benchmark(module_name, cls_name, method, params, repeat=args.repeat)
+        except Exception as e:
+            result = {'value': None, 'unit': '', 'error': f"{type(e).__name__}: {e}"}
+        results[key] = result
+        if result['value'] is None:
+            print(f"{key:<100} failed ({result.get('error', '')})")
+        else:
+            print(f"{key:<100} {result['value']:12.6g} {result['unit']}")
+
+    meta = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'date': time.strftime('%Y-%m-%d %H:%M:%S')
+    }
+    for path in (args.output, args.save_baseline):
+        if path is not None:
+            pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump({'meta': meta, 'results': results}, f, indent=2)
+
+    if args.baseline is not None:
+        if not pathlib.Path(args.baseline).is_file():
+            print(f"\nBaseline '{args.baseline}' not found, skipping the comparison. It can be created with "
+                  f"--save-baseline.")
+            return 0
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, factor=args.factor)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than a factor of {args.factor}:")
+            for key, old, new, ratio in regressions:
+                print(f"{key:<100} {old:12.6g} -> {new:12.6g} ({ratio:.2f}x)")
+            return 1
+        print(f"\nNo regressions compared to '{args.baseline}'.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -21,88 +21,106 @@
 #   along with HILO-MPC. If not, see <http://www.gnu.org/licenses/>.
 #
 
-import hilo_mpc.modules.dynamic_model.dynamic_model as dyn_mod
-import hilo_mpc.modules.controller.mpc as mpc
-import hilo_mpc.modules.controller.ocp as ocp
-import hilo_mpc.modules.controller.lqr as lqr
-import hilo_mpc.modules.controller.pid as pid
-import hilo_mpc.modules.estimator.mhe as mhe
-import hilo_mpc.modules.estimator.kf as kf
-import hilo_mpc.modules.estimator.pf as pf
-import hilo_mpc.modules.machine_learning.nn.layer as layer
-import hilo_mpc.modules.machine_learning.nn.nn as nn
-import hilo_mpc.modules.machine_learning.gp.mean as mean
-import hilo_mpc.modules.machine_learning.gp.kernel as kernel
-import hilo_mpc.modules.machine_learning.gp.gp as gp
-import hilo_mpc.modules.control_loop as cl
-import hilo_mpc.modules.optimizer as opti
-import hilo_mpc.util.plotting as plotting
-import hilo_mpc.util.session as session
+import importlib
 
 
-Model = dyn_mod.Model
-NMPC = mpc.NMPC
-LMPC = mpc.LMPC
-OptimalControlProblem = ocp.OptimalControlProblem
-OCP = OptimalControlProblem
-LinearQuadraticRegulator = lqr.LinearQuadraticRegulator
-LQR = LinearQuadraticRegulator
-PID = pid.PID
-MovingHorizonEstimator = mhe.MovingHorizonEstimator
-MHE = MovingHorizonEstimator
-KalmanFilter = kf.KalmanFilter
-KF = KalmanFilter
-ExtendedKalmanFilter = kf.ExtendedKalmanFilter
-EKF = ExtendedKalmanFilter
-UnscentedKalmanFilter = kf.UnscentedKalmanFilter
-UKF = UnscentedKalmanFilter
-ParticleFilter = pf.ParticleFilter
-PF = ParticleFilter
-Layer = layer.Layer
-Dense = layer.Dense
-Dropout = layer.Dropout
-ArtificialNeuralNetwork = nn.ArtificialNeuralNetwork
-ANN = ArtificialNeuralNetwork
-Mean = mean.Mean
-ConstantMean = mean.ConstantMean
-ZeroMean = mean.ZeroMean
-OneMean = mean.OneMean
-PolynomialMean = mean.PolynomialMean
-LinearMean = mean.LinearMean
-Kernel = kernel.Kernel
-ConstantKernel = kernel.ConstantKernel
-SquaredExponentialKernel = kernel.SquaredExponentialKernel
-MaternKernel = kernel.MaternKernel
-ExponentialKernel = kernel.ExponentialKernel
-Matern32Kernel = kernel.Matern32Kernel
-Matern52Kernel = kernel.Matern52Kernel
-RationalQuadraticKernel = kernel.RationalQuadraticKernel
-PiecewisePolynomialKernel = kernel.PiecewisePolynomialKernel
-DotProductKernel = kernel.DotProductKernel
-PolynomialKernel = kernel.PolynomialKernel
-LinearKernel = kernel.LinearKernel
-NeuralNetworkKernel = kernel.NeuralNetworkKernel
-PeriodicKernel = kernel.PeriodicKernel
-GaussianProcess = gp.GaussianProcess
-GP = GaussianProcess
-GPArray = gp.GPArray
-SimpleControlLoop = cl.SimpleControlLoop
-LinearProgram = opti.LinearProgram
-LP = LinearProgram
-QuadraticProgram = opti.QuadraticProgram
-QP = QuadraticProgram
-NonlinearProgram = opti.NonlinearProgram
-NLP = NonlinearProgram
-Session = session.Session
+# NOTE: The public classes and functions are resolved lazily on first access (PEP 562), so that 'import hilo_mpc' does
+#  not import every submodule (and their dependencies like SciPy) if e.g. only the Model class is needed. For the same
+#  reason, the submodules of SciPy that are expensive to import (e.g. scipy.stats, scipy.optimize, scipy.sparse) are
+#  imported inside the functions using them.
+_LAZY_ATTRIBUTES = {
+    'Model': ('hilo_mpc.modules.dynamic_model.dynamic_model', 'Model'),
+    'NMPC': ('hilo_mpc.modules.controller.mpc', 'NMPC'),
+    'LMPC': ('hilo_mpc.modules.controller.mpc', 'LMPC'),
+    'ApproximateMPC': ('hilo_mpc.modules.controller.approximate_mpc', 'ApproximateMPC'),
+    'OptimalControlProblem': ('hilo_mpc.modules.controller.ocp', 'OptimalControlProblem'),
+    'OCP': ('hilo_mpc.modules.controller.ocp', 'OptimalControlProblem'),
+    'LinearQuadraticRegulator': ('hilo_mpc.modules.controller.lqr', 'LinearQuadraticRegulator'),
+    'LQR': ('hilo_mpc.modules.controller.lqr', 'LinearQuadraticRegulator'),
+    'PID': ('hilo_mpc.modules.controller.pid', 'PID'),
+    'MovingHorizonEstimator': ('hilo_mpc.modules.estimator.mhe', 'MovingHorizonEstimator'),
+    'MHE': ('hilo_mpc.modules.estimator.mhe', 'MovingHorizonEstimator'),
+    'KalmanFilter': ('hilo_mpc.modules.estimator.kf', 'KalmanFilter'),
+    'KF': ('hilo_mpc.modules.estimator.kf', 'KalmanFilter'),
+    'ExtendedKalmanFilter': ('hilo_mpc.modules.estimator.kf', 'ExtendedKalmanFilter'),
+    'EKF': ('hilo_mpc.modules.estimator.kf', 'ExtendedKalmanFilter'),
+    'UnscentedKalmanFilter': ('hilo_mpc.modules.estimator.kf', 'UnscentedKalmanFilter'),
+    'UKF': ('hilo_mpc.modules.estimator.kf', 'UnscentedKalmanFilter'),
+    'ParticleFilter': ('hilo_mpc.modules.estimator.pf', 'ParticleFilter'),
+    'PF': ('hilo_mpc.modules.estimator.pf', 'ParticleFilter'),
+    'EnsembleKalmanFilter': ('hilo_mpc.modules.estimator.enkf', 'EnsembleKalmanFilter'),
+    'EnKF': ('hilo_mpc.modules.estimator.enkf', 'EnsembleKalmanFilter'),
+    'Layer': ('hilo_mpc.modules.machine_learning.nn.layer', 'Layer'),
+    'Dense': ('hilo_mpc.modules.machine_learning.nn.layer', 'Dense'),
+    'Dropout': ('hilo_mpc.modules.machine_learning.nn.layer', 'Dropout'),
+    'ArtificialNeuralNetwork': ('hilo_mpc.modules.machine_learning.nn.nn', 'ArtificialNeuralNetwork'),
+    'ANN': ('hilo_mpc.modules.machine_learning.nn.nn', 'ArtificialNeuralNetwork'),
+    'Mean': ('hilo_mpc.modules.machine_learning.gp.mean', 'Mean'),
+    'ConstantMean': ('hilo_mpc.modules.machine_learning.gp.mean', 'ConstantMean'),
+    'ZeroMean': ('hilo_mpc.modules.machine_learning.gp.mean', 'ZeroMean'),
+    'OneMean': ('hilo_mpc.modules.machine_learning.gp.mean', 'OneMean'),
+    'PolynomialMean': ('hilo_mpc.modules.machine_learning.gp.mean', 'PolynomialMean'),
+    'LinearMean': ('hilo_mpc.modules.machine_learning.gp.mean', 'LinearMean'),
+    'Kernel': ('hilo_mpc.modules.machine_learning.gp.kernel', 'Kernel'),
+    'ConstantKernel': ('hilo_mpc.modules.machine_learning.gp.kernel', 'ConstantKernel'),
+    'SquaredExponentialKernel': ('hilo_mpc.modules.machine_learning.gp.kernel', 'SquaredExponentialKernel'),
+    'MaternKernel': ('hilo_mpc.modules.machine_learning.gp.kernel', 'MaternKernel'),
+    'ExponentialKernel': ('hilo_mpc.modules.machine_learning.gp.kernel', 'ExponentialKernel'),
+    'Matern32Kernel': ('hilo_mpc.modules.machine_learning.gp.kernel', 'Matern32Kernel'),
+    'Matern52Kernel': ('hilo_mpc.modules.machine_learning.gp.kernel', 'Matern52Kernel'),
+    'RationalQuadraticKernel': ('hilo_mpc.modules.machine_learning.gp.kernel', 'RationalQuadraticKernel'),
+    'PiecewisePolynomialKernel': ('hilo_mpc.modules.machine_learning.gp.kernel', 'PiecewisePolynomialKernel'),
+    'DotProductKernel': ('hilo_mpc.modules.machine_learning.gp.kernel', 'DotProductKernel'),
+    'PolynomialKernel': ('hilo_mpc.modules.machine_learning.gp.kernel', 'PolynomialKernel'),
+    'LinearKernel': ('hilo_mpc.modules.machine_learning.gp.kernel', 'LinearKernel'),
+    'NeuralNetworkKernel': ('hilo_mpc.modules.machine_learning.gp.kernel', 'NeuralNetworkKernel'),
+    'PeriodicKernel': ('hilo_mpc.modules.machine_learning.gp.kernel', 'PeriodicKernel'),
+    'GaussianProcess': ('hilo_mpc.modules.machine_learning.gp.gp', 'GaussianProcess'),
+    'GP': ('hilo_mpc.modules.machine_learning.gp.gp', 'GaussianProcess'),
+    'GPArray': ('hilo_mpc.modules.machine_learning.gp.gp', 'GPArray'),
+    'SimpleControlLoop': ('hilo_mpc.modules.control_loop', 'SimpleControlLoop'),
+    'LinearProgram': ('hilo_mpc.modules.optimizer', 'LinearProgram'),
+    'LP': ('hilo_mpc.modules.optimizer', 'LinearProgram'),
+    'QuadraticProgram': ('hilo_mpc.modules.optimizer', 'QuadraticProgram'),
+    'QP': ('hilo_mpc.modules.optimizer', 'QuadraticProgram'),
+    'NonlinearProgram': ('hilo_mpc.modules.optimizer', 'NonlinearProgram'),
+    'NLP': ('hilo_mpc.modules.optimizer', 'NonlinearProgram'),
+    'Session': ('hilo_mpc.util.session', 'Session'),
+    'SeriesWriter': ('hilo_mpc.util.io', 'SeriesWriter'),
+    'SeriesReader': ('hilo_mpc.util.io', 'SeriesReader'),
+    'get_plot_backend': ('hilo_mpc.util.plotting', 'get_plot_backend'),
+    'set_plot_backend': ('hilo_mpc.util.plotting', 'set_plot_backend')
+}
 
-get_plot_backend = plotting.get_plot_backend
-set_plot_backend = plotting.set_plot_backend
+
+def __getattr__(name):
+    """
+
+    :param name:
+    :return:
+    """
+    if name in _LAZY_ATTRIBUTES:
+        module, attribute = _LAZY_ATTRIBUTES[name]
+        value = getattr(importlib.import_module(module), attribute)
+        # Cache the value, so that __getattr__ is only called once per name
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def __dir__():
+    """
+
+    :return:
+    """
+    return sorted(set(globals()) | set(__all__))
 
 
 __all__ = [
     'Model',
     'NMPC',
     'LMPC',
+    'ApproximateMPC',
     'OptimalControlProblem',
     'OCP',
     'LinearQuadraticRegulator',
@@ -118,6 +136,8 @@ __all__ = [
     'UKF',
     'ParticleFilter',
     'PF',
+    'EnsembleKalmanFilter',
+    'EnKF',
     'Layer',
     'Dense',
     'Dropout',
@@ -154,6 +174,8 @@ __all__ = [
     'NonlinearProgram',
     'NLP',
     'Session',
+    'SeriesWriter',
+    'SeriesReader',
     'get_plot_backend',
     'set_plot_backend'
 ]
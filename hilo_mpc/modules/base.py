@@ -26,6 +26,8 @@ from __future__ import annotations
 from abc import ABCMeta, abstractmethod
 from collections.abc import KeysView
 from copy import copy
+from dataclasses import dataclass
+from functools import lru_cache
 import platform
 from typing import Any, Optional, Sequence, Union
 import warnings
@@ -35,10 +37,10 @@ import numpy as np
 
 from .object import Object
 from ..plugins.plugins import PlotManager
-from ..util.io import save_mat
+from ..util.io import SeriesWriter, load_object, save_mat, save_object
 from ..util.plotting import get_plot_backend
-from ..util.util import setup_warning, check_compiler, check_if_list_of_type, convert, dump_clean, is_list_like,\
-    lower_case, who_am_i, _split_expression, AOT, JIT
+from ..util.util import setup_warning, check_compiler, check_if_list_of_type, convert, dump_clean, generate_c_code, \
+    is_list_like, lower_case, who_am_i, _split_expression, AOT, JIT
 
 if platform.system() == 'Linux':
     from hilo_mpc.util.unix import compile_so
@@ -94,6 +96,38 @@ class Base(Object):
         args += f", display={self._display}"
         return f"{self.__class__.__name__}({args})"
 
+    def save(self, path_to_file: str) -> None:
+        """
+        Saves the object to a file
+
+        All CasADi objects that were generated during the setup (e.g. integrators and NLP solvers) are saved as well, so
+        that the object restored by :meth:`load` can be used without running the setup again.
+
+        :param path_to_file: Path to the file
+        :type path_to_file: str
+        :return:
+        """
+        if self._c_name is not None and self._compiler_opts.get('method') in JIT and \
+                self._compiler_opts.get('compiler') == 'shell':
+            # NOTE: CasADi cannot deserialize functions that were compiled by the shell compiler
+            raise RuntimeError(f"{self.__class__.__name__} was compiled just-in-time and cannot be saved. Use "
+                               f"ahead-of-time compilation instead.")
+        save_object(path_to_file, self)
+
+    @classmethod
+    def load(cls, path_to_file: str):
+        """
+        Loads an object that was saved with :meth:`save`
+
+        The object is only restored if it was saved with the same versions of HILO-MPC and CasADi. Since the file is
+        unpickled, only load files from trusted sources.
+
+        :param path_to_file: Path to the file
+        :type path_to_file: str
+        :return: The restored object
+        """
+        return load_object(path_to_file, cls=cls)
+
     @setup_warning
     def _set(self, attr, args, **kwargs):
         """
@@ -283,7 +317,7 @@ class Base(Object):
         old_method = method
         old_compiler = compiler
         method, compiler, extra = check_compiler(method, compiler)
-        if method != self._compiler_opts['method'] or compiler != self._compiler_opts['compiler']:
+        if method != self._compiler_opts.get('method') or compiler != self._compiler_opts.get('compiler'):
             if method is not None and compiler is not None:
                 self._compiler_opts['method'] = method
                 self._compiler_opts['compiler'] = compiler
@@ -317,15 +351,18 @@ class Base(Object):
                 msg = f"Instance {self.__class__.__name__} has the following free variables/parameters: {free_vars}"
                 raise RuntimeError(msg)
 
-    def setup(self, **kwargs):
+    def _compile(self):
         """
+        Compiles the generated C code according to the compiler options
+
+        Depending on the compilation method, either a :class:`casadi.Importer` (just-in-time compilation) or the path
+        to the compiled library (ahead-of-time compilation) is returned, that can be passed to :func:`casadi.external`
+        or :func:`casadi.nlpsol`. If the code could not be compiled, None is returned.
 
-        :param kwargs:
         :return:
         """
-        # TODO: Typing hints
-        # TODO: Support for user-defined output
-        if self._compiler_opts['method'] in JIT:
+        method = self._compiler_opts.get('method')
+        if method in JIT:
             importer_opts = {}
             if self._compiler_opts['compiler'] == 'shell':
                 path = self._compiler_opts.pop('path')
@@ -333,7 +370,15 @@ class Base(Object):
                 # Cleanup set to false, to prevent warning messages that temporary files are not found. Since closing
                 # the session will remove the temporary path, CasADi cannot find the temporary files anymore.
                 importer_opts['cleanup'] = False
-                importer_opts['name'] = path + 'tmp_casadi_compiler_shell'
+                # NOTE: The name of the generated file is part of the name of the library, so that objects sharing the
+                #  same path do not overwrite each others libraries
+                name = 'tmp_casadi_compiler_shell_' + self._c_name.replace('\\', '/').rsplit('/', 1)[-1].rsplit('.', 1)[0]
+                # NOTE: Since CasADi 3.6 the directory of the temporary files is set separately
+                if tuple(int(k) for k in ca.__version__.split('.')[:2]) >= (3, 6):
+                    importer_opts['directory'] = path
+                    importer_opts['name'] = name
+                else:
+                    importer_opts['name'] = path + name
                 if platform.system() == 'Windows':
                     vcvars = self._compiler_opts.get('extra', None)
                     if vcvars is not None:
@@ -344,20 +389,58 @@ class Base(Object):
                     else:
                         warnings.warn("Could not find a compiler. Make sure Microsoft Visual Studio is installed "
                                       "(other compilers are not yet supported).")
-                        return
-            C = ca.Importer(self._c_name, self._compiler_opts['compiler'], importer_opts)
-            self._function = ca.external(self._function, C)
-        elif self._compiler_opts['method'] in AOT:
+                        return None
+            return ca.Importer(self._c_name, self._compiler_opts['compiler'], importer_opts)
+        elif method in AOT:
             if platform.system() == 'Linux':
                 library = compile_so(self._c_name, self._compiler_opts['compiler'])
             elif platform.system() == 'Windows':
                 library = compile_dll(self._c_name)
             else:
                 library = None
-            if library is not None:
-                self._function = ca.external(self._function, library)
+            return library
+        elif method is None:
+            warnings.warn("No compiler available for C/C++ code generation. Please set a compiler via the method "
+                          "'set_compiler'.")
         else:
             warnings.warn("Unknown method for C/C++ code generation")
+        return None
+
+    def _generate_function(self, function: ca.Function, **kwargs) -> ca.Function:
+        """
+        Generates and compiles C code for the given function, if the keyword argument 'c_code' is set to True
+
+        The same keyword arguments as for the setup of the :class:`Model <hilo_mpc.Model>` are supported, i.e.
+        'c_code', 'generator', 'gen_path', 'gen_name', 'gen_opts' and 'session'. If no C code is generated, the function
+        is returned unchanged.
+
+        :param function:
+        :param kwargs:
+        :return:
+        """
+        use_c_code = kwargs.get('c_code', False)
+        if use_c_code:
+            gen_path, gen_name, gen_opts = self._generator(**kwargs)
+            if gen_path is not None:
+                self._c_name = generate_c_code(function, gen_path, gen_name, opts=gen_opts)
+                if self._compiler_opts.get('method') in JIT and self._compiler_opts['compiler'] == 'shell':
+                    self._compiler_opts['path'] = gen_path
+                library = self._compile()
+                if library is not None:
+                    return ca.external(function.name(), library)
+        return function
+
+    def setup(self, **kwargs):
+        """
+
+        :param kwargs:
+        :return:
+        """
+        # TODO: Typing hints
+        # TODO: Support for user-defined output
+        library = self._compile()
+        if library is not None:
+            self._function = ca.external(self._function, library)
 
     def is_setup(self) -> bool:
         """
@@ -608,11 +691,12 @@ class Vector(Container):
         """Constructor method"""
         super().__init__(data_format, values=values_or_names, shape=shape, id=id, name=name, parent=parent)
 
+        self._name_index = None
         if self._fx is ca.DM:
             if isinstance(values_or_names, str):
                 self._names = [values_or_names]
             elif isinstance(values_or_names, (list, tuple)):
-                self._names = values_or_names
+                self._names = list(values_or_names)
             else:
                 raise TypeError(f"Wrong type {type(values_or_names)} for argument 'values_or_names'")
         else:
@@ -660,6 +744,7 @@ class Vector(Container):
         """Item deletion method"""
         super().__delitem__(key)
         self._update_names()
+        self._name_index = None
         if isinstance(key, (list, tuple)):
             for k in reversed(key):
                 if self._axis == 0:
@@ -688,17 +773,32 @@ class Vector(Container):
             else:
                 return self.__contains__(item.elements())
         elif isinstance(item, str):
-            if item in self._names:
+            if item in self._get_name_index():
                 return True
         elif isinstance(item, (list, tuple)):
             return all(self.__contains__(k) for k in item)
         return False
 
+    def _get_name_index(self):
+        """
+
+        :return:
+        """
+        # NOTE: Maps every name to the list of rows with that name, so that look-ups by name don't need to scan the
+        #  names. The index is rebuilt lazily after the names were changed.
+        if self._name_index is None:
+            name_index = {}
+            for k, name in enumerate(self._names):
+                name_index.setdefault(name, []).append(k)
+            self._name_index = name_index
+        return self._name_index
+
     def _update_names(self):
         """
 
         :return:
         """
+        self._name_index = None
         if self._fx is ca.SX:
             self._names = [val.name() for val in self._values.elements()]
         elif self._fx is ca.MX:
@@ -989,10 +1089,11 @@ class Vector(Container):
         :param names:
         :return:
         """
+        name_index = self._get_name_index()
         if isinstance(names, str):
-            return [k for k, v in enumerate(self._names) if v == names]
+            return list(name_index.get(names, []))
         elif isinstance(names, (list, tuple, KeysView)):
-            return [self._names.index(name) for name in names if name in self._names]
+            return [name_index[name][0] for name in names if name in name_index]
         else:
             raise TypeError(f"Wrong type {type(names)} for argument 'names'")
 
@@ -2154,6 +2255,57 @@ class Problem(Equations):
         return solver
 
 
+@dataclass(frozen=True)
+class SeriesKey:
+    """
+    Pre-parsed key of a :class:`Series` object
+
+    Keys like 'x:f' or 'u_ref' can be parsed once via :meth:`Series.get_key` and the returned object can then be used
+    instead of the string in :meth:`Series.get_by_id`, which avoids parsing the string again in every call.
+
+    :param id: identifier of the data, e.g. 'x' or 'u'
+    :type id: str
+    :param appendage: '0' for the initial value, 'f' for the final value or an empty string for all values
+    :type appendage: str
+    :param container: 'ref', 'lb', 'ub', 'noise', 'noisy' (or their long forms) or an empty string for the data itself
+    :type container: str
+    """
+    id: str
+    appendage: str = ''
+    container: str = ''
+
+
+@lru_cache(maxsize=1024)
+def _parse_series_key(arg: str) -> SeriesKey:
+    """
+
+    :param arg:
+    :return:
+    """
+    arg = arg.split(':')
+    if len(arg) == 1:
+        bc = ''
+    elif len(arg) == 2:
+        bc = arg[1]
+        if bc not in ['0', 'f']:
+            raise ValueError(f"Unsupported appendage '{bc}'. Use '0' to indicate initial values and 'f' to indicate"
+                             f" final values.")
+    else:
+        raise ValueError(f"Unsupported key {'_'.join(arg)}")
+    arg = arg[0]
+
+    arg = arg.rsplit('_')
+    if len(arg) == 1:
+        index = ''
+    elif len(arg) == 2:
+        index = arg[1]
+    else:
+        raise ValueError(f"Unsupported key {'_'.join(arg)}")
+    arg = arg[0]
+
+    return SeriesKey(arg, bc, index)
+
+
 class Series(Object, metaclass=ABCMeta):
     """"""
     # TODO: Typing hints
@@ -2190,6 +2342,7 @@ class Series(Object, metaclass=ABCMeta):
             self._create_id()
 
         self._names = []
+        self._name_index = {}
         self._abscissa = None
 
         self._n_samples = 0
@@ -2202,10 +2355,11 @@ class Series(Object, metaclass=ABCMeta):
         self._upper_bound = {}
         self._noise = {}
         self._names = []
+        self._name_index = {}
 
     def __getitem__(self, item: str):
         """Item getter method"""
-        if item in self._names:
+        if item in self._name_index:
             return self._get_by_name(item)
         else:
             return self.get_by_id(item)
@@ -2423,32 +2577,15 @@ class Series(Object, metaclass=ABCMeta):
 
         return new
 
-    def get_by_id(self, arg):
+    def get_by_id(self, arg: Union[str, SeriesKey]):
         """
 
         :param arg:
         :return:
         """
-        arg = arg.split(':')
-        if len(arg) == 1:
-            bc = ''
-        elif len(arg) == 2:
-            bc = arg[1]
-            if bc not in ['0', 'f']:
-                raise ValueError(f"Unsupported appendage '{bc}'. Use '0' to indicate initial values and 'f' to indicate"
-                                 f" final values.")
-        else:
-            raise ValueError(f"Unsupported key {'_'.join(arg)}")
-        arg = arg[0]
-
-        arg = arg.rsplit('_')
-        if len(arg) == 1:
-            index = ''
-        elif len(arg) == 2:
-            index = arg[1]
-        else:
-            raise ValueError(f"Unsupported key {'_'.join(arg)}")
-        arg = arg[0]
+        if not isinstance(arg, SeriesKey):
+            arg = _parse_series_key(arg)
+        arg, bc, index = arg.id, arg.appendage, arg.container
 
         if bc == '0' and arg in self._data and not index:
             return self._data[arg][:, 0]
@@ -2494,20 +2631,18 @@ class Series(Object, metaclass=ABCMeta):
         else:
             container = None
 
-        if container is None or container == 'noisy':
-            for value in self._data.values():
-                if arg in value:
-                    if not value.is_empty():
-                        if k is None:
-                            k = slice(0, value.shape[1])
-                        index = value.index(arg)
-                        if container == 'noisy':
-                            id_ = self.get_id(arg)
-                            return value[index, k] + self._noise[id_][index, k]
-                        else:
-                            return value[index, k]
-                    else:
-                        return value.values
+        if (container is None or container == 'noisy') and arg in self._name_index:
+            id_, index = self._name_index[arg]
+            value = self._data[id_]
+            if not value.is_empty():
+                if k is None:
+                    k = slice(0, value.shape[1])
+                if container == 'noisy':
+                    return value[index, k] + self._noise[id_][index, k]
+                else:
+                    return value[index, k]
+            else:
+                return value.values
         return None
 
     def get_by_name(self, *args: Sequence[str]) -> Optional[Union[ca.DM, list[Optional[ca.DM]]]]:
@@ -2526,9 +2661,18 @@ class Series(Object, metaclass=ABCMeta):
         :param name:
         :return:
         """
-        for key, value in self._data.items():
-            if name in value:
-                return key
+        if name in self._name_index:
+            return self._name_index[name][0]
+
+    @staticmethod
+    def get_key(arg: str) -> SeriesKey:
+        """
+        Parse a key like 'x:f' or 'u_ref' once, so that it can be reused in repeated calls to :meth:`get_by_id`
+
+        :param arg:
+        :return:
+        """
+        return _parse_series_key(arg)
 
     def get_ref_by_name(self, name):
         """
@@ -2537,15 +2681,15 @@ class Series(Object, metaclass=ABCMeta):
         :return:
         """
         # TODO: Update according to get_by_name()?
-        for value in self._reference.values():
-            if name in value:
-                if not value.is_empty():
-                    index = value.index(name)
-                    val = value[index, :]
-                    if not np.isnan(val).all():
-                        return val
-                else:
-                    return value.values
+        if name in self._name_index:
+            id_, index = self._name_index[name]
+            value = self._reference[id_]
+            if not value.is_empty():
+                val = value[index, :]
+                if not np.isnan(val).all():
+                    return val
+            else:
+                return value.values
         return None
 
     def get_lb_by_name(self, name):
@@ -2555,15 +2699,15 @@ class Series(Object, metaclass=ABCMeta):
         :return:
         """
         # TODO: Update according to get_by_name()?
-        for value in self._lower_bound.values():
-            if name in value:
-                if not value.is_empty():
-                    index = value.index(name)
-                    val = value[index, :]
-                    if not np.isnan(val).all():
-                        return val
-                else:
-                    return value.values
+        if name in self._name_index:
+            id_, index = self._name_index[name]
+            value = self._lower_bound[id_]
+            if not value.is_empty():
+                val = value[index, :]
+                if not np.isnan(val).all():
+                    return val
+            else:
+                return value.values
         return None
 
     def get_ub_by_name(self, name):
@@ -2573,15 +2717,15 @@ class Series(Object, metaclass=ABCMeta):
         :return:
         """
         # TODO: Update according to get_by_name()?
-        for value in self._upper_bound.values():
-            if name in value:
-                if not value.is_empty():
-                    index = value.index(name)
-                    val = value[index, :]
-                    if not np.isnan(val).all():
-                        return val
-                else:
-                    return value.values
+        if name in self._name_index:
+            id_, index = self._name_index[name]
+            value = self._upper_bound[id_]
+            if not value.is_empty():
+                val = value[index, :]
+                if not np.isnan(val).all():
+                    return val
+            else:
+                return value.values
         return None
 
     def get_description(self, arg):
@@ -2590,12 +2734,10 @@ class Series(Object, metaclass=ABCMeta):
         :param arg:
         :return:
         """
-        if arg in self._names:
-            for value in self._data.values():
-                if arg in value:
-                    index = value.index(arg)
-                    # NOTE: index should always be a list of length 1
-                    return value.description[index[0]]
+        if arg in self._name_index:
+            id_, index = self._name_index[arg]
+            # NOTE: index should always be a list of length 1
+            return self._data[id_].description[index[0]]
         else:
             return self._data[arg].description
 
@@ -2640,12 +2782,10 @@ class Series(Object, metaclass=ABCMeta):
         :param arg:
         :return:
         """
-        if arg in self._names:
-            for value in self._data.values():
-                if arg in value:
-                    index = value.index(arg)
-                    # NOTE: index should always be a list of length 1
-                    return value.labels[index[0]]
+        if arg in self._name_index:
+            id_, index = self._name_index[arg]
+            # NOTE: index should always be a list of length 1
+            return self._data[id_].labels[index[0]]
         else:
             return self._data[arg].labels
 
@@ -2655,12 +2795,10 @@ class Series(Object, metaclass=ABCMeta):
         :param arg:
         :return:
         """
-        if arg in self._names:
-            for value in self._data.values():
-                if arg in value:
-                    index = value.index(arg)
-                    # NOTE: index should always be a list of length 1
-                    return value.units[index[0]]
+        if arg in self._name_index:
+            id_, index = self._name_index[arg]
+            # NOTE: index should always be a list of length 1
+            return self._data[id_].units[index[0]]
         else:
             return self._data[arg].units
 
@@ -3454,6 +3592,11 @@ class Series(Object, metaclass=ABCMeta):
                 self._upper_bound[arg] = Vector(**kwargs[arg], parent=self)
                 self._noise[arg] = Vector(**kwargs[arg], parent=self)
                 self._names.extend(self._data[arg].names)
+                for k, name in enumerate(self._data[arg].names):
+                    if name not in self._name_index:
+                        self._name_index[name] = (arg, [k])
+                    elif self._name_index[name][0] == arg:
+                        self._name_index[name][1].append(k)
 
     def to_dict(self, *args, **kwargs):
         """
@@ -3489,7 +3632,7 @@ class Series(Object, metaclass=ABCMeta):
             else:
                 container = ''
 
-            if arg in self._names:
+            if arg in self._name_index:
                 arg_data = self.get_by_name(arg + container).full()
                 if index is not None:
                     arg_data = arg_data[:, index]
@@ -3529,6 +3672,22 @@ class Series(Object, metaclass=ABCMeta):
         data = self.to_dict(*args, **kwargs)
         save_mat(file_name, data)
 
+    def to_file(self, *args, file_name='data', format='npy', **kwargs):
+        """
+        Saves the solution to columnar files, where every variable is stored separately. The entries to be saved can be
+        passed as arguments, e.g. model.solution.to_file('x', 'u', file_name='results/run', format='hdf5'). If no
+        entries are passed, all entries are saved. To append new samples during a run use
+        :class:`~hilo_mpc.SeriesWriter` directly.
+
+        :param args:
+        :param file_name:
+        :param format: One of 'npy', 'hdf5' or 'parquet'
+        :param kwargs: Additional keyword arguments of :class:`~hilo_mpc.SeriesWriter`
+        :return:
+        """
+        with SeriesWriter(file_name, format=format, **kwargs) as writer:
+            writer.write(self, *args)
+
     def update(self, **kwargs):
         """
 
@@ -0,0 +1,450 @@
+#   
+#   This file is part of HILO-MPC
+#
+#   HILO-MPC is a toolbox for easy, flexible and fast development of machine-learning-supported
+#   optimal control and estimation problems
+#
+#   Copyright (c) 2021 Johannes Pohlodek, Bruno Morabito, Rolf Findeisen
+#                      All rights reserved
+#
+#   HILO-MPC is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Lesser General Public License as
+#   published by the Free Software Foundation, either version 3
+#   of the License, or (at your option) any later version.
+#
+#   HILO-MPC is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public License
+#   along with HILO-MPC. If not, see <http://www.gnu.org/licenses/>.
+#
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+from typing import Any, Optional, Sequence, TypeVar, Union
+import warnings
+
+import casadi as ca
+import numpy as np
+
+from .base import Controller
+from .mpc import NMPC
+from ...util.data import ChunkedDataSet, DataSet
+from ...util.probability import lhs
+from ...util.util import check_and_wrap_to_DM
+
+
+Numeric = Union[int, float]
+NumArray = Union[Sequence[Numeric], np.ndarray]
+Data = TypeVar('Data', DataSet, ChunkedDataSet)
+
+
+# NOTE: Controller of the worker processes. It is inherited from the parent process when the worker is forked, so the
+#  NMPC (which contains CasADi functions and closures) doesn't need to be pickled.
+_WORKER_ARGUMENTS = None
+
+
+def _initialize_worker(*args) -> None:
+    """
+
+    :param args:
+    :return:
+    """
+    global _WORKER_ARGUMENTS
+    _WORKER_ARGUMENTS = args
+
+
+def _solve_worker(samples: np.ndarray) -> (np.ndarray, np.ndarray):
+    """
+
+    :param samples:
+    :return:
+    """
+    return _solve_samples(samples, *_WORKER_ARGUMENTS)
+
+
+def _solve_samples(samples: np.ndarray, mpc: NMPC, n_x: int, v0: ca.DM, t0: Numeric) -> (np.ndarray, np.ndarray):
+    """
+    Solve the MPC problem for every sample
+
+    Every optimal control problem is solved from the same initial guess and at the same time, so the result doesn't
+    depend on the order of the samples or the distribution of the samples over the worker processes.
+
+    :param samples: Samples of the initial states and the constant parameters (one sample per column)
+    :param mpc: Set up NMPC
+    :param n_x: Number of states
+    :param v0: Initial guess of the optimization variables
+    :param t0: Time at which the optimal control problems are solved
+    :return: Optimal inputs (one sample per column) and flags indicating whether the solver converged
+    """
+    n_samples = samples.shape[1]
+    u = np.zeros((mpc._n_u, n_samples))
+    success = np.zeros(n_samples, dtype=bool)
+    for k in range(n_samples):
+        x0 = samples[:n_x, k]
+        cp = samples[n_x:, k] if samples.shape[0] > n_x else None
+        mpc._time = t0
+        u[:, k] = mpc.optimize(x0, cp=cp, v0=v0).full().flatten()
+        success[k] = mpc._solver_status_code in [1, 2]
+    return u, success
+
+
+class ApproximateMPC(Controller):
+    """
+    Approximate model predictive control
+
+    The feasible set of initial states and constant parameters is sampled by Latin hypercube sampling and the optimal
+    control problem of the supplied NMPC is solved for every sample. The pairs of initial states and parameters and the
+    first optimal inputs are stored in a data set, which is used to train an approximator (e.g. an
+    :class:`~hilo_mpc.ArtificialNeuralNetwork`). Online, the prediction of the approximator replaces the solution of the
+    nonlinear program.
+
+    :param mpc: Set up nonlinear model predictive controller that is approximated
+    :type mpc: :class:`~hilo_mpc.NMPC`
+    :param approximator: Trained approximator of the MPC law. Needs to provide a method :meth:`predict` that maps the
+        features (initial states followed by the constant parameters) to the inputs.
+    :type approximator: :class:`~hilo_mpc.ArtificialNeuralNetwork`, optional
+    :param saturate: Whether the inputs returned by :meth:`optimize` are saturated at the input bounds of the MPC
+    :type saturate: bool
+    """
+    def __init__(self, mpc: NMPC, approximator: Optional[Any] = None, saturate: bool = False) -> None:
+        """Constructor method"""
+        if not isinstance(mpc, NMPC):
+            raise TypeError("The controller to be approximated needs to be an object of the NMPC class")
+        if not mpc._nlp_setup_done:
+            raise RuntimeError("The NMPC is not set up. Run NMPC.setup() before passing it to the approximate MPC.")
+
+        super().__init__()
+
+        model = mpc._model_orig
+        cp_index = [k for k in range(model.n_p) if k not in mpc._time_varying_parameters_ind]
+        self._mpc = mpc
+        self._n_x = mpc._n_x
+        self._n_u = mpc._n_u
+        self._n_cp = len(cp_index)
+        self._cp_index = cp_index
+        self._x_names = model.dynamical_state_names[:self._n_x]
+        self._p_names = [model.parameter_names[k] for k in cp_index]
+        self._u_names = model.input_names[:self._n_u]
+        self._u_lb = (np.asarray(mpc._u_lb, dtype=float) * np.asarray(mpc._u_scaling, dtype=float))[:self._n_u]
+        self._u_ub = (np.asarray(mpc._u_ub, dtype=float) * np.asarray(mpc._u_scaling, dtype=float))[:self._n_u]
+
+        # NOTE: The initial guess is stored here, since the NMPC overwrites it when warm starting is activated
+        self._v0 = ca.DM(mpc._v0)
+        self._t0 = mpc._time
+
+        self._approximator = approximator
+        self._saturate = saturate
+        self._data_set = None
+        self._n_failed = 0
+        self._metrics = None
+
+    def _update_type(self) -> None:
+        """
+
+        :return:
+        """
+        self._type = 'ApproximateMPC'
+
+    def _predict(self, features: np.ndarray) -> np.ndarray:
+        """
+
+        :param features: Features (one data point per column)
+        :return:
+        """
+        if self._approximator is None:
+            raise RuntimeError("No approximator of the MPC law available. Train an approximator using the method "
+                               "'train' or supply an already trained approximator.")
+        u = self._approximator.predict(np.asarray(features, dtype=float))
+        if isinstance(u, ca.DM):
+            u = u.full()
+        return np.asarray(u, dtype=float).reshape(self._n_u, -1)
+
+    @property
+    def mpc(self) -> NMPC:
+        """
+
+        :return:
+        """
+        return self._mpc
+
+    @property
+    def approximator(self) -> Optional[Any]:
+        """
+
+        :return:
+        """
+        return self._approximator
+
+    @approximator.setter
+    def approximator(self, approximator: Any) -> None:
+        self._approximator = approximator
+
+    @property
+    def features(self) -> list[str]:
+        """
+        Names of the features, i.e. the initial states followed by the constant parameters
+
+        :return:
+        """
+        return self._x_names + self._p_names
+
+    @property
+    def labels(self) -> list[str]:
+        """
+        Names of the labels, i.e. the inputs
+
+        :return:
+        """
+        return list(self._u_names)
+
+    @property
+    def data(self) -> Optional[Data]:
+        """
+
+        :return:
+        """
+        return self._data_set
+
+    @property
+    def n_failed(self) -> int:
+        """
+        Number of samples of the last call of :meth:`sample`, for which the solver didn't converge
+
+        :return:
+        """
+        return self._n_failed
+
+    @property
+    def metrics(self) -> Optional[dict[str, Union[float, np.ndarray]]]:
+        """
+        Metrics of the last call of :meth:`evaluate`
+
+        :return:
+        """
+        return self._metrics
+
+    def sample(
+            self,
+            n_samples: int,
+            x_lb: Union[Numeric, NumArray],
+            x_ub: Union[Numeric, NumArray],
+            p_lb: Optional[Union[Numeric, NumArray]] = None,
+            p_ub: Optional[Union[Numeric, NumArray]] = None,
+            seed: Optional[int] = None,
+            processes: Optional[int] = 1,
+            batch_size: int = 100,
+            path: Optional[str] = None
+    ) -> Data:
+        """
+        Generate training data by solving the optimal control problem for Latin hypercube samples
+
+        The samples are distributed over the worker processes in batches of size :obj:`batch_size` and the results are
+        added to the data set as soon as a batch is finished. Samples, for which the solver did not converge, are
+        discarded (see :attr:`n_failed`).
+
+        :param n_samples: Number of samples
+        :param x_lb: Lower bounds of the initial states
+        :param x_ub: Upper bounds of the initial states
+        :param p_lb: Lower bounds of the constant parameters
+        :param p_ub: Upper bounds of the constant parameters
+        :param seed: Seed of the Latin hypercube sampling
+        :param processes: Number of worker processes. If None, the number of CPUs is used. Worker processes are only
+            available on platforms supporting the 'fork' start method, otherwise the samples are processed serially.
+        :param batch_size: Number of samples per batch
+        :param path: If supplied, the data is stored on disk in a :class:`~hilo_mpc.util.data.ChunkedDataSet` in this
+            directory instead of in memory
+        :return: Data set with the initial states and constant parameters as features and the optimal inputs as labels
+        """
+        if self._n_cp > 0 and (p_lb is None or p_ub is None):
+            raise ValueError(f"The model has {self._n_cp} constant parameter(s): {self._p_names}. Bounds for the "
+                             f"sampling of the parameters are required.")
+        lower_bound = np.broadcast_to(np.asarray(x_lb, dtype=float).flatten(), (self._n_x,))
+        upper_bound = np.broadcast_to(np.asarray(x_ub, dtype=float).flatten(), (self._n_x,))
+        if self._n_cp > 0:
+            lower_bound = np.concatenate([lower_bound, np.broadcast_to(np.asarray(p_lb, dtype=float).flatten(),
+                                                                       (self._n_cp,))])
+            upper_bound = np.concatenate([upper_bound, np.broadcast_to(np.asarray(p_ub, dtype=float).flatten(),
+                                                                       (self._n_cp,))])
+        if batch_size < 1:
+            raise ValueError("The batch size needs to be a positive integer")
+        if processes is None:
+            processes = os.cpu_count()
+
+        samples = lhs(lower_bound, upper_bound, n_samples, seed=seed).T
+        batches = [samples[:, k:k + batch_size] for k in range(0, n_samples, batch_size)]
+
+        features = self.features
+        labels = self.labels
+        if path is not None:
+            data_set = ChunkedDataSet(features, labels, path)
+        else:
+            model = self._mpc._model_orig
+            properties = {
+                'x': {
+                    'description': model.dynamical_state_description[:self._n_x] + [
+                        model.parameter_description[k] for k in self._cp_index],
+                    'units': model.dynamical_state_units[:self._n_x] + [model.parameter_units[k] for k in
+                                                                        self._cp_index]
+                },
+                'y': {
+                    'description': model.input_description[:self._n_u],
+                    'units': model.input_units[:self._n_u]
+                }
+            }
+            data_set = DataSet(features, labels, properties=properties, plot_backend=self._mpc.solution.plot_backend)
+
+        args = (self._mpc, self._n_x, self._v0, self._t0)
+        if processes > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+            warnings.warn("Worker processes require the 'fork' start method, which is not available on this platform. "
+                          "The samples are processed serially.")
+            processes = 1
+
+        n_failed = 0
+        if processes > 1:
+            with ProcessPoolExecutor(max_workers=min(processes, len(batches)),
+                                     mp_context=multiprocessing.get_context('fork'), initializer=_initialize_worker,
+                                     initargs=args) as executor:
+                for batch, (u, success) in zip(batches, executor.map(_solve_worker, batches)):
+                    data_set.add_data(batch[:, success], u[:, success])
+                    n_failed += np.count_nonzero(~success)
+        else:
+            v0 = self._mpc._v0
+            t0 = self._mpc._time
+            for batch in batches:
+                u, success = _solve_samples(batch, *args)
+                data_set.add_data(batch[:, success], u[:, success])
+                n_failed += np.count_nonzero(~success)
+            self._mpc._v0 = v0
+            self._mpc._time = t0
+        if n_failed > 0:
+            warnings.warn(f"The solver did not converge for {n_failed} of {n_samples} samples. These samples were "
+                          f"discarded.")
+
+        self._n_failed = n_failed
+        self._data_set = data_set
+        return data_set
+
+    def train(self, approximator: Any, *args, **kwargs) -> None:
+        """
+        Train the approximator on the data generated by :meth:`sample`
+
+        Positional and keyword arguments are passed on to the method :meth:`train` of the approximator (e.g. batch size
+        and epochs for an :class:`~hilo_mpc.ArtificialNeuralNetwork`).
+
+        :param approximator: Approximator of the MPC law, e.g. an artificial neural network with the features and
+            labels given by :attr:`features` and :attr:`labels`
+        :param args:
+        :param kwargs:
+        :return:
+        """
+        if self._data_set is None:
+            raise RuntimeError("No data available. Generate the training data using the method 'sample' first.")
+        if list(approximator.features) != self.features or list(approximator.labels) != self.labels:
+            raise ValueError(f"Mismatch in the features or labels of the approximator. Got {approximator.features} and "
+                             f"{approximator.labels}, expected {self.features} and {self.labels}.")
+
+        approximator.add_data_set(self._data_set)
+        if hasattr(approximator, 'is_setup') and not approximator.is_setup():
+            approximator.setup()
+        approximator.train(*args, **kwargs)
+        self._approximator = approximator
+
+    def evaluate(self, data_set: Optional[Data] = None, tol: Numeric = 1e-6) -> dict[str, Union[float, np.ndarray]]:
+        """
+        Compare the approximate MPC law with the optimal inputs of a data set
+
+        The following metrics are returned:
+
+        * 'mean_absolute_error', 'max_absolute_error' and 'root_mean_squared_error': Errors of the approximate inputs
+          for every input
+        * 'max_constraint_violation': Maximum violation of the input bounds of the MPC by the approximate inputs
+        * 'constraint_violation_rate': Fraction of the data points, where the input bounds are violated by more than
+          :obj:`tol`
+
+        :param data_set: Data set generated by :meth:`sample`. It should be different from the training data. If None,
+            the data set of the last call of :meth:`sample` is used.
+        :param tol: Tolerance for the constraint violation
+        :return:
+        """
+        if data_set is None:
+            data_set = self._data_set
+            if data_set is None:
+                raise RuntimeError("No data available. Generate data using the method 'sample' first.")
+        if list(data_set.features) != self.features or list(data_set.labels) != self.labels:
+            raise ValueError(f"Mismatch in the features or labels of the data set. Got {data_set.features} and "
+                             f"{data_set.labels}, expected {self.features} and {self.labels}.")
+
+        features, labels = data_set.raw_data
+        if isinstance(data_set, ChunkedDataSet):
+            chunks = zip((chunk.T for chunk in features.iter_chunks()), (chunk.T for chunk in labels.iter_chunks()))
+        else:
+            chunks = [(features, labels)]
+
+        n_data_points = 0
+        absolute_error = np.zeros(self._n_u)
+        max_absolute_error = np.zeros(self._n_u)
+        squared_error = np.zeros(self._n_u)
+        max_violation = 0.
+        n_violations = 0
+        for x, u_opt in chunks:
+            u = self._predict(x)
+            error = np.abs(u - u_opt)
+            violation = np.max(np.maximum(self._u_lb[:, None] - u, u - self._u_ub[:, None]), axis=0, initial=0.)
+            n_data_points += u.shape[1]
+            absolute_error += error.sum(axis=1)
+            max_absolute_error = np.maximum(max_absolute_error, error.max(axis=1, initial=0.))
+            squared_error += (error ** 2).sum(axis=1)
+            max_violation = max(max_violation, float(violation.max(initial=0.)))
+            n_violations += np.count_nonzero(violation > tol)
+        if n_data_points == 0:
+            raise ValueError("The data set is empty")
+
+        self._metrics = {
+            'mean_absolute_error': absolute_error / n_data_points,
+            'max_absolute_error': max_absolute_error,
+            'root_mean_squared_error': np.sqrt(squared_error / n_data_points),
+            'max_constraint_violation': max_violation,
+            'constraint_violation_rate': n_violations / n_data_points
+        }
+        return self._metrics
+
+    def optimize(
+            self,
+            x0: Union[Numeric, NumArray, ca.DM],
+            cp: Optional[Union[Numeric, NumArray, ca.DM]] = None
+    ) -> ca.DM:
+        """
+        Evaluate the approximate MPC law
+
+        Has the same signature as :meth:`NMPC.optimize`, so the approximate MPC can be used in place of the NMPC in
+        closed-loop simulations.
+
+        :param x0: Current state
+        :param cp: Constant parameters
+        :return: Approximate optimal input
+        """
+        x0 = check_and_wrap_to_DM(x0)
+        if x0.shape[0] != self._n_x:
+            raise ValueError(f"Dimension mismatch. The supplied state has dimension {x0.shape[0]}, but the MPC has "
+                             f"{self._n_x} states.")
+        if self._n_cp > 0:
+            if cp is None:
+                raise ValueError(f"The model has {self._n_cp} constant parameter(s): {self._p_names}. You must pass "
+                                 f"the values of these to the 'cp' parameter.")
+            x0 = ca.vertcat(x0, check_and_wrap_to_DM(cp))
+
+        u = ca.DM(self._predict(x0.full()))
+        if self._saturate:
+            u = ca.fmin(ca.fmax(u, self._u_lb), self._u_ub)
+        return u
+
+
+__all__ = [
+    'ApproximateMPC'
+]
@@ -86,6 +86,7 @@ class NMPC(Controller, DynamicOptimization):
 
         self._e_soft_stage_ind = []
         self._e_term_stage_ind = []
+        self._stage_structure = None
 
         # In some cases, for example path following with interpolated path using spline, the objective
         # function needs to be defined in MX variable instead of SX, because the CasADi spline interpolation
@@ -1116,7 +1117,74 @@ class NMPC(Controller, DynamicOptimization):
         self.terminal_constraint.weight = weight
         self.terminal_constraint.name = name
 
-    def setup(self, options=None, solver_options=None) -> None:
+    def _arrange_stage_wise(self, x_ind, u_ind, stage_ind, n_v, g_size, g_stage, g_gap):
+        """
+        Returns the permutations of the optimization variables and of the constraints, that order the optimal control
+        problem stage-wise, together with the dimensions of the stages
+
+        The optimization variables are ordered as [x_0, u_0, w_0, x_1, u_1, w_1, ..., x_N], where w_k are the variables
+        local to stage k (e.g. states at the collocation points), which are treated as additional controls. The
+        constraints of every stage start with the gap-closing constraint x_{k+1} - F(x_k, u_k, w_k), followed by the
+        remaining constraints of that stage. Since the terminal constraint is evaluated at the end of the last interval,
+        it belongs to the last stage with controls. Structure-exploiting solvers like fatrop require this ordering.
+
+        :param x_ind: indices of the states for every stage
+        :param u_ind: indices of the inputs for every stage
+        :param stage_ind: indices of the remaining variables local to every stage
+        :param n_v: number of optimization variables
+        :param g_size: number of rows of every block of the constraints
+        :param g_stage: index of the first block of the constraints for every stage
+        :param g_gap: index of the block of the gap-closing constraint for every stage
+        :return: permutation of the optimization variables, permutation of the constraints, dimensions of the stages
+        """
+        unsupported = []
+        if self._control_horizon != self._prediction_horizon:
+            unsupported.append("a control horizon different from the prediction horizon")
+        if self.stage_constraint.is_soft or self.terminal_constraint.is_soft:
+            unsupported.append("soft constraints")
+        if self._custom_constraint_flag:
+            unsupported.append("custom constraints")
+        if self._minimize_final_time_flag:
+            unsupported.append("minimization of the final time")
+        if self._model.n_z > 0:
+            unsupported.append("algebraic states")
+        if self._nlp_options['ipopt_debugger']:
+            unsupported.append("the IPOPT debugger")
+        if unsupported:
+            raise ValueError(f"The stage-wise structure of the optimal control problem is not available for "
+                             f"{', '.join(unsupported)}")
+
+        n_g = sum(g_size)
+        offset = np.cumsum([0] + g_size)
+
+        def rows(block):
+            return list(range(offset[block], offset[block + 1]))
+
+        perm = []
+        g_perm = []
+        structure = {'N': self._prediction_horizon, 'nx': [], 'nu': [], 'ng': []}
+        for ii in range(self._prediction_horizon):
+            perm.extend(x_ind[ii])
+            perm.extend(u_ind[ii])
+            perm.extend(stage_ind[ii])
+            g_perm.extend(rows(g_gap[ii]))
+            end = g_stage[ii + 1] if ii + 1 < self._prediction_horizon else len(g_size)
+            path = [row for block in range(g_stage[ii], end) if block != g_gap[ii] for row in rows(block)]
+            g_perm.extend(path)
+            structure['nx'].append(len(x_ind[ii]))
+            structure['nu'].append(len(u_ind[ii]) + len(stage_ind[ii]))
+            structure['ng'].append(len(path))
+        perm.extend(x_ind[-1])
+        structure['nx'].append(len(x_ind[-1]))
+        structure['nu'].append(0)
+        structure['ng'].append(0)
+
+        if sorted(perm) != list(range(n_v)) or sorted(g_perm) != list(range(n_g)):
+            raise RuntimeError("Not all optimization variables and constraints could be assigned to a stage of the "
+                               "optimal control problem")
+        return np.array(perm, dtype=int), np.array(g_perm, dtype=int), structure
+
+    def setup(self, options=None, solver_options=None, **kwargs) -> None:
 
         """
         Sets up the corresponding optimization problem (OP) of the MPC. This must be run before attempting to solve
@@ -1127,6 +1195,8 @@ class NMPC(Controller, DynamicOptimization):
         :param solver_options: Dictionary with options for the optimizer. These options are solver specific. Refer to
             the CasADi Documentation https://web.casadi.org/python-api/#nlp
         :type solver_options: dict
+        :param kwargs: Options for C code generation of the functions evaluated by the NLP solver, i.e. 'c_code',
+            'generator', 'gen_path', 'gen_name' and 'gen_opts'. The compiler can be chosen via :meth:`set_compiler`.
         :return: None
         """
         if not self._scaling_is_set:
@@ -1482,12 +1552,16 @@ class NMPC(Controller, DynamicOptimization):
                     offset += model.n_z
 
             # Some other variables must be added, depending on the approximation method used
+            # NOTE: The indices of these variables are stored for every stage, so that the problem can be arranged
+            #  stage-wise for structure-exploiting solvers
+            stage_ind = [[] for _ in range(self._prediction_horizon)]
             if self._nlp_options['integration_method'] == 'collocation':
                 ip = np.resize(np.array([], dtype=ca.MX), (self._prediction_horizon, 1))
                 zp = np.resize(np.array([], dtype=ca.MX), (self._prediction_horizon, 1))
 
                 for ii in range(self._prediction_horizon):
                     ip[ii, 0] = v[offset:offset + n_xik]
+                    stage_ind[ii].extend(range(offset, offset + n_xik))
                     v_guess[offset:offset + n_xik] = x_ik_guess
                     v_lb[offset:offset + n_xik] = x_ik_lb
                     v_ub[offset:offset + n_xik] = x_ik_ub
@@ -1498,6 +1572,7 @@ class NMPC(Controller, DynamicOptimization):
 
                     if model.n_z > 0:
                         zp[ii, 0] = v[offset:offset + n_zik]
+                        stage_ind[ii].extend(range(offset, offset + n_zik))
                         v_guess[offset:offset + n_zik] = z_ik_guess
                         v_lb[offset:offset + n_zik] = z_ik_lb
                         v_ub[offset:offset + n_zik] = z_ik_ub
@@ -1507,6 +1582,7 @@ class NMPC(Controller, DynamicOptimization):
                 zp = np.resize(np.array([], dtype=ca.MX), (self._prediction_horizon, 1))
                 for ii in range(self._prediction_horizon):
                     zp[ii, 0] = v[offset:offset + n_zik]
+                    stage_ind[ii].extend(range(offset, offset + n_zik))
                     v_guess[offset:offset + n_zik] = z_ik_guess
                     v_lb[offset:offset + n_zik] = z_ik_lb
                     v_ub[offset:offset + n_zik] = z_ik_ub
@@ -1610,7 +1686,12 @@ class NMPC(Controller, DynamicOptimization):
             ind_g = 0
             # get the current sampling time
             time = param_npl_mpc['time']
+            # NOTE: The positions of the blocks of the constraints are stored for every stage, so that the constraints
+            #  can be arranged stage-wise for structure-exploiting solvers
+            g_stage = []
+            g_gap = []
             for ii in range(self._prediction_horizon):
+                g_stage.append(len(g))
                 x_ii = x[ii, 0]
                 if ii < self._control_horizon:
                     u_ii = u[ii, 0]
@@ -1650,6 +1731,7 @@ class NMPC(Controller, DynamicOptimization):
                 elif self._nlp_options['integration_method'] == 'discrete':
                     x_ii_1 = int_dynamics_fun(time, dt_ii, x_ii, u_ii, zp[ii, 0], p_ii)
 
+                g_gap.append(len(g))
                 g.append(x[ii + 1, 0] - x_ii_1)
                 g_lb.append(np.zeros(model.n_x))
                 g_ub.append(np.zeros(model.n_x))
@@ -1739,9 +1821,29 @@ class NMPC(Controller, DynamicOptimization):
                 # Add the time to the objective function
                 J += ca.sum1(_dt) * self._minimize_final_time_weight
 
-            g = ca.vertcat(*g)
-            self._g_lb = ca.DM(ca.vertcat(*g_lb))
-            self._g_ub = ca.DM(ca.vertcat(*g_ub))
+            g_lb = ca.DM(ca.vertcat(*g_lb))
+            g_ub = ca.DM(ca.vertcat(*g_ub))
+            if self._nlp_options['stage_structure']:
+                perm, g_perm, self._stage_structure = self._arrange_stage_wise(
+                    x_ind, u_ind, stage_ind, n_v, [gk.size1() for gk in g], g_stage, g_gap)
+                position = np.empty(n_v, dtype=int)
+                position[perm] = np.arange(n_v)
+                v_stage = ca.MX.sym('v', n_v)
+                g = ca.vertcat(*g)[g_perm.tolist()]
+                J, g = ca.substitute([ca.MX(J), g], [v], [v_stage[position.tolist()]])
+                g_lb = g_lb[g_perm.tolist()]
+                g_ub = g_ub[g_perm.tolist()]
+                v = v_stage
+                v_guess = v_guess[perm]
+                v_lb = v_lb[perm]
+                v_ub = v_ub[perm]
+                x_ind = [[int(position[j]) for j in ind] for ind in x_ind]
+                u_ind = [[int(position[j]) for j in ind] for ind in u_ind]
+            else:
+                g = ca.vertcat(*g)
+
+            self._g_lb = g_lb
+            self._g_ub = g_ub
             self._v0 = ca.DM(v_guess)
             self._v_lb = ca.DM(v_lb)
             self._v_ub = ca.DM(v_ub)
@@ -1757,14 +1859,29 @@ class NMPC(Controller, DynamicOptimization):
 
             if self._nlp_options['ipopt_debugger']:
                 # Adds the callback debugger.
-                debugger = IpoptDebugger('ipopt_debugger', self._n_v, self._g.shape[0], 0, 0, self._x_ind, self._u_ind)
+                debugger = IpoptDebugger('ipopt_debugger', self._n_v, self._g.shape[0], 0, 0, self._x_ind, self._u_ind,
+                                         **self._nlp_options['ipopt_debugger_options'])
                 self.debugger = debugger
                 self._nlp_opts.update({'iteration_callback': debugger})
 
             nlp_dict = {'f': self._J, 'x': self._v, 'p': self._param_npl_mpc, 'g': self._g}
             if self._solver_name in self._solver_name_list_nlp:
-                solver = ca.nlpsol('solver', self._solver_name, nlp_dict, self._nlp_opts)
+                nlp_opts = self._nlp_opts
+                if self._solver_name == 'fatrop':
+                    # NOTE: The dimensions of the stages are passed explicitly, so that fatrop does not need to detect
+                    #  the structure from the sparsity pattern of the constraint Jacobian
+                    nlp_opts = nlp_opts.copy()
+                    nlp_opts.setdefault('structure_detection', 'manual')
+                    if nlp_opts['structure_detection'] == 'manual':
+                        for key, value in self._stage_structure.items():
+                            nlp_opts.setdefault(key, value)
+                    nlp_opts.setdefault('equality', [lb == ub for lb, ub in zip(self._g_lb.nonzeros(),
+                                                                                 self._g_ub.nonzeros())])
+                solver = self._generate_nlp_solver(self._solver_name, nlp_dict, nlp_opts, **kwargs)
             elif self._solver_name in self._solver_name_list_qp:
+                if kwargs.get('c_code', False):
+                    warnings.warn(f"C code generation is not supported for the QP solver '{self._solver_name}'. "
+                                  f"Ignoring option 'c_code'.")
                 solver = ca.qpsol('solver', self._solver_name, nlp_dict, self._nlp_opts)
             else:
                 raise ValueError(
@@ -2001,12 +2118,19 @@ class LMPC(Controller, DynamicOptimization):
                 f"set_time_varying_parameters() method."
             )
 
-    def setup(self, options=None, solver_options=None, nlp_solver='qpoases'):
+    def setup(self, options=None, solver_options=None, nlp_solver='qpoases', **kwargs):
         """
 
         :param options:
-        :param solver_options:
-        :param nlp_solver:
+        :param solver_options: For nlp_solver='explicit' the options 'region_lb' and 'region_ub' (bounds of the state
+            region over which the explicit solution is computed, defaults to the state constraints), 'leaf_size'
+            (maximum number of candidate regions in the leafs of the binary search tree) and 'max_regions' are
+            supported
+        :param nlp_solver: 'explicit' precomputes the explicit (piecewise affine) solution of the LMPC, such that no QP
+            needs to be solved online
+        :param kwargs: Options for C code generation of the function evaluating the constraint matrix of the QP, i.e.
+            'c_code', 'generator', 'gen_path', 'gen_name' and 'gen_opts'. The compiler can be chosen via
+            :meth:`set_compiler`.
         :return:
         """
         if not self._scaling_is_set:
@@ -2062,6 +2186,22 @@ class LMPC(Controller, DynamicOptimization):
         # Add constraints for the ode
         Adis = ca.horzcat(Abar1 + Abar2, Abar3)
 
+        # NOTE: The constraint matrix usually only depends on the sampling interval and the constant parameters.
+        #  Instead of substituting these symbols every time the LMPC is optimized, the matrix is evaluated by a
+        #  function, which can also be compiled. Matrices of linearized models can still contain other symbols (e.g.
+        #  the equilibrium point), which are left to the substitution in LMPC.optimize().
+        ind_cp_par = [i for i in range(self._model.n_p) if i not in self._time_varying_parameters_ind]
+        arguments = ca.vertcat(self._model.dt, self._model.p[ind_cp_par])
+        if all(ca.depends_on(var, arguments) for var in ca.symvar(Adis)):
+            constraint_matrix = ca.Function('constraint_matrix', [self._model.dt, self._model.p[ind_cp_par]], [Adis],
+                                            ['dt', 'cp'], ['A'])
+            self._constraint_matrix_function = self._generate_function(constraint_matrix, **kwargs)
+        else:
+            if kwargs.get('c_code', False):
+                warnings.warn("The constraint matrix of the LMPC depends on variables other than the sampling interval "
+                              "and the constant parameters. Ignoring option 'c_code'.")
+            self._constraint_matrix_function = None
+
         # generate parameters
         bdis = ca.kron(ca.DM.zeros(self._model.n_x), ca.DM.ones(self.horizon))
         # Add constraints for the polytope constraints
@@ -2100,6 +2240,12 @@ class LMPC(Controller, DynamicOptimization):
                 raise ImportError(message)
 
             solver = setup_solver(self)
+        elif self._solver_name == 'explicit':
+            from ..embedded.explicit_mpc import setup_solver
+
+            if solver_options is None:
+                solver_options = {}
+            solver = setup_solver(self, **solver_options)
         else:
             raise ValueError(
                 f"The solver {self._solver_name} does no exist. The possible solver are {self._solver_name_list_qp}."
@@ -2127,6 +2273,10 @@ class LMPC(Controller, DynamicOptimization):
         # TODO: substitute all the values of all the variables remaining in the matrices
         if self._solver_name == 'muaompc':
             return self._solver(x0)
+        if self._solver_name == 'explicit':
+            u_opt = ca.DM(self._solver(check_and_wrap_to_DM(x0).full()))
+            self._n_iterations += 1
+            return u_opt
 
         if self._model.n_p - self._n_tvp != 0:
             if cp is not None:
@@ -2150,32 +2300,22 @@ class LMPC(Controller, DynamicOptimization):
         if self._n_tvp > 0:
             self._parse_tvp_parameters_values(tvp)
 
-        Ad = self._Ad
-        Ad_ub = self._Ad_ub
-        Ad_lb = self._Ad_lb
-
-        Ad = ca.substitute(Ad, self._model.dt, self._sampling_interval)
-        Ad_ub = ca.substitute(Ad_ub, self._model.dt, self._sampling_interval)
-        Ad_lb = ca.substitute(Ad_lb, self._model.dt, self._sampling_interval)
-
-        if cp is not None:
+        if cp is None:
+            cp = ca.DM.zeros(0, 1)
+        if self._constraint_matrix_function is not None:
+            Ad = self._constraint_matrix_function(self._sampling_interval, cp)
+        else:
             ind_cp_par = [i for i in range(self._model.n_p) if i not in self._time_varying_parameters_ind]
-            Ad = ca.substitute(Ad, self._model.p[ind_cp_par], cp)
-            Ad_ub = ca.substitute(Ad_ub, self._model.p[ind_cp_par], cp)
-            Ad_lb = ca.substitute(Ad_lb, self._model.p[ind_cp_par], cp)
+            Ad = ca.substitute(self._Ad, ca.vertcat(self._model.dt, self._model.p[ind_cp_par]),
+                               ca.vertcat(self._sampling_interval, cp))
+            Ad = ca.DM(Ad)
 
         self._v_lb[self._x_ind[0][0:self._n_x]] = x0
         self._v_ub[self._x_ind[0][0:self._n_x]] = x0
 
-        if self._n_tvp:
-            Ad_ub = ca.substitute(Ad_ub, self._tvp, self._time_varying_parameters_horizon)
-            Ad_lb = ca.substitute(Ad_lb, self._tvp, self._time_varying_parameters_horizon)
-
-        Ad = ca.DM(Ad)
-        Ad_ub = ca.DM(Ad_ub)
-        Ad_lb = ca.DM(Ad_lb)
-
-        sol = self._solver(h=self._H, g=self._g, a=Ad, lbx=self._v_lb, ubx=self._v_ub, lba=Ad_lb, uba=Ad_ub)
+        # NOTE: The bounds of the equality constraints of the dynamics are constant (zero)
+        sol = self._solver(h=self._H, g=self._g, a=Ad, lbx=self._v_lb, ubx=self._v_ub, lba=self._Ad_lb,
+                           uba=self._Ad_ub)
 
         self._nlp_solution = sol
         u_opt = sol['x'][self._u_ind[0]]
@@ -2192,6 +2332,17 @@ class LMPC(Controller, DynamicOptimization):
         """
         return self._horizon
 
+    @property
+    def explicit_solution(self):
+        """
+        Explicit solution of the LMPC, if the LMPC was set up with nlp_solver='explicit'
+
+        :return:
+        """
+        if self._solver_name == 'explicit':
+            return self._solver
+        return None
+
 
 __all__ = [
     'NMPC',
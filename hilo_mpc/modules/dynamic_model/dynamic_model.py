@@ -23,7 +23,7 @@
 
 from __future__ import annotations
 
-from copy import deepcopy
+from copy import copy, deepcopy
 import platform
 from typing import Optional, Sequence, TypeVar, Union
 import warnings
@@ -36,8 +36,8 @@ from ..machine_learning.base import LearningBase
 from ...util.data import DataSet, DataGenerator
 from ...util.modeling import GenericCost, QuadraticCost, continuous2discrete
 from ...util.parsing import parse_dynamic_equations
-from ...util.util import check_if_list_of_string, convert, dump_clean, generate_c_code, is_iterable, is_list_like, \
-    is_square, who_am_i, JIT
+from ...util.util import check_if_list_of_string, convert, dump_clean, generate_c_code, has_call_nodes, \
+    is_iterable, is_linear, is_list_like, is_square, who_am_i, JIT
 
 
 Symbolic = TypeVar('Symbolic', ca.SX, ca.MX)
@@ -216,17 +216,17 @@ class _Model(Base):
 
         :return:
         """
-        is_linear = True
+        linear = True
         for eq in ['ode', 'alg', 'meas']:
             for var in ['_x', '_y', '_z', '_u']:  # '_p'
                 if hasattr(self, var):
-                    is_linear = ca.is_linear(getattr(self._rhs, eq), getattr(self, var).values)
-                if not is_linear:
+                    linear = is_linear(getattr(self._rhs, eq), getattr(self, var).values)
+                if not linear:
                     break
-            if not is_linear:
+            if not linear:
                 break
 
-        self._is_linear = is_linear
+        self._is_linear = linear
         if self._is_linearized and not self._is_linear:
             self._is_linearized = False
 
@@ -2660,8 +2660,17 @@ class _Model(Base):
             if eq.is_empty():
                 continue
 
+            if has_call_nodes(eq):
+                # NOTE: The directional derivative of a call node is again a call node, that depends on the direction
+                #  and would therefore not be recognized as linear in the direction. The Jacobian of the call node only
+                #  depends on the equilibrium point after the substitution below.
+                def jtimes(expr, var, direction):
+                    return ca.mtimes(ca.jacobian(expr, var), direction)
+            else:
+                jtimes = ca.jtimes
+
             if not dx.is_empty():
-                dyn_state_derivative = ca.jtimes(eq, x, dx)
+                dyn_state_derivative = jtimes(eq, x, dx)
             else:
                 if self._use_sx:
                     dyn_state_derivative = ca.SX.zeros(eq.shape)
@@ -2669,7 +2678,7 @@ class _Model(Base):
                     dyn_state_derivative = ca.MX.zeros(eq.shape)
 
             if not dz.is_empty():
-                alg_state_derivative = ca.jtimes(eq, z, dz)
+                alg_state_derivative = jtimes(eq, z, dz)
             else:
                 if self._use_sx:
                     alg_state_derivative = ca.SX.zeros(eq.shape)
@@ -2677,7 +2686,7 @@ class _Model(Base):
                     alg_state_derivative = ca.MX.zeros(eq.shape)
 
             if not du.is_empty():
-                input_derivative = ca.jtimes(eq, u, du)
+                input_derivative = jtimes(eq, u, du)
             else:
                 if self._use_sx:
                     input_derivative = ca.SX.zeros(eq.shape)
@@ -3061,9 +3070,13 @@ class _Model(Base):
             if hasattr(obj, 'features') and hasattr(obj, 'labels') and callable(predict):
                 # TODO: Check the following if-else statement
                 if use_sx:
-                    out = predict(all_the_variables[all_the_indices])
+                    features = all_the_variables[all_the_indices]
                 else:
-                    out = predict(ca.vertcat(*[all_the_variables[i] for i in all_the_indices]))
+                    features = ca.vertcat(*[all_the_variables[i] for i in all_the_indices])
+                if obj.embedding == 'expression':
+                    out = predict(features)
+                else:
+                    out = obj.to_function()(features)
                 # TODO: Maybe add a parameter return_variance (defaults to False) to the predict method of the GPR
                 #  instead?
                 if is_list_like(out):
@@ -3271,6 +3284,9 @@ class Model(_Model):
         self._dydp_nnz = 0
         self._dzdp_nnz = 0
 
+        self._lti_function = None
+        self._lti_solution = None
+
     def __repr__(self) -> str:
         args = ""
         if self._id is not None:
@@ -3566,17 +3582,35 @@ class Model(_Model):
         :return:
         """
         dt = kwargs.pop('dt', None)
+        grid = None
         if dt is None:
             grid = kwargs.pop('grid', None)
+        # NOTE: The functions of the model can only be reused if the sampling time or time grid stays the same
+        share_functions = setup and dt is None and grid is None and self.is_setup()
+        if dt is None:
             if grid is None:
                 if self.is_setup():
                     dt = self._solution.dt
                     if dt is None:
                         grid = self._solution.grid
 
-        _model = super().copy(name=name, setup=False, **kwargs)
-        model = Model(plot_backend=self._solution.plot_backend)
-        model.__setstate__(_model.__getstate__())
+        use_sx = kwargs.get('use_sx')
+        if (use_sx is None or use_sx == self._use_sx) and not self._rhs.is_empty():
+            model = self._clone(name=name, share_functions=share_functions)
+            if share_functions:
+                model._setup_time_series(dt, grid)
+                return model
+            if not setup:
+                # NOTE: The clone has the same equations as the model, so the result of a previous linearity check of
+                #  the model can be reused
+                linear = model._is_linear if model._is_linear is not None else model.is_linear()
+                if model._rhs.matrix_notation is None and linear:
+                    model._rhs.generate_matrix_notation(ca.vertcat(model.x, model.z), model.u)
+                return model
+        else:
+            _model = super().copy(name=name, setup=False, **kwargs)
+            model = Model(plot_backend=self._solution.plot_backend)
+            model.__setstate__(_model.__getstate__())
 
         if setup:
             if not self._rhs.is_empty():
@@ -3595,6 +3629,49 @@ class Model(_Model):
 
         return model
 
+    def _clone(self, name=None, share_functions=False) -> 'Model':
+        """
+
+        :param name:
+        :param share_functions:
+        :return:
+        """
+        # NOTE: The symbolic expressions and the CasADi functions are immutable, so they can be shared between the
+        #  model and its clone. Only the containers holding them as well as the lists and dictionaries are copied,
+        #  so that changes to the clone don't propagate to the original model.
+        def _copy_mutable(state):
+            for key, value in state.items():
+                if isinstance(value, (Vector, RightHandSide)):
+                    value = copy(value)
+                    _copy_mutable(value.__dict__)
+                    state[key] = value
+                elif isinstance(value, (list, dict)):
+                    state[key] = value.copy()
+                elif isinstance(value, (ca.SX, ca.MX, ca.DM)):
+                    state[key] = type(value)(value)
+            return state
+
+        model = Model.__new__(Model)
+        state = _copy_mutable(self.__getstate__())
+
+        plot_backend = self._solution.plot_backend
+        state['_solution'] = TimeSeries(plot_backend, parent=model)
+        state['_steady_state'] = TimeSeries(plot_backend, parent=model)
+        state['_collocation_points'] = TimeSeries(plot_backend, parent=model)
+        if not share_functions:
+            state['_function'] = None
+            state['_integrator_function'] = None
+            state['_meas_function'] = None
+            state['_lti_function'] = None
+            state['_lti_solution'] = None
+        if name is not None:
+            state['name'] = name
+
+        model.__setstate__(state)
+        model._create_id()
+
+        return model
+
     def discretize(
             self,
             method: str,
@@ -3731,6 +3808,8 @@ class Model(_Model):
         # TODO: Add support for time grid
         # TODO: Check time-dependent odes
         self._solution.clear()
+        self._lti_function = None
+        self._lti_solution = None
 
         dt = kwargs.get('dt')
         if dt is None:
@@ -3752,6 +3831,15 @@ class Model(_Model):
         if self._n_z > 0 and self._n_p > 0:
             self._dzdp_nnz = ca.jacobian(self._rhs.alg, self._p.values).nnz()
 
+        self._setup_time_series(dt, grid)
+
+    def _setup_time_series(self, dt, grid) -> None:
+        """
+
+        :param dt:
+        :param grid:
+        :return:
+        """
         if dt is not None:
             names = ['dt']
             vector = {
@@ -4193,11 +4281,17 @@ class Model(_Model):
             else:
                 args['z_col'] = ca.repmat(args['z0'], self._collocation_points.degree)
 
-        if steps > 1:
-            function = self._function.mapaccum(steps)
-            result = function(**args)
-        else:
-            result = self._function(**args)
+        # NOTE: Single steps of discrete-time models are already cheap to evaluate with the model function
+        result = None
+        closed_form = kwargs.get('closed_form', True) and (steps > 1 or not self._rhs.discrete)
+        if closed_form and self._lti_simulation_is_possible():
+            result = self._simulate_lti(dt, args['x0'], args.get('p', ca.DM()), steps)
+        if result is None:
+            if steps > 1:
+                function = self._function.mapaccum(steps)
+                result = function(**args)
+            else:
+                result = self._function(**args)
         result['t'] = tf
         if self._n_x > 0:
             result['x'] = result.pop('xf')
@@ -4209,6 +4303,93 @@ class Model(_Model):
             result['q'] = result.pop('qf')
         self._solution.update(**result)
 
+    def _lti_simulation_is_possible(self) -> bool:
+        """
+        Checks whether the model is a linear time-invariant system, that can be simulated in closed form
+
+        Continuous-time models are only simulated in closed form, if the model would otherwise be integrated by the
+        SUNDIALS integrators, since the closed-form solution would differ from the solution of fixed-step methods.
+
+        :return:
+        """
+        if self._lti_function is None:
+            is_possible = self._is_linear and not self._is_linearized and not self._is_time_variant
+            is_possible = is_possible and self._n_x > 0 and self._n_z == 0 and self._n_q == 0
+            is_possible = is_possible and self._x_col.is_empty() and self._solution.dt is not None
+            is_possible = is_possible and (self._rhs.discrete or self._solver in ['cvodes', 'idas'])
+            if is_possible:
+                x = self._x.values
+                u = self._u.values
+                zeros = ca.vertcat(ca.DM.zeros(self._n_x), ca.DM.zeros(self._n_u))
+                matrices = []
+                for equations in [self._rhs.ode, self._rhs.meas]:
+                    matrices.append(ca.jacobian(equations, x))
+                    matrices.append(ca.jacobian(equations, u))
+                    matrices.append(ca.substitute(equations, ca.vertcat(x, u), zeros))
+                # NOTE: The equations could depend on further variables (e.g. time or collocation points)
+                arguments = ca.vertcat(self._dt.values, self._p.values)
+                if all(ca.depends_on(var, arguments) for matrix in matrices for var in ca.symvar(matrix)):
+                    self._lti_function = ca.Function('lti', [self._dt.values, self._p.values], matrices)
+                else:
+                    is_possible = False
+            if not is_possible:
+                self._lti_function = False
+        return self._lti_function is not False
+
+    def _simulate_lti(self, dt: Numeric, x0: ca.DM, p: ca.DM, steps: int) -> Optional[dict[str, ca.DM]]:
+        """
+        Simulates the linear time-invariant system by the exact zero-order hold discretization
+
+        The discrete-time matrices are computed by the matrix exponential and are cached until the sampling time or the
+        parameter values change. Returns None if the parameter values change during the simulation.
+
+        :param dt:
+        :param x0:
+        :param p:
+        :param steps:
+        :return:
+        """
+        n_x = self._n_x
+        n_u = self._n_u
+
+        p = p.full().reshape(n_u + self._n_p, steps)
+        u = p[:n_u, :]
+        p = p[n_u:, :]
+        if steps > 1 and not np.all(p == p[:, :1]):
+            return None
+
+        key = (float(dt), tuple(p[:, 0]))
+        if self._lti_solution is None or self._lti_solution['key'] != key:
+            A, B, c, C, D, d = (matrix.full() for matrix in self._lti_function(dt, p[:, 0]))
+            if not self._rhs.discrete:
+                from scipy.linalg import expm
+
+                # NOTE: The affine term is treated as an additional input of constant value 1
+                M = np.zeros((n_x + n_u + 1, n_x + n_u + 1))
+                M[:n_x, :n_x] = A
+                M[:n_x, n_x:n_x + n_u] = B
+                M[:n_x, -1:] = c
+                E = expm(M * float(dt))
+                A = E[:n_x, :n_x]
+                B = E[:n_x, n_x:n_x + n_u]
+                c = E[:n_x, -1:]
+            self._lti_solution = {'key': key, 'matrices': (A, B, c, C, D, d)}
+        A, B, c, C, D, d = self._lti_solution['matrices']
+
+        # NOTE: The contributions of the inputs are computed for all steps at once, only the propagation of the states
+        #  is done recursively
+        w = B @ u + c
+        x = np.empty((n_x, steps))
+        x_k = x0.full().ravel()
+        for k in range(steps):
+            x_k = A @ x_k + w[:, k]
+            x[:, k] = x_k
+
+        result = {'xf': ca.DM(x)}
+        if self._n_y > 0:
+            result['yf'] = ca.DM(C @ x + D @ u + d)
+        return result
+
     def generate_data(
             self,
             signal_type: str,
@@ -0,0 +1,654 @@
+#   
+#   This file is part of HILO-MPC
+#
+#   HILO-MPC is a toolbox for easy, flexible and fast development of machine-learning-supported
+#   optimal control and estimation problems
+#
+#   Copyright (c) 2021 Johannes Pohlodek, Bruno Morabito, Rolf Findeisen
+#                      All rights reserved
+#
+#   HILO-MPC is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Lesser General Public License as
+#   published by the Free Software Foundation, either version 3
+#   of the License, or (at your option) any later version.
+#
+#   HILO-MPC is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public License
+#   along with HILO-MPC. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+
+import casadi as ca
+import numpy as np
+
+
+_TOL = 1e-9
+
+
+class ExplicitSolution:
+    """
+    Explicit solution of a linear MPC problem, i.e. the piecewise affine control law u = K_i*x + k_i over the critical
+    regions H_i*x <= h_i of the state space.
+
+    The inequalities of all critical regions are stored row-wise in one array, where the rows of the i-th critical
+    region are given by offsets[i]:offsets[i + 1]. The critical region containing a state is located with a binary
+    search tree over the bounding boxes of the critical regions. Every node of the tree either splits the state space
+    along one axis or is a leaf with a (short) list of candidate regions.
+
+    :param H: Normals of the inequalities of all critical regions
+    :type H: numpy.ndarray
+    :param h: Right-hand sides of the inequalities of all critical regions
+    :type h: numpy.ndarray
+    :param offsets: Offsets of the inequalities of the single critical regions
+    :type offsets: numpy.ndarray
+    :param K: Feedback matrices of the critical regions (n_regions x n_u x n_x)
+    :type K: numpy.ndarray
+    :param k: Offsets of the control law of the critical regions (n_regions x n_u)
+    :type k: numpy.ndarray
+    :param lb: Lower bounds of the state region the explicit solution was computed for
+    :type lb: numpy.ndarray
+    :param ub: Upper bounds of the state region the explicit solution was computed for
+    :type ub: numpy.ndarray
+    :param leaf_size: Maximum number of candidate regions in the leafs of the binary search tree, defaults to 4
+    :type leaf_size: int, optional
+    """
+    def __init__(self, H, h, offsets, K, k, lb, ub, leaf_size=4):
+        """Constructor method"""
+        self._H = np.asarray(H, dtype=float)
+        self._h = np.asarray(h, dtype=float)
+        self._offsets = np.asarray(offsets, dtype=int)
+        self._K = np.asarray(K, dtype=float)
+        self._k = np.asarray(k, dtype=float)
+        self._lb = np.asarray(lb, dtype=float)
+        self._ub = np.asarray(ub, dtype=float)
+        self._leaf_size = leaf_size
+        self._build_tree()
+
+    def __call__(self, x):
+        """
+
+        :param x:
+        :return:
+        """
+        x = np.asarray(x, dtype=float).ravel()
+        region = self.locate(x)
+        if region < 0:
+            raise ValueError(f"The state {x.tolist()} is not contained in any critical region of the explicit "
+                             f"solution, i.e. the MPC problem is infeasible or the state is outside of the region "
+                             f"{self._lb.tolist()} <= x <= {self._ub.tolist()}.")
+        return self._K[region] @ x + self._k[region]
+
+    def _bounding_boxes(self):
+        """
+
+        :return:
+        """
+        from scipy.optimize import linprog
+
+        n_regions = self.n_regions
+        n_x = self.n_x
+        box_lb = np.empty((n_regions, n_x))
+        box_ub = np.empty((n_regions, n_x))
+        bounds = list(zip(self._lb, self._ub))
+        for i in range(n_regions):
+            rows = slice(self._offsets[i], self._offsets[i + 1])
+            for j in range(n_x):
+                c = np.zeros(n_x)
+                c[j] = 1.
+                res = linprog(c, A_ub=self._H[rows], b_ub=self._h[rows], bounds=bounds, method='highs')
+                box_lb[i, j] = res.fun if res.status == 0 else self._lb[j]
+                res = linprog(-c, A_ub=self._H[rows], b_ub=self._h[rows], bounds=bounds, method='highs')
+                box_ub[i, j] = -res.fun if res.status == 0 else self._ub[j]
+        return box_lb, box_ub
+
+    def _build_tree(self):
+        """
+
+        :return:
+        """
+        box_lb, box_ub = self._bounding_boxes()
+        axis = []
+        threshold = []
+        left = []
+        right = []
+        start = []
+        count = []
+        leaf_regions = []
+
+        def build(ind, depth):
+            """
+
+            :param ind:
+            :param depth:
+            :return:
+            """
+            node = len(axis)
+            axis.append(-1)
+            threshold.append(0.)
+            left.append(-1)
+            right.append(-1)
+            start.append(0)
+            count.append(0)
+
+            best = None
+            if ind.size > self._leaf_size and depth < 64:
+                for d in range(self.n_x):
+                    t = np.median((box_lb[ind, d] + box_ub[ind, d]) / 2)
+                    ind_left = ind[box_lb[ind, d] < t + _TOL]
+                    ind_right = ind[box_ub[ind, d] > t - _TOL]
+                    score = max(ind_left.size, ind_right.size)
+                    if score < ind.size and (best is None or score < best[0]):
+                        best = (score, d, t, ind_left, ind_right)
+
+            if best is None:
+                start[node] = len(leaf_regions)
+                count[node] = ind.size
+                leaf_regions.extend(ind.tolist())
+            else:
+                _, axis[node], threshold[node], ind_left, ind_right = best
+                left[node] = build(ind_left, depth + 1)
+                right[node] = build(ind_right, depth + 1)
+            return node
+
+        build(np.arange(self.n_regions), 0)
+        self._axis = np.array(axis, dtype=int)
+        self._threshold = np.array(threshold)
+        self._left = np.array(left, dtype=int)
+        self._right = np.array(right, dtype=int)
+        self._start = np.array(start, dtype=int)
+        self._count = np.array(count, dtype=int)
+        self._leaf_regions = np.array(leaf_regions, dtype=int)
+
+        # NOTE: The point location in Python is faster on plain Python objects than on single elements of NumPy arrays
+        self._nodes = [
+            (int(axis[i]), float(threshold[i]), int(left[i]), int(right[i]),
+             leaf_regions[start[i]:start[i] + count[i]] if left[i] < 0 else None) for i in range(len(axis))
+        ]
+        self._regions = [
+            (self._H[self._offsets[i]:self._offsets[i + 1]], self._h[self._offsets[i]:self._offsets[i + 1]] + 1e-8)
+            for i in range(self.n_regions)
+        ]
+
+    @property
+    def n_x(self):
+        """
+        Number of states
+
+        :return:
+        """
+        return self._K.shape[2]
+
+    @property
+    def n_u(self):
+        """
+        Number of inputs
+
+        :return:
+        """
+        return self._K.shape[1]
+
+    @property
+    def n_regions(self):
+        """
+        Number of critical regions
+
+        :return:
+        """
+        return self._K.shape[0]
+
+    @property
+    def depth(self):
+        """
+        Depth of the binary search tree
+
+        :return:
+        """
+        def depth(node):
+            if self._left[node] < 0:
+                return 0
+            return 1 + max(depth(self._left[node]), depth(self._right[node]))
+        return depth(0)
+
+    def locate(self, x):
+        """
+        Returns the index of the critical region containing the state x or -1 if no critical region contains x
+
+        :param x:
+        :return:
+        """
+        nodes = self._nodes
+        axis, threshold, left, right, candidates = nodes[0]
+        while candidates is None:
+            axis, threshold, left, right, candidates = nodes[left if x[axis] <= threshold else right]
+        for region in candidates:
+            H, h = self._regions[region]
+            if (H @ x <= h).all():
+                return region
+        return -1
+
+    def save(self, file):
+        """
+        Saves the explicit solution to a NumPy .npz file
+
+        :param file:
+        :return:
+        """
+        np.savez(file, H=self._H, h=self._h, offsets=self._offsets, K=self._K, k=self._k, lb=self._lb, ub=self._ub,
+                 leaf_size=self._leaf_size)
+
+    @classmethod
+    def load(cls, file):
+        """
+        Loads an explicit solution from a NumPy .npz file
+
+        :param file:
+        :return:
+        """
+        with np.load(file) as data:
+            return cls(data['H'], data['h'], data['offsets'], data['K'], data['k'], data['lb'], data['ub'],
+                       leaf_size=int(data['leaf_size']))
+
+    def export(self, name='explicit_mpc', path=None, target='c'):
+        """
+        Exports a standalone evaluator of the explicit solution
+
+        For target='c' the files <name>.h and <name>.c are generated, which declare and define the function
+        'int <name>_evaluate(const double *x, double *u)'. The function returns the index of the critical region
+        containing x or -1 if no critical region contains x. For target='numpy' the Python module <name>.py is
+        generated, which only depends on NumPy and defines the function 'evaluate(x)'.
+
+        :param name: Name of the generated files and prefix of the generated functions
+        :type name: str
+        :param path: Directory of the generated files. By default the current working directory is used.
+        :type path: str, optional
+        :param target: Either 'c' or 'numpy'
+        :type target: str
+        :return: List of the generated files
+        """
+        if path is None:
+            path = os.getcwd()
+        os.makedirs(path, exist_ok=True)
+
+        arrays = {
+            'H': self._H.ravel(), 'h': self._h, 'offsets': self._offsets, 'K': self._K.ravel(), 'k': self._k.ravel(),
+            'axis': self._axis, 'threshold': self._threshold, 'left': self._left, 'right': self._right,
+            'start': self._start, 'count': self._count, 'leaf_regions': self._leaf_regions
+        }
+
+        if target == 'c':
+            header = os.path.join(path, name + '.h')
+            source = os.path.join(path, name + '.c')
+            with open(header, 'w') as f:
+                f.write(_C_HEADER.format(name=name, NAME=name.upper(), n_x=self.n_x, n_u=self.n_u,
+                                         n_regions=self.n_regions))
+            definitions = []
+            for key, value in arrays.items():
+                if value.dtype.kind == 'f':
+                    values = ', '.join(repr(float(v)) for v in value)
+                    definitions.append(f"static const double {key}[] = {{{values if values else '0.'}}};")
+                else:
+                    values = ', '.join(str(int(v)) for v in value)
+                    definitions.append(f"static const int {key}[] = {{{values if values else '0'}}};")
+            with open(source, 'w') as f:
+                f.write(_C_SOURCE.format(name=name, NAME=name.upper(), arrays='\n'.join(definitions)))
+            return [header, source]
+        elif target == 'numpy':
+            module = os.path.join(path, name + '.py')
+            definitions = []
+            for key, value in arrays.items():
+                values = ', '.join(repr(float(v)) if value.dtype.kind == 'f' else str(int(v)) for v in value)
+                dtype = 'float' if value.dtype.kind == 'f' else 'int'
+                definitions.append(f"_{key} = np.array([{values}], dtype={dtype})")
+            with open(module, 'w') as f:
+                f.write(_NUMPY_MODULE.format(n_x=self.n_x, n_u=self.n_u, arrays='\n'.join(definitions)))
+            return [module]
+        else:
+            raise ValueError(f"Target '{target}' not recognized. Possible targets are 'c' and 'numpy'.")
+
+
+_C_HEADER = """/* Explicit MPC evaluator generated by HILO-MPC */
+#ifndef {NAME}_H
+#define {NAME}_H
+
+#define {NAME}_N_X {n_x}
+#define {NAME}_N_U {n_u}
+#define {NAME}_N_REGIONS {n_regions}
+
+int {name}_evaluate(const double *x, double *u);
+
+#endif
+"""
+
+
+_C_SOURCE = """/* Explicit MPC evaluator generated by HILO-MPC */
+#include "{name}.h"
+
+{arrays}
+
+int {name}_evaluate(const double *x, double *u) {{
+    int node = 0, i, j, r, row;
+    while (left[node] >= 0) {{
+        node = (x[axis[node]] <= threshold[node]) ? left[node] : right[node];
+    }}
+    for (i = start[node]; i < start[node] + count[node]; ++i) {{
+        r = leaf_regions[i];
+        for (row = offsets[r]; row < offsets[r + 1]; ++row) {{
+            double s = 0.;
+            for (j = 0; j < {NAME}_N_X; ++j) s += H[row * {NAME}_N_X + j] * x[j];
+            if (s > h[row] + 1e-8) break;
+        }}
+        if (row == offsets[r + 1]) {{
+            for (j = 0; j < {NAME}_N_U; ++j) {{
+                double s = k[r * {NAME}_N_U + j];
+                for (row = 0; row < {NAME}_N_X; ++row) s += K[(r * {NAME}_N_U + j) * {NAME}_N_X + row] * x[row];
+                u[j] = s;
+            }}
+            return r;
+        }}
+    }}
+    return -1;
+}}
+"""
+
+
+_NUMPY_MODULE = '''"""Explicit MPC evaluator generated by HILO-MPC"""
+import numpy as np
+
+
+N_X = {n_x}
+N_U = {n_u}
+
+{arrays}
+
+
+def evaluate(x):
+    """
+    Returns the optimal input for the state x or None if no critical region contains x
+
+    :param x:
+    :return:
+    """
+    x = np.asarray(x, dtype=float).ravel()
+    node = 0
+    while _left[node] >= 0:
+        node = _left[node] if x[_axis[node]] <= _threshold[node] else _right[node]
+    for r in _leaf_regions[_start[node]:_start[node] + _count[node]]:
+        rows = slice(_offsets[r], _offsets[r + 1])
+        if np.all(_H.reshape(-1, N_X)[rows] @ x <= _h[rows] + 1e-8):
+            return _K.reshape(-1, N_U, N_X)[r] @ x + _k.reshape(-1, N_U)[r]
+    return None
+'''
+
+
+def _condense(A, B, Q, R, N, x_lb, x_ub, u_lb, u_ub):
+    """
+    Condenses the linear MPC problem to the multiparametric QP
+
+        min 1/2*U'*H*U + x'*F'*U  s.t.  G*U <= w + S*x
+
+    in the inputs U = [u_0, ..., u_{N-1}] with the initial state x as parameter.
+
+    :return:
+    """
+    n_x, n_u = B.shape
+    Phi = np.zeros((N + 1, n_x, n_x))
+    Gamma = np.zeros((N + 1, n_x, N * n_u))
+    Phi[0] = np.eye(n_x)
+    for i in range(1, N + 1):
+        Phi[i] = A @ Phi[i - 1]
+        Gamma[i] = A @ Gamma[i - 1]
+        Gamma[i, :, (i - 1) * n_u:i * n_u] += B
+    Phi = Phi.reshape(-1, n_x)
+    Gamma = Gamma.reshape(-1, N * n_u)
+
+    Q_bar = np.kron(np.eye(N + 1), Q)
+    R_bar = np.kron(np.eye(N), R)
+    H = Gamma.T @ Q_bar @ Gamma + R_bar
+    F = Gamma.T @ Q_bar @ Phi
+
+    # NOTE: The initial state is fixed, so the state constraints are only imposed on the predicted states
+    I_u = np.eye(N * n_u)
+    G = [I_u, -I_u, Gamma[n_x:], -Gamma[n_x:]]
+    w = [np.tile(u_ub, N), -np.tile(u_lb, N), np.tile(x_ub, N), -np.tile(x_lb, N)]
+    S = [np.zeros((N * n_u, n_x)), np.zeros((N * n_u, n_x)), -Phi[n_x:], Phi[n_x:]]
+    G = np.vstack(G)
+    w = np.concatenate(w)
+    S = np.vstack(S)
+    finite = np.isfinite(w)
+    return H, F, G[finite], w[finite], S[finite]
+
+
+def _reduce(E, e):
+    """
+    Normalizes the inequalities E*x <= e and removes the redundant ones. Returns None if the polytope is not
+    full-dimensional.
+
+    :param E:
+    :param e:
+    :return:
+    """
+    from scipy.optimize import linprog
+
+    norm = np.linalg.norm(E, axis=1)
+    zero = norm < _TOL
+    if np.any(e[zero] < -_TOL):
+        return None
+    E = E[~zero] / norm[~zero, None]
+    e = e[~zero] / norm[~zero]
+
+    # Chebyshev ball
+    n_x = E.shape[1]
+    c = np.zeros(n_x + 1)
+    c[-1] = -1.
+    res = linprog(c, A_ub=np.hstack([E, np.ones((E.shape[0], 1))]), b_ub=e,
+                  bounds=n_x * [(None, None)] + [(0., None)], method='highs')
+    if res.status != 0 or -res.fun < 1e-7:
+        return None
+
+    keep = np.ones(E.shape[0], dtype=bool)
+    for i in range(E.shape[0]):
+        keep[i] = False
+        e_relaxed = e[keep]
+        res = linprog(-E[i], A_ub=np.vstack([E[keep], E[i]]), b_ub=np.append(e_relaxed, e[i] + 1.),
+                      bounds=n_x * [(None, None)], method='highs')
+        if res.status != 0 or -res.fun > e[i] + 1e-9:
+            keep[i] = True
+    return E[keep], e[keep]
+
+
+def _interior_point(G, w, S, E, e):
+    """
+    Returns a state in E*x <= e for which the constraints G*U <= w + S*x can be satisfied with the largest slack or
+    None if there is no such state
+
+    :return:
+    """
+    from scipy.optimize import linprog
+
+    n_v = G.shape[1]
+    n_x = S.shape[1]
+    c = np.zeros(n_v + n_x + 1)
+    c[-1] = -1.
+    A_ub = np.vstack([np.hstack([G, -S, np.ones((G.shape[0], 1))]),
+                      np.hstack([np.zeros((E.shape[0], n_v)), E, np.zeros((E.shape[0], 1))])])
+    res = linprog(c, A_ub=A_ub, b_ub=np.concatenate([w, e]), bounds=(n_v + n_x) * [(None, None)] + [(0., 1.)],
+                  method='highs')
+    if res.status != 0:
+        return None
+    return res.x[n_v:n_v + n_x]
+
+
+def _facet_center(E, e, i):
+    """
+    Returns the center of the largest ball in the i-th facet of the polytope E*x <= e
+
+    :return:
+    """
+    from scipy.optimize import linprog
+
+    n_x = E.shape[1]
+    others = np.arange(E.shape[0]) != i
+    c = np.zeros(n_x + 1)
+    c[-1] = -1.
+    # NOTE: Since the rows are normalized, the distance to the other facets is given by the residual of their
+    #  inequalities
+    res = linprog(c, A_ub=np.hstack([E[others], np.ones((others.sum(), 1))]), b_ub=e[others],
+                  A_eq=np.append(E[i], 0.)[None, :], b_eq=e[i:i + 1], bounds=n_x * [(None, None)] + [(0., None)],
+                  method='highs')
+    if res.status != 0:
+        return None
+    return res.x[:n_x]
+
+
+def solve_mpqp(H, F, G, w, S, lb, ub, n_u, max_regions=None):
+    """
+    Solves the multiparametric QP
+
+        min 1/2*U'*H*U + x'*F'*U  s.t.  G*U <= w + S*x,  lb <= x <= ub
+
+    by geometric exploration of the state region. Starting from one critical region, the QP is solved at a point just
+    beyond every facet of a critical region, which yields the active set and thereby the critical region on the other
+    side of the facet. Returns the critical regions and the control laws of the first n_u optimization variables.
+
+    :return:
+    """
+    n_x = F.shape[1]
+    n_v = H.shape[0]
+    H_inv = np.linalg.inv(H)
+    E_box = np.vstack([np.eye(n_x), -np.eye(n_x)])
+    e_box = np.concatenate([ub, -lb])
+
+    # NOTE: Constraints that do not depend on the optimization variables only restrict the state region
+    depends = np.linalg.norm(G, axis=1) > _TOL
+    E_box = np.vstack([E_box, -S[~depends]])
+    e_box = np.concatenate([e_box, w[~depends]])
+    G, w, S = G[depends], w[depends], S[depends]
+    n_c = G.shape[0]
+
+    qp = ca.conic('mpqp', 'qpoases', {'h': ca.DM(H).sparsity(), 'a': ca.DM.ones(n_c, n_v).sparsity()},
+                  {'printLevel': 'none', 'error_on_fail': False})
+
+    def active_set(x):
+        """
+
+        :param x:
+        :return:
+        """
+        sol = qp(h=H, g=F @ x, a=G, lba=-np.inf, uba=w + S @ x)
+        if not qp.stats()['success']:
+            return None
+        return tuple(np.flatnonzero(np.array(sol['lam_a']).ravel() > 1e-8).tolist())
+
+    def critical_region(active):
+        """
+
+        :param active:
+        :return:
+        """
+        active = list(active)
+        inactive = np.setdiff1d(np.arange(n_c), active)
+        if active:
+            G_a = G[active]
+            if np.linalg.matrix_rank(G_a) < len(active):
+                # NOTE: Active sets violating the linear independence constraint qualification are skipped
+                return None
+            Z = G_a @ H_inv @ G_a.T
+            # Lagrange multipliers lambda = Lambda*x + lambda_0
+            Lambda = -np.linalg.solve(Z, S[active] + G_a @ H_inv @ F)
+            lambda_0 = -np.linalg.solve(Z, w[active])
+            L = -H_inv @ (F + G_a.T @ Lambda)
+            l = -H_inv @ G_a.T @ lambda_0
+            E = [G[inactive] @ L - S[inactive], -Lambda, E_box]
+            e = [w[inactive] - G[inactive] @ l, lambda_0, e_box]
+        else:
+            L = -H_inv @ F
+            l = np.zeros(n_v)
+            E = [G @ L - S, E_box]
+            e = [w, e_box]
+        polytope = _reduce(np.vstack(E), np.concatenate(e))
+        if polytope is None:
+            return None
+        return polytope[0], polytope[1], L[:n_u], l[:n_u]
+
+    x = _interior_point(G, w, S, E_box, e_box)
+    if x is None:
+        raise ValueError("The MPC problem is infeasible for all states in the supplied state region.")
+
+    # Step size across the facets of the critical regions
+    eps = 1e-6 * max(1., float(np.max(ub - lb)))
+    regions = []
+    explored = set()
+    queue = [x]
+    while queue:
+        x = queue.pop()
+        if np.any(E_box @ x > e_box + _TOL):
+            continue
+        if any(np.all(region[0] @ x <= region[1] + _TOL) for region in regions):
+            continue
+        active = active_set(x)
+        if active is None or active in explored:
+            continue
+        explored.add(active)
+        region = critical_region(active)
+        if region is None:
+            continue
+        regions.append(region)
+        if max_regions is not None and len(regions) > max_regions:
+            raise RuntimeError(f"The explicit solution has more than {max_regions} critical regions.")
+
+        E, e = region[:2]
+        for i in range(E.shape[0]):
+            center = _facet_center(E, e, i)
+            if center is not None:
+                queue.append(center + eps * E[i])
+
+    offsets = np.cumsum([0] + [region[0].shape[0] for region in regions])
+    H_regions = np.vstack([region[0] for region in regions])
+    h_regions = np.concatenate([region[1] for region in regions])
+    K = np.stack([region[2] for region in regions])
+    k = np.stack([region[3] for region in regions])
+    return H_regions, h_regions, offsets, K, k
+
+
+def setup_solver(mpc, region_lb=None, region_ub=None, leaf_size=4, max_regions=None):
+    """
+    Computes the explicit solution of the linear MPC over the state region region_lb <= x <= region_ub. By default the
+    state constraints of the MPC are used as state region.
+
+    :param mpc:
+    :param region_lb:
+    :param region_ub:
+    :param leaf_size:
+    :param max_regions:
+    :return:
+    """
+    model = mpc._model
+    dt = mpc._sampling_interval
+    try:
+        A = np.array(ca.evalf(ca.substitute(ca.SX(model.state_matrix), model.dt, dt)))
+        B = np.array(ca.evalf(ca.substitute(ca.SX(model.input_matrix), model.dt, dt)))
+    except RuntimeError:
+        raise ValueError("The explicit solution of the linear MPC requires numeric system matrices, i.e. the system "
+                         "matrices may not depend on parameters.")
+
+    x_lb = np.array(ca.DM(mpc._x_lb)).ravel()
+    x_ub = np.array(ca.DM(mpc._x_ub)).ravel()
+    u_lb = np.array(ca.DM(mpc._u_lb)).ravel()
+    u_ub = np.array(ca.DM(mpc._u_ub)).ravel()
+    region_lb = x_lb if region_lb is None else np.array(region_lb, dtype=float).ravel()
+    region_ub = x_ub if region_ub is None else np.array(region_ub, dtype=float).ravel()
+    if not (np.all(np.isfinite(region_lb)) and np.all(np.isfinite(region_ub))):
+        raise ValueError("The explicit solution can only be computed over a bounded state region. Set finite state "
+                         "constraints or supply the solver options 'region_lb' and 'region_ub'.")
+
+    Q = np.array(ca.DM(mpc.Q))
+    R = np.array(ca.DM(mpc.R)).reshape(B.shape[1], B.shape[1])
+    H, F, G, w, S = _condense(A, B, Q, R, mpc.horizon, x_lb, x_ub, u_lb, u_ub)
+    H_regions, h_regions, offsets, K, k = solve_mpqp(H, F, G, w, S, region_lb, region_ub, B.shape[1],
+                                                     max_regions=max_regions)
+    return ExplicitSolution(H_regions, h_regions, offsets, K, k, region_lb, region_ub, leaf_size=leaf_size)
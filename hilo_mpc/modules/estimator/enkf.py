@@ -0,0 +1,621 @@
+#   
+#   This file is part of HILO-MPC
+#
+#   HILO-MPC is a toolbox for easy, flexible and fast development of machine-learning-supported
+#   optimal control and estimation problems
+#
+#   Copyright (c) 2021 Johannes Pohlodek, Bruno Morabito, Rolf Findeisen
+#                      All rights reserved
+#
+#   HILO-MPC is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Lesser General Public License as
+#   published by the Free Software Foundation, either version 3
+#   of the License, or (at your option) any later version.
+#
+#   HILO-MPC is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public License
+#   along with HILO-MPC. If not, see <http://www.gnu.org/licenses/>.
+#
+
+from typing import Optional, Sequence, Union
+import warnings
+
+import casadi as ca
+import numpy as np
+
+from .base import _Estimator
+from .kf import _psd_sqrt
+from ..dynamic_model.dynamic_model import Model
+from ...util.util import convert
+
+
+Numeric = Union[int, float]
+
+
+class EnsembleKalmanFilter(_Estimator):
+    """
+    Ensemble Kalman filter (EnKF) class for state estimation of high-dimensional systems
+
+    The error covariance matrix is represented by an ensemble of states, which is propagated through the model. The
+    analysis step uses the low-rank covariance of the ensemble and perturbed measurements, so that the computational
+    cost scales with the product of the ensemble size and the number of states instead of the third power of the number
+    of states. The full error covariance matrix is never formed during the estimation. Only its diagonal is stored in the
+    solution.
+
+    :param model:
+    :param id: The identifier of the EnKF object. If no identifier is given, a random one will be generated.
+    :param name: The name of the EnKF object. By default the EnKF object has no name.
+    :param plot_backend: Plotting library that is used to visualize estimated data. At the moment only
+        `Matplotlib <https://matplotlib.org/>`_ and `Bokeh <https://bokeh.org/>`_ are supported. By default no plotting
+        library is selected, i.e. no plots can be generated.
+    :param ensemble_size: Number of ensemble members
+    :param inflation: Multiplicative inflation factor of the deviations of the forecast ensemble from its mean. Values
+        larger than 1 counteract the underestimation of the error covariance by small ensembles.
+    :param parallelization: Parallelization of the propagation of the ensemble members (see CasADi's Function.map).
+        Possible values are 'serial' (default), 'openmp' and 'thread'.
+    :param seed: Seed of the random number generator used for the initial ensemble and the perturbations
+    """
+    def __init__(
+            self,
+            model: Model,
+            id: Optional[str] = None,
+            name: Optional[str] = None,
+            plot_backend: Optional[str] = None,
+            ensemble_size: int = 50,
+            inflation: Numeric = 1.,
+            parallelization: str = 'serial',
+            seed: Optional[int] = None
+    ) -> None:
+        """Constructor method"""
+        if model.is_linear():
+            warnings.warn("The supplied model is linear. For better efficiency use an observer targeted at the "
+                          "estimation of linear systems.")
+
+        super().__init__(model, id=id, name=name, plot_backend=plot_backend)
+
+        if parallelization not in ['serial', 'openmp', 'thread']:
+            raise ValueError(f"Parallelization '{parallelization}' not recognized. Available parallelizations are "
+                             f"'serial', 'openmp' and 'thread'.")
+        self._parallelization = parallelization
+
+        self._ensemble_size = None
+        self.ensemble_size = ensemble_size
+        self._inflation = None
+        self.inflation = inflation
+        self._rng = np.random.default_rng(seed)
+
+        self._localization = None
+        self._ensemble_space = False
+        self._ensemble = None
+        self._process_noise_sqrt = None
+        self._measurement_noise_sqrt = None
+        self._measurement_noise_inverse = None
+        self._predict_function = None
+        self._update_function = None
+
+    def _update_type(self) -> None:
+        """
+
+        :return:
+        """
+        self._type = 'ensemble Kalman filter'
+
+    def _set_process_noise(self, var):
+        """
+
+        :param var:
+        :return:
+        """
+        super()._set_process_noise(var)
+        self._process_noise_sqrt = None
+
+    def _set_measurement_noise(self, var):
+        """
+
+        :param var:
+        :return:
+        """
+        super()._set_measurement_noise(var)
+        self._measurement_noise_sqrt = None
+        self._measurement_noise_inverse = None
+
+    def _set_error_covariance(self, P0):
+        """
+
+        :param P0:
+        :return:
+        """
+        if P0 is None:
+            P0 = ca.DM.eye(self._n_x)
+        else:
+            P0 = convert(P0, ca.DM)
+            if not P0.is_square():
+                P0 = ca.diag(P0)
+            if P0.shape != (self._n_x, self._n_x):
+                raise ValueError(f"Dimension mismatch. Supplied dimension is {P0.shape[0]}x{P0.shape[1]}, but required"
+                                 f" dimension is {self._n_x}x{self._n_x}")
+        # NOTE: The initial ensemble is sampled on the first call of estimate(), since the ensemble size could still
+        #  change in the meantime
+        self._error_covariance = P0
+        self._ensemble = None
+        self._solution.set('P', ca.diag(P0))
+
+    def _map_model(self, which: Optional[str] = None) -> ca.Function:
+        """
+        Returns the model function evaluated for all ensemble members at once
+
+        :param which:
+        :return:
+        """
+        x = ca.MX.sym('x', self._model.n_x)
+        up = ca.MX.sym('p', self._model.n_u + self._model.n_p)
+        if which is None:
+            out = self._model(x0=x, p=up)['xf']
+        else:
+            out = self._model(x0=x, p=up, which=which)['yf']
+
+        function = ca.Function('ensemble_member', [x, up], [out], ['x', 'p'], ['y'])
+        return function.map(self._ensemble_size, self._parallelization)
+
+    def _setup_predict(self) -> None:
+        """
+
+        :return:
+        """
+        n_x = self._model.n_x
+        n_u = self._model.n_u
+        n_p = self._model.n_p
+        n_e = self._ensemble_size
+
+        X = ca.MX.sym('X', n_x, n_e)
+        up = ca.MX.sym('p', n_u + n_p)
+        W = ca.MX.sym('W', n_x, n_e)
+
+        # NOTE: At the moment only additive noise is supported
+        X_prop = self._map_model()(X, up) + W
+
+        self._predict_function = ca.Function('prediction_step',
+                                             [X, up, W],
+                                             [X_prop],
+                                             ['X', 'p', 'W'],
+                                             ['X_prop'])
+
+    def _setup_update(self) -> None:
+        """
+
+        :return:
+        """
+        n_x = self._model.n_x
+        n_y = self._n_y
+        n_u = self._model.n_u
+        n_p = self._model.n_p
+        n_e = self._ensemble_size
+
+        X = ca.MX.sym('X', n_x, n_e)
+        y = ca.MX.sym('y', n_y)
+        up = ca.MX.sym('p', n_u + n_p)
+        E = ca.MX.sym('E', n_y, n_e)
+        R = ca.MX.sym('R', (n_y, n_y))
+        R_inv = ca.MX.sym('R_inv', (n_y, n_y))
+        inflation = ca.MX.sym('inflation')
+
+        x_mean = ca.sum2(X) / n_e
+        A = inflation * (X - ca.repmat(x_mean, 1, n_e))
+        X_inf = ca.repmat(x_mean, 1, n_e) + A
+
+        if self._model.n_y == 0:
+            Y = X_inf
+        else:
+            Y = self._map_model(which='meas_function')(X_inf, up)
+        y_mean = ca.sum2(Y) / n_e
+        B = Y - ca.repmat(y_mean, 1, n_e)
+
+        innovation = ca.repmat(y, 1, n_e) + E - Y
+        if self._ensemble_space:
+            # NOTE: With the Woodbury identity B^T*(B*B^T/(N-1) + R)^-1 = M^-1*B^T*R^-1 with M = I + B^T*R^-1*B/(N-1), the
+            #  analysis is carried out in the space of the ensemble members and only N x N systems need to be solved. The
+            #  inverse of R is computed once outside of the function (R is usually diagonal).
+            T = B.T @ R_inv
+            M = ca.DM.eye(n_e) + T @ B / (n_e - 1)
+            X_up = X_inf + A @ ca.solve(M, T @ innovation) / (n_e - 1)
+        else:
+            # NOTE: Only the (tapered) cross covariance between the states and the measurements and the (tapered)
+            #  covariance of the measurements are formed. The n_x x n_x covariance matrix of the ensemble is never
+            #  formed.
+            P_xy = A @ B.T / (n_e - 1)
+            P_yy = B @ B.T / (n_e - 1)
+            if self._localization is not None:
+                rho_xy, rho_yy = self._localization_matrices()
+                P_xy *= rho_xy
+                P_yy *= rho_yy
+            X_up = X_inf + P_xy @ ca.solve(P_yy + R, innovation)
+
+        x_up = ca.sum2(X_up) / n_e
+        A_up = X_up - ca.repmat(x_up, 1, n_e)
+        P_diag = ca.sum2(A_up ** 2) / (n_e - 1)
+
+        self._update_function = ca.Function('update_step',
+                                            [X, y, up, E, R, R_inv, inflation],
+                                            [X_up, x_up, P_diag, y_mean],
+                                            ['X', 'y', 'p', 'E', 'R', 'R_inv', 'inflation'],
+                                            ['X_up', 'x', 'P', 'y_pred'])
+
+    def _localization_matrices(self) -> (ca.DM, ca.DM):
+        """
+        Returns the tapering matrices for the cross covariance between states and measurements and for the covariance of
+        the measurements
+
+        :return:
+        """
+        radius = self._localization['radius']
+        x_coordinates = self._localization['x_coordinates']
+        y_coordinates = self._localization['y_coordinates']
+
+        n_x = self._model.n_x
+        if x_coordinates is None:
+            x_coordinates = np.arange(n_x)
+        x_coordinates = _coordinates(x_coordinates, n_x, 'states')
+
+        if y_coordinates is None:
+            if self._model.n_y == 0:
+                y_coordinates = x_coordinates
+            else:
+                y_coordinates = x_coordinates[self._measured_states()]
+        else:
+            y_coordinates = _coordinates(y_coordinates, self._n_y, 'measurements')
+
+        rho_xy = _gaspari_cohn(_distance(x_coordinates, y_coordinates), radius)
+        rho_yy = _gaspari_cohn(_distance(y_coordinates, y_coordinates), radius)
+        return ca.DM(rho_xy), ca.DM(rho_yy)
+
+    def _measured_states(self) -> np.ndarray:
+        """
+        Returns the index of the state, that every measurement depends on, if every measurement depends on exactly one
+        state
+
+        :return:
+        """
+        x = ca.MX.sym('x', self._model.n_x)
+        up = ca.MX.sym('p', self._model.n_u + self._model.n_p)
+        y = self._model(x0=x, p=up, which='meas_function')['yf']
+        dependency = np.asarray(ca.DM(ca.jacobian(y, x).sparsity(), 1))
+        if not np.all(np.count_nonzero(dependency, axis=1) == 1):
+            raise ValueError("The coordinates of the measurements cannot be derived from the measurement equations, "
+                             "since not every measurement depends on exactly one state. Please supply the coordinates "
+                             "of the measurements.")
+        return np.argmax(dependency, axis=1)
+
+    def _initial_ensemble(self) -> None:
+        """
+
+        :return:
+        """
+        x0 = self._solution.get_by_id('x:f')
+        if self._error_covariance is None:
+            self._set_error_covariance(None)
+        self._ensemble = ca.repmat(x0, 1, self._ensemble_size) + ca.DM(self._sample(self._error_covariance))
+
+    def _sample(self, cov: ca.DM, sqrt: Optional[np.ndarray] = None, n: int = 1) -> np.ndarray:
+        """
+        Returns n times ensemble size samples from the normal distribution with zero mean and the covariance matrix cov
+
+        :param cov:
+        :param sqrt:
+        :param n:
+        :return:
+        """
+        # NOTE: The samples are kept as NumPy arrays, since the conversion to DM is more expensive than the evaluation of
+        #  the filter function for large ensembles
+        if sqrt is None:
+            sqrt = self._noise_sqrt(cov)
+        z = self._rng.standard_normal((cov.size1(), n * self._ensemble_size))
+        if sqrt.ndim == 1:
+            return sqrt[:, None] * z
+        return sqrt @ z
+
+    @staticmethod
+    def _noise_sqrt(cov: ca.DM) -> np.ndarray:
+        """
+        Returns the square root of a diagonal covariance matrix as a vector or the lower triangular factor of a general
+        covariance matrix
+
+        :param cov:
+        :return:
+        """
+        diagonal = _diagonal(cov)
+        if diagonal is not None:
+            return np.sqrt(diagonal)
+        return np.asarray(_psd_sqrt(cov))
+
+    @staticmethod
+    def _noise_inverse(cov: ca.DM) -> ca.DM:
+        """
+        Returns the inverse of a covariance matrix
+
+        :param cov:
+        :return:
+        """
+        diagonal = _diagonal(cov)
+        if diagonal is not None and np.all(diagonal > 0.):
+            return ca.diag(1. / diagonal)
+        try:
+            L_inv = np.linalg.inv(np.linalg.cholesky(np.asarray(cov)))
+        except np.linalg.LinAlgError:
+            raise ValueError("The measurement noise covariance matrix needs to be positive definite for the ensemble "
+                             "Kalman filter without localization.")
+        return ca.DM(L_inv.T @ L_inv)
+
+    def set_localization(
+            self,
+            radius: Numeric,
+            x_coordinates: Optional[Sequence] = None,
+            y_coordinates: Optional[Sequence] = None
+    ) -> None:
+        """
+        Sets the localization of the ensemble covariance by the compactly supported correlation function of Gaspari and
+        Cohn
+
+        Covariances between states and measurements that are further apart than the given radius are set to zero, which
+        suppresses spurious correlations of small ensembles. Needs to be called before the setup.
+
+        :param radius: Distance, at which the correlation function reaches zero
+        :param x_coordinates: Coordinates of the states. Either one coordinate per state or one row of coordinates per
+            state. By default, the index of the state is used as its coordinate.
+        :param y_coordinates: Coordinates of the measurements. If not supplied, every measurement needs to depend on
+            exactly one state and the coordinate of this state is used.
+        :return:
+        """
+        if radius <= 0:
+            raise ValueError("The localization radius needs to be positive.")
+        self._localization = {'radius': radius, 'x_coordinates': x_coordinates, 'y_coordinates': y_coordinates}
+
+    @property
+    def ensemble_size(self) -> int:
+        """
+
+        :return:
+        """
+        return self._ensemble_size
+
+    @ensemble_size.setter
+    def ensemble_size(self, ensemble_size: int) -> None:
+        if int(ensemble_size) != ensemble_size or ensemble_size < 2:
+            raise ValueError("The ensemble size needs to be an integer greater than 1.")
+        self._ensemble_size = int(ensemble_size)
+
+    n_samples = ensemble_size
+
+    @property
+    def inflation(self) -> Numeric:
+        """
+
+        :return:
+        """
+        return self._inflation
+
+    @inflation.setter
+    def inflation(self, inflation: Numeric) -> None:
+        if inflation <= 0:
+            raise ValueError("The inflation factor needs to be positive.")
+        self._inflation = inflation
+
+    @property
+    def ensemble(self) -> Optional[ca.DM]:
+        """
+        Current ensemble of states (one ensemble member per column)
+
+        :return:
+        """
+        return self._ensemble
+
+    @property
+    def error_covariance(self) -> Optional[ca.DM]:
+        """
+        Sample covariance of the current ensemble
+
+        :return:
+        """
+        if self._ensemble is None:
+            return self._error_covariance
+        A = self._ensemble - ca.repmat(ca.sum2(self._ensemble) / self._ensemble_size, 1, self._ensemble_size)
+        return A @ A.T / (self._ensemble_size - 1)
+
+    P = error_covariance
+
+    def setup(self, **kwargs) -> None:
+        """
+
+        :param kwargs:
+        :return:
+        """
+        self._solution.setup(self._model.solution)
+
+        n_x = self._model.n_x
+        n_y = self._model.n_y
+        n_u = self._model.n_u
+        n_p = self._model.n_p
+        n_e = self._ensemble_size
+
+        if n_y == 0:
+            warnings.warn(f"The model has no measurement equations, I am assuming measurements of all states "
+                          f"{self._model.dynamical_state_names} are available.")
+            n_y = n_x
+        self._n_y = n_y
+
+        self._solution.setup('P', P={
+            'values_or_names': ['P_' + str(k) for k in range(n_x)],
+            'description': n_x * ['diagonal of the error covariance matrix'],
+            'labels': n_x * [''],
+            'units': n_x * [''],
+            'shape': (n_x, 0),
+            'data_format': ca.DM
+        })
+
+        # NOTE: The localization destroys the low rank of the ensemble covariance, so the analysis can only be carried
+        #  out in the space of the ensemble members without localization. It only pays off for more measurements than
+        #  ensemble members.
+        self._ensemble_space = self._localization is None and n_e < n_y
+
+        self._setup_predict()
+        self._setup_update()
+
+        X = ca.MX.sym('X', n_x, n_e)
+        y = ca.MX.sym('y', n_y)
+        u = ca.MX.sym('u', n_u)
+        p = ca.MX.sym('p', n_p)
+        up = ca.vertcat(u, p)
+        W = ca.MX.sym('W', n_x, n_e)
+        E = ca.MX.sym('E', n_y, n_e)
+        R = ca.MX.sym('R', (n_y, n_y))
+        R_inv = ca.MX.sym('R_inv', (n_y, n_y))
+        inflation = ca.MX.sym('inflation')
+
+        X_prop = self._predict_function(X, up, W)
+        X_up, x_up, P_diag, y_pred = self._update_function(X_prop, y, up, E, R, R_inv, inflation)
+
+        self._function = ca.Function('function',
+                                     [X, y, up, W, E, R, R_inv, inflation],
+                                     [X_up, x_up, P_diag, y_pred],
+                                     ['X', 'y', 'p', 'W', 'E', 'R', 'R_inv', 'inflation'],
+                                     ['X_up', 'x', 'P', 'y_pred'])
+        self._function = self._generate_function(self._function, **kwargs)
+
+        self._n_x = n_x
+        # self._n_z = n_z
+        self._n_u = n_u
+        self._n_p = n_p
+        # self._n_p_est = n_p_est
+
+        self._process_noise_covariance = ca.DM.zeros((n_x, n_x))
+        self._measurement_noise_covariance = ca.DM.zeros((n_y, n_y))
+        self._process_noise_sqrt = None
+        self._measurement_noise_sqrt = None
+        self._measurement_noise_inverse = None
+        self._ensemble = None
+
+    def estimate(self, *args, **kwargs):
+        """
+
+        :param args:
+        :param kwargs:
+        :return:
+        """
+        self._check_setup()
+
+        kwargs['skip'] = ['x']
+
+        args = self._process_inputs(**kwargs)
+        tf = args.pop('t0')
+        steps = args.pop('steps')
+        if self._ensemble is None:
+            self._initial_ensemble()
+        args['X'] = self._ensemble
+
+        if self._process_noise_sqrt is None:
+            self._process_noise_sqrt = self._noise_sqrt(self._process_noise_covariance)
+        if self._measurement_noise_sqrt is None:
+            self._measurement_noise_sqrt = self._noise_sqrt(self._measurement_noise_covariance)
+        args['W'] = self._sample(self._process_noise_covariance, sqrt=self._process_noise_sqrt, n=steps)
+        args['E'] = self._sample(self._measurement_noise_covariance, sqrt=self._measurement_noise_sqrt, n=steps)
+
+        # NOTE: The analysis in the space of the ensemble members only needs the inverse of R
+        if self._ensemble_space:
+            if self._measurement_noise_inverse is None:
+                self._measurement_noise_inverse = self._noise_inverse(self._measurement_noise_covariance)
+            name, R = 'R_inv', self._measurement_noise_inverse
+        else:
+            name, R = 'R', self._measurement_noise_covariance
+
+        if steps > 1:
+            args[name] = ca.repmat(R, 1, steps)
+            args['inflation'] = ca.repmat(self._inflation, 1, steps)
+            function = self._function.mapaccum(steps)
+            result = function(**args)
+            self._ensemble = result['X_up'][:, -self._ensemble_size:]
+        else:
+            args[name] = R
+            args['inflation'] = self._inflation
+            result = self._function(**args)
+            self._ensemble = result['X_up']
+        if self._model.n_y == 0:
+            self._solution.update(t=tf, x=result['x'], P=result['P'])
+        else:
+            self._solution.update(t=tf, x=result['x'], P=result['P'], y=result['y_pred'])
+
+
+def _diagonal(cov: ca.DM) -> Optional[np.ndarray]:
+    """
+    Returns the diagonal of a covariance matrix, if the covariance matrix is diagonal, and None otherwise
+
+    :param cov:
+    :return:
+    """
+    # NOTE: Converting large DM objects to NumPy arrays is expensive, so the sparsity pattern is checked first
+    if cov.sparsity().is_diag() and cov.nnz() == cov.size1():
+        return np.array(cov.nonzeros())
+    cov = np.asarray(cov)
+    diagonal = np.diag(cov)
+    if np.array_equal(np.diag(diagonal), cov):
+        return diagonal
+    return None
+
+
+def _coordinates(coordinates: Sequence, n: int, which: str) -> np.ndarray:
+    """
+    Returns the coordinates as an array with one row per variable
+
+    :param coordinates:
+    :param n:
+    :param which:
+    :return:
+    """
+    coordinates = np.asarray(coordinates, dtype=float)
+    if coordinates.ndim == 1:
+        coordinates = coordinates[:, None]
+    if coordinates.shape[0] != n:
+        raise ValueError(f"Dimension mismatch. Supplied number of coordinates of the {which} is {coordinates.shape[0]}, "
+                         f"but required number is {n}.")
+    return coordinates
+
+
+def _distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Returns the Euclidean distances between all rows of a and all rows of b
+
+    :param a:
+    :param b:
+    :return:
+    """
+    return np.sqrt(np.sum((a[:, None, :] - b[None, :, :]) ** 2, axis=2))
+
+
+def _gaspari_cohn(distance: np.ndarray, radius: Numeric) -> np.ndarray:
+    """
+    Returns the fifth-order piecewise rational correlation function of Gaspari and Cohn, which is 1 for a distance of 0
+    and 0 for distances larger than the radius
+
+    :param distance:
+    :param radius:
+    :return:
+    """
+    r = 2. * np.abs(distance) / radius
+    rho = np.zeros_like(r)
+
+    near = r <= 1.
+    rn = r[near]
+    rho[near] = -rn ** 5 / 4 + rn ** 4 / 2 + 5 * rn ** 3 / 8 - 5 * rn ** 2 / 3 + 1
+
+    far = (r > 1.) & (r < 2.)
+    rf = r[far]
+    rho[far] = rf ** 5 / 12 - rf ** 4 / 2 + 5 * rf ** 3 / 8 + 5 * rf ** 2 / 3 - 5 * rf + 4 - 2 / (3 * rf)
+
+    return rho
+
+
+__all__ = [
+    'EnsembleKalmanFilter'
+]
@@ -21,8 +21,10 @@
 #   along with HILO-MPC. If not, see <http://www.gnu.org/licenses/>.
 #
 
+from __future__ import annotations
+
 from abc import ABCMeta, abstractmethod
-from typing import Optional, Union
+from typing import Any, Optional, Union
 import warnings
 
 import casadi as ca
@@ -43,6 +45,8 @@ class _KalmanFilter(_Estimator, metaclass=ABCMeta):
         `Matplotlib <https://matplotlib.org/>`_ and `Bokeh <https://bokeh.org/>`_ are supported. By default, no plotting
         library is selected, i.e. no plots can be generated.
     :param square_root_form: Not used at the moment (will be implemented in the future)
+    :param joseph_form: Whether to use the Joseph form of the update of the error covariance matrix, which keeps the
+        error covariance matrix symmetric and positive semi-definite in the presence of rounding errors
     """
     def __init__(
             self,
@@ -50,12 +54,14 @@ class _KalmanFilter(_Estimator, metaclass=ABCMeta):
             id: Optional[str] = None,
             name: Optional[str] = None,
             plot_backend: Optional[str] = None,
-            square_root_form: bool = True
+            square_root_form: bool = True,
+            joseph_form: bool = False
     ) -> None:
         """Constructor method"""
         super().__init__(model, id=id, name=name, plot_backend=plot_backend)
 
         self._square_root_form = square_root_form
+        self._joseph_form = joseph_form
         self._predict_function = None
         self._update_function = None
         self._is_linearized = False
@@ -177,7 +183,12 @@ class _KalmanFilter(_Estimator, metaclass=ABCMeta):
         K = ca.solve(P_yy.T, P_xy.T).T
 
         x_up = x + K @ (y - y_pred)
-        P_up = P - K @ P_yy @ K.T
+        if self._joseph_form:
+            I_KH = ca.DM.eye(n_x) - K @ H
+            P_up = I_KH @ P @ I_KH.T + K @ R @ K.T
+            P_up = (P_up + P_up.T) / 2
+        else:
+            P_up = P - K @ P_yy @ K.T
 
         self._update_function = ca.Function('update_step',
                                             [ca.horzcat(x, P), y, up, R],
@@ -185,6 +196,35 @@ class _KalmanFilter(_Estimator, metaclass=ABCMeta):
                                             ['x0', 'y', 'p', 'R'],
                                             ['x', 'y_pred'])
 
+    def _setup_function(self) -> None:
+        """
+        Combines the prediction and the update step to the function that is evaluated in every estimation step
+
+        :return:
+        """
+        n_x = self._model.n_x
+        n_y = self._model.n_y
+        n_u = self._model.n_u
+        n_p = self._model.n_p
+
+        x = ca.MX.sym('x', n_x)
+        y = ca.MX.sym('y', n_y)
+        u = ca.MX.sym('u', n_u)
+        p = ca.MX.sym('p', n_p)
+        up = ca.vertcat(u, p)
+        P = ca.MX.sym('P', (n_x, n_x))
+        Q = ca.MX.sym('Q', (n_x, n_x))
+        R = ca.MX.sym('R', (n_y, n_y))
+
+        prediction = self._predict_function(ca.horzcat(x, P), up, Q)
+        update, y_pred = self._update_function(prediction, y, up, R)
+
+        self._function = ca.Function('function',
+                                     [ca.horzcat(x, P), y, up, Q, R],
+                                     [update, y_pred],
+                                     ['x0', 'y', 'p', 'Q', 'R'],
+                                     ['x', 'y_pred'])
+
     def check_consistency(self) -> None:
         """
 
@@ -242,29 +282,13 @@ class _KalmanFilter(_Estimator, metaclass=ABCMeta):
         n_u = self._model.n_u
         n_p = self._model.n_p
 
-        x = ca.MX.sym('x', n_x)
-        y = ca.MX.sym('y', n_y)
-        u = ca.MX.sym('u', n_u)
-        p = ca.MX.sym('p', n_p)
-        up = ca.vertcat(u, p)
-        P = ca.MX.sym('P', (n_x, n_x))
-        Q = ca.MX.sym('Q', (n_x, n_x))
-        R = ca.MX.sym('R', (n_y, n_y))
-
         self._setup_parameters()
         self._setup_update(*update_args)
         self._setup_predict(*predict_args)
-
-        prediction = self._predict_function(ca.horzcat(x, P), up, Q)
-        update, y_pred = self._update_function(prediction, y, up, R)
-
-        self._function = ca.Function('function',
-                                     [ca.horzcat(x, P), y, up, Q, R],
-                                     [update, y_pred],
-                                     ['x0', 'y', 'p', 'Q', 'R'],
-                                     ['x', 'y_pred'])
+        self._setup_function()
 
         self.check_consistency()
+        self._function = self._generate_function(self._function, **kwargs)
 
         self._n_x = n_x
         self._n_y = n_y
@@ -273,8 +297,8 @@ class _KalmanFilter(_Estimator, metaclass=ABCMeta):
         self._n_p = n_p
         # self._n_p_est = n_p_est
 
-        self._process_noise_covariance = ca.DM.zeros(Q.shape)
-        self._measurement_noise_covariance = ca.DM.zeros(R.shape)
+        self._process_noise_covariance = ca.DM.zeros((n_x, n_x))
+        self._measurement_noise_covariance = ca.DM.zeros((n_y, n_y))
 
     def estimate(self, *args, **kwargs):
         """
@@ -291,20 +315,41 @@ class _KalmanFilter(_Estimator, metaclass=ABCMeta):
         steps = args.pop('steps')
         # TODO: Maybe create a TimeSeries specifically tailored to estimation, where get_function_args(.) returns last
         #  error covariance as well
-        args['x0'] = ca.horzcat(args['x0'], ca.reshape(self._solution.get_by_id('P:f'), self._n_x, self._n_x))
+        P, Q, R = self._get_covariance_args()
+        args['x0'] = ca.horzcat(args['x0'], P)
 
         if steps > 1:
-            Q = ca.repmat(self._process_noise_covariance, 1, steps)
-            R = ca.repmat(self._measurement_noise_covariance, 1, steps)
+            Q = ca.repmat(Q, 1, steps)
+            R = ca.repmat(R, 1, steps)
             args['Q'] = Q
             args['R'] = R
             function = self._function.mapaccum(steps)
             result = function(**args)
         else:
-            args['Q'] = self._process_noise_covariance
-            args['R'] = self._measurement_noise_covariance
+            args['Q'] = Q
+            args['R'] = R
             result = self._function(**args)
-        self._solution.update(t=tf, x=result['x'][:, 0], P=result['x'][:, 1:][:], y=result['y_pred'])
+        P = self._process_covariance_result(result['x'][:, 1:])
+        self._solution.update(t=tf, x=result['x'][:, 0], P=P[:], y=result['y_pred'])
+
+    def _get_covariance_args(self):
+        """
+        Returns the error covariance matrix as well as the process and measurement noise covariance matrices in the form
+        expected by the filter function
+
+        :return:
+        """
+        P = ca.reshape(self._solution.get_by_id('P:f'), self._n_x, self._n_x)
+        return P, self._process_noise_covariance, self._measurement_noise_covariance
+
+    def _process_covariance_result(self, P):
+        """
+        Returns the error covariance matrix from the corresponding output of the filter function
+
+        :param P:
+        :return:
+        """
+        return P
 
     def predict(self, *args, **kwargs):
         """
@@ -336,6 +381,12 @@ class KalmanFilter(_KalmanFilter):
         `Matplotlib <https://matplotlib.org/>`_ and `Bokeh <https://bokeh.org/>`_ are supported. By default no plotting
         library is selected, i.e. no plots can be generated.
     :param square_root_form: Not used at the moment (will be implemented in the future)
+    :param joseph_form: Whether to use the Joseph form of the update of the error covariance matrix, which keeps the
+        error covariance matrix symmetric and positive semi-definite in the presence of rounding errors
+    :param steady_state: Whether to use the steady-state Kalman filter. The error covariance matrix and the Kalman gain
+        are obtained from the solution of the discrete-time algebraic Riccati equation, which is solved once for the
+        current noise covariance matrices and parameter values. In every estimation step only the mean is propagated.
+        This requires a time-invariant model.
     """
     def __init__(
             self,
@@ -343,14 +394,25 @@ class KalmanFilter(_KalmanFilter):
             id: Optional[str] = None,
             name: Optional[str] = None,
             plot_backend: Optional[str] = None,
-            square_root_form: bool = True
+            square_root_form: bool = True,
+            joseph_form: bool = False,
+            steady_state: bool = False
     ) -> None:
         """Constructor method"""
         if not model.is_linear():
             raise ValueError("The supplied model is nonlinear. Please use an estimator targeted at the estimation of "
                              "nonlinear systems.")
+        if steady_state and model.is_time_variant():
+            raise ValueError("The steady-state Kalman filter requires a time-invariant model.")
 
-        super().__init__(model, id=id, name=name, plot_backend=plot_backend, square_root_form=square_root_form)
+        super().__init__(model, id=id, name=name, plot_backend=plot_backend, square_root_form=square_root_form,
+                         joseph_form=joseph_form)
+
+        self._steady_state = steady_state
+        self._state_matrix = None
+        self._input_matrix = None
+        self._output_matrix = None
+        self._steady_state_solution = None
 
     def _update_type(self) -> None:
         """
@@ -366,6 +428,267 @@ class KalmanFilter(_KalmanFilter):
         """
         pass
 
+    def _setup_predict(self, *args: Optional[ca.Function]) -> None:
+        """
+
+        :param args:
+        :return:
+        """
+        if not self._steady_state:
+            super()._setup_predict(*args)
+            return
+
+        self._state_matrix = args[0]
+
+        n_x = self._model.n_x
+        n_u = self._model.n_u
+        n_p = self._model.n_p
+
+        # NOTE: The input matrix and the affine term of the dynamical equations, which are discretized together with the
+        #  state matrix in _solve_steady_state
+        ode = self._model.dynamical_equations
+        xu = ca.vertcat(self._model.x, self._model.u)
+        self._input_matrix = ca.Function('input_matrix', [self._model.p, self._model.dt],
+                                         [ca.jacobian(ode, self._model.u), ca.substitute(ode, xu, ca.DM.zeros(xu.shape))])
+
+        x = ca.MX.sym('x', n_x)
+        u = ca.MX.sym('u', n_u)
+        p = ca.MX.sym('p', n_p)
+        up = ca.vertcat(u, p)
+        A = ca.MX.sym('A', (n_x, n_x))
+        B = ca.MX.sym('B', (n_x, n_u))
+        c = ca.MX.sym('c', n_x)
+
+        P = ca.SX.sym('P', (n_x, n_x))
+        self._solution.setup('P', P={
+            'values_or_names': [k.name() for k in P.elements()],
+            'description': P.numel() * [''],
+            'labels': P.numel() * [''],
+            'units': P.numel() * [''],
+            'shape': (P.numel(), 0),
+            'data_format': ca.DM
+        })
+
+        # NOTE: The mean is propagated with the discretized system matrices instead of the integrator of the model
+        x_pred = A @ x + B @ u + c
+
+        self._predict_function = ca.Function('prediction_step',
+                                             [x, up, A, B, c],
+                                             [x_pred],
+                                             ['x0', 'p', 'A', 'B', 'c'],
+                                             ['x'])
+
+    def _setup_update(self, *args: Optional[ca.Function]) -> None:
+        """
+
+        :param args:
+        :return:
+        """
+        if not self._steady_state:
+            super()._setup_update(*args)
+            return
+
+        self._output_matrix = args[0]
+
+        n_x = self._model.n_x
+        n_y = self._model.n_y
+        n_u = self._model.n_u
+        n_p = self._model.n_p
+
+        x = ca.MX.sym('x', n_x)
+        u = ca.MX.sym('u', n_u)
+        p = ca.MX.sym('p', n_p)
+        up = ca.vertcat(u, p)
+
+        if n_y == 0:
+            y_pred = x
+            n_y = n_x
+        else:
+            sol = self._model(x0=x, p=up, which='meas_function')
+            y_pred = sol['yf']
+        y = ca.MX.sym('y', n_y)
+        K = ca.MX.sym('K', (n_x, n_y))
+
+        x_up = x + K @ (y - y_pred)
+
+        self._update_function = ca.Function('update_step',
+                                            [x, y, up, K],
+                                            [x_up, y_pred],
+                                            ['x0', 'y', 'p', 'K'],
+                                            ['x', 'y_pred'])
+
+    def _setup_function(self) -> None:
+        """
+
+        :return:
+        """
+        if not self._steady_state:
+            super()._setup_function()
+            return
+
+        self._steady_state_solution = None
+
+        n_x = self._model.n_x
+        n_y = self._model.n_y
+        n_u = self._model.n_u
+        n_p = self._model.n_p
+
+        x = ca.MX.sym('x', n_x)
+        y = ca.MX.sym('y', n_y)
+        u = ca.MX.sym('u', n_u)
+        p = ca.MX.sym('p', n_p)
+        up = ca.vertcat(u, p)
+        K = ca.MX.sym('K', (n_x, n_y))
+        A = ca.MX.sym('A', (n_x, n_x))
+        B = ca.MX.sym('B', (n_x, n_u))
+        c = ca.MX.sym('c', n_x)
+
+        prediction = self._predict_function(x, up, A, B, c)
+        update, y_pred = self._update_function(prediction, y, up, K)
+
+        self._function = ca.Function('function',
+                                     [x, y, up, K, A, B, c],
+                                     [update, y_pred],
+                                     ['x0', 'y', 'p', 'K', 'A', 'B', 'c'],
+                                     ['x', 'y_pred'])
+
+    def _solve_steady_state(self, p: ca.DM) -> dict[str, Any]:
+        """
+        Returns the steady-state Kalman gain and error covariance matrix (after the update step) as well as the
+        discretized system matrices for the given parameter values
+
+        The prediction of the error covariance matrix over one sampling interval is discretized exactly (Van Loan's
+        method for continuous-time models), so that the solution corresponds to the limit of the Kalman filter for the
+        same model. The mean is propagated with the exact zero-order hold discretization of the model. The solution is
+        cached until the parameter values or the noise covariance matrices change.
+
+        :param p:
+        :return:
+        """
+        from scipy.linalg import expm, solve_discrete_are
+
+        key = p.nonzeros()
+        if self._steady_state_solution is not None and self._steady_state_solution['p'] == key:
+            return self._steady_state_solution
+
+        Q = np.asarray(self._process_noise_covariance)
+        R = np.asarray(self._measurement_noise_covariance)
+        n_x = self._n_x
+        n_u = self._n_u
+        # NOTE: For now we ignore time-variant systems (i.e., [] instead of t)
+        F = np.asarray(self._state_matrix(p, self._solution.dt, []))
+        G, c = (np.asarray(matrix) for matrix in self._input_matrix(p, self._solution.dt))
+        H = np.asarray(self._output_matrix(p, self._solution.dt, []))
+        if self._model.discrete:
+            A = F
+            B = G
+            Q_d = Q
+        else:
+            M = np.block([[-F, Q], [np.zeros((n_x, n_x)), F.T]]) * self._solution.dt
+            E = expm(M)
+            A = E[n_x:, n_x:].T
+            Q_d = A @ E[:n_x, n_x:]
+            Q_d = (Q_d + Q_d.T) / 2
+
+            # NOTE: The affine term is treated as an additional input of constant value 1
+            M = np.zeros((n_x + n_u + 1, n_x + n_u + 1))
+            M[:n_x, :n_x] = F
+            M[:n_x, n_x:n_x + n_u] = G
+            M[:n_x, -1:] = c
+            E = expm(M * self._solution.dt)
+            B = E[:n_x, n_x:n_x + n_u]
+            c = E[:n_x, -1:]
+
+        try:
+            P_pred = solve_discrete_are(A.T, H.T, Q_d, R)
+        except (ValueError, np.linalg.LinAlgError) as error:
+            raise RuntimeError(f"The algebraic Riccati equation of the steady-state Kalman filter could not be solved. "
+                               f"Make sure that the system is detectable and the measurement noise covariance matrix is"
+                               f" positive definite. ({error})")
+
+        P_yy = H @ P_pred @ H.T + R
+        K = np.linalg.solve(P_yy.T, H @ P_pred.T).T
+        if self._joseph_form:
+            I_KH = np.eye(n_x) - K @ H
+            P = I_KH @ P_pred @ I_KH.T + K @ R @ K.T
+        else:
+            P = P_pred - K @ P_yy @ K.T
+        P = (P + P.T) / 2
+
+        self._steady_state_solution = {'p': key, 'K': ca.DM(K), 'P': ca.DM(P), 'A': ca.DM(A), 'B': ca.DM(B),
+                                       'c': ca.DM(c)}
+        return self._steady_state_solution
+
+    def estimate(self, *args, **kwargs):
+        """
+
+        :param args:
+        :param kwargs:
+        :return:
+        """
+        if not self._steady_state:
+            super().estimate(*args, **kwargs)
+            return
+
+        self._check_setup()
+
+        args = self._process_inputs(**kwargs)
+        tf = args.pop('t0')
+        steps = args.pop('steps')
+        args['x0'] = args['x0'][:, 0]
+
+        solution = self._solve_steady_state(args['p'][self._n_u:, 0])
+        P = solution['P']
+        if steps > 1:
+            for key in ['K', 'A', 'B', 'c']:
+                args[key] = ca.repmat(solution[key], 1, steps)
+            function = self._function.mapaccum(steps)
+            result = function(**args)
+            P = ca.repmat(P[:], 1, steps)
+        else:
+            for key in ['K', 'A', 'B', 'c']:
+                args[key] = solution[key]
+            result = self._function(**args)
+            P = P[:]
+        self._solution.update(t=tf, x=result['x'], P=P, y=result['y_pred'])
+
+    def _set_process_noise(self, var):
+        """
+
+        :param var:
+        :return:
+        """
+        super()._set_process_noise(var)
+        self._steady_state_solution = None
+
+    def _set_measurement_noise(self, var):
+        """
+
+        :param var:
+        :return:
+        """
+        super()._set_measurement_noise(var)
+        self._steady_state_solution = None
+
+    @property
+    def steady_state(self) -> bool:
+        """
+
+        :return:
+        """
+        return self._steady_state
+
+    @property
+    def gain(self) -> Optional[ca.DM]:
+        """
+        Steady-state Kalman gain (only available for the steady-state Kalman filter after the first estimation step)
+
+        :return:
+        """
+        if self._steady_state_solution is not None:
+            return self._steady_state_solution['K']
+        return None
+
 
 class ExtendedKalmanFilter(_KalmanFilter):
     """
@@ -378,6 +701,8 @@ class ExtendedKalmanFilter(_KalmanFilter):
         `Matplotlib <https://matplotlib.org/>`_ and `Bokeh <https://bokeh.org/>`_ are supported. By default no plotting
         library is selected, i.e. no plots can be generated.
     :param square_root_form: Not used at the moment (will be implemented in the future)
+    :param joseph_form: Whether to use the Joseph form of the update of the error covariance matrix, which keeps the
+        error covariance matrix symmetric and positive semi-definite in the presence of rounding errors
     :note: The same methods and properties as for the :py:class:`Kalman filter <.KalmanFilter>` apply
     """
     def __init__(
@@ -386,14 +711,16 @@ class ExtendedKalmanFilter(_KalmanFilter):
             id: Optional[str] = None,
             name: Optional[str] = None,
             plot_backend: Optional[str] = None,
-            square_root_form: bool = True
+            square_root_form: bool = True,
+            joseph_form: bool = False
     ) -> None:
         """Constructor method"""
         if model.is_linear():
             warnings.warn("The supplied model is linear. For better efficiency use an observer targeted at the "
                           "estimation of linear systems.")
 
-        super().__init__(model, id=id, name=name, plot_backend=plot_backend, square_root_form=square_root_form)
+        super().__init__(model, id=id, name=name, plot_backend=plot_backend, square_root_form=square_root_form,
+                         joseph_form=joseph_form)
 
     def _update_type(self) -> None:
         """
@@ -423,7 +750,13 @@ class UnscentedKalmanFilter(_KalmanFilter):
     :param plot_backend: Plotting library that is used to visualize estimated data. At the moment only
         `Matplotlib <https://matplotlib.org/>`_ and `Bokeh <https://bokeh.org/>`_ are supported. By default no plotting
         library is selected, i.e. no plots can be generated.
-    :param square_root_form: Not used at the moment (will be implemented in the future)
+    :param square_root_form: Whether to propagate the Cholesky factor of the error covariance matrix instead of the
+        error covariance matrix itself (square-root UKF). The Cholesky factor is updated by QR decompositions and rank-one
+        updates, so no Cholesky decomposition is necessary in every step. The methods :meth:`estimate` and
+        :attr:`solution` still work with the error covariance matrix, but :meth:`predict` and :meth:`update` take and
+        return the lower triangular Cholesky factors of the covariance matrices in this case.
+    :param parallelization: Parallelization of the evaluation of the sigma points (see CasADi's Function.map). Possible
+        values are 'serial' (default), 'openmp' and 'thread'.
     """
     def __init__(
             self,
@@ -434,7 +767,8 @@ class UnscentedKalmanFilter(_KalmanFilter):
             beta: Union[int, float] = None,
             kappa: Union[int, float] = None,
             plot_backend: Optional[str] = None,
-            square_root_form: bool = True
+            square_root_form: bool = False,
+            parallelization: str = 'serial'
     ) -> None:
         """Constructor method"""
         if model.is_linear():
@@ -452,11 +786,20 @@ class UnscentedKalmanFilter(_KalmanFilter):
         if kappa is None:
             kappa = 0.
         self._check_parameter_bounds('kappa', kappa)
+        if parallelization not in ['serial', 'openmp', 'thread']:
+            raise ValueError(f"Parallelization '{parallelization}' not recognized. Available parallelizations are "
+                             f"'serial', 'openmp' and 'thread'.")
+        self._parallelization = parallelization
         self._lambda = None
         self._gamma = None
 
         self._weights = None
         self._sqrt = None
+        self._qr = None
+        self._cholupdate = None
+        self._error_covariance_sqrt = None
+        self._process_noise_sqrt = None
+        self._measurement_noise_sqrt = None
 
     def _update_type(self) -> None:
         """
@@ -483,6 +826,33 @@ class UnscentedKalmanFilter(_KalmanFilter):
                 raise ValueError(f"The parameter kappa needs to be greater or equal to 0. Supplied kappa is {value}.")
             self._kappa = value
 
+    def _set_process_noise(self, var):
+        """
+
+        :param var:
+        :return:
+        """
+        super()._set_process_noise(var)
+        self._process_noise_sqrt = None
+
+    def _set_measurement_noise(self, var):
+        """
+
+        :param var:
+        :return:
+        """
+        super()._set_measurement_noise(var)
+        self._measurement_noise_sqrt = None
+
+    def _set_error_covariance(self, P0):
+        """
+
+        :param P0:
+        :return:
+        """
+        super()._set_error_covariance(P0)
+        self._error_covariance_sqrt = None
+
     def _setup_parameters(self) -> None:
         """
 
@@ -502,6 +872,67 @@ class UnscentedKalmanFilter(_KalmanFilter):
         a = ca.SX.sym('a', (n_x, n_x))
         self._sqrt = ca.Function('sqrt', [a], [ca.chol(a)])
 
+        self._qr = {}
+        self._cholupdate = {}
+
+    def _map_sigma_points(self, which: Optional[str] = None) -> ca.Function:
+        """
+        Returns the model function evaluated for all sigma points at once
+
+        :param which:
+        :return:
+        """
+        n_x = self._model.n_x
+
+        x = ca.MX.sym('x', n_x)
+        up = ca.MX.sym('p', self._model.n_u + self._model.n_p)
+        if which is None:
+            out = self._model(x0=x, p=up)['xf']
+        else:
+            out = self._model(x0=x, p=up, which=which)['yf']
+
+        function = ca.Function('sigma_point', [x, up], [out], ['x', 'p'], ['y'])
+        return function.map(2 * n_x + 1, self._parallelization)
+
+    def _weighted_sqrt(self, X: ca.MX, x: ca.MX, S: ca.MX) -> ca.MX:
+        """
+        Returns the Cholesky factor of the weighted covariance of the sigma points X about x plus the covariance with the
+        Cholesky factor S
+
+        :param X:
+        :param x:
+        :param S:
+        :return:
+        """
+        W = self._weights[1, :]
+        D = X - ca.repmat(x, 1, X.size2())
+        A = ca.horzcat(np.sqrt(W[1]) * D[:, 1:], S)
+        # NOTE: The weight of the central sigma point is negative for small values of alpha, which results in a
+        #  downdate of the Cholesky factor
+        sign = -1 if W[0] < 0. else 1
+
+        # NOTE: The QR decompositions and the rank-one updates are set up as separate functions once for every
+        #  dimension, so that the graphs of the prediction and update steps stay small
+        if A.shape not in self._qr:
+            a = ca.MX.sym('a', A.shape)
+            self._qr[A.shape] = ca.Function('qr', [a], [_lower_triangular_factor(a)])
+        L = self._qr[A.shape](A)
+        return self._get_cholupdate(A.size1(), sign)(L, np.sqrt(abs(W[0])) * D[:, 0])
+
+    def _get_cholupdate(self, n: int, sign: int) -> ca.Function:
+        """
+        Returns the function for rank-one updates (sign=1) or downdates (sign=-1) of n-by-n Cholesky factors
+
+        :param n:
+        :param sign:
+        :return:
+        """
+        if (n, sign) not in self._cholupdate:
+            L = ca.SX.sym('L', (n, n))
+            v = ca.SX.sym('v', n)
+            self._cholupdate[(n, sign)] = ca.Function('cholupdate', [L, v], [_cholupdate(L, v, sign)])
+        return self._cholupdate[(n, sign)]
+
     def _setup_predict(self, *args: Optional[ca.Function]) -> None:
         """
 
@@ -519,13 +950,12 @@ class UnscentedKalmanFilter(_KalmanFilter):
 
         P = ca.MX.sym('P', (n_x, n_x))
         Q = ca.MX.sym('Q', (n_x, n_x))
-        P_sqrt = self._sqrt(P)
-        X = [x]
-        for k in range(n_x):
-            X.append(x + self._gamma * P_sqrt[:, k])
-        for k in range(n_x):
-            X.append(x - self._gamma * P_sqrt[:, k])
-        X = ca.horzcat(*X)
+        if self._square_root_form:
+            # NOTE: In the square-root form P and Q are the lower triangular Cholesky factors of the covariance matrices
+            P_sqrt = P
+        else:
+            P_sqrt = self._sqrt(P).T
+        X = ca.repmat(x, 1, 2 * n_x + 1) + self._gamma * ca.horzcat(ca.MX.zeros(n_x, 1), P_sqrt, -P_sqrt)
 
         self._solution.setup('P', P={
             'values_or_names': [P.name() + '_' + str(k) for k in range(P.numel())],
@@ -536,16 +966,15 @@ class UnscentedKalmanFilter(_KalmanFilter):
             'data_format': ca.DM
         })
 
-        sol = self._model(x0=X, p=up)
-        X = sol['xf']
+        X = self._map_sigma_points()(X, up)
 
-        x_pred = ca.MX(0)
-        for k in range(2 * n_x + 1):
-            x_pred += self._weights[0, k] * X[:, k]
+        x_pred = X @ ca.DM(self._weights[0, :])
 
-        P_pred = Q
-        for k in range(2 * n_x + 1):
-            P_pred += self._weights[1, k] * (X[:, k] - x_pred) @ (X[:, k] - x_pred).T
+        if self._square_root_form:
+            P_pred = self._weighted_sqrt(X, x_pred, Q)
+        else:
+            D = X - ca.repmat(x_pred, 1, 2 * n_x + 1)
+            P_pred = D @ ca.diag(ca.DM(self._weights[1, :])) @ D.T + Q
 
         self._predict_function = ca.Function('prediction_step',
                                              [ca.horzcat(x, P), up, Q],
@@ -577,25 +1006,34 @@ class UnscentedKalmanFilter(_KalmanFilter):
                           f"{self._model.dynamical_state_names} are available.")
             Y = X
         else:
-            sol = self._model(x0=X, p=up, which='meas_function')
-            Y = sol['yf']
+            Y = self._map_sigma_points(which='meas_function')(X, up)
 
-        y_pred = ca.MX(0)
-        for k in range(2 * n_x + 1):
-            y_pred += self._weights[0, k] * Y[:, k]
+        y_pred = Y @ ca.DM(self._weights[0, :])
 
         R = ca.MX.sym('R', (n_y, n_y))
-        P_xy = ca.MX(0)
-        P_yy = R
-        for k in range(2 * n_x + 1):
-            P_xy += self._weights[1, k] * (X[:, k] - x) @ (Y[:, k] - y_pred).T
-            P_yy += self._weights[1, k] * (Y[:, k] - y_pred) @ (Y[:, k] - y_pred).T
+        D_x = X - ca.repmat(x, 1, 2 * n_x + 1)
+        D_y = Y - ca.repmat(y_pred, 1, 2 * n_x + 1)
+        P_xy = D_x @ ca.diag(ca.DM(self._weights[1, :])) @ D_y.T
+
+        if self._square_root_form:
+            # NOTE: In the square-root form P and R are the lower triangular Cholesky factors of the covariance matrices
+            S_yy = self._weighted_sqrt(Y, y_pred, R)
+            # K = P_xy*(S_yy*S_yy^T)^-1
+            K = ca.solve(S_yy.T, ca.solve(S_yy, P_xy.T)).T
+
+            x_up = x + K @ (y - y_pred)
+            U = K @ S_yy
+            P_up = P
+            for k in range(U.size2()):
+                P_up = self._get_cholupdate(n_x, -1)(P_up, U[:, k])
+        else:
+            P_yy = D_y @ ca.diag(ca.DM(self._weights[1, :])) @ D_y.T + R
 
-        # NOTE: See NOTE in KalmanFilter.setup()
-        K = ca.solve(P_yy.T, P_xy.T).T
+            # NOTE: See NOTE in KalmanFilter.setup()
+            K = ca.solve(P_yy.T, P_xy.T).T
 
-        x_up = x + K @ (y - y_pred)
-        P_up = P - K @ P_yy @ K.T
+            x_up = x + K @ (y - y_pred)
+            P_up = P - K @ P_yy @ K.T
 
         self._update_function = ca.Function('update_step',
                                             [ca.horzcat(x, P, X), y, up, R],
@@ -603,6 +1041,77 @@ class UnscentedKalmanFilter(_KalmanFilter):
                                             ['x0', 'y', 'p', 'R'],
                                             ['x', 'y_pred'])
 
+    def _get_covariance_args(self):
+        """
+
+        :return:
+        """
+        if not self._square_root_form:
+            return super()._get_covariance_args()
+
+        if self._error_covariance_sqrt is None:
+            P = ca.reshape(self._solution.get_by_id('P:f'), self._n_x, self._n_x)
+            self._error_covariance_sqrt = _psd_sqrt(P)
+        if self._process_noise_sqrt is None:
+            self._process_noise_sqrt = _psd_sqrt(self._process_noise_covariance)
+        if self._measurement_noise_sqrt is None:
+            self._measurement_noise_sqrt = _psd_sqrt(self._measurement_noise_covariance)
+        return self._error_covariance_sqrt, self._process_noise_sqrt, self._measurement_noise_sqrt
+
+    def _process_covariance_result(self, P):
+        """
+
+        :param P:
+        :return:
+        """
+        if not self._square_root_form:
+            return super()._process_covariance_result(P)
+
+        self._error_covariance_sqrt = P
+        return P @ P.T
+
+    def setup(self, **kwargs) -> None:
+        """
+
+        :param kwargs:
+        :return:
+        """
+        super().setup(**kwargs)
+        self._error_covariance_sqrt = None
+        self._process_noise_sqrt = None
+        self._measurement_noise_sqrt = None
+
+    def predict(self, *args, **kwargs):
+        """
+        Evaluates the prediction step of the UKF
+
+        The input 'x0' is the horizontal concatenation [x, P] of the state and the error covariance matrix and 'Q' is
+        the process noise covariance matrix. The output 'x' is the horizontal concatenation [x, P, X] of the predicted
+        state, the predicted error covariance matrix and the propagated sigma points. In the square-root form, P and Q
+        are the lower triangular Cholesky factors of the covariance matrices, i.e. the covariance matrix is P @ P.T.
+
+        :param args:
+        :param kwargs:
+        :return:
+        """
+        return super().predict(*args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        """
+        Evaluates the update step of the UKF
+
+        The input 'x0' is the horizontal concatenation [x, P, X] of the predicted state, the predicted error
+        covariance matrix and the propagated sigma points as returned by :meth:`predict` and 'R' is the measurement
+        noise covariance matrix. The output 'x' is the horizontal concatenation [x, P] of the updated state and error
+        covariance matrix. In the square-root form, P and R are the lower triangular Cholesky factors of the
+        covariance matrices, i.e. the covariance matrix is P @ P.T.
+
+        :param args:
+        :param kwargs:
+        :return:
+        """
+        return super().update(*args, **kwargs)
+
     @property
     def alpha(self) -> float:
         """
@@ -640,6 +1149,72 @@ class UnscentedKalmanFilter(_KalmanFilter):
         self._check_parameter_bounds('kappa', arg)
 
 
+def _psd_sqrt(A: ca.DM) -> ca.DM:
+    """
+    Returns a lower triangular matrix L with L*L^T = A for a symmetric positive semi-definite matrix A
+
+    :param A:
+    :return:
+    """
+    A = np.asarray(A)
+    try:
+        return ca.DM(np.linalg.cholesky(A))
+    except np.linalg.LinAlgError:
+        # NOTE: For singular matrices (e.g. no process noise) the Cholesky decomposition does not exist, but any factor L
+        #  with L*L^T = A can be triangularized with a QR decomposition
+        eigenvalues, eigenvectors = np.linalg.eigh(A)
+        L = eigenvectors * np.sqrt(np.maximum(eigenvalues, 0.))
+        R = np.linalg.qr(L.T, mode='r')
+        return ca.DM(R.T)
+
+
+def _lower_triangular_factor(A: ca.MX) -> ca.MX:
+    """
+    Returns the lower triangular matrix L with non-negative diagonal and L*L^T = A*A^T using a QR decomposition of A^T
+    by Householder reflections
+
+    :param A:
+    :return:
+    """
+    n = A.size1()
+    # NOTE: The Householder reflections are applied to the trailing block of A^T only, so that no element-wise
+    #  assignments are necessary
+    B = A.T
+    rows = []
+    for k in range(n):
+        x = B[:, 0]
+        norm = ca.norm_2(x)
+        v = ca.vertcat(x[0] + ca.if_else(x[0] < 0, -norm, norm), x[1:])
+        vv = ca.dot(v, v)
+        B = B - ca.if_else(vv > 0, 2 * v @ (v.T @ B) / vv, ca.MX.zeros(B.shape))
+        rows.append(ca.horzcat(ca.MX.zeros(1, k), ca.if_else(B[0, 0] < 0, -B[0, :], B[0, :])))
+        B = B[1:, 1:]
+    return ca.vertcat(*rows).T
+
+
+def _cholupdate(L: ca.SX, v: ca.SX, sign: int) -> ca.SX:
+    """
+    Returns the lower triangular Cholesky factor of L*L^T + sign*v*v^T (rank-one update or downdate)
+
+    :param L:
+    :param v:
+    :param sign:
+    :return:
+    """
+    n = L.size1()
+    L = ca.SX(L)
+    v = ca.SX(v)
+    for k in range(n):
+        r = ca.sqrt(L[k, k] ** 2 + sign * v[k] ** 2)
+        c = r / L[k, k]
+        s = v[k] / L[k, k]
+        L[k, k] = r
+        if k < n - 1:
+            L[k + 1:, k] = (L[k + 1:, k] + sign * s * v[k + 1:]) / c
+            v[k + 1:] = c * v[k + 1:] - s * L[k + 1:, k]
+    return L
+
+
 __all__ = [
     'KalmanFilter',
     'ExtendedKalmanFilter',
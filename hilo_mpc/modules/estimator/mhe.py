@@ -53,11 +53,12 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
 
     mhe_opts: options list
 
-    =================== =============================
-    Opts                Description
-    =================== =============================
-    arrival_cost_update Can be smoothing or filtering
-    =================== =============================
+    ==================== ==================================================================================
+    Opts                 Description
+    ==================== ==================================================================================
+    arrival_guess_update Can be smoothing or filtering. The filtering update propagates the guess and the
+                         weights of the arrival cost with an extended Kalman filter (default: smoothing)
+    ==================== ==================================================================================
 
     """
     def __init__(self, model, id=None, name=None, plot_backend=None, time=0) -> None:
@@ -87,6 +88,13 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
         self._arrival_term = 0
         self._horizon_is_reached = False
 
+        # Filtering update of the arrival cost
+        self._arrival_update_function = None
+        self._arrival_measurement_ind = None
+        self._x_arrival = None
+        self._x_arrival_weights = None
+        self._x_arrival_covariance = None
+
         # Initialize the costs
         self.quad_stage_cost = MHEQuadraticCost(self._model)
         self.quad_arrival_cost = MHEQuadraticCost(self._model)
@@ -118,12 +126,18 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
             s_w = ca.SX.sym(s + '_meas')
             self._y_meas = ca.vertcat(*[self._y_meas, s_w])
 
-        # Here the measurements of input, output and time varying parameters
-        self._y_history = []
-        self._u_history = []
-        self._tvp_history = []
+        # Here the measurements of input and output and their time stamps. The windows are preallocated in
+        # self._setup_measurement_windows()
+        self._y_window = None
+        self._u_window = None
+        self._t_window = None
+        self._dt_window = None
+        self._t_last = None
         # Counter that counts the number of measurements collected
         self._meas_counter = 0
+        # Preallocated values of the NLP parameters and the indices of the single entries
+        self._parameter_values = None
+        self._parameter_ind = {}
 
         self.meas_num = len(meas_names)
 
@@ -170,9 +184,14 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
             self._stage_term += self.quad_stage_cost.cost
             self._stage_term_flag = True
 
+        if self._nlp_options['arrival_guess_update'] == 'filtering':
+            variable_weights = ['states']
+        else:
+            variable_weights = None
         self.quad_arrival_cost._setup(x_scale=self._x_scaling, u_scale=self._u_scaling,
                                       p_scale=self._p_scaling,
-                                      w_scale=self._w_scaling)
+                                      w_scale=self._w_scaling,
+                                      variable_weights=variable_weights)
         if self.quad_arrival_cost._is_set:
             self._arrival_term += self.quad_arrival_cost.cost
             self._arrival_term_flag = True
@@ -255,10 +274,131 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
             if self._nlp_options['arrival_guess_update'] == 'smoothing':
                 return self._nlp_solution['x'][self._x_ind[2]]
             elif self._nlp_options['arrival_guess_update'] == 'filtering':
-                raise NotImplementedError("The filtering update is not yet implemented.")
+                return self._x_arrival
         else:
             return self.quad_arrival_cost.x_guess
 
+    def _setup_arrival_update(self):
+        """
+        Sets up the filtering update of the arrival cost. The guess and the weights of the arrival cost are propagated
+        by one time step with an extended Kalman filter that is linearized at the (smoothed) estimate of the first state
+        of the horizon. The weights are the inverse of the error covariance matrix.
+
+        :return:
+        """
+        arrival_states = [iter_ref for iter_ref in self.quad_arrival_cost._iter_ref_list if iter_ref['type'] == 'states']
+        if not arrival_states:
+            raise ValueError("The filtering update of the arrival cost requires the states in the arrival cost. Add "
+                             "them with quad_arrival_cost.add_states().")
+
+        # NOTE: The update is formulated in the unscaled variables, i.e. it needs to be set up before the model is
+        #  scaled
+        model = self._model
+        n_x = model.n_x
+        problem = dict(model)
+        x_scaling = ca.DM(self._x_scaling)
+        u_scaling = ca.DM(self._u_scaling)
+
+        x_hat = ca.MX.sym('x_hat', n_x)
+        x_bar = ca.MX.sym('x_bar', n_x)
+        P = ca.MX.sym('P', n_x, n_x)
+        u = ca.MX.sym('u', model.n_u)
+        p = ca.MX.sym('p', model.n_p)
+        t = ca.MX.sym('t')
+        dt = ca.MX.sym('dt')
+
+        if model.discrete:
+            dynamics = ca.Function('dynamics', [problem['t'], problem['dt'], problem['x'], problem['u'], problem['p']],
+                                   [problem['ode']])
+            f_hat = dynamics(t, dt, x_hat, u * u_scaling, p)
+        else:
+            dt_int = ca.SX.sym('dt')
+            if model.n_z == 0:
+                dae = {'x': problem['x'], 'p': ca.vertcat(problem['u'], problem['p'], dt_int),
+                       'ode': dt_int * problem['ode']}
+            else:
+                dae = {'x': ca.vertcat(problem['x'], problem['z']),
+                       'p': ca.vertcat(problem['u'], problem['p'], dt_int),
+                       'ode': ca.vertcat(dt_int * problem['ode'], problem['alg'])}
+            opts = {'abstol': 1e-10, 'reltol': 1e-10, 'tf': 1.}
+            integrator = ca.integrator('integrator_arrival', model.solver, dae, opts)
+            f_hat = integrator(x0=ca.vertcat(x_hat, ca.DM.zeros(model.n_z)), p=ca.vertcat(u * u_scaling, p, dt))['xf']
+            f_hat = f_hat[:n_x]
+        A = ca.jacobian(f_hat, x_hat)
+
+        # Process noise (the state noise enters the scaled dynamics)
+        if self._state_noise_flag:
+            D = ca.diag(x_scaling / ca.DM(self._w_scaling))
+            Q = D @ ca.solve(ca.DM(self.quad_stage_cost._w_weights), D)
+        else:
+            Q = ca.DM.zeros(n_x, n_x)
+
+        # Measurements (only the measurements in the stage cost are considered)
+        ind_y = []
+        h = []
+        R = []
+        offset = 0
+        for tv_ref in self.quad_stage_cost._tv_ref_list:
+            n_ref = tv_ref['placeholder'].shape[0]
+            if tv_ref['type'] == 'measurements':
+                ind_y.extend(range(offset, offset + n_ref))
+                h.append(model.meas[tv_ref['ind']])
+                R.append(ca.solve(ca.DM(tv_ref['weights']), ca.DM.eye(n_ref)))
+            offset += n_ref
+        self._arrival_measurement_ind = ind_y
+        y = ca.MX.sym('y', len(ind_y))
+
+        x_up = x_bar
+        P_up = P
+        if ind_y:
+            measurement = ca.Function('measurement', [problem['x']], [ca.vertcat(*h)])
+            R = ca.diagcat(*R)
+            y_hat = measurement(x_hat)
+            H = ca.jacobian(y_hat, x_hat)
+            S = H @ P @ H.T + R
+            K = ca.solve(S, H @ P).T
+            I_KH = ca.MX.eye(n_x) - K @ H
+            x_up = x_bar + K @ (y - y_hat - H @ (x_bar - x_hat))
+            P_up = I_KH @ P @ I_KH.T + K @ R @ K.T
+
+        x_next = f_hat + A @ (x_up - x_hat)
+        P_next = A @ P_up @ A.T + Q
+        P_next = (P_next + P_next.T) / 2
+        W_next = ca.solve(P_next, ca.MX.eye(n_x))
+
+        self._arrival_update_function = ca.Function('arrival_update', [x_hat, x_bar, P, u, p, y, t, dt],
+                                                    [x_next, P_next, (W_next + W_next.T) / 2],
+                                                    ['x_hat', 'x_bar', 'P', 'u', 'p', 'y', 't', 'dt'],
+                                                    ['x_bar_next', 'P_next', 'W_next'])
+        weights = ca.DM(arrival_states[0]['weights'])
+        self._x_arrival = ca.DM(self.quad_arrival_cost.x_guess)
+        self._x_arrival_weights = weights
+        self._x_arrival_covariance = ca.solve(weights, ca.DM.eye(n_x))
+
+    def _update_arrival_cost(self, x_arrival):
+        """
+        Propagates the guess and the weights of the arrival cost to the next MHE iteration
+
+        :param x_arrival: Guess of the arrival cost that was used in the current MHE iteration
+        :return:
+        """
+        sol = self._nlp_solution['x']
+        x_hat = sol[self._x_ind[0]] * self._x_scaling
+        if self._model.n_p > 0:
+            p = sol[self._p_ind[0]] * self._p_scaling
+        else:
+            p = []
+        # Oldest measurement in the window
+        k = self._meas_counter % self._horizon
+        y = self._y_window[self._arrival_measurement_ind, k]
+        u = self._u_window[:, k]
+
+        update = self._arrival_update_function(x_hat=x_hat, x_bar=x_arrival, P=self._x_arrival_covariance, u=u, p=p,
+                                               y=y, t=self._t_window[k], dt=self._dt_window[k])
+        self._x_arrival = update['x_bar_next']
+        self._x_arrival_covariance = update['P_next']
+        self._x_arrival_weights = update['W_next']
+
     def _update_arrival_param(self):
 
         """
@@ -271,13 +411,42 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
         else:
             return self.quad_arrival_cost.p_guess
 
-    def add_measurements(self, y_meas, u_meas=None):
+    def _setup_measurement_windows(self):
+        """
+        Preallocates the measurement windows and the values of the NLP parameters.
+        Every window stores the horizon twice, i.e. new measurements are written to the columns k and k + horizon. This
+        way the last horizon measurements in chronological order are always given by the columns k + 1 to
+        k + horizon, which can be copied to the NLP parameters without rearranging the window.
+
+        :return:
+        """
+        n_window = 2 * self._horizon
+        self._y_window = np.zeros((self.meas_num, n_window))
+        self._u_window = np.zeros((self._model.n_u, n_window))
+        self._t_window = np.zeros(n_window)
+        self._dt_window = np.zeros(n_window)
+
+        ext_parameters = self._ext_parameters
+        self._parameter_values = np.zeros(ext_parameters.size)
+        self._parameter_ind = {}
+        for key in ext_parameters.keys():
+            ind = np.array(ext_parameters.f[key], dtype=int)
+            shape = ext_parameters[key].shape
+            if shape[1] > 1:
+                # NOTE: The entries are stored in column-major order
+                ind = ind.reshape(shape[1], shape[0]).T
+            self._parameter_ind[key] = ind
+
+    def add_measurements(self, y_meas, u_meas=None, time=None):
         """
         This adds measurements that will appended to the measurements history.
-        At the moment it is assumed that measurements are available ata  constant time interval.
+        The time stamps of the measurements can be irregular. Missing measurements will just lead to a larger sampling
+        interval between two consecutive measurements.
 
         :param y_meas:
-        :param u_meas:
+        :param u_meas: If no input measurements are supplied, the last input measurements are kept
+        :param time: Time stamp of the measurements. If not supplied, the measurements are assumed to be taken one
+            sampling interval after the last measurements (or at the initial time for the first measurements)
         :return:
         """
         if not self._nlp_setup_done:
@@ -291,23 +460,38 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
         # Quality check
         y_meas, u_meas = self._check_measurements(y_meas, u_meas)
 
-        self._y_history.append(y_meas)
+        if time is None:
+            if self._meas_counter == 0:
+                time = self._time
+            else:
+                time = self._t_last + self._sampling_interval
+        elif self._meas_counter > 0 and time <= self._t_last:
+            raise ValueError(f"The time stamps of the measurements must be strictly increasing. The last measurements "
+                             f"were taken at {self._t_last}, but the new measurements at {time}.")
+
+        # Write the measurements into the windows. The oldest measurements will be overwritten.
+        horizon = self._horizon
+        k = self._meas_counter % horizon
+        columns = [k, k + horizon]
+        self._y_window[:, columns] = np.reshape(y_meas, (-1, 1))
         if u_meas is not None:
-            self._u_history.append(u_meas)
+            self._u_window[:, columns] = np.reshape(u_meas, (-1, 1))
+        elif self._meas_counter > 0:
+            self._u_window[:, columns] = self._u_window[:, [k - 1]]
+        self._t_window[columns] = time
+        # NOTE: The last sampling interval of the horizon is used for the one step-ahead prediction
+        self._dt_window[columns] = self._sampling_interval
+        if self._meas_counter > 0:
+            k_prev = (k - 1) % horizon
+            self._dt_window[[k_prev, k_prev + horizon]] = time - self._t_last
+        self._t_last = time
 
         self._meas_counter += 1
 
-        if self._meas_counter == self._horizon:
+        if self._meas_counter >= self._horizon:
             # The horizon has been reached. The MHE can start
             self._horizon_is_reached = True
 
-        if self._meas_counter > self._horizon:
-            # Shift horizon
-            # The last measurements will be forgotten
-            self._y_history.pop(0)
-            if u_meas is not None:
-                self._u_history.pop(0)
-
     def estimate(self, x_arrival=None, p_arrival=None, v0=None, runs=0, **kwargs):
         """
         Compute MHE
@@ -330,12 +514,13 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
         if not isinstance(runs, int) and not runs > 0:
             raise TypeError("the 'runs' parameter must be a positive integer")
 
-        # Update the time
-        self._time += self._sampling_interval
-
         if self._horizon_is_reached:
+            # The estimate is the one step-ahead prediction of the last measurements
+            self._time = self._t_last + self._sampling_interval
+
             # Get external parameters
-            param = self._ext_parameters(0)
+            param = self._parameter_values
+            ind = self._parameter_ind
 
             if x_arrival is not None:
                 x_arrival = check_and_wrap_to_DM(x_arrival)
@@ -347,26 +532,26 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
             else:
                 x_arrival = self._update_arrival_states()
 
-            param['x_arrival'] = x_arrival
+            param[ind['x_arrival']] = ca.DM(x_arrival).full().ravel()
+            if self._nlp_options['arrival_guess_update'] == 'filtering':
+                param[ind['x_arrival_weights']] = self._x_arrival_weights.full()
 
             if self._model.n_p > 0:
                 if p_arrival is not None:
                     p_arrival = check_and_wrap_to_DM(p_arrival)
                 else:
                     p_arrival = self._update_arrival_param()
-                param['p_arrival'] = p_arrival
+                param[ind['p_arrival']] = ca.DM(p_arrival).full().ravel()
 
+            # Measurements in chronological order
+            k = self._meas_counter % self._horizon
+            window = slice(k, k + self._horizon)
             if self._model.n_y > 0:
-                param['y_meas'] = np.array(self._y_history).T  # y_meas must be self._horizon, self.meas_num
+                param[ind['y_meas']] = self._y_window[:, window]
             if self._model.n_u > 0:
-                param['u_meas'] = np.array(self._u_history).T  # y_meas must be self._horizon, self._model.n_u
-
-            # TODO when varying sampling times are implemented, give the possibility to provide varying sampling times.
-            dt_grid = None
-            if dt_grid is None:
-                param['dt'] = ca.repmat(self.sampling_interval, self.horizon)
-
-            param['time'] = self._time
+                param[ind['u_meas']] = self._u_window[:, window]
+            param[ind['dt']] = self._dt_window[window]
+            param[ind['time']] = self._time
 
             if v0 is None:
                 v0 = self._v0
@@ -398,6 +583,9 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
                         self._v0 = sol['x']
                     v00 = v0 + v0 * (1 - 2 * np.random.rand(self._n_v)) * pert_factor
 
+            if self._nlp_options['arrival_guess_update'] == 'filtering':
+                self._update_arrival_cost(x_arrival)
+
             # Get the status of the solver
             self._solver_status_wrapper()
 
@@ -413,11 +601,18 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
                 self._solution.add('t', self._time)
                 return x_opt, None
         else:
+            # Update the time
+            self._time += self._sampling_interval
             return None, None
 
-    def setup(self, options=None, nlp_opts=None, solver='ipopt'):
+    def setup(self, options=None, nlp_opts=None, solver='ipopt', **kwargs):
         """
 
+        :param options:
+        :param nlp_opts:
+        :param solver:
+        :param kwargs: Options for C code generation of the functions evaluated by the NLP solver, i.e. 'c_code',
+            'generator', 'gen_path', 'gen_name' and 'gen_opts'. The compiler can be chosen via :meth:`set_compiler`.
         :return:
         """
         if not self._scaling_is_set:
@@ -447,6 +642,9 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
         # Define cost terms
         self._define_cost_terms()
 
+        if self._nlp_options['arrival_guess_update'] == 'filtering' and self._nlp_setup_done is False:
+            self._setup_arrival_update()
+
         # Scaling...
         self._scale_problem()
 
@@ -462,11 +660,14 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
         # function
         p_arrival = ca.SX.sym('p_arrival', 0)
         x_arrival = ca.SX.sym('x_arrival', 0)
+        x_arrival_weights = ca.SX.sym('x_arrival_weights', 0)
         for iter_ref in self.quad_arrival_cost._iter_ref_list:
             if iter_ref['type'] == 'parameters':
                 p_arrival = iter_ref['placeholder']
             elif iter_ref['type'] == 'states':
                 x_arrival = iter_ref['placeholder']
+                if self._nlp_options['arrival_guess_update'] == 'filtering':
+                    x_arrival_weights = iter_ref['weights_placeholder']
 
         if self._nlp_setup_done is False:
             model = self._model
@@ -474,7 +675,7 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
             # ... objective function.
             if self._arrival_term_flag:
                 self._arrival_term_fun = ca.Function('arrival_term',
-                                                     [model.x, model.p, x_arrival, p_arrival],
+                                                     [model.x, model.p, x_arrival, p_arrival, x_arrival_weights],
                                                      [self._arrival_term])
 
             if self._stage_term_flag:
@@ -581,13 +782,16 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
                 u = problem['u']
                 p = problem['p']
                 z = problem['z']
+                # NOTE: The integration is normalized to the interval [0, 1], so that the sampling intervals within the
+                #  horizon can differ from each other
+                dt = ca.SX.sym('dt')
                 if model.n_z == 0:
-                    dae = {'x': x, 'p': ca.vertcat(u, p, t_ref_placeholder), 'ode': model.ode}
+                    dae = {'x': x, 'p': ca.vertcat(u, p, t_ref_placeholder, dt), 'ode': dt * model.ode}
                 else:
-                    dae = {'x': ca.vertcat(x, z), 'p': ca.vertcat(u, p, t_ref_placeholder),
-                           'ode': ca.vertcat(model.ode, model.alg)}
+                    dae = {'x': ca.vertcat(x, z), 'p': ca.vertcat(u, p, t_ref_placeholder, dt),
+                           'ode': ca.vertcat(dt * model.ode, model.alg)}
 
-                opts = {'abstol': 1e-10, 'reltol': 1e-10, 'tf': self._sampling_interval}
+                opts = {'abstol': 1e-10, 'reltol': 1e-10, 'tf': 1.}
                 int_dynamics_fun = ca.integrator("integrator_ms", model.solver, dae, opts)
             else:
                 raise ValueError(f"Integration {self._nlp_options['integration_method']} not defined.")
@@ -677,6 +881,7 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
             ext_parameters = catools.struct_symMX([catools.entry('tv_p', shape=(self._n_tvp, self._horizon)),
                                                    catools.entry('p_arrival', shape=p_arrival.shape[0]),
                                                    catools.entry('x_arrival', shape=x_arrival.shape[0]),
+                                                   catools.entry('x_arrival_weights', shape=x_arrival_weights.shape),
                                                    catools.entry('u_meas', shape=(self._model.n_u, self._horizon)),
                                                    catools.entry('y_meas',
                                                                  shape=(
@@ -688,6 +893,7 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
             y_meas = ext_parameters['y_meas']
             p_arrival = ext_parameters['p_arrival']
             x_arrival = ext_parameters['x_arrival']
+            x_arrival_weights = ext_parameters['x_arrival_weights']
             _dt = ext_parameters['dt']
             # Constraint function for the NLP
             g = []
@@ -712,10 +918,11 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
 
                 if self._nlp_options['integration_method'] == 'multiple_shooting':
                     # TODO: here somewhere t has to enter
-                    sol = int_dynamics_fun(x0=x_ii, p=ca.vertcat(u_ii, p, y_ii))
+                    sol = int_dynamics_fun(x0=x_ii, p=ca.vertcat(u_ii, p, y_ii, dt_ii))
+                    x_ii_1 = sol['xf'][:model.n_x]
                     # add state noise. I assume the state noise is in discrete form so I need to add it here
                     if self._state_noise_flag:
-                        x_ii_1 = sol['xf'] + w_ii
+                        x_ii_1 = x_ii_1 + w_ii
                 elif self._nlp_options['integration_method'] == 'collocation':
                     [g_coll, x_ii_1] = int_dynamics_fun(
                         time + dt_ii, dt_ii, ip[ii, 0], x_ii, u_ii, zp[ii, 0], p, e_soft_stage, y_ii)
@@ -735,9 +942,13 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
                 g_ub.append(np.zeros(model.n_x))
 
                 # Add lagrange term
+                # NOTE: With the filtering update the arrival cost only contains the information of the measurements
+                #  before the horizon, so the stage cost is also added at the beginning of the horizon.
                 if ii == 0:
                     if self._arrival_term_flag:
-                        J += self._arrival_term_fun(x_ii, p, x_arrival, p_arrival)
+                        J += self._arrival_term_fun(x_ii, p, x_arrival, p_arrival, x_arrival_weights)
+                    if self._stage_term_flag and self._nlp_options['arrival_guess_update'] == 'filtering':
+                        J += self._stage_term_fun(w_ii, x_ii, y_ii)
                 else:
                     if self._stage_term_flag:
                         J += self._stage_term_fun(w_ii, x_ii, y_ii)
@@ -778,11 +989,15 @@ class MovingHorizonEstimator(Estimator, DynamicOptimization):
             self._nlp_setup_done = True
             self._n_v = n_v
             self._ext_parameters = ext_parameters
+            self._setup_measurement_windows()
 
             nlp_dict = {'f': self._J, 'x': self._v, 'p': self._param_npl_mhe, 'g': self._g}
             if self._solver_name == 'ipopt':
-                solver = ca.nlpsol("solver", 'ipopt', nlp_dict, self._nlp_opts)
+                solver = self._generate_nlp_solver('ipopt', nlp_dict, self._nlp_opts, **kwargs)
             elif self._solver_name == 'qpsol':
+                if kwargs.get('c_code', False):
+                    warnings.warn("C code generation is not supported for the QP solver 'qpoases'. Ignoring option "
+                                  "'c_code'.")
                 solver = ca.qpsol("solver", 'qpoases', nlp_dict, self._nlp_opts)
             else:
                 raise ValueError(f"The solver {self._solver_name} does no exist. The possible solver are",
@@ -26,10 +26,10 @@ import warnings
 
 import casadi as ca
 import numpy as np
-from scipy.stats import norm
 
 from .base import _Estimator
 from ..dynamic_model.dynamic_model import Model
+from ...util.probability import lhsnorm
 from ...util.util import convert
 
 
@@ -326,6 +326,7 @@ class ParticleFilter(_Estimator):
                                      [X_prop, Y, update['q']],
                                      ['X', 'y', 'p', 'w', 'v', 'R'],
                                      ['X_prop', 'Y', 'q'])
+        self._function = self._generate_function(self._function, **kwargs)
 
         self._n_x = n_x
         self._n_y = n_y
@@ -422,31 +423,6 @@ class ParticleFilter(_Estimator):
         self._solution.update(t=tf, x=x, X=X[:], P=P[:], y=y)
 
 
-def lhsnorm(mu, sigma, n):
-    """
-
-    :param mu:
-    :param sigma:
-    :param n:
-    :return:
-    """
-    # TODO: Migrate to somewhere in util
-    n_m = mu.size
-    z = np.random.multivariate_normal(mu, sigma, size=n)
-    x = np.zeros_like(z, dtype=z.dtype)
-
-    idz = np.argsort(z, axis=0)
-    for k in range(n_m):
-        x[idz[:, k], k] = np.linspace(1, n, n)
-    x -= np.random.rand(*x.shape)
-    x /= n
-
-    for k in range(n_m):
-        x[:, k] = norm.ppf(x[:, k], loc=mu[k], scale=np.sqrt(sigma[k, k]))
-
-    return x
-
-
 __all__ = [
     'ParticleFilter'
 ]
@@ -23,13 +23,112 @@
 
 from __future__ import annotations
 
-from typing import Optional
+from typing import Callable, Optional
 import warnings
 
 import casadi as ca
 
 from ..base import Base, Equations
 from ...plugins.plugins import LearningManager
+from ...util.util import SX_CALL_NODES
+
+
+_EMBEDDINGS = ['expression', 'function', 'callback']
+
+
+class _LearnedCallback(ca.Callback):
+    """
+    Callback that evaluates a learned component numerically with its own prediction method
+
+    The Jacobian is supplied by the (opaque) CasADi function of the learned component, so that derivatives of any order
+    are available to the solvers. Both the prediction method and the CasADi function refer to the state of the learned
+    component at the time the callback was created.
+
+    :param name:
+    :param predict:
+    :param function:
+    """
+    def __init__(self, name: str, predict: Callable, function: ca.Function) -> None:
+        """Constructor method"""
+        ca.Callback.__init__(self)
+
+        self._predict = predict
+        self._function = function
+        self.construct(name, {})
+
+    def get_n_in(self) -> int:
+        """
+
+        :return:
+        """
+        return 1
+
+    def get_n_out(self) -> int:
+        """
+
+        :return:
+        """
+        return 1
+
+    def get_name_in(self, i: int) -> str:
+        """
+
+        :param i:
+        :return:
+        """
+        return 'features'
+
+    def get_name_out(self, i: int) -> str:
+        """
+
+        :param i:
+        :return:
+        """
+        return 'labels'
+
+    def get_sparsity_in(self, i: int) -> ca.Sparsity:
+        """
+
+        :param i:
+        :return:
+        """
+        return self._function.sparsity_in(i)
+
+    def get_sparsity_out(self, i: int) -> ca.Sparsity:
+        """
+
+        :param i:
+        :return:
+        """
+        return self._function.sparsity_out(i)
+
+    def eval(self, arg: list[ca.DM]) -> list[ca.DM]:
+        """
+
+        :param arg:
+        :return:
+        """
+        return [ca.DM(self._predict(arg[0].full()))]
+
+    def has_jacobian(self) -> bool:
+        """
+
+        :return:
+        """
+        return True
+
+    def get_jacobian(self, name: str, inames: list[str], onames: list[str], opts: dict) -> ca.Function:
+        """
+
+        :param name:
+        :param inames:
+        :param onames:
+        :param opts:
+        :return:
+        """
+        x = ca.MX.sym(inames[0], self._function.sparsity_in(0))
+        out = ca.MX.sym(inames[1], self._function.sparsity_out(0))
+        return ca.Function(name, [x, out], [ca.jacobian(self._function(x), x)], inames, onames, opts)
 
 
 class LearningBase(Base):
@@ -40,13 +139,16 @@ class LearningBase(Base):
     :param labels:
     :param id:
     :param name:
+    :param embedding: how the learned component is embedded into the equations of a model, one of 'expression'
+        (default), 'function' or 'callback'. See :attr:`embedding`.
     """
     def __init__(
             self,
             features: list[str],
             labels: list[str],
             id: Optional[str] = None,
-            name: Optional[str] = None
+            name: Optional[str] = None,
+            embedding: Optional[str] = None
     ) -> None:
         """Constructor method"""
         super().__init__(id=id, name=name)
@@ -56,6 +158,17 @@ class LearningBase(Base):
         self._labels = labels
         self._n_labels = len(labels)
         self._backend = None
+        # NOTE: CasADi doesn't keep the Python object of a callback alive, so the learned component holds on to its
+        #  callback. Callbacks that were replaced after the learned parameters changed might still be referenced by the
+        #  equations of previously set up models and are kept as long as their wrapping function is alive.
+        self._callback = None
+        self._callback_function = None
+        self._callback_state = None
+        self._expired_callbacks = []
+
+        if embedding is None:
+            embedding = 'expression'
+        self.embedding = embedding
 
     __array_ufunc__ = None  # https://stackoverflow.com/questions/38229953/array-and-rmul-operator-in-python-numpy
 
@@ -128,6 +241,104 @@ class LearningBase(Base):
         """
         return self._n_labels
 
+    @property
+    def embedding(self) -> str:
+        """
+        How the learned component is embedded into the equations of a model
+
+        'expression' substitutes the symbolic prediction of the learned component into the equations. 'function' keeps
+        the learned component as a single opaque call node of a CasADi function, such that the size of the functions
+        derived from the model (integrators, linearizations, NLPs and their derivatives) doesn't depend on the size of
+        the learned component. 'callback' additionally evaluates the learned component numerically with its own
+        prediction method (e.g. the vectorized NumPy forward pass of neural networks). Callbacks cannot be used for code
+        generation. Both 'function' and 'callback' require CasADi 3.7 or higher, otherwise 'expression' is used.
+
+        :return:
+        """
+        return self._embedding
+
+    @embedding.setter
+    def embedding(self, embedding: str) -> None:
+        embedding = embedding.lower()
+        if embedding not in _EMBEDDINGS:
+            raise ValueError(f"Embedding '{embedding}' not recognized. Choose one of the following: "
+                             f"{', '.join(_EMBEDDINGS)}")
+        self._embedding = embedding
+
+    def to_function(self, embedding: Optional[str] = None) -> ca.Function:
+        """
+        Returns a CasADi function mapping the features to the (mean) prediction of the labels
+
+        :param embedding: 'expression', 'function' or 'callback', defaults to :attr:`embedding`
+        :return:
+        """
+        if embedding is None:
+            embedding = self._embedding
+        embedding = embedding.lower()
+        if embedding not in _EMBEDDINGS:
+            raise ValueError(f"Embedding '{embedding}' not recognized. Choose one of the following: "
+                             f"{', '.join(_EMBEDDINGS)}")
+
+        if embedding != 'expression' and not SX_CALL_NODES:
+            warnings.warn(f"Embedding '{embedding}' requires CasADi 3.7 or higher. Installed version is "
+                          f"{ca.__version__}. Falling back to embedding 'expression'.")
+            embedding = 'expression'
+
+        if embedding == 'expression':
+            x = ca.SX.sym('x', self._n_features)
+            out = self.predict(x)
+            if isinstance(out, tuple):
+                out = out[0]
+            return ca.Function(type(self).__name__, [x], [out], ['features'], ['labels'])
+
+        if embedding == 'function':
+            return self._opaque_function()
+
+        # NOTE: Only the function wrapping the callback is handed out, so that CasADi keeps track of its references.
+        #  Expired callbacks are dropped as soon as their wrapping function is not referenced anymore.
+        self._expired_callbacks = [callback for callback in self._expired_callbacks if callback[1].alive()]
+        state = self._get_callback_state()
+        if self._callback is None or state != self._callback_state:
+            if self._callback is not None:
+                self._expired_callbacks.append((self._callback, ca.WeakRef(self._callback_function)))
+            function = self._opaque_function()
+            self._callback = _LearnedCallback(type(self).__name__ + '_callback', self._frozen_predict(), function)
+            x = ca.MX.sym('x', self._n_features)
+            self._callback_function = ca.Function(type(self).__name__, [x], [self._callback(x)], ['features'],
+                                                  ['labels'], {'never_inline': True})
+            self._callback_state = state
+        return self._callback_function
+
+    def _frozen_predict(self) -> Callable:
+        """
+        Returns a function evaluating the (mean) prediction numerically, which is not affected by later changes of the
+        learned component
+
+        :return:
+        """
+        function = self.to_function(embedding='expression')
+        return lambda X: function(X).full()
+
+    def _get_callback_state(self) -> tuple:
+        """
+        Returns the state of the learned component the Jacobian of the callback depends on
+
+        :return:
+        """
+        return self._function,
+
+    def _opaque_function(self) -> ca.Function:
+        """
+
+        :return:
+        """
+        # NOTE: The opaque function wraps the SX graph of the prediction, where all the operations on the learned
+        #  parameters (e.g. the inverse of the covariance matrix of a GP) are already evaluated.
+        function = self.to_function(embedding='expression')
+        x = ca.MX.sym('x', self._n_features)
+        return ca.Function(type(self).__name__, [x], function.call([x]), ['features'], ['labels'],
+                           {'never_inline': True})
+
     def update(self, *args):
         """
 
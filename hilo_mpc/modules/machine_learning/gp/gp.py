@@ -23,13 +23,15 @@
 
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+import multiprocessing
+import os
 from typing import Dict, Optional, Sequence, Tuple, TypeVar, Union
 import warnings
 
 import casadi as ca
 import numpy as np
-from scipy import stats
 
 from .inference import Inference
 from .likelihood import Likelihood
@@ -54,6 +56,45 @@ Mu = TypeVar('Mu', bound=Mean)
 Cov = TypeVar('Cov', bound=Kernel)
 
 
+# NOTE: GP of the worker processes. It is inherited from the parent process when the worker is forked, so the solver of
+#  the hyperparameter optimization doesn't need to be pickled.
+_WORKER_ARGUMENTS = None
+
+
+def _initialize_worker(*args) -> None:
+    """
+
+    :param args:
+    :return:
+    """
+    global _WORKER_ARGUMENTS
+    _WORKER_ARGUMENTS = args
+
+
+def _fit_worker(x0: np.ndarray) -> (np.ndarray, float, dict):
+    """
+
+    :param x0:
+    :return:
+    """
+    return _fit_hyperparameters(x0, *_WORKER_ARGUMENTS)
+
+
+def _fit_hyperparameters(x0: np.ndarray, gp: GaussianProcess) -> (np.ndarray, float, dict):
+    """
+
+    :param x0:
+    :param gp:
+    :return:
+    """
+    solver = gp._gp_solver
+    solver.set_initial_guess(x0)
+    solver.solve()
+    x = solver.solution.get_by_id('x:f').full().flatten()
+    log_marginal_likelihood = float(gp._log_marginal_likelihood(x0=x, p=gp._gp_args['p'])['log_marg_lik'])
+    return x, log_marginal_likelihood, solver.stats()
+
+
 @dataclass
 class Data:
     """"""
@@ -133,7 +174,7 @@ class GaussianProcess(LearningBase):
         if len(labels) > 1:
             raise ValueError("Training a GP on multiple labels is not supported. Please use 'MultiOutputGP' to train "
                              "GPs on multiple labels.")
-        super().__init__(features, labels, id=id, name=name)
+        super().__init__(features, labels, id=id, name=name, embedding=kwargs.get('embedding'))
 
         if likelihood is None:
             likelihood = Likelihood.gaussian()
@@ -231,9 +272,13 @@ class GaussianProcess(LearningBase):
 
         self._where_is_what = {}
         self._log_marginal_likelihood = None
+        self._posterior_function = None
+        self._cross_covariance_function = None
+        self._kernel_function = None
         self._gp_solver = None
         self._gp_args = {}
         self._optimization_stats = {}
+        self._restart_stats = []
 
     def __str__(self) -> str:
         """String representation method"""
@@ -628,6 +673,21 @@ class GaussianProcess(LearningBase):
             ['mean', 'variance']
         )
 
+        # NOTE: The following functions are used for the prediction of numerical query points in batches, where the
+        #  Cholesky factorization of the covariance matrix of the training data is only computed once
+        self._posterior_function = ca.Function('posterior', [w, p], [posterior['chol'], posterior['alpha']],
+                                               ['x0', 'p'], ['chol', 'alpha'])
+        self._cross_covariance_function = ca.Function(
+            'cross_covariance',
+            [X, w, p],
+            [self.kernel(X_sym, X), self.mean(X), self.kernel(X, X)],
+            ['X', 'x0', 'p'],
+            ['K_star', 'mean', 'K_star_star']
+        )
+        X_2 = ca.SX.sym('X_2', n)
+        self._kernel_function = ca.Function('kernel', [X, X_2, w, p], [self.kernel(X, X_2)],
+                                            ['X', 'X_2', 'x0', 'p'], ['K'])
+
         self._gp_solver.setup()
 
         self._gp_solver.set_initial_guess(w0)
@@ -657,7 +717,7 @@ class GaussianProcess(LearningBase):
         """
         return float(self._log_marginal_likelihood(x0=self._gp_args['x0'], p=self._gp_args['p'])['log_marg_lik'])
 
-    def fit_model(self) -> None:
+    def fit_model(self, restarts: int = 0, processes: int = 1, seed: Optional[int] = None) -> None:
         """
         Optimizes the hyperparameters by minimizing the negative log marginal likelihood.
 
@@ -665,21 +725,67 @@ class GaussianProcess(LearningBase):
         their targets) and suitable start values and bounds for the hyperparameters, the hyperparameters will be
         adapted by minimizing the negative log marginal likelihood.
 
+        Since the log marginal likelihood is usually multimodal, the optimization can be restarted from random initial
+        guesses of the hyperparameters. These are drawn from the hyperpriors of the hyperparameters or, if no
+        hyperprior is given, from their bounds (see :meth:`~hilo_mpc.util.machine_learning.Parameter.sample`). The
+        hyperparameters with the highest log marginal likelihood are kept. The results of all the optimizations are
+        available via :attr:`restart_stats`.
+
         :Note: Instead of boundary values the string 'fixed' can be passed which flags the hyperparameter, keeping it
             constant during the optimization routine.
 
+        :param restarts: number of optimizations from random initial guesses in addition to the optimization from the
+            current values of the hyperparameters
+        :param processes: number of worker processes for the optimizations. Worker processes are only available on
+            platforms supporting the 'fork' start method, otherwise the optimizations are run serially. If None, the
+            number of CPUs is used.
+        :param seed: seed of the random initial guesses
         :return:
         """
         if self._gp_solver is None:
             raise RuntimeError("The GP has not been set up yet. Please run the setup() method before fitting.")
-
-        self._gp_solver.solve()
-        solution = self._gp_solver.solution
+        if restarts < 0:
+            raise ValueError("The number of restarts needs to be a non-negative integer")
+        if processes is None:
+            processes = os.cpu_count()
+
+        initial_guesses = np.vstack([ca.DM(self._gp_args['x0']).full().T,
+                                     self._sample_initial_guesses(restarts, seed=seed)])
+        if processes > 1 and restarts > 0 and 'fork' not in multiprocessing.get_all_start_methods():
+            warnings.warn("Worker processes require the 'fork' start method, which is not available on this platform. "
+                          "The optimizations are run serially.")
+            processes = 1
+
+        if processes > 1 and restarts > 0:
+            with ProcessPoolExecutor(max_workers=min(processes, restarts + 1),
+                                     mp_context=multiprocessing.get_context('fork'), initializer=_initialize_worker,
+                                     initargs=(self,)) as executor:
+                results = list(executor.map(_fit_worker, initial_guesses))
+        else:
+            results = [_fit_hyperparameters(x0, self) for x0 in initial_guesses]
+
+        self._restart_stats = [{
+            'x0': x0,
+            'x': x,
+            'log_marginal_likelihood': log_marginal_likelihood,
+            'success': stats['success'],
+            'stats': stats
+        } for x0, (x, log_marginal_likelihood, stats) in zip(initial_guesses, results)]
+
+        # NOTE: Unsuccessful optimizations are only considered if none of the optimizations was successful
+        candidates = [k for k, restart in enumerate(self._restart_stats) if
+                      restart['success'] and np.isfinite(restart['log_marginal_likelihood'])]
+        if not candidates:
+            candidates = [k for k, restart in enumerate(self._restart_stats) if
+                          np.isfinite(restart['log_marginal_likelihood'])]
+        if not candidates:
+            candidates = [0]
+        best = max(candidates, key=lambda k: self._restart_stats[k]['log_marginal_likelihood'])
 
         names = [parameter.name for parameter in self.hyperparameters if not parameter.fixed]
-        values = solution.get_by_id('x:f').full().flatten()
+        values = self._restart_stats[best]['x'].copy()
         self.update_hyperparameters(names, values=values)
-        self._optimization_stats = self._gp_solver.stats()
+        self._optimization_stats = self._restart_stats[best]['stats']
         if not self._optimization_stats['success']:  # pragma: no cover
             if self._solver == 'ipopt':
                 return_status = self._optimization_stats['return_status']
@@ -696,24 +802,132 @@ class GaussianProcess(LearningBase):
             warnings.warn(f"Fitting of GP didn't terminate successfully\nSolver message: {message}\n"
                           f"Try to use a different solver")
 
-    def predict(self, X_query: Array, noise_free: bool = False) -> (Array, Array):
+    def _sample_initial_guesses(self, n: int, seed: Optional[int] = None) -> np.ndarray:
         """
 
-        :param X_query:
-        :param noise_free:
+        :param n:
+        :param seed:
         :return:
         """
+        rng = np.random.default_rng(seed)
+        samples = [np.empty((n, 0))]
+        for parameter in self.hyperparameters:
+            if parameter.fixed:
+                continue
+            name = parameter.name
+            prior = parameter.prior
+            if prior is not None and getattr(prior, 'mean', None) is not None and getattr(prior, 'variance',
+                                                                                            None) is not None:
+                # NOTE: The hyperpriors are defined on the decision variables of the hyperparameter optimization
+                samples.append(prior.sample((n, parameter.SX.numel()), rng=rng))
+            else:
+                values = parameter.sample(n, rng=rng)
+                if self._hyp_is_log[name]:
+                    values = np.log(values)
+                    if 'variance' in name:
+                        values /= 2
+                samples.append(values)
+        return np.hstack(samples)
+
+    @property
+    def restart_stats(self) -> list[dict]:
+        """
+        Results of the optimizations of the hyperparameters of the last call to :meth:`fit_model`
+
+        Every entry contains the initial guess ('x0') and the solution ('x') of the decision variables of the
+        optimization, the log marginal likelihood at the solution, whether the solver was successful and the solver
+        statistics. The first entry corresponds to the optimization from the values of the hyperparameters before the
+        fit.
+
+        :return:
+        """
+        return self._restart_stats
+
+    def _get_callback_state(self) -> tuple:
+        """
+
+        :return:
+        """
+        # NOTE: The hyperparameters are arguments of the prediction function, so changing them doesn't rebuild it
+        if self._function is None:
+            return super()._get_callback_state()
+        return self._function, ca.DM(self._gp_args['x0']).full().tobytes(), ca.DM(self._gp_args['p']).full().tobytes()
+
+    def predict(
+            self,
+            X_query: Array,
+            noise_free: bool = False,
+            full_cov: bool = False,
+            batch_size: int = 10000
+    ) -> (Array, Array):
+        """
+        Predicts the mean and the variance of the labels at the query points
+
+        Numerical query points (one per column) are evaluated in batches of at most :obj:`batch_size` points, where
+        only the marginal variances of the query points are computed by default. The full covariance matrix of the
+        query points, e.g. for drawing joint samples, is returned if :obj:`full_cov` is True.
+
+        :param X_query: query points with shape (number of features, number of query points)
+        :param noise_free: whether to exclude the noise variance from the predicted variance
+        :param full_cov: whether to return the full covariance matrix instead of the marginal variances, only
+            supported for numerical query points
+        :param batch_size: maximum number of numerical query points that are evaluated at the same time
+        :return: the mean with shape (1, number of query points) and the variance with shape
+            (1, number of query points) or the covariance matrix with shape (number of query points, number of query
+            points)
+        """
         if self._function is None:
             raise RuntimeError("The GP has not been set up yet. Please run the setup() method before predicting.")
 
-        prediction = self._function(X=X_query, x0=self._gp_args['x0'], p=self._gp_args['p'])
-        mean, var = prediction['mean'], prediction['variance']
-        if not noise_free:
-            var += self.noise_variance.value
+        if isinstance(X_query, (ca.SX, ca.MX)):
+            if full_cov:
+                raise ValueError("The full covariance matrix can only be predicted for numerical query points")
+            prediction = self._function(X=X_query, x0=self._gp_args['x0'], p=self._gp_args['p'])
+            mean, var = prediction['mean'], prediction['variance']
+            if not noise_free:
+                var += self.noise_variance.value
+            return mean, var
+
+        X = ca.DM(X_query).full()
+        if X.shape[0] != self._n_features:
+            raise ValueError(f"Dimension mismatch. Expected {self._n_features} features (rows) in the query points, got "
+                             f"{X.shape[0]}.")
+
+        # NOTE: Imported here, since scipy.linalg is not needed for the symbolic prediction
+        from scipy.linalg import solve_triangular
+
+        x0, p = self._gp_args['x0'], self._gp_args['p']
+        chol, alpha = (k.full() for k in self._posterior_function(x0, p))
+        n_query = X.shape[1]
+        mean = np.empty((1, n_query))
+        if full_cov:
+            v = np.empty((chol.shape[0], n_query))
+        else:
+            var = np.empty((1, n_query))
+        for k in range(0, n_query, batch_size):
+            X_batch = X[:, k:k + batch_size]
+            K_star, prior_mean, K_star_star = self._cross_covariance_function(X_batch, x0, p)
+            K_star = K_star.full()
+            mean[:, k:k + batch_size] = prior_mean.full() + alpha.T @ K_star
+            # NOTE: CasADi's Cholesky decomposition returns an upper triangular matrix, so L^T\k_* is solved here
+            #  (see Rasmussen p.19)
+            v_batch = solve_triangular(chol, K_star, trans='T')
+            if full_cov:
+                v[:, k:k + batch_size] = v_batch
+            else:
+                var[:, k:k + batch_size] = K_star_star.full() - np.sum(v_batch ** 2, axis=0)
+
+        if full_cov:
+            K = self._kernel_function(np.repeat(X, n_query, axis=1), np.tile(X, n_query), x0, p)
+            var = K.full().reshape(n_query, n_query) - v.T @ v
+            if not noise_free:
+                var += float(self.noise_variance.value) * np.eye(n_query)
+        elif not noise_free:
+            var += float(self.noise_variance.value)
 
-        if isinstance(X_query, np.ndarray):
-            mean = mean.full()
-            var = var.full()
+        if not isinstance(X_query, np.ndarray):
+            mean = ca.DM(mean)
+            var = ca.DM(var)
 
         return mean, var
 
@@ -740,6 +954,8 @@ class GaussianProcess(LearningBase):
         elif mean is None and var is None:
             return None
 
+        from scipy import stats
+
         predictive_quantiles = [stats.norm.ppf(q / 100) * np.sqrt(var + float(self.noise_variance.value)) + mean for q
                                 in quantiles]
 
@@ -48,7 +48,9 @@ class Inference(metaclass=ABCMeta):
         self._posterior = {
             'mean': ca.SX(),
             'var': ca.SX(),
-            'log_marginal_likelihood': ca.SX()
+            'log_marginal_likelihood': ca.SX(),
+            'chol': ca.SX(),
+            'alpha': ca.SX()
         }
 
     def __call__(self, *args, **kwargs) -> Optional[Dict[str, Symbolic]]:
@@ -219,6 +221,8 @@ class ExactInference(Inference):
         self._posterior['mean'] = mu
         self._posterior['var'] = var
         self._posterior['log_marginal_likelihood'] = log_marginal_likelihood
+        self._posterior['chol'] = L
+        self._posterior['alpha'] = alpha
 
 
 class Laplace(Inference):
@@ -29,19 +29,22 @@ import numpy as np
 
 from ..base import LearningBase
 from ....plugins.plugins import LearningManager, LearningVisualizationManager, check_version
-from ....util.data import DataSet
-from ....util.machine_learning import net_to_casadi_graph
-from ....util.util import is_list_like
+from ....util.data import ChunkedArray, ChunkedDataSet, DataSet
+from ....util.machine_learning import net_forward_pass, net_to_casadi_graph
+from ....util.util import SX_CALL_NODES, is_list_like
 
 
 ML = TypeVar('ML', bound=LearningBase)
+# NOTE: Networks with at least one layer of this size are built on MX symbols by default, if they can enter SX
+#  expressions as call nodes (see SX_CALL_NODES)
+_MX_LAYER_SIZE = 16
 
 
 class ArtificialNeuralNetwork(LearningBase):
     """Artificial neural network class"""
     def __init__(self, features, labels, id=None, name=None, **kwargs):
         """Constructor method"""
-        super().__init__(features, labels, id=id, name=name)
+        super().__init__(features, labels, id=id, name=name, embedding=kwargs.get('embedding'))
 
         self._layers = []
         self._weights = None
@@ -50,6 +53,7 @@ class ArtificialNeuralNetwork(LearningBase):
         self._hidden = None
 
         self._seed = kwargs.get('seed')
+        self._use_sx = kwargs.get('use_sx')
 
         learning_rate = kwargs.get('learning_rate')
         if learning_rate is None:
@@ -130,6 +134,28 @@ class ArtificialNeuralNetwork(LearningBase):
             # TODO: Return a little more info
             raise RuntimeError("Supplied scaler is missing the attribute 'scale_'")
 
+    def _fit_scaler(self, scaler: Any, data: Union[np.ndarray, ChunkedArray]) -> Union[np.ndarray, ChunkedArray]:
+        """
+
+        :param scaler:
+        :param data:
+        :return:
+        """
+        if isinstance(data, ChunkedArray):
+            # NOTE: Scalers supporting incremental fitting (like the ones of scikit-learn) are fitted chunk by chunk and
+            #  the scaling is applied lazily when the data is read
+            if not hasattr(scaler, 'partial_fit') or not callable(scaler.partial_fit):
+                raise TypeError(f"Data sets stored on disk (ChunkedDataSet) can only be scaled by scalers supporting "
+                                f"incremental fitting (method 'partial_fit'). Supplied scaler "
+                                f"{type(scaler).__name__} doesn't support it.")
+            for chunk in data.iter_chunks():
+                scaler.partial_fit(chunk)
+            self._check_scaler(scaler)
+            return data.with_transform(scaler.transform)
+        scaler.fit(data)
+        self._check_scaler(scaler)
+        return scaler.transform(data)
+
     def _check_data_sets(self, data_sets=None):
         """
 
@@ -143,7 +169,7 @@ class ArtificialNeuralNetwork(LearningBase):
             data_sets = [data_sets]
 
         for data_set in data_sets:
-            if isinstance(data_set, DataSet):
+            if isinstance(data_set, (DataSet, ChunkedDataSet)):
                 for feature in self._features:
                     if feature not in data_set.features:
                         raise ValueError(f"Feature {feature} does not exist in the supplied data set")
@@ -186,6 +212,25 @@ class ArtificialNeuralNetwork(LearningBase):
     def seed(self, seed):
         self._seed = seed
 
+    @property
+    def use_sx(self):
+        """
+        Whether the CasADi graph of the network is built on SX symbols
+
+        If None, the network is built on MX symbols if one of the dense layers has at least 16 nodes, otherwise on SX
+        symbols. SX graphs are expanded into scalar operations, which is efficient for small networks. MX graphs keep
+        the dense layers as matrix-vector products and enter SX expressions, like the equations of a model, as a single
+        call node. Since older versions of CasADi (< 3.7) inline MX graphs called with SX arguments, networks are always
+        built on SX symbols by default there.
+
+        :return:
+        """
+        return self._use_sx
+
+    @use_sx.setter
+    def use_sx(self, use_sx):
+        self._use_sx = use_sx
+
     @property
     def learning_rate(self):
         """
@@ -292,13 +337,58 @@ class ArtificialNeuralNetwork(LearningBase):
         :param bias:
         :return:
         """
-        x = ca.SX.sym('x', self._n_features)
+        use_sx = self._use_sx
+        if use_sx is None:
+            use_sx = not SX_CALL_NODES or all(len(layer) < _MX_LAYER_SIZE for layer in self._layers if
+                                              layer.type.lower() == 'dense')
+        if use_sx:
+            x = ca.SX.sym('x', self._n_features)
+        else:
+            x = ca.MX.sym('x', self._n_features)
         if weights is None and bias is None:
             self._function = self._net.build_graph(x, self._layers, input_scaling=self._scaler_x,
                                                    output_scaling=self._scaler_y)
+            weights, bias = self._net.get_weights_and_bias()
         else:
             self._function = net_to_casadi_graph({'weights': weights, 'bias': bias}, x, self._layers,
                                                  input_scaling=self._scaler_x, output_scaling=self._scaler_y)
+        # NOTE: The weights and biases are stored as NumPy arrays for the vectorized evaluation of numerical query
+        #  points. Symbolic weights can only be evaluated with the CasADi graph.
+        if all(isinstance(k, (np.ndarray, ca.DM, list, tuple)) for k in list(weights) + list(bias)):
+            self._weights = [ca.DM(k).full() for k in weights]
+            self._bias = [ca.DM(k).full().reshape(-1, 1) for k in bias]
+        else:
+            self._weights = None
+            self._bias = None
+
+    def _opaque_function(self) -> ca.Function:
+        """
+
+        :return:
+        """
+        if self._weights is None:
+            return super()._opaque_function()
+
+        # NOTE: Independent of the type of the CasADi graph of the network, the opaque function keeps the dense layers
+        #  as matrix-vector products
+        x = ca.MX.sym('x', self._n_features)
+        function = net_to_casadi_graph({'weights': self._weights, 'bias': self._bias}, x, self._layers,
+                                       input_scaling=self._scaler_x, output_scaling=self._scaler_y)
+        return ca.Function(type(self).__name__, [x], function.call([x])[:1], ['features'], ['labels'],
+                           {'never_inline': True})
+
+    def _frozen_predict(self) -> Callable:
+        """
+
+        :return:
+        """
+        if self._weights is None:
+            return super()._frozen_predict()
+
+        net = {'weights': self._weights, 'bias': self._bias}
+        layers = list(self._layers)
+        scaler_x, scaler_y = self._scaler_x, self._scaler_y
+        return lambda X: net_forward_pass(net, X, layers, input_scaling=scaler_x, output_scaling=scaler_y)
 
     def prepare_data_set(
             self,
@@ -319,22 +409,36 @@ class ArtificialNeuralNetwork(LearningBase):
         :param shuffle:
         :return:
         """
-        data = self._data_sets[0].append(self._data_sets[1:], ignore_index=True, sort=False)
-        if isinstance(data, DataSet):
-            x_data, y_data = data.raw_data
-            # TODO: Make this the default in the future, so we don't have to transpose (therefore transpose for pandas
-            #  objects)
-            x_data = x_data.T
-            y_data = y_data.T
-            # NOTE: I don't think at the moment that a length check is necessary here
+        if all(isinstance(data_set, ChunkedDataSet) for data_set in self._data_sets):
+            # NOTE: Data sets stored on disk are not loaded into memory. Instead, lazy views are used, that are read
+            #  batch-wise during training.
+            for data_set in self._data_sets[1:]:
+                if data_set.features != self._data_sets[0].features or data_set.labels != self._data_sets[0].labels:
+                    raise ValueError(f"Mismatch in the features or labels. Got {data_set.features} and "
+                                     f"{data_set.labels}, expected {self._data_sets[0].features} and "
+                                     f"{self._data_sets[0].labels}.")
+            x_data = ChunkedArray.concatenate([data_set.raw_data[0] for data_set in self._data_sets])
+            y_data = ChunkedArray.concatenate([data_set.raw_data[1] for data_set in self._data_sets])
+        elif any(isinstance(data_set, ChunkedDataSet) for data_set in self._data_sets):
+            raise TypeError("Data sets stored on disk (ChunkedDataSet) cannot be combined with other kinds of data "
+                            "sets")
         else:
-            # NOTE: pandas is assumed here for now
-            x_data = data[self._features].values
-            y_data = data[self._labels].values
+            data = self._data_sets[0].append(self._data_sets[1:], ignore_index=True, sort=False)
+            if isinstance(data, DataSet):
+                x_data, y_data = data.raw_data
+                # TODO: Make this the default in the future, so we don't have to transpose (therefore transpose for
+                #  pandas objects)
+                x_data = x_data.T
+                y_data = y_data.T
+                # NOTE: I don't think at the moment that a length check is necessary here
+            else:
+                # NOTE: pandas is assumed here for now
+                x_data = data[self._features].values
+                y_data = data[self._labels].values
 
-            if len(x_data) != len(y_data):
-                raise ValueError(f"Dimension mismatch. Features have {len(x_data)} entries and labels have "
-                                 f"{len(y_data)} entries.")
+                if len(x_data) != len(y_data):
+                    raise ValueError(f"Dimension mismatch. Features have {len(x_data)} entries and labels have "
+                                     f"{len(y_data)} entries.")
 
         if scale_data or scaler is not None or scaler_backend is not None:
             if scaler is None:
@@ -342,17 +446,13 @@ class ArtificialNeuralNetwork(LearningBase):
             self.set_scaling(scaler, backend=scaler_backend)
 
         if self._scaler_x is not None:
-            self._scaler_x.fit(x_data)
-            self._check_scaler(self._scaler_x)
-            x_data = self._scaler_x.transform(x_data)
+            x_data = self._fit_scaler(self._scaler_x, x_data)
         if self._scaler_y is not None:
-            self._scaler_y.fit(y_data)
-            self._check_scaler(self._scaler_y)
-            y_data = self._scaler_y.transform(y_data)
+            y_data = self._fit_scaler(self._scaler_y, y_data)
 
         # TODO: Add support for data split directly in DataSet class
-        data_set_size = len(data)
-        indices = list(range(data_set_size))
+        data_set_size = len(x_data)
+        indices = np.arange(data_set_size)
         if shuffle:
             np.random.seed(self._seed)
             np.random.shuffle(indices)
@@ -360,17 +460,22 @@ class ArtificialNeuralNetwork(LearningBase):
         train, validate, test = np.split(indices, [int(train_split * data_set_size),
                                                    int((train_split + validation_split) * data_set_size)])
 
-        x_train = x_data[train, :]
-        y_train = y_data[train, :]
-        self._train_data = (x_train, y_train)
+        if isinstance(x_data, ChunkedArray):
+            self._train_data = (x_data.take(train), y_data.take(train))
+            self._validate_data = (x_data.take(validate), y_data.take(validate))
+            self._test_data = (x_data.take(test), y_data.take(test))
+        else:
+            x_train = x_data[train, :]
+            y_train = y_data[train, :]
+            self._train_data = (x_train, y_train)
 
-        x_validate = x_data[validate, :]
-        y_validate = y_data[validate, :]
-        self._validate_data = (x_validate, y_validate)
+            x_validate = x_data[validate, :]
+            y_validate = y_data[validate, :]
+            self._validate_data = (x_validate, y_validate)
 
-        x_test = x_data[test, :]
-        y_test = y_data[test, :]
-        self._test_data = (x_test, y_test)
+            x_test = x_data[test, :]
+            y_test = y_data[test, :]
+            self._test_data = (x_test, y_test)
 
     def set_input_scaling(self, scaler: Union[str, Callable], backend: Optional[str] = None) -> None:
         """
@@ -533,15 +638,49 @@ class ArtificialNeuralNetwork(LearningBase):
         """
         return super().is_setup()
 
-    def predict(self, X_query):
+    def predict(self, X_query, batch_size=10000):
         """
+        Predict the labels at the query points
 
-        :param X_query:
+        Symbolic query points (CasADi SX or MX) are evaluated with the CasADi graph of the network. Numerical query
+        points are propagated through the network at once with NumPy (see :func:`net_forward_pass`). To bound the
+        memory, at most :obj:`batch_size` query points are evaluated at the same time. NumPy arrays are returned for
+        NumPy arrays and CasADi DM otherwise.
+
+        :param X_query: Query points (one query point per column)
+        :param batch_size: Maximum number of numerical query points that are evaluated at the same time
         :return:
         """
-        # TODO: We could also add a predict method to the wrapper and just link here, but this would not work with
-        #  CasADi variables like this
-        return self._function(X_query)[0]
+        if self._function is None:
+            raise RuntimeError("The artificial neural network has not been trained yet")
+        if isinstance(X_query, (ca.SX, ca.MX)):
+            return self._function.call([X_query])[0]
+
+        return_numpy = isinstance(X_query, np.ndarray)
+        X_query = np.asarray(X_query.full() if isinstance(X_query, ca.DM) else X_query, dtype=float)
+        if X_query.ndim < 2:
+            X_query = X_query.reshape(-1, 1)
+        if X_query.shape[0] != self._n_features:
+            raise ValueError(f"Dimension mismatch. Supplied query points have dimension {X_query.shape[0]}, but the "
+                             f"artificial neural network has {self._n_features} features.")
+
+        net = {'weights': self._weights, 'bias': self._bias}
+        n_query = X_query.shape[1]
+        if self._weights is None:
+            y = self._function.call([ca.DM(X_query)])[0].full()
+        elif n_query <= batch_size:
+            y = net_forward_pass(net, X_query, self._layers, input_scaling=self._scaler_x,
+                                 output_scaling=self._scaler_y)
+        else:
+            y = np.empty((self._n_labels, n_query))
+            for start in range(0, n_query, batch_size):
+                y[:, start:start + batch_size] = net_forward_pass(net, X_query[:, start:start + batch_size],
+                                                                  self._layers, input_scaling=self._scaler_x,
+                                                                  output_scaling=self._scaler_y)
+
+        if return_numpy:
+            return y
+        return ca.DM(y)
 
     def show_tensorboard(self, browser=None):
         """
@@ -893,7 +893,7 @@ class DynamicOptimization(Base):
 
         self._solver_name_list_qp = ['qpoases', 'cplex', 'gurobi', 'oopq', 'sqic', 'nlp']
         self._solver_name_list_nlp = ['ipopt', 'bonmin', 'knitro', 'snopt', 'worhp', 'scpgen', 'sqpmethod', 'blocksqp',
-                                      'AmplInterface']
+                                      'fatrop', 'AmplInterface']
 
         self._n_iterations = 0
 
@@ -949,6 +949,37 @@ class DynamicOptimization(Base):
                     print(f"Ups... {self.__class__.__name__} had some problems. The ipopt error message is: "
                           f"{self._solver_status}. " + refer_ipopt)
 
+    def _generate_nlp_solver(self, solver_name, nlp, options, **kwargs):
+        """
+        Creates the NLP solver, where the functions evaluated by the solver are compiled if the keyword argument
+        'c_code' is set to True
+
+        The objective, the constraints and their derivatives (gradient of the objective, Jacobian of the constraints and
+        Hessian of the Lagrangian) are generated as C code and compiled according to the compiler options (see
+        :meth:`set_compiler`). The solver itself is still called through CasADi.
+
+        :param solver_name:
+        :param nlp:
+        :param options:
+        :param kwargs:
+        :return:
+        """
+        use_c_code = kwargs.get('c_code', False)
+        if use_c_code:
+            gen_path, gen_name, gen_opts = self._generator(**kwargs)
+            if gen_path is not None:
+                nlp_function = ca.Function('nlp', [nlp['x'], nlp['p']], [nlp['f'], nlp['g']], ['x', 'p'], ['f', 'g'])
+                # NOTE: The solver is only created to obtain the derivatives required by the respective solver plugin
+                prototype = ca.nlpsol('solver', solver_name, nlp, options)
+                functions = [nlp_function] + [prototype.get_function(name) for name in prototype.get_function()]
+                self._c_name = generate_c_code(functions, gen_path, gen_name, opts=gen_opts)
+                if self._compiler_opts.get('method') in JIT and self._compiler_opts['compiler'] == 'shell':
+                    self._compiler_opts['path'] = gen_path
+                library = self._compile()
+                if library is not None:
+                    return ca.nlpsol('solver', solver_name, library, options)
+        return ca.nlpsol('solver', solver_name, nlp, options)
+
     def _populate_solution(self):
         """
 
@@ -1074,6 +1105,13 @@ class DynamicOptimization(Base):
                 self._solver_status_code = 5
             else:
                 self._solver_status_code = -1
+        else:
+            stats = self._solver.stats()
+            self._solver_status = str(stats.get('return_status', '')).lower()
+            if stats.get('success', False):
+                self._solver_status_code = 1
+            else:
+                self._solver_status_code = -1
 
     def _get_tvp_parameters_values(self):
         """
@@ -1329,14 +1367,25 @@ class DynamicOptimization(Base):
             else:
                 self._nlp_opts = {}
 
+        # NOTE: Plugin-specific options are only accepted by the respective plugin
+        solver = getattr(self, '_solver_name', 'ipopt')
+        if solver == 'ipopt':
+            suppress_output = {'ipopt.suppress_all_output': 'yes'}
+        elif solver == 'fatrop':
+            suppress_output = {'fatrop.print_level': 0}
+        else:
+            suppress_output = {}
+        print_level = solver + '.print_level'
+
         if self._nlp_options_is_set and self._nlp_options['print_level'] == 1:
-            if self._nlp_opts.get('ipopt.print_level') is None:
-                self._nlp_opts['ipopt.suppress_all_output'] = 'yes'
+            if self._nlp_opts.get(print_level) is None:
+                for key, value in suppress_output.items():
+                    self._nlp_opts.setdefault(key, value)
 
             if self._nlp_opts.get('print_time') is None:
                 self._nlp_opts['print_time'] = False
         else:
-            self._nlp_opts['ipopt.suppress_all_output'] = 'yes'
+            self._nlp_opts.update(suppress_output)
             self._nlp_opts['print_time'] = False
 
         self._solver_options_is_set = True
@@ -1375,6 +1424,8 @@ class DynamicOptimization(Base):
         possible_choices['degree'] = None
         possible_choices['print_level'] = [0, 1]
         possible_choices['ipopt_debugger'] = [True, False]
+        possible_choices['ipopt_debugger_options'] = None
+        possible_choices['stage_structure'] = [True, False]
 
         option_list = list(possible_choices.keys())
 
@@ -1385,7 +1436,9 @@ class DynamicOptimization(Base):
             'print_level': 1,
             'warm_start': True,
             'solver': 'ipopt',
-            'ipopt_debugger': False
+            'ipopt_debugger': False,
+            'ipopt_debugger_options': {},
+            'stage_structure': False
         }
 
         if self._model.discrete:
@@ -1415,6 +1468,10 @@ class DynamicOptimization(Base):
                           f" the model is in discrete time. I am overwriting and using discrete mode.")
             default_opts['integration_method'] = 'discrete'
 
+        # fatrop relies on the stage-wise structure of the optimal control problem
+        if default_opts['solver'] == 'fatrop':
+            default_opts['stage_structure'] = True
+
         # Integration methods. Those are necessary for the RungeKutta class
         if default_opts['integration_method'] == 'rk4':
             default_opts['class'] = 'explicit'
@@ -1551,17 +1608,20 @@ class DynamicOptimization(Base):
                              "of the NMPC.")
 
         plot_last = kwargs.get('plot_last', False)
-        numLines = len(self.debugger.g_sols)
+        g_sols = self.debugger.g_sols
+        lam_g_sols = self.debugger.lam_g_sols
+        x_sols = self.debugger.x_sols
+        numLines = len(g_sols)
 
         pg = figure(width=2000, height=1200, title='Nonlinear constraints')
         x = np.arange(0, self._g.shape[0])
         colors_g = itertools.cycle(inferno(numLines))
         if plot_last:
-            y = self.debugger.g_sols[-1]
+            y = g_sols[-1]
             pg.scatter(x, y.squeeze(), color=next(colors_g), legend_label=f'iter. {numLines}', line_width=2)
         else:
             for m in range(numLines):
-                y = self.debugger.g_sols[m]
+                y = g_sols[m]
                 pg.scatter(x, y.squeeze(), color=next(colors_g), legend_label=f'iter. {m}', line_width=2)
 
         # Add sections saying what is what
@@ -1593,11 +1653,11 @@ class DynamicOptimization(Base):
         x = np.arange(0, self._g.shape[0])
         colors_lagg = itertools.cycle(inferno(numLines))
         if plot_last:
-            y = self.debugger.lam_g_sols[-1]
+            y = lam_g_sols[-1]
             plagg.line(x, y.squeeze(), color=next(colors_lagg), legend_label=f'iter. {numLines}')
         else:
             for m in range(numLines):
-                y = self.debugger.lam_g_sols[m]
+                y = lam_g_sols[m]
                 plagg.line(x, y.squeeze(), color=next(colors_lagg), legend_label=f'iter. {m}')
         show(column([pg, plagg]))
 
@@ -1615,12 +1675,12 @@ class DynamicOptimization(Base):
                 dt_pred = np.zeros((self.prediction_horizon))
 
                 for ii in range(self.prediction_horizon + 1):
-                    x_pred[:, ii] = np.array(self.debugger.x_sols[-1])[self._x_ind[ii]] * self._x_scaling
+                    x_pred[:, ii] = np.array(x_sols[-1])[self._x_ind[ii]] * self._x_scaling
                 for ii in range(self.control_horizon):
-                    u_pred[:, ii] = np.array(self.debugger.x_sols[-1])[self._u_ind[ii]] * self._u_scaling
+                    u_pred[:, ii] = np.array(x_sols[-1])[self._u_ind[ii]] * self._u_scaling
                 if len(self._dt_ind) > 0:
                     for ii in range(self.prediction_horizon):
-                        dt_pred[ii] = np.array(self.debugger.x_sols[-1])[self._dt_ind[ii]]
+                        dt_pred[ii] = np.array(x_sols[-1])[self._dt_ind[ii]]
                 else:
                     dt_pred = np.arange(0, (self.prediction_horizon + 1) * self._sampling_interval,
                                         self._sampling_interval)
@@ -1635,12 +1695,12 @@ class DynamicOptimization(Base):
                     dt_pred = np.zeros((self.prediction_horizon))
 
                     for ii in range(self.prediction_horizon + 1):
-                        x_pred[:, ii] = np.array(self.debugger.x_sols[m])[self._x_ind[ii]] * self._x_scaling
+                        x_pred[:, ii] = np.array(x_sols[m])[self._x_ind[ii]] * self._x_scaling
                     for ii in range(self.control_horizon):
-                        u_pred[:, ii] = np.array(self.debugger.x_sols[m])[self._u_ind[ii]] * self._u_scaling
+                        u_pred[:, ii] = np.array(x_sols[m])[self._u_ind[ii]] * self._u_scaling
                     if len(self._dt_ind) > 0:
                         for ii in range(self.prediction_horizon):
-                            dt_pred[ii] = np.array(self.debugger.x_sols[m])[self._dt_ind[ii]]
+                            dt_pred[ii] = np.array(x_sols[m])[self._dt_ind[ii]]
                     else:
                         dt_pred = np.arange(0, (self.prediction_horizon + 1) * self._sampling_interval,
                                             self._sampling_interval)
@@ -31,7 +31,7 @@ from torch.nn import Module, ModuleList, Linear, Dropout, MSELoss, L1Loss, Cosin
 from torch.nn import functional as F
 from torch.optim import Adadelta, Adagrad, Adam, AdamW, SparseAdam, Adamax, ASGD, LBFGS, RMSprop, Rprop, SGD
 from torch.optim.lr_scheduler import ReduceLROnPlateau
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import BatchSampler, DataLoader, Dataset, RandomSampler, SequentialSampler
 
 from ...util.machine_learning import net_to_casadi_graph
 
@@ -88,6 +88,30 @@ class _DataSet(Dataset):
         return self.features[item, :], self.labels[item, :]
 
 
+class _LazyDataSet(Dataset):
+    """
+    Data set for data that is read batch-wise on access, e.g. from files on disk
+
+    Items are whole batches, i.e. lists of indices supplied by a batch sampler.
+    """
+    def __init__(self, x_data, y_data, device, dtype):
+        """Constructor method"""
+        self.features = x_data
+        self.labels = y_data
+        self._device = device
+        self._dtype = dtype
+
+    def __len__(self):
+        """Length method"""
+        return len(self.features)
+
+    def __getitem__(self, item):
+        """Item getter method"""
+        x = torch.tensor(self.features[item], device=self._device, dtype=self._dtype)
+        y = torch.tensor(self.labels[item], device=self._device, dtype=self._dtype)
+        return x, y
+
+
 class _EarlyStopping:
     """"""
     def __init__(self, folder='.', patience=7, verbose=False, delta=0, debug=False):
@@ -342,6 +366,11 @@ class _PyTorchWrapper:
         :param shuffle:
         :return:
         """
+        if not isinstance(data[0], np.ndarray):
+            # NOTE: Data that is not in memory (e.g. from a ChunkedDataSet) is read one batch at a time
+            data_set = _LazyDataSet(data[0], data[1], self._device, self._dtype)
+            sampler = RandomSampler(data_set) if shuffle else SequentialSampler(data_set)
+            return DataLoader(data_set, batch_size=None, sampler=BatchSampler(sampler, batch_size, False))
         x_data = torch.tensor(data[0], device=self._device, dtype=self._dtype)
         y_data = torch.tensor(data[1], device=self._device, dtype=self._dtype)
         data_set = _DataSet(x_data, y_data)
@@ -26,6 +26,7 @@ from distutils.version import StrictVersion
 from typing import Optional
 import warnings
 
+import numpy as np
 import tensorflow as tf
 from tensorflow.keras import Model
 from tensorflow.keras.layers import Dense, Dropout, Input
@@ -151,6 +152,8 @@ class _TensorFlowWrapper:
         :param batch_size:
         :return:
         """
+        if not isinstance(data[0], np.ndarray):
+            return self._get_lazy_data_loader(data, batch_size, shuffle)
         data_loader = tf.data.Dataset.from_tensor_slices(data)
         if shuffle:
             data_loader = data_loader.shuffle(len(data_loader), seed=self._seed,
@@ -159,6 +162,41 @@ class _TensorFlowWrapper:
             data_loader = data_loader.batch(batch_size)
         return data_loader
 
+    def _get_lazy_data_loader(self, data, batch_size, shuffle):
+        """
+        Data loader for data that is not in memory (e.g. from a ChunkedDataSet) and is read one batch at a time
+
+        :param data:
+        :param batch_size:
+        :param shuffle:
+        :return:
+        """
+        x_data, y_data = data
+        n_samples = len(x_data)
+        random_state = np.random.RandomState(self._seed)
+
+        def generator():
+            """
+
+            :return:
+            """
+            index = np.arange(n_samples)
+            if shuffle:
+                random_state.shuffle(index)
+            for start in range(0, n_samples, batch_size):
+                batch = index[start:start + batch_size]
+                yield x_data[batch], y_data[batch]
+
+        # NOTE: output_signature is only available from TensorFlow 2.4 onwards
+        data_loader = tf.data.Dataset.from_generator(
+            generator,
+            output_types=(tf.as_dtype(x_data.dtype), tf.as_dtype(y_data.dtype)),
+            output_shapes=(tf.TensorShape([None, x_data.shape[1]]), tf.TensorShape([None, y_data.shape[1]]))
+        )
+        # NOTE: The number of batches cannot be inferred from a generator, but is required by len(data_loader)
+        n_batches = -(-n_samples // batch_size)
+        return data_loader.apply(tf.data.experimental.assert_cardinality(n_batches))
+
     def _preprocessing(
             self,
             data,
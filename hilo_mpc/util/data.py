@@ -24,7 +24,12 @@
 from __future__ import annotations
 
 from copy import deepcopy
-from typing import Optional, Sequence, TypeVar, Union
+from itertools import product
+import json
+import math
+from operator import add
+import pathlib
+from typing import Callable, Optional, Sequence, TypeVar, Union
 import warnings
 
 import casadi as ca
@@ -185,39 +190,13 @@ class DataSet:
             downsample_factor = 10
 
         inputs = self._raw_data.get_by_id('x').full()
-        index = np.array([])
-
-        k = 0
         dim = inputs.shape[1]
-        n_inputs = inputs.shape[1]
-        while True:
-            if data_removal == 'euclidean_distance':
-                euclidean_distance = np.zeros(n_inputs)
-                euclidean_distance[:k + 1] = distance_threshold * np.ones(k + 1)
-
-                distance = inputs[:, None, k] - inputs[:, k + 1:]
-                k += 1
-                if distance.size == 0:
-                    break
-
-                euclidean_distance[k:] = np.linalg.norm(distance, axis=0)
-
-                index_keep = euclidean_distance >= distance_threshold
-                if index.size == 0:
-                    index = np.flatnonzero(index_keep)
-                else:
-                    index = index[index_keep]
-            elif data_removal == 'downsample':
-                index = np.arange(0, inputs.shape[1], downsample_factor)
-                break
-            else:
-                raise NotImplementedError(f"Data selection method '{method}' not implemented or recognized")
-
-            inputs = inputs[:, index_keep]
-
-            n_inputs = inputs.shape[1]
-            if n_inputs <= k:
-                break
+        if data_removal == 'euclidean_distance':
+            index = _select_by_euclidean_distance(inputs, distance_threshold)
+        elif data_removal == 'downsample':
+            index = np.arange(0, dim, downsample_factor)
+        else:
+            raise NotImplementedError(f"Data selection method '{method}' not implemented or recognized")
 
         return dim, index
 
@@ -639,6 +618,610 @@ class DataSet:
         return new_data_set
 
 
+class EuclideanDistanceFilter:
+    """
+    Streaming data selection by Euclidean distance
+
+    Selects data points as they arrive, using the same criterion as :meth:`DataSet.select_train_data` with the method
+    'euclidean_distance': a data point is kept, if its Euclidean distance to every previously kept data point is greater
+    than or equal to the distance threshold. Kept data points are hashed into a grid with a cell size equal to the
+    distance threshold, so every new data point only needs to be compared to the kept data points in the neighboring
+    cells.
+
+    :param distance_threshold: Minimum Euclidean distance between two kept data points
+    :type distance_threshold: int, float
+    """
+    def __init__(self, distance_threshold: Numeric) -> None:
+        """Constructor method"""
+        if distance_threshold <= 0:
+            raise ValueError("The distance threshold needs to be positive")
+        self._distance_threshold = distance_threshold
+        self._cells = {}
+        self._offsets = None
+        self._n_features = None
+        self._index = []
+        self._n_seen = 0
+
+    def __len__(self) -> int:
+        """Length method"""
+        return len(self._index)
+
+    def _get_candidates(self, cell: tuple[int, ...]) -> list[list[float]]:
+        """
+
+        :param cell:
+        :return:
+        """
+        candidates = []
+        if len(self._offsets) <= len(self._cells):
+            for offset in self._offsets:
+                neighbor = self._cells.get(tuple(map(add, cell, offset)))
+                if neighbor is not None:
+                    candidates.extend(neighbor)
+        else:
+            # NOTE: For many features there are more neighboring cells than occupied cells
+            for neighbor_cell, neighbor in self._cells.items():
+                if all(abs(c - n) <= 1 for c, n in zip(cell, neighbor_cell)):
+                    candidates.extend(neighbor)
+        return candidates
+
+    @property
+    def distance_threshold(self) -> Numeric:
+        """
+
+        :return:
+        """
+        return self._distance_threshold
+
+    @property
+    def index(self) -> np.ndarray:
+        """
+        Indices of the kept data points with respect to all data points supplied so far
+
+        :return:
+        """
+        return np.array(self._index, dtype=int)
+
+    @property
+    def n_seen(self) -> int:
+        """
+
+        :return:
+        """
+        return self._n_seen
+
+    def update(self, features: NumArray) -> np.ndarray:
+        """
+        Select from a new chunk of data points
+
+        :param features: Data points of shape (number of features, number of data points). A one-dimensional array is
+            treated as a single data point.
+        :type features: list, numpy.ndarray
+        :return: Boolean mask of the kept data points in the supplied chunk
+        :rtype: numpy.ndarray
+        """
+        features = np.asarray(features, dtype=float)
+        if features.ndim == 1:
+            features = features.reshape(-1, 1)
+        n_features, n_samples = features.shape
+        if self._n_features is None:
+            self._n_features = n_features
+            self._offsets = list(product((-1, 0, 1), repeat=n_features))
+        elif self._n_features != n_features:
+            raise ValueError(f"Dimension mismatch. Expected {self._n_features} features, got {n_features}.")
+
+        # NOTE: Every cell only contains a handful of kept data points, so plain Python floats are faster here than
+        #  NumPy arrays
+        keep = np.zeros(n_samples, dtype=bool)
+        points = features.T.tolist()
+        cells = np.floor(features / self._distance_threshold).astype(int).T.tolist()
+        for k, (point, cell) in enumerate(zip(points, cells)):
+            cell = tuple(cell)
+            if any(math.sqrt(sum((p - c) ** 2 for p, c in zip(point, candidate))) < self._distance_threshold for
+                   candidate in self._get_candidates(cell)):
+                continue
+            keep[k] = True
+            self._cells.setdefault(cell, []).append(point)
+            self._index.append(self._n_seen + k)
+        self._n_seen += n_samples
+
+        return keep
+
+    def reset(self) -> None:
+        """
+
+        :return:
+        """
+        self._cells = {}
+        self._offsets = None
+        self._n_features = None
+        self._index = []
+        self._n_seen = 0
+
+
+class ChunkedArray:
+    """
+    Read-only view on a two-dimensional array that is split into chunks along its first axis
+
+    The chunks are usually NumPy memory-mapped arrays, so data is only read from disk when it is indexed. Indexing with
+    an integer, a slice or an array of integers returns a NumPy array with the selected rows. Sub-views can be created
+    with :meth:`take` and transformations like scaling can be attached with :meth:`with_transform` without reading any
+    data.
+
+    :param chunks: Two-dimensional arrays with the same number of columns
+    :type chunks: list
+    :param index: Rows of the concatenated chunks that are part of the view. If None, all rows are part of the view.
+    :type index: numpy.ndarray, optional
+    :param transforms: Functions that are applied in order to the rows read from the chunks
+    :type transforms: tuple, optional
+    """
+    def __init__(
+            self,
+            chunks: Sequence[np.ndarray],
+            index: Optional[NumArray] = None,
+            transforms: Optional[tuple] = None
+    ) -> None:
+        """Constructor method"""
+        self._chunks = list(chunks)
+        self._offsets = np.concatenate([[0], np.cumsum([chunk.shape[0] for chunk in self._chunks])]).astype(int)
+        self._index = np.asarray(index, dtype=int) if index is not None else None
+        if transforms is None:
+            transforms = ()
+        self._transforms = tuple(transforms)
+
+    def __len__(self) -> int:
+        """Length method"""
+        if self._index is None:
+            return int(self._offsets[-1])
+        return self._index.size
+
+    def __getitem__(self, item) -> np.ndarray:
+        """Item getter method"""
+        columns = None
+        if isinstance(item, tuple):
+            item, columns = item
+
+        n_rows = len(self)
+        squeeze = False
+        if isinstance(item, (int, np.integer)):
+            if item < 0:
+                item += n_rows
+            if item < 0 or item >= n_rows:
+                raise IndexError(f"Index {item} is out of bounds for {self.__class__.__name__} of length {n_rows}")
+            positions = np.array([item])
+            squeeze = True
+        elif isinstance(item, slice):
+            positions = np.arange(*item.indices(n_rows))
+        else:
+            positions = np.asarray(item)
+            if positions.dtype == bool:
+                positions = np.flatnonzero(positions)
+            positions = positions.astype(int)
+            positions[positions < 0] += n_rows
+            if positions.size > 0 and (positions.min() < 0 or positions.max() >= n_rows):
+                raise IndexError(f"Index out of bounds for {self.__class__.__name__} of length {n_rows}")
+
+        rows = self._read(positions if self._index is None else self._index[positions])
+        if columns is not None:
+            rows = rows[:, columns]
+        if squeeze:
+            rows = rows[0]
+        return rows
+
+    def __array__(self, dtype=None) -> np.ndarray:
+        """Array conversion method"""
+        array = self[:]
+        if dtype is not None:
+            array = array.astype(dtype)
+        return array
+
+    def _read(self, rows: np.ndarray) -> np.ndarray:
+        """
+
+        :param rows:
+        :return:
+        """
+        data = np.empty((rows.size, self.shape[1]), dtype=self.dtype)
+        chunk_index = np.searchsorted(self._offsets, rows, side='right') - 1
+        for k in np.unique(chunk_index):
+            positions = np.flatnonzero(chunk_index == k)
+            local_rows = rows[positions] - self._offsets[k]
+            # NOTE: Reading from memory-mapped files is faster, if the rows are sorted
+            order = np.argsort(local_rows, kind='stable')
+            data[positions[order]] = self._chunks[k][local_rows[order]]
+        for transform in self._transforms:
+            data = transform(data)
+        return data
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """
+
+        :return:
+        """
+        n_columns = self._chunks[0].shape[1] if self._chunks else 0
+        return len(self), n_columns
+
+    @property
+    def size(self) -> int:
+        """
+
+        :return:
+        """
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def dtype(self) -> np.dtype:
+        """
+
+        :return:
+        """
+        if self._chunks:
+            return self._chunks[0].dtype
+        return np.dtype(float)
+
+    @property
+    def ndim(self) -> int:
+        """
+
+        :return:
+        """
+        return 2
+
+    @staticmethod
+    def concatenate(arrays: Sequence['ChunkedArray']) -> 'ChunkedArray':
+        """
+
+        :param arrays:
+        :return:
+        """
+        if any(array._index is not None for array in arrays):
+            raise ValueError("Only views containing all the rows of their chunks can be concatenated")
+        if any(array._transforms != arrays[0]._transforms for array in arrays):
+            raise ValueError("Only views with the same transformations can be concatenated")
+        if len({array.shape[1] for array in arrays if len(array) > 0}) > 1:
+            raise ValueError("Dimension mismatch. All views need to have the same number of columns.")
+        return ChunkedArray([chunk for array in arrays for chunk in array._chunks], transforms=arrays[0]._transforms)
+
+    def iter_chunks(self, chunk_size: Optional[int] = None):
+        """
+        Iterate over the rows of the view in blocks
+
+        :param chunk_size: Number of rows per block. If None, the blocks correspond to the chunks on disk (or the size of
+            the first chunk, if the view doesn't contain all rows).
+        :type chunk_size: int, optional
+        :return:
+        """
+        if chunk_size is None:
+            if self._index is None:
+                for chunk in self._chunks:
+                    data = np.asarray(chunk)
+                    for transform in self._transforms:
+                        data = transform(data)
+                    yield data
+                return
+            chunk_size = max(self._chunks[0].shape[0], 1) if self._chunks else 1
+        for start in range(0, len(self), chunk_size):
+            yield self[start:start + chunk_size]
+
+    def take(self, index: NumArray) -> 'ChunkedArray':
+        """
+        Lazy selection of rows
+
+        :param index:
+        :return:
+        """
+        index = np.asarray(index, dtype=int)
+        if self._index is not None:
+            index = self._index[index]
+        return ChunkedArray(self._chunks, index=index, transforms=self._transforms)
+
+    def with_transform(self, transform: Callable[[np.ndarray], np.ndarray]) -> 'ChunkedArray':
+        """
+        Lazy transformation of the rows, e.g. scaling
+
+        :param transform:
+        :return:
+        """
+        return ChunkedArray(self._chunks, index=self._index, transforms=self._transforms + (transform,))
+
+
+class ChunkedDataSet:
+    """
+    Data set stored in chunks of NumPy memory-mapped files on disk
+
+    Contrary to :class:`DataSet`, the data points are stored row-wise, i.e. the raw, train and test data is returned as
+    :class:`ChunkedArray` views of shape (number of data points, number of features) and (number of data points, number
+    of labels). Data is only read from disk, when the views are indexed, so data sets that are too large to fit into
+    memory can be used for the training of neural networks.
+
+    The directory contains a file 'meta.json' with the names of the features and labels and the number of data points
+    per chunk, as well as the files 'x_00000.npy', 'y_00000.npy', ... for the chunks. Supplying a directory that
+    already contains a data set opens that data set.
+
+    :param features: Names of the features
+    :type features: list of str
+    :param labels: Names of the labels
+    :type labels: list of str
+    :param path: Directory where the data set is stored
+    :type path: str
+    :param chunk_size: Maximum number of data points per chunk
+    :type chunk_size: int
+    :param dtype: Data type of the stored values
+    :type dtype: str
+    """
+    def __init__(
+            self,
+            features: Sequence[str],
+            labels: Sequence[str],
+            path: str,
+            chunk_size: int = 100000,
+            dtype: str = 'float64'
+    ) -> None:
+        """Constructor method"""
+        self._path = pathlib.Path(path)
+        meta_file = self._path / 'meta.json'
+        if meta_file.exists():
+            with open(meta_file) as f:
+                meta = json.load(f)
+            if meta['features'] != list(features) or meta['labels'] != list(labels):
+                raise ValueError(f"Mismatch between the supplied features and labels and the ones of the data set stored"
+                                 f" in '{path}'. Got {list(features)} and {list(labels)}, expected {meta['features']} "
+                                 f"and {meta['labels']}.")
+            self._chunk_size = meta['chunk_size']
+            self._dtype = np.dtype(meta['dtype'])
+            self._n_rows = meta['chunks']
+        else:
+            if chunk_size < 1:
+                raise ValueError("The chunk size needs to be a positive integer")
+            self._path.mkdir(parents=True, exist_ok=True)
+            self._chunk_size = chunk_size
+            self._dtype = np.dtype(dtype)
+            self._n_rows = []
+        self._features = list(features)
+        self._labels = list(labels)
+        self._train_index = []
+        self._test_index = []
+        if not meta_file.exists():
+            self._write_meta()
+
+    def __len__(self) -> int:
+        """Length method"""
+        return sum(self._n_rows)
+
+    def _chunk_file(self, arg: str, chunk: int) -> pathlib.Path:
+        """
+
+        :param arg:
+        :param chunk:
+        :return:
+        """
+        return self._path / f'{arg}_{chunk:05d}.npy'
+
+    def _get_view(self, arg: str) -> ChunkedArray:
+        """
+
+        :param arg:
+        :return:
+        """
+        chunks = [np.load(self._chunk_file(arg, k), mmap_mode='r')[:n_rows] for k, n_rows in enumerate(self._n_rows)]
+        if not chunks:
+            n_columns = len(self._features) if arg == 'x' else len(self._labels)
+            chunks = [np.empty((0, n_columns), dtype=self._dtype)]
+        return ChunkedArray(chunks)
+
+    def _write_meta(self) -> None:
+        """
+
+        :return:
+        """
+        meta = {
+            'features': self._features,
+            'labels': self._labels,
+            'chunk_size': self._chunk_size,
+            'dtype': self._dtype.name,
+            'chunks': self._n_rows
+        }
+        with open(self._path / 'meta.json', 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    @property
+    def features(self) -> list[str]:
+        """
+
+        :return:
+        """
+        return self._features
+
+    @property
+    def labels(self) -> list[str]:
+        """
+
+        :return:
+        """
+        return self._labels
+
+    @property
+    def path(self) -> pathlib.Path:
+        """
+
+        :return:
+        """
+        return self._path
+
+    @property
+    def chunk_size(self) -> int:
+        """
+
+        :return:
+        """
+        return self._chunk_size
+
+    @property
+    def n_chunks(self) -> int:
+        """
+
+        :return:
+        """
+        return len(self._n_rows)
+
+    @property
+    def raw_data(self) -> (ChunkedArray, ChunkedArray):
+        """
+
+        :return:
+        """
+        return self._get_view('x'), self._get_view('y')
+
+    @property
+    def train_data(self) -> (ChunkedArray, ChunkedArray):
+        """
+
+        :return:
+        """
+        features, labels = self.raw_data
+        return features.take(self._train_index), labels.take(self._train_index)
+
+    @property
+    def test_data(self) -> (ChunkedArray, ChunkedArray):
+        """
+
+        :return:
+        """
+        features, labels = self.raw_data
+        return features.take(self._test_index), labels.take(self._test_index)
+
+    @classmethod
+    def from_data_set(cls, data_set: DataSet, path: str, chunk_size: int = 100000) -> 'ChunkedDataSet':
+        """
+
+        :param data_set:
+        :param path:
+        :param chunk_size:
+        :return:
+        """
+        chunked_data_set = cls(data_set.features, data_set.labels, path, chunk_size=chunk_size)
+        chunked_data_set.add_data(*data_set.raw_data)
+        return chunked_data_set
+
+    def add_data(self, features: NumArray, labels: NumArray) -> None:
+        """
+        Append data points to the data set
+
+        As for :meth:`DataSet.add_data`, the arrays are expected to have one data point per column.
+
+        :param features:
+        :param labels:
+        :return:
+        """
+        features = np.asarray(features, dtype=self._dtype)
+        labels = np.asarray(labels, dtype=self._dtype)
+        if features.ndim == 1:
+            features = features.reshape(-1, 1)
+        if labels.ndim == 1:
+            labels = labels.reshape(-1, 1)
+        if features.shape[0] != len(self._features):
+            raise ValueError(f"Dimension mismatch. Expected {len(self._features)} features, got {features.shape[0]}.")
+        if labels.shape[0] != len(self._labels):
+            raise ValueError(f"Dimension mismatch. Expected {len(self._labels)} labels, got {labels.shape[0]}.")
+        if features.shape[1] != labels.shape[1]:
+            raise ValueError(f"Dimension mismatch. Got {features.shape[1]} data points for the features and "
+                             f"{labels.shape[1]} data points for the labels.")
+
+        start = 0
+        n_samples = features.shape[1]
+        while start < n_samples:
+            if not self._n_rows or self._n_rows[-1] == self._chunk_size:
+                for arg, n_columns in [('x', len(self._features)), ('y', len(self._labels))]:
+                    chunk = np.lib.format.open_memmap(self._chunk_file(arg, len(self._n_rows)), mode='w+',
+                                                      dtype=self._dtype, shape=(self._chunk_size, n_columns))
+                    del chunk
+                self._n_rows.append(0)
+            chunk_index = len(self._n_rows) - 1
+            offset = self._n_rows[chunk_index]
+            stop = min(n_samples, start + self._chunk_size - offset)
+            for arg, values in [('x', features), ('y', labels)]:
+                chunk = np.load(self._chunk_file(arg, chunk_index), mmap_mode='r+')
+                chunk[offset:offset + stop - start, :] = values[:, start:stop].T
+                chunk.flush()
+                del chunk
+            self._n_rows[chunk_index] += stop - start
+            start = stop
+        self._write_meta()
+
+    def select_train_data(
+            self,
+            method: str,
+            distance_threshold: Optional[Numeric] = None,
+            downsample_factor: Optional[int] = None
+    ) -> None:
+        """
+
+        :param method:
+        :param distance_threshold:
+        :param downsample_factor:
+        :return:
+        """
+        index = self._reduce_data(method, distance_threshold=distance_threshold, downsample_factor=downsample_factor)
+        self._train_index = index
+
+        print(f"{len(index)}/{len(self)} data points selected for training")
+
+    def select_test_data(
+            self,
+            method: str,
+            distance_threshold: Optional[Numeric] = None,
+            downsample_factor: Optional[int] = None
+    ) -> None:
+        """
+
+        :param method:
+        :param distance_threshold:
+        :param downsample_factor:
+        :return:
+        """
+        index = self._reduce_data(method, distance_threshold=distance_threshold, downsample_factor=downsample_factor)
+        self._test_index = index
+
+        print(f"{len(index)}/{len(self)} data points selected for testing")
+
+    def _reduce_data(
+            self,
+            method: str,
+            distance_threshold: Optional[Numeric] = None,
+            downsample_factor: Optional[int] = None
+    ) -> np.ndarray:
+        """
+
+        :param method:
+        :param distance_threshold:
+        :param downsample_factor:
+        :return:
+        """
+        if len(self) == 0:
+            raise ValueError("No raw data available")
+
+        data_removal = method.lower().replace(' ', '_')
+        if data_removal == 'euclidean_distance':
+            if distance_threshold is None:
+                warnings.warn("No distance threshold supplied for data selection using Euclidean distance. "
+                              "Applying default value of 0.5.")
+                distance_threshold = .5
+            # NOTE: The chunks are processed one after another, so that the data set doesn't need to fit into memory
+            data_filter = EuclideanDistanceFilter(distance_threshold)
+            for chunk in self._get_view('x').iter_chunks():
+                data_filter.update(chunk.T)
+            return data_filter.index
+        elif data_removal == 'downsample':
+            if downsample_factor is None:
+                warnings.warn("No downsample factor supplied for data selection using downsampling. "
+                              "Applying default value of 10.")
+                downsample_factor = 10
+            return np.arange(0, len(self), downsample_factor)
+        else:
+            raise NotImplementedError(f"Data selection method '{method}' not implemented or recognized")
+
+
 class DataGenerator:
     """"""
     def __init__(
@@ -1167,6 +1750,39 @@ class DataGenerator:
         self._data_set.set_data(inputs, outputs, time=time, feature_noise=input_noise, label_noise=output_noise)
 
 
+def _select_by_euclidean_distance(inputs: np.ndarray, distance_threshold: Numeric) -> np.ndarray:
+    """
+    Greedy selection of data points, such that no two selected data points are closer than the distance threshold
+
+    The data points are processed in order. A data point is selected, if its Euclidean distance to every previously
+    selected data point is greater than or equal to the distance threshold. A KD-tree is used to find the data points
+    that are removed by a selected data point.
+
+    :param inputs:
+    :param distance_threshold:
+    :return:
+    """
+    from scipy.spatial import cKDTree
+
+    points = inputs.T
+    n_points = points.shape[0]
+    tree = cKDTree(points)
+    removed = np.zeros(n_points, dtype=bool)
+    index = []
+    for k in range(n_points):
+        if removed[k]:
+            continue
+        index.append(k)
+        neighbors = np.array(tree.query_ball_point(points[k], distance_threshold), dtype=int)
+        neighbors = neighbors[neighbors > k]
+        if neighbors.size > 0:
+            # NOTE: query_ball_point also returns data points with a distance equal to the distance threshold, which are
+            #  kept
+            close = np.linalg.norm(points[neighbors] - points[k], axis=1) < distance_threshold
+            removed[neighbors[close]] = True
+    return np.array(index, dtype=int)
+
+
 def _get_distribution_information(**kwargs) -> (str, Optional[int], Optional[Union[Numeric, NumArray]]):
     """
 
@@ -21,9 +21,26 @@
 #   along with HILO-MPC. If not, see <http://www.gnu.org/licenses/>.
 #
 
+from __future__ import annotations
+
+import hashlib
+import json
 import pathlib
+import pickle
+import struct
+from typing import Any, Optional, Union
+
+import casadi as ca
+import numpy as np
 
-from scipy.io import savemat
+
+# NOTE: Version of the file format of saved objects. Needs to be increased whenever the attributes of the saved objects
+#  change in a way that breaks the restoring of previously saved objects.
+_SAVE_FORMAT = 1
+_SERIES_FORMATS = ['npy', 'hdf5', 'parquet']
+# NOTE: The header of the .npy files written by the SeriesWriter has a fixed size, so that it can be overwritten with the
+#  new number of samples whenever data is appended to the file
+_NPY_HEADER_SIZE = 128
 
 
 def save_mat(path_to_file: str, data: dict) -> None:
@@ -33,6 +50,489 @@ def save_mat(path_to_file: str, data: dict) -> None:
     :param data:
     :return:
     """
+    from scipy.io import savemat
+
     path = pathlib.Path(path_to_file)
     path.parent.mkdir(parents=True, exist_ok=True)
     savemat(str(path), data)
+
+
+def _get_versions() -> dict[str, Optional[str]]:
+    """
+    Returns the versions that need to coincide when restoring saved objects
+
+    :return:
+    """
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        hilo_mpc = None
+    else:
+        try:
+            hilo_mpc = version('hilo-mpc')
+        except PackageNotFoundError:
+            hilo_mpc = None
+    return {'format': str(_SAVE_FORMAT), 'hilo_mpc': hilo_mpc, 'casadi': ca.__version__}
+
+
+def save_object(path_to_file: str, obj: Any) -> None:
+    """
+    Saves an object including all of its CasADi objects (symbolic expressions and functions) to a file
+
+    The CasADi objects are serialized by CasADi within a common context, so that symbolic variables shared among
+    different expressions and functions are restored consistently.
+
+    :param path_to_file:
+    :param obj:
+    :return:
+    """
+    if not hasattr(ca, 'global_pickle_context'):
+        raise RuntimeError(f"Saving objects requires CasADi 3.7.1 or higher. Installed version is {ca.__version__}.")
+
+    try:
+        with ca.global_pickle_context():
+            payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as error:
+        raise RuntimeError(f"{obj.__class__.__name__} could not be saved: {error}") from error
+
+    header = {
+        'class': f'{obj.__class__.__module__}.{obj.__class__.__qualname__}',
+        'versions': _get_versions(),
+        'hash': hashlib.sha256(payload).hexdigest()
+    }
+
+    path = pathlib.Path(path_to_file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as file:
+        pickle.dump(header, file, protocol=pickle.HIGHEST_PROTOCOL)
+        file.write(payload)
+
+
+def load_object(path_to_file: str, cls: Optional[type] = None) -> Any:
+    """
+    Loads an object that was saved with :func:`save_object`
+
+    The object is only restored if it was saved with the same versions of HILO-MPC and CasADi and the file is intact.
+    Since the object is unpickled, only files from trusted sources should be loaded.
+
+    :param path_to_file:
+    :param cls: Expected class of the loaded object
+    :return:
+    """
+    with open(path_to_file, 'rb') as file:
+        header = pickle.load(file)
+        payload = file.read()
+
+    versions = _get_versions()
+    for key, value in header['versions'].items():
+        if versions.get(key) != value:
+            raise RuntimeError(f"The file '{path_to_file}' was saved with version {value} of '{key}', but version "
+                               f"{versions.get(key)} is used. Please run the setup again and save the object anew.")
+    if hashlib.sha256(payload).hexdigest() != header['hash']:
+        raise RuntimeError(f"The file '{path_to_file}' is corrupted")
+
+    with ca.global_unpickle_context():
+        obj = pickle.loads(payload)
+    if cls is not None and not isinstance(obj, cls):
+        raise TypeError(f"The file '{path_to_file}' contains an object of type {header['class']}, but an object of "
+                        f"type {cls.__name__} was expected")
+    return obj
+
+
+def _write_npy_header(file, dtype: np.dtype, n_samples: int) -> None:
+    """
+    Writes the header of a one-dimensional .npy file with a fixed size of :data:`_NPY_HEADER_SIZE` bytes
+
+    :param file:
+    :param dtype:
+    :param n_samples:
+    :return:
+    """
+    magic = np.lib.format.magic(1, 0)
+    header_length = _NPY_HEADER_SIZE - len(magic) - 2
+    header = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (n_samples,)})
+    file.seek(0)
+    file.write(magic + struct.pack('<H', header_length) + (header.ljust(header_length - 1) + '\n').encode('latin1'))
+
+
+class SeriesWriter:
+    """
+    Streams the data of a time series to columnar files
+
+    Every call of :meth:`write` only appends the samples that were added to the time series since the last call, so
+    the writer can be used during a simulation or a control loop to keep the files up to date. Every variable (e.g.
+    every dynamical state) is stored as a separate column, so that single variables can be read without loading the
+    rest of the data (see :class:`SeriesReader`).
+
+    The following formats are supported:
+
+    * 'npy': A directory with one uncompressed .npy file per variable. The files can be memory-mapped directly by
+      NumPy.
+    * 'hdf5': A single HDF5 file with one chunked and compressed data set per variable. Requires h5py.
+    * 'parquet': A directory with one Parquet file per entry of the time series (e.g. 'x' or 'u'), where every call of
+      :meth:`write` adds a compressed row group. Requires pyarrow. The files are only readable after the writer was
+      closed.
+
+    :param path_to_file: Path to the directory ('npy' and 'parquet') or the file ('hdf5')
+    :param format: Format of the files, one of 'npy', 'hdf5' or 'parquet'
+    :param compression: Compression of the 'hdf5' and 'parquet' formats. If None, the default of the respective library
+        is used ('gzip' for h5py and 'snappy' for pyarrow).
+    :param chunk_size: Number of samples per chunk of the 'hdf5' format and maximum number of samples per row group of
+        the 'parquet' format
+    :param dtype: Data type of the stored values
+    """
+    def __init__(
+            self,
+            path_to_file: str,
+            format: str = 'npy',
+            compression: Optional[str] = None,
+            chunk_size: int = 1024,
+            dtype: Union[str, type, np.dtype] = np.float64
+    ) -> None:
+        """Constructor method"""
+        if format not in _SERIES_FORMATS:
+            raise ValueError(f"Format '{format}' not recognized. Available formats are {', '.join(_SERIES_FORMATS)}.")
+        if chunk_size < 1:
+            raise ValueError("The chunk size needs to be a positive integer")
+
+        self._path = pathlib.Path(path_to_file)
+        self._format = format
+        self._compression = compression
+        self._chunk_size = chunk_size
+        self._dtype = np.dtype(dtype)
+        self._metadata = {'format': format, 'dtype': self._dtype.str, 'dt': None, 'grid': None, 'entries': {}}
+        self._n_written = {}
+        self._file = None
+        self._parquet_writers = {}
+
+        if format == 'hdf5':
+            try:
+                import h5py
+            except ModuleNotFoundError:
+                raise ModuleNotFoundError("Format 'hdf5' requires h5py, which is not installed")
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = h5py.File(self._path, 'w')
+        else:
+            if format == 'parquet':
+                try:
+                    import pyarrow
+                except ModuleNotFoundError:
+                    raise ModuleNotFoundError("Format 'parquet' requires pyarrow, which is not installed")
+            self._path.mkdir(parents=True, exist_ok=True)
+
+    def __enter__(self) -> 'SeriesWriter':
+        """Enter method of the context manager"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Exit method of the context manager"""
+        self.close()
+
+    @property
+    def path(self) -> pathlib.Path:
+        """
+
+        :return:
+        """
+        return self._path
+
+    @property
+    def format(self) -> str:
+        """
+
+        :return:
+        """
+        return self._format
+
+    def _add_entry(self, series, arg: str) -> None:
+        """
+
+        :param series:
+        :param arg:
+        :return:
+        """
+        names = series.get_names(arg)
+        self._metadata['entries'][arg] = {
+            'names': names,
+            'description': series.get_description(arg),
+            'labels': series.get_labels(arg),
+            'units': series.get_units(arg)
+        }
+        self._n_written[arg] = 0
+
+        if self._format == 'npy':
+            directory = self._path / arg
+            directory.mkdir(exist_ok=True)
+            for name in names:
+                with open(directory / f'{name}.npy', 'wb') as file:
+                    _write_npy_header(file, self._dtype, 0)
+        elif self._format == 'hdf5':
+            group = self._file.create_group(arg)
+            for name in names:
+                group.create_dataset(name, shape=(0,), maxshape=(None,), dtype=self._dtype,
+                                     chunks=(self._chunk_size,), compression=self._compression or 'gzip')
+        elif self._format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            schema = pa.schema([(name, pa.from_numpy_dtype(self._dtype)) for name in names])
+            kwargs = {}
+            if self._compression is not None:
+                kwargs['compression'] = self._compression
+            self._parquet_writers[arg] = pq.ParquetWriter(str(self._path / f'{arg}.parquet'), schema, **kwargs)
+
+    def _append(self, arg: str, values: np.ndarray) -> None:
+        """
+
+        :param arg:
+        :param values:
+        :return:
+        """
+        names = self._metadata['entries'][arg]['names']
+        n_samples = self._n_written[arg] + values.shape[1]
+
+        if self._format == 'npy':
+            for name, column in zip(names, values):
+                with open(self._path / arg / f'{name}.npy', 'r+b') as file:
+                    file.seek(0, 2)
+                    file.write(column.tobytes())
+                    # NOTE: The header is updated after the data was written, so that a concurrent reader never sees
+                    #  samples that are not yet stored in the file
+                    _write_npy_header(file, self._dtype, n_samples)
+        elif self._format == 'hdf5':
+            group = self._file[arg]
+            for name, column in zip(names, values):
+                data_set = group[name]
+                data_set.resize((n_samples,))
+                data_set[self._n_written[arg]:] = column
+        elif self._format == 'parquet':
+            import pyarrow as pa
+
+            table = pa.table({name: column for name, column in zip(names, values)},
+                             schema=self._parquet_writers[arg].schema)
+            self._parquet_writers[arg].write_table(table, row_group_size=self._chunk_size)
+
+        self._n_written[arg] = n_samples
+
+    def _write_metadata(self) -> None:
+        """
+
+        :return:
+        """
+        metadata = json.dumps(self._metadata)
+        if self._format == 'hdf5':
+            self._file.attrs['metadata'] = metadata
+            self._file.flush()
+        else:
+            path = self._path / 'metadata.json'
+            temporary_path = path.with_suffix('.tmp')
+            temporary_path.write_text(metadata)
+            temporary_path.replace(path)
+
+    def write(self, series, *args: str) -> None:
+        """
+        Appends the samples that were added to the time series since the last call to the files
+
+        :param series: Time series whose data should be written
+        :param args: Entries of the time series that should be written (e.g. 'x' or 'u'). If none are supplied, all
+            entries are written. Entries are written from the first call on, on which they were supplied.
+        :return:
+        """
+        if self._file is None and self._format == 'hdf5':
+            raise RuntimeError("The writer was already closed")
+        if not args:
+            args = list(series)
+
+        if self._metadata['dt'] is None and self._metadata['grid'] is None:
+            dt = getattr(series, 'dt', None)
+            grid = getattr(series, 'grid', None)
+            if dt is not None:
+                self._metadata['dt'] = float(dt)
+            elif grid is not None:
+                self._metadata['grid'] = np.asarray(grid, dtype=float).ravel().tolist()
+
+        for arg in args:
+            if arg not in series:
+                raise ValueError(f"Entry '{arg}' not found in the time series")
+            if arg not in self._metadata['entries']:
+                self._add_entry(series, arg)
+            elif series.get_names(arg) != self._metadata['entries'][arg]['names']:
+                raise ValueError(f"The variables of entry '{arg}' changed since the last call")
+
+            values = series.get_by_id(arg)
+            n_written = self._n_written[arg]
+            n_samples = values.shape[1]
+            if n_samples < n_written:
+                raise ValueError(f"Entry '{arg}' has fewer samples than were already written. Was the time series "
+                                 f"cleared in the meantime?")
+            if n_samples > n_written:
+                # NOTE: Only the new samples are converted, so the cost of every call is independent of the length of
+                #  the time series
+                self._append(arg, np.asarray(values[:, n_written:].full(), dtype=self._dtype))
+
+        self._write_metadata()
+
+    def close(self) -> None:
+        """
+        Closes all open files. For the 'parquet' format the files can only be read after the writer was closed.
+
+        :return:
+        """
+        for writer in self._parquet_writers.values():
+            writer.close()
+        self._parquet_writers = {}
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SeriesReader:
+    """
+    Reads the columnar files written by :class:`SeriesWriter` without loading all of the data
+
+    Single variables are returned as one-dimensional arrays, which are memory-mapped for the 'npy' format. For the
+    'hdf5' format the h5py data sets are returned, which only read the data when they are sliced. For the 'parquet'
+    format only the requested column is read from the memory-mapped file.
+
+    :param path_to_file: Path to the directory ('npy' and 'parquet') or the file ('hdf5') written by
+        :class:`SeriesWriter`
+    """
+    def __init__(self, path_to_file: str) -> None:
+        """Constructor method"""
+        self._path = pathlib.Path(path_to_file)
+        self._file = None
+        if self._path.is_dir():
+            self._metadata = json.loads((self._path / 'metadata.json').read_text())
+        else:
+            try:
+                import h5py
+            except ModuleNotFoundError:
+                raise ModuleNotFoundError("Format 'hdf5' requires h5py, which is not installed")
+            self._file = h5py.File(self._path, 'r')
+            self._metadata = json.loads(self._file.attrs['metadata'])
+
+        self._name_index = {}
+        for arg, entry in self._metadata['entries'].items():
+            for name in entry['names']:
+                self._name_index.setdefault(name, arg)
+
+    def __enter__(self) -> 'SeriesReader':
+        """Enter method of the context manager"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Exit method of the context manager"""
+        self.close()
+
+    def __contains__(self, item: str) -> bool:
+        """Item check method"""
+        return item in self._metadata['entries'] or item in self._name_index
+
+    def __iter__(self):
+        """Item iteration method"""
+        yield from self._metadata['entries']
+
+    def __getitem__(self, item: str):
+        """Item getter method"""
+        if item in self._name_index:
+            return self.get_column(self._name_index[item], item)
+        elif item in self._metadata['entries']:
+            # NOTE: Entries consisting of several variables are loaded into memory with the same layout as in the time
+            #  series, i.e. one row per variable
+            columns = [self.get_column(item, name) for name in self._metadata['entries'][item]['names']]
+            return np.vstack([np.asarray(column[:]) for column in columns])
+        raise KeyError(f"'{item}' not found")
+
+    @property
+    def format(self) -> str:
+        """
+
+        :return:
+        """
+        return self._metadata['format']
+
+    @property
+    def dt(self) -> Optional[float]:
+        """
+
+        :return:
+        """
+        return self._metadata['dt']
+
+    @property
+    def grid(self) -> Optional[np.ndarray]:
+        """
+
+        :return:
+        """
+        grid = self._metadata['grid']
+        if grid is not None:
+            return np.array(grid)
+        return None
+
+    @property
+    def names(self) -> list[str]:
+        """
+
+        :return:
+        """
+        return list(self._name_index)
+
+    def get_names(self, arg: str) -> list[str]:
+        """
+
+        :param arg:
+        :return:
+        """
+        return self._metadata['entries'][arg]['names']
+
+    def get_description(self, arg: str) -> list[str]:
+        """
+
+        :param arg:
+        :return:
+        """
+        return self._metadata['entries'][arg]['description']
+
+    def get_labels(self, arg: str) -> list[str]:
+        """
+
+        :param arg:
+        :return:
+        """
+        return self._metadata['entries'][arg]['labels']
+
+    def get_units(self, arg: str) -> list[str]:
+        """
+
+        :param arg:
+        :return:
+        """
+        return self._metadata['entries'][arg]['units']
+
+    def get_column(self, arg: str, name: str):
+        """
+        Returns the values of the variable with the given name of the entry 'arg' without loading the other variables
+
+        :param arg:
+        :param name:
+        :return:
+        """
+        if self.format == 'npy':
+            return np.load(self._path / arg / f'{name}.npy', mmap_mode='r')
+        elif self.format == 'hdf5':
+            return self._file[arg][name]
+        else:
+            import pyarrow.parquet as pq
+
+            table = pq.read_table(str(self._path / f'{arg}.parquet'), columns=[name], memory_map=True)
+            return table.column(name).to_numpy()
+
+    def close(self) -> None:
+        """
+
+        :return:
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -205,6 +205,11 @@ class Parameter(Object):
         self._value = convert(value, ca.DM)
         self._shape = self._value.shape
 
+        bounds = kwargs.get('bounds')
+        if bounds is None:
+            bounds = (-ca.inf, ca.inf)
+        self._bounds = tuple(bounds)
+
         if prior is not None:
             if not is_list_like(prior):
                 prior = [prior]
@@ -445,6 +450,25 @@ class Parameter(Object):
         """
         return self.SX.is_scalar()
 
+    def sample(self, n: int = 1, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+        Draws random values of the parameter, e.g. as initial guesses for the optimization of hyperparameters
+
+        The values are drawn uniformly between the bounds of the parameter. If the parameter is unbounded, they are
+        drawn from a normal distribution around the current value.
+
+        :param n: number of samples
+        :param rng: random number generator
+        :return: array of shape (n, number of values of the parameter)
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        value = self._value.full().flatten()
+        lb, ub = self._bounds
+        if np.isfinite(lb) and np.isfinite(ub):
+            return rng.uniform(lb, ub, size=(n, value.size))
+        return value + np.maximum(np.abs(value), 1.) * rng.standard_normal((n, value.size))
+
 
 class PositiveParameter(Parameter):
     """"""
@@ -484,6 +508,25 @@ class PositiveParameter(Parameter):
         if bounds is not None:  # pragma: no cover
             self._log_bounds = (ca.log(self._bounds[0]), ca.log(self._bounds[1]))
 
+    def sample(self, n: int = 1, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+        Draws random values of the parameter, e.g. as initial guesses for the optimization of hyperparameters
+
+        The values are drawn log-uniformly between the bounds of the parameter. If the parameter is unbounded, the
+        logarithms of the values are drawn from a normal distribution around the logarithm of the current value.
+
+        :param n: number of samples
+        :param rng: random number generator
+        :return: array of shape (n, number of values of the parameter)
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        log = np.log(self._value.full().flatten())
+        lb, ub = self._bounds
+        if lb > 0. and np.isfinite(ub):
+            return np.exp(rng.uniform(np.log(lb), np.log(ub), size=(n, log.size)))
+        return np.exp(log + rng.standard_normal((n, log.size)))
+
     @property
     def log(self) -> ca.DM:
         """
@@ -571,8 +614,66 @@ def net_to_casadi_graph(net, x, layers, **kwargs):
             hidden.append("layer_" + str(ct))
             ct += 1
 
+    # NOTE: On MX symbols the dense layers are matrix-vector products. The function is not inlined when called with SX
+    #  arguments, so it enters SX expressions (e.g. the model equations) as a single call node instead of being expanded
+    #  into scalar operations. CasADi < 3.7 ignores this option for SX arguments.
+    if isinstance(x, ca.MX):
+        options = {'never_inline': True}
+    else:
+        options = {}
+
     return ca.Function('neural_network',
                        [x],
                        graph,
                        ["features"],
-                       ["labels"] + hidden)
+                       ["labels"] + hidden,
+                       options)
+
+
+_NUMPY_ACTIVATIONS = {
+    'sigmoid': lambda x: 1. / (1. + np.exp(-x)),
+    'tanh': np.tanh,
+    'relu': lambda x: np.maximum(0., x),
+    'softplus': lambda x: np.log(1. + np.exp(x)),
+    'softmax': lambda x: np.exp(x) / np.sum(np.exp(x), axis=0, keepdims=True),
+    'linear': lambda x: x,
+    'scale': lambda x: 1. / (1. - x)
+}
+
+
+def net_forward_pass(net, x, layers, **kwargs):
+    """
+    Forward pass of the network for a batch of query points using NumPy
+
+    Counterpart of :func:`net_to_casadi_graph` for numerical values. The query points are stored column-wise, so all of
+    them are propagated through a dense layer by a single matrix-matrix product.
+
+    :param net:
+    :param x: Query points (one query point per column)
+    :param layers:
+    :param kwargs:
+    :return: Labels (one query point per column)
+    """
+    input_scaling = kwargs.get('input_scaling')
+    output_scaling = kwargs.get('output_scaling')
+    if isinstance(net, dict):
+        weights = net['weights']
+        bias = net['bias']
+    else:
+        weights, bias = net.get_weights_and_bias()
+
+    h = np.asarray(x, dtype=float)
+    if input_scaling is not None:
+        h = (h - np.reshape(input_scaling.mean_, (-1, 1))) / np.reshape(input_scaling.scale_, (-1, 1))
+
+    layers = [layer for layer in layers if layer.type.lower() != 'dropout']
+    for k, layer in enumerate(layers):
+        if layer.type.lower() == 'dense':
+            h = _NUMPY_ACTIVATIONS[layer.activation](np.asarray(weights[k]) @ h + np.reshape(bias[k], (-1, 1)))
+    # NOTE: Right now the output layer is assumed to be linear and cannot be changed
+    y = np.asarray(weights[-1]) @ h + np.reshape(bias[-1], (-1, 1))
+
+    if output_scaling is not None:
+        y = y * np.reshape(output_scaling.scale_, (-1, 1)) + np.reshape(output_scaling.mean_, (-1, 1))
+
+    return y
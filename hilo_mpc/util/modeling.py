@@ -549,6 +549,7 @@ class MHEQuadraticCost(GenericCost):
         self.ref_placeholder = []
         self._has_state_noise = False
         self._w = []
+        self._w_weights = None
         self._x_guess = None
         self._p_guess = None
         self._n_tv_refs = 0
@@ -643,13 +644,20 @@ class MHEQuadraticCost(GenericCost):
                 # of the states and inputs
                 p_ref = ca.SX.sym(f'{name}_ref', ref.shape[0])
                 self._n_tv_refs += ref.shape[0]
-                self._tv_ref_list.append({'ref': ref, 'names': names, 'placeholder': p_ref, 'ind': ind, 'type': type})
+                self._tv_ref_list.append({'ref': ref, 'names': names, 'placeholder': p_ref, 'ind': ind, 'type': type,
+                                          'weights': W})
             elif ref_type == 'iter_var_ref':
                 # Iteration varying references. These reference change only once for every MHE iteration
                 ref = check_and_wrap_to_list(ref)
                 p_ref = ca.SX.sym(f'{name}_ref', len(ref))
                 self._n_iter_var_refs += len(ref)
-                self._iter_ref_list.append({'ref': ref, 'names': names, 'placeholder': p_ref, 'ind': ind, 'type': type})
+                # NOTE: The weights of iteration varying references can also change once for every MHE iteration
+                #  (e.g. filtering update of the arrival cost). They are substituted by their values in self._setup()
+                #  if they are kept constant.
+                p_weights = ca.SX.sym(f'{name}_weights', W.shape[0], W.shape[1])
+                self._iter_ref_list.append({'ref': ref, 'names': names, 'placeholder': p_ref, 'ind': ind, 'type': type,
+                                            'weights': W, 'weights_placeholder': p_weights})
+                W = p_weights
             elif ref_type == 'fixed_ref':
                 # Fixed references. The values of these reference do not change within the prediction horizon
                 ref = check_and_wrap_to_list(ref)
@@ -664,7 +672,7 @@ class MHEQuadraticCost(GenericCost):
 
         self._is_set = True
 
-    def _setup(self, x_scale=None, w_scale=None, p_scale=None, u_scale=None):
+    def _setup(self, x_scale=None, w_scale=None, p_scale=None, u_scale=None, variable_weights=None):
         """
         This scales the references of path following and trajectory tracking.
 
@@ -672,10 +680,17 @@ class MHEQuadraticCost(GenericCost):
         :param w_scale:
         :param p_scale:
         :param u_scale:
+        :param variable_weights: Types of the iteration varying references whose weights are not substituted by their
+            values, i.e. the weights need to be supplied at every MHE iteration
         :return:
         """
+        if variable_weights is None:
+            variable_weights = []
         for fixed_ref in self._fixed_ref_list:
             self._cost = ca.substitute(self._cost, fixed_ref['placeholder'], fixed_ref['ref'])
+        for iter_ref in self._iter_ref_list:
+            if iter_ref['type'] not in variable_weights:
+                self._cost = ca.substitute(self._cost, iter_ref['weights_placeholder'], ca.DM(iter_ref['weights']))
         self._cost = ca.substitute(self._cost, self._model.x, self._model.x * ca.DM(x_scale))
         if self._model.n_p > 0:
             self._cost = ca.substitute(self._cost, self._model.p, self._model.p * ca.DM(p_scale))
@@ -741,6 +756,8 @@ class MHEQuadraticCost(GenericCost):
         names = [f'w_{i}' for i in self._model.dynamical_state_names]
         ind_w = list(range(self._model.n_x))
         self._has_state_noise = True
+        weights = self._create_weight_matrix(weights, who_am_i())
+        self._w_weights = weights
         self._add_cost_term(self._w, names, weights, None, ind_w, 'state_noise')
 
     def add_states(self, weights, guess):
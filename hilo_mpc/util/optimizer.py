@@ -27,7 +27,6 @@ from typing import Optional, TypeVar, Union
 
 import casadi as ca
 import numpy as np
-from scipy.optimize import minimize
 
 
 Numeric = Union[int, float]
@@ -35,30 +34,180 @@ Symbolic = TypeVar('Symbolic', ca.SX, ca.MX)
 
 
 class IpoptDebugger(ca.Callback):
-    """"""
-    def __init__(self, name, n_v, n_g, n_p, iter_step, ind_x, ind_u, opts=None):
+    """
+    Iteration callback storing the iterates of IPOPT
+
+    The iterates are stored in preallocated NumPy arrays, which are used as ring buffers, i.e. only the last
+    :obj:`buffer_size` recorded iterates are kept. If a file name is supplied, the arrays are memory-mapped to NumPy
+    files (one per stored quantity), which can be inspected after the optimization with :meth:`load`.
+
+    :param name:
+    :type name: str
+    :param n_v: Number of optimization variables
+    :type n_v: int
+    :param n_g: Number of constraints
+    :type n_g: int
+    :param n_p: Number of parameters
+    :type n_p: int
+    :param iter_step:
+    :type iter_step: int
+    :param ind_x: Indices of the states in the optimization variables
+    :type ind_x: list
+    :param ind_u: Indices of the inputs in the optimization variables
+    :type ind_u: list
+    :param opts:
+    :type opts: dict, optional
+    :param buffer_size: Maximum number of stored iterates, defaults to 1000
+    :type buffer_size: int
+    :param dtype: Data type of the stored iterates, e.g. :obj:`numpy.float32`, defaults to :obj:`numpy.float64`
+    :type dtype: str, numpy.dtype
+    :param record_every: Only every k-th iterate is stored, defaults to 1
+    :type record_every: int
+    :param variables: Optimization variables whose values and multipliers are stored. Either a list of indices or a
+        list of the strings 'x' (states) and 'u' (inputs). If None, all optimization variables are stored.
+    :type variables: list, optional
+    :param file_name: Prefix of the NumPy files the iterates are memory-mapped to
+    :type file_name: str, optional
+    """
+    def __init__(self, name, n_v, n_g, n_p, iter_step, ind_x, ind_u, opts=None, buffer_size=1000, dtype=np.float64,
+                 record_every=1, variables=None, file_name=None):
         """Constructor method"""
         super().__init__()
 
+        if buffer_size < 1:
+            raise ValueError("The buffer size of the IPOPT debugger needs to be a positive integer")
+        if record_every < 1:
+            raise ValueError("The recording interval of the IPOPT debugger needs to be a positive integer")
+
         self.n_v = n_v
         self.n_g = n_g
         self.np = n_p
         self.ind_x = ind_x
         self.ind_u = ind_u
-        self.x_sols = []
-        self.f_sols = []
-        self.g_sols = []
-        self.lam_x_sols = []
-        self.lam_g_sols = []
-        self.lam_p_sols = []
-        self.iter = []
         self.iter_step = iter_step
+        self.buffer_size = buffer_size
+        self.dtype = np.dtype(dtype)
+        self.record_every = record_every
+        self.file_name = file_name
+
+        if variables is None:
+            self._variables = None
+        else:
+            indices = []
+            for block in variables:
+                if block == 'x':
+                    indices.append(np.ravel(ind_x).astype(int))
+                elif block == 'u':
+                    indices.append(np.ravel(ind_u).astype(int))
+                else:
+                    indices.append(np.ravel(block).astype(int))
+            self._variables = np.concatenate(indices) if indices else np.array([], dtype=int)
+
+        # NOTE: The multipliers of the parameters are not passed to the callback (see get_sparsity_in)
+        n_stored = n_v if self._variables is None else self._variables.size
+        self._buffers = {}
+        for key, shape in [('iter', ()), ('x', (n_stored, )), ('f', ()), ('g', (n_g, )), ('lam_x', (n_stored, )),
+                           ('lam_g', (n_g, )), ('lam_p', (0, ))]:
+            dtype = np.int64 if key == 'iter' else self.dtype
+            if file_name is None:
+                buffer = np.empty((buffer_size, ) + shape, dtype=dtype)
+            else:
+                buffer = np.lib.format.open_memmap(f'{file_name}_{key}.npy', mode='w+', dtype=dtype,
+                                                   shape=(buffer_size, ) + shape)
+            self._buffers[key] = buffer
+        self._n_calls = 0
+        self._n_recorded = 0
+        self._buffers['iter'][:] = -1
 
         # Initialize internal objects
         if opts is None:
             opts = {}
         self.construct(name, opts)
 
+    def _get_ordered(self, key):
+        """
+
+        :param key:
+        :return:
+        """
+        buffer = self._buffers[key]
+        if self._n_recorded <= self.buffer_size:
+            return buffer[:self._n_recorded]
+        start = self._n_recorded % self.buffer_size
+        return np.concatenate([buffer[start:], buffer[:start]])
+
+    def _get_variables(self, key):
+        """
+
+        :param key:
+        :return:
+        """
+        values = self._get_ordered(key)
+        if self._variables is None:
+            return values
+        # NOTE: Variables that were not stored are set to NaN, so that the iterates can still be indexed with the
+        #  indices of the optimization variables
+        full = np.full((values.shape[0], self.n_v), np.nan, dtype=self.dtype)
+        full[:, self._variables] = values
+        return full
+
+    @property
+    def iter(self):
+        """
+        Iteration numbers of the stored iterates
+
+        :return:
+        """
+        return self._get_ordered('iter')
+
+    @property
+    def x_sols(self):
+        """
+
+        :return:
+        """
+        return self._get_variables('x')
+
+    @property
+    def f_sols(self):
+        """
+
+        :return:
+        """
+        return self._get_ordered('f')
+
+    @property
+    def g_sols(self):
+        """
+
+        :return:
+        """
+        return self._get_ordered('g')
+
+    @property
+    def lam_x_sols(self):
+        """
+
+        :return:
+        """
+        return self._get_variables('lam_x')
+
+    @property
+    def lam_g_sols(self):
+        """
+
+        :return:
+        """
+        return self._get_ordered('lam_g')
+
+    @property
+    def lam_p_sols(self):
+        """
+
+        :return:
+        """
+        return self._get_ordered('lam_p')
+
     def get_n_in(self):
         """
 
@@ -111,21 +260,21 @@ class IpoptDebugger(ca.Callback):
         :param arg:
         :return:
         """
-        # Create dictionary
-        if not self.iter:
-            self.iter = [0]
-        else:
-            self.iter.append(self.iter[-1] + self.iter_step)
-        darg = {}
-        for (i, s) in enumerate(ca.nlpsol_out()): darg[s] = arg[i]
-        x_sol = [float(elem) for elem in darg['x'].full()]
-
-        self.x_sols.append(x_sol)
-        self.f_sols.append(darg['f'].full()[0][0])
-        self.g_sols.append(darg['g'].full())
-        self.lam_x_sols.append(darg['lam_x'].full())
-        self.lam_g_sols.append(darg['lam_g'].full())
-        self.lam_p_sols.append(darg['lam_p'].full())
+        iteration = self._n_calls
+        self._n_calls += 1
+        if iteration % self.record_every != 0:
+            return [0]
+
+        row = self._n_recorded % self.buffer_size
+        self._n_recorded += 1
+        for (i, s) in enumerate(ca.nlpsol_out()):
+            if s not in self._buffers:
+                continue
+            value = arg[i].full().ravel()
+            if s in ('x', 'lam_x') and self._variables is not None:
+                value = value[self._variables]
+            self._buffers[s][row] = value if s != 'f' else value[0]
+        self._buffers['iter'][row] = iteration
 
         return [0]
 
@@ -134,12 +283,37 @@ class IpoptDebugger(ca.Callback):
 
         :return:
         """
-        self.x_sols = []
-        self.f_sols = []
-        self.g_sols = []
-        self.lam_x_sols = []
-        self.lam_g_sols = []
-        self.lam_p_sols = []
+        self._n_calls = 0
+        self._n_recorded = 0
+        self._buffers['iter'][:] = -1
+
+    def flush(self):
+        """
+        Write the memory-mapped iterates to disk
+
+        :return:
+        """
+        if self.file_name is not None:
+            for buffer in self._buffers.values():
+                buffer.flush()
+
+    @staticmethod
+    def load(file_name):
+        """
+        Load the iterates that were memory-mapped to NumPy files
+
+        :param file_name: Prefix of the NumPy files
+        :type file_name: str
+        :return: Stored iterates sorted by the iteration numbers. Variables that were not stored are omitted.
+        :rtype: dict
+        """
+        iterations = np.load(f'{file_name}_iter.npy', mmap_mode='r')
+        order = np.argsort(iterations, kind='stable')
+        order = order[iterations[order] >= 0]
+        solution = {'iter': np.asarray(iterations[order])}
+        for key in ['x', 'f', 'g', 'lam_x', 'lam_g', 'lam_p']:
+            solution[key] = np.load(f'{file_name}_{key}.npy', mmap_mode='r')[order]
+        return solution
 
 
 class SciPyOptimizer:
@@ -167,8 +341,7 @@ class SciPyOptimizer:
         self._solver = solver
 
         self._function = None
-        self._jacobian = None
-        self._hessian = None
+        self._hessian_vector_product = None
 
         self._get_free = []
         self._has_free = False
@@ -234,9 +407,10 @@ class SciPyOptimizer:
             min_kwargs['args'] = (p, )
         min_kwargs['method'] = self._solver
         if self._solver in ['CG', 'BFGS', 'Newton-CG', 'L-BFGS-B']:
-            min_kwargs['jac'] = self._jacobian
+            # NOTE: The objective function returns the objective value and its gradient
+            min_kwargs['jac'] = True
         if self._solver in ['Newton-CG']:
-            min_kwargs['hess'] = self._hessian
+            min_kwargs['hessp'] = self._hessian_vector_product
         if self._solver in ['L-BFGS-B']:
             bounds = []
             for k in range(self._n_x):
@@ -246,11 +420,17 @@ class SciPyOptimizer:
             min_kwargs['bounds'] = bounds
         min_kwargs.update(self._options)
 
+        from scipy.optimize import minimize
+
         sol = minimize(self._function, x0, **min_kwargs)
 
         self._stats['status'] = sol.status
         self._stats['success'] = sol.success
         self._stats['message'] = sol.message
+        self._stats['iter_count'] = sol.get('nit')
+        self._stats['n_eval_f'] = sol.get('nfev')
+        self._stats['n_eval_grad_f'] = sol.get('njev')
+        self._stats['n_eval_hess_f'] = sol.get('nhev')
 
         return {'f': sol.fun, 'x': sol.x}
 
@@ -277,55 +457,60 @@ class SciPyOptimizer:
         self._n_p = p.shape[0]
         self._n_f = f.shape[0]
 
-        function = ca.Function('function', [x, p], [f])
-        function_free = function.get_free()
-
-        def fun(w, args):
-            """
-
-            :param w:
-            :param args:
-            :return:
-            """
-            return function(w, args).full().flatten()
+        if self._solver in ['CG', 'BFGS', 'Newton-CG', 'L-BFGS-B']:
+            # NOTE: The objective value and its gradient are evaluated by a single function, so that common
+            #  subexpressions (e.g. the Cholesky decomposition in the log marginal likelihood of GPs) are only evaluated
+            #  once per iterate
+            gradient = ca.gradient(f, x)
+            function = ca.Function('function', [x, p], [f, gradient])
 
-        self._function = fun
+            def fun(w, args):
+                """
 
-        if self._solver in ['CG', 'BFGS', 'Newton-CG', 'L-BFGS-B']:
-            jacobian = ca.Function('jacobian', [x, p], [ca.jacobian(f, x)])
-            jacobian_free = jacobian.get_free()
+                :param w:
+                :param args:
+                :return:
+                """
+                f_w, gradient_w = function(w, args)
+                return float(f_w), gradient_w.full().flatten()
+        else:
+            gradient = None
+            function = ca.Function('function', [x, p], [f])
 
-            def jac(w, args):
+            def fun(w, args):
                 """
 
                 :param w:
                 :param args:
                 :return:
                 """
-                return jacobian(w, args).full().flatten()
+                return function(w, args).full().flatten()
 
-            self._jacobian = jac
-        else:
-            jacobian_free = []
+        self._function = fun
+        function_free = function.get_free()
 
         if self._solver in ['Newton-CG']:
-            hessian = ca.Function('hessian', [x, p], [ca.hessian(f, x)[0]])
-            hessian_free = hessian.get_free()
+            # NOTE: The Hessian-vector products are evaluated by forward-over-reverse algorithmic differentiation, which
+            #  avoids the construction of dense Hessians
+            v = f.sym('v', self._n_x)
+            hessian_vector_product = ca.Function('hessian_vector_product', [x, p, v], [ca.jtimes(gradient, x, v)])
+            hessian_free = hessian_vector_product.get_free()
 
-            def hess(w, args):
+            def hessp(w, d, args):
                 """
 
                 :param w:
+                :param d:
                 :param args:
                 :return:
                 """
-                return hessian(w, args).full()
+                return hessian_vector_product(w, args, d).full().flatten()
 
-            self._hessian = hess
+            self._hessian_vector_product = hessp
         else:
             hessian_free = []
 
-        self._get_free = list(set(function_free + jacobian_free + hessian_free))
+        self._get_free = list(set(function_free + hessian_free))
         if self._get_free:
             self._has_free = True
 
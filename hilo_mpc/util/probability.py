@@ -167,6 +167,16 @@ class Prior(metaclass=ABCMeta):
         """
         return self._name
 
+    def sample(self, size: Union[int, Sequence[int]], rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+        Draws samples from the prior
+
+        :param size:
+        :param rng:
+        :return:
+        """
+        raise NotImplementedError(f"Sampling from the {self._name} prior is not supported")
+
     @staticmethod
     def gaussian(
             mean: Optional[Union[Numeric, Sequence[Numeric]]] = None,
@@ -275,6 +285,17 @@ class GaussianPrior(_MeanVariancePrior):
 
         self._pdf = Gaussian()
 
+    def sample(self, size: Union[int, Sequence[int]], rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+
+        :param size:
+        :param rng:
+        :return:
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        return rng.normal(self._mean, np.sqrt(self._variance), size=size)
+
 
 class LaplacePrior(_MeanVariancePrior):
     """"""
@@ -288,6 +309,17 @@ class LaplacePrior(_MeanVariancePrior):
 
         self._pdf = Laplace()
 
+    def sample(self, size: Union[int, Sequence[int]], rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+
+        :param size:
+        :param rng:
+        :return:
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        return rng.laplace(self._mean, np.sqrt(self._variance / 2.), size=size)
+
 
 class StudentsTPrior(_MeanVariancePrior):
     """"""
@@ -303,6 +335,19 @@ class StudentsTPrior(_MeanVariancePrior):
         self._nu = self._check_dimensionality(nu, 'nu')
         self._pdf = StudentsT()
 
+    def sample(self, size: Union[int, Sequence[int]], rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+
+        :param size:
+        :param rng:
+        :return:
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        # NOTE: The variance of the Student's t-distribution with scale s is s^2*nu/(nu - 2)
+        scale = np.sqrt(self._variance * (self._nu - 2.) / self._nu)
+        return self._mean + scale * rng.standard_t(self._nu, size=size)
+
     def _get_parameter_values(self) -> (Union[Numeric, Sequence[Numeric]], ...):
         """
 
@@ -337,10 +382,73 @@ class DeltaPrior(Prior):
         pass
 
 
+def lhs(
+        lower_bound: Union[Numeric, Sequence[Numeric], np.ndarray],
+        upper_bound: Union[Numeric, Sequence[Numeric], np.ndarray],
+        n: int,
+        seed: Optional[int] = None
+) -> np.ndarray:
+    """
+    Latin hypercube sampling of a box
+
+    Every dimension is divided into n intervals of equal length and every interval contains exactly one of the
+    samples. Contrary to :func:`lhsnorm` the samples are uniformly distributed within the box.
+
+    :param lower_bound: Lower bounds of the box
+    :param upper_bound: Upper bounds of the box
+    :param n: Number of samples
+    :param seed: Seed of the random number generator
+    :return: Array of shape (n, number of dimensions) with one sample per row
+    """
+    lower_bound = np.atleast_1d(np.asarray(lower_bound, dtype=float)).flatten()
+    upper_bound = np.atleast_1d(np.asarray(upper_bound, dtype=float)).flatten()
+    if lower_bound.size != upper_bound.size:
+        raise ValueError(f"Dimension mismatch between lower bound ({lower_bound.size}) and upper bound "
+                         f"({upper_bound.size})")
+    if np.any(~np.isfinite(lower_bound)) or np.any(~np.isfinite(upper_bound)):
+        raise ValueError("Latin hypercube sampling requires finite bounds")
+    if np.any(upper_bound < lower_bound):
+        raise ValueError("The upper bound needs to be greater than or equal to the lower bound")
+
+    rng = np.random.default_rng(seed)
+    n_dim = lower_bound.size
+    x = (np.argsort(rng.random((n, n_dim)), axis=0) + rng.random((n, n_dim))) / n
+
+    return lower_bound + x * (upper_bound - lower_bound)
+
+
+def lhsnorm(mu, sigma, n):
+    """
+
+    :param mu:
+    :param sigma:
+    :param n:
+    :return:
+    """
+    from scipy.stats import norm
+
+    n_m = mu.size
+    z = np.random.multivariate_normal(mu, sigma, size=n)
+    x = np.zeros_like(z, dtype=z.dtype)
+
+    idz = np.argsort(z, axis=0)
+    for k in range(n_m):
+        x[idz[:, k], k] = np.linspace(1, n, n)
+    x -= np.random.rand(*x.shape)
+    x /= n
+
+    for k in range(n_m):
+        x[:, k] = norm.ppf(x[:, k], loc=mu[k], scale=np.sqrt(sigma[k, k]))
+
+    return x
+
+
 __all__ = [
     'Prior',
     'GaussianPrior',
     'LaplacePrior',
     'StudentsTPrior',
-    'DeltaPrior'
+    'DeltaPrior',
+    'lhs',
+    'lhsnorm'
 ]
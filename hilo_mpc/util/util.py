@@ -30,8 +30,6 @@ import warnings
 
 import casadi as ca
 import numpy as np
-from scipy.sparse import issparse
-from scipy.sparse.linalg import norm as sparse_norm
 
 if platform.system() == 'Windows':
     from .windows import get_vcvars, WINDOWS_COMPILERS
@@ -44,6 +42,9 @@ Function = TypeVar('Function', bound=Callable[..., Any])
 
 JIT = ['jit', 'just-in-time']
 AOT = ['aot', 'ahead-of-time']
+# NOTE: Since CasADi 3.7 functions called with SX arguments are kept as call nodes in the SX graph. In older versions
+#  they are inlined and callbacks cannot be called with SX arguments at all.
+SX_CALL_NODES = tuple(int(k) for k in ca.__version__.split('.')[:2]) >= (3, 7)
 TYPES = {
     ca.SX: ca.SX,
     ca.MX: ca.MX,
@@ -566,6 +567,76 @@ def is_iterable(obj) -> bool:
     return True
 
 
+def has_call_nodes(expr) -> bool:
+    """
+
+    :param expr:
+    :return:
+    """
+    if not isinstance(expr, ca.SX) or expr.is_empty():
+        return False
+    function = ca.Function('expression', ca.symvar(expr), [expr])
+    return any(function.instruction_id(k) == ca.OP_CALL for k in range(function.n_instructions()))
+
+
+def _degree(expr, var) -> int:
+    """
+    Returns an upper bound for the polynomial degree of the expression w.r.t. the variables (0, 1 or 2, where 2 stands
+    for any degree higher than 1 or non-polynomial dependencies)
+
+    :param expr:
+    :param var:
+    :return:
+    """
+    parameters = [symbol for symbol in ca.symvar(expr) if not ca.depends_on(symbol, var)]
+    function = ca.Function('expression', [var, ca.vertcat(*parameters)], [expr])
+    degree = {}
+    max_degree = 0
+    for k in range(function.n_instructions()):
+        op = function.instruction_id(k)
+        inputs = [degree.get(i, 0) for i in function.instruction_input(k) if i >= 0]
+        if op == ca.OP_INPUT:
+            value = 1 if function.instruction_input(k)[0] == 0 else 0
+        elif op == ca.OP_OUTPUT:
+            max_degree = max(max_degree, inputs[0])
+            continue
+        elif op == ca.OP_CONST or not inputs:
+            value = 0
+        elif op in [ca.OP_ADD, ca.OP_SUB, ca.OP_NEG, ca.OP_TWICE, ca.OP_ASSIGN]:
+            value = max(inputs)
+        elif op == ca.OP_MUL:
+            value = min(sum(inputs), 2)
+        elif op == ca.OP_DIV:
+            value = inputs[0] if inputs[1] == 0 else 2
+        else:
+            # NOTE: All other operations (including calls to functions) are treated as nonlinear, unless none of their
+            #  arguments depends on the variables
+            value = 0 if max(inputs) == 0 else 2
+        for i in function.instruction_output(k):
+            if i >= 0:
+                degree[i] = value
+    return max_degree
+
+
+def is_linear(expr, var) -> bool:
+    """
+
+    :param expr:
+    :param var:
+    :return:
+    """
+    if ca.is_linear(expr, var):
+        return True
+    if not has_call_nodes(expr) or not var.is_valid_input():
+        return False
+
+    # NOTE: CasADi treats calls to external functions (e.g. neural networks that are embedded as a single call node)
+    #  conservatively, i.e. they are never considered to be linear. In this case the expression is considered to be
+    #  linear if none of the call nodes depends on the variables and the remaining operations are affine in the
+    #  variables (e.g. for linearized models, where the call nodes are only evaluated at the equilibrium point).
+    return _degree(expr, var) <= 1
+
+
 def is_list_like(obj):
     """
 
@@ -637,6 +708,9 @@ def is_symmetric(x, tol=1e-8):
     :param tol:
     :return:
     """
+    from scipy.sparse import issparse
+    from scipy.sparse.linalg import norm as sparse_norm
+
     if issparse(x):
         # TODO: Test this
         return sparse_norm(x - x.T, ca.inf) < tol
@@ -0,0 +1,143 @@
+from unittest import TestCase
+import tempfile
+
+import casadi as ca
+import numpy as np
+
+from hilo_mpc import ANN, ApproximateMPC, Dense, LMPC, Model, NMPC
+from hilo_mpc.util.data import ChunkedDataSet
+from hilo_mpc.util.probability import lhs
+
+
+def _nmpc():
+    """
+
+    :return:
+    """
+    model = Model(plot_backend='bokeh')
+    x = model.set_dynamical_states(['x_1', 'x_2'])
+    u = model.set_inputs('u')
+    a = model.set_parameters('a')
+    model.set_dynamical_equations([x[1], a * x[0] + u])
+    model.setup(dt=.1)
+
+    nmpc = NMPC(model, plot_backend='bokeh')
+    nmpc.quad_stage_cost.add_states(names=['x_1', 'x_2'], ref=[0., 0.], weights=[1., 1.])
+    nmpc.quad_stage_cost.add_inputs(names='u', weights=.1)
+    nmpc.horizon = 10
+    nmpc.set_box_constraints(u_lb=[-1.], u_ub=[1.])
+    nmpc.setup(options={'print_level': 0})
+    return nmpc
+
+
+class TestLatinHypercubeSampling(TestCase):
+    """"""
+    def test_lhs(self) -> None:
+        """
+
+        :return:
+        """
+        samples = lhs([0., -1.], [1., 3.], 8, seed=0)
+        self.assertEqual(samples.shape, (8, 2))
+        # NOTE: Every one of the 8 intervals of every dimension contains exactly one sample
+        np.testing.assert_array_equal(np.sort(np.floor(8. * samples[:, 0])), np.arange(8))
+        np.testing.assert_array_equal(np.sort(np.floor(2. * (samples[:, 1] + 1.))), np.arange(8))
+        np.testing.assert_array_equal(lhs([0., -1.], [1., 3.], 8, seed=0), samples)
+
+        with self.assertRaises(ValueError):
+            lhs([0., -np.inf], [1., 1.], 8)
+        with self.assertRaises(ValueError):
+            lhs([0., 0.], [1.], 8)
+
+
+class TestApproximateMPC(TestCase):
+    """"""
+    def setUp(self) -> None:
+        """
+
+        :return:
+        """
+        self.nmpc = _nmpc()
+
+    def test_approximate_mpc_initialization(self) -> None:
+        """
+
+        :return:
+        """
+        ampc = ApproximateMPC(self.nmpc)
+        self.assertEqual(ampc.type, 'ApproximateMPC')
+        self.assertEqual(ampc.features, ['x_1', 'x_2', 'a'])
+        self.assertEqual(ampc.labels, ['u'])
+        self.assertIsNone(ampc.data)
+
+        with self.assertRaises(ValueError):
+            ampc.sample(10, [-1., -1.], [1., 1.])
+        with self.assertRaises(RuntimeError):
+            ampc.optimize([0., 0.], cp=0.)
+
+        model = Model(plot_backend='bokeh', discrete=True)
+        x = model.set_dynamical_states('x')
+        u = model.set_inputs('u')
+        model.set_dynamical_equations(x + u)
+        model.setup(dt=1.)
+        with self.assertRaises(TypeError):
+            ApproximateMPC(LMPC(model))
+        with self.assertRaises(RuntimeError):
+            ApproximateMPC(NMPC(model))
+
+    def test_approximate_mpc_sample(self) -> None:
+        """
+
+        :return:
+        """
+        ampc = ApproximateMPC(self.nmpc)
+        data_set = ampc.sample(30, [-1., -1.], [1., 1.], p_lb=-.5, p_ub=.5, seed=0, batch_size=7)
+        self.assertEqual(len(data_set), 30)
+        self.assertEqual(ampc.n_failed, 0)
+        self.assertEqual(data_set.features, ['x_1', 'x_2', 'a'])
+        features, labels = data_set.raw_data
+        np.testing.assert_array_equal(features, lhs([-1., -1., -.5], [1., 1., .5], 30, seed=0).T)
+
+        for k in [0, 13, 29]:
+            u = self.nmpc.optimize(features[:2, k], cp=features[2, k], v0=ampc._v0)
+            np.testing.assert_allclose(labels[:, k], u.full().flatten(), atol=1e-10)
+        self.assertTrue(np.all(np.abs(labels) <= 1. + 1e-8))
+
+        # NOTE: The samples are solved independently of each other, so the results don't depend on the distribution of
+        #  the samples over the worker processes
+        with tempfile.TemporaryDirectory() as directory:
+            chunked_data_set = ampc.sample(30, [-1., -1.], [1., 1.], p_lb=-.5, p_ub=.5, seed=0, processes=3,
+                                           batch_size=4, path=directory)
+            self.assertIsInstance(chunked_data_set, ChunkedDataSet)
+            np.testing.assert_array_equal(chunked_data_set.raw_data[0][:], features.T)
+            np.testing.assert_allclose(chunked_data_set.raw_data[1][:], labels.T, atol=1e-10)
+
+    def test_approximate_mpc_evaluate(self) -> None:
+        """
+
+        :return:
+        """
+        ampc = ApproximateMPC(self.nmpc)
+        features, labels = ampc.sample(40, [-1., -1.], [1., 1.], p_lb=-.5, p_ub=.5, seed=1).raw_data
+
+        # NOTE: Linear approximation of the MPC law, that doesn't respect the input bounds
+        ann = ANN(ampc.features, ampc.labels)
+        ann.add_layers(Dense(1, activation='linear'))
+        weights = np.linalg.lstsq(np.vstack([features, np.ones((1, 40))]).T, labels.T, rcond=None)[0].T
+        ann.build_graph(weights=[weights[:, :3], np.ones((1, 1))], bias=[weights[:, 3:], np.zeros((1, 1))])
+        ampc.approximator = ann
+
+        u = weights[:, :3] @ features + weights[:, 3:]
+        metrics = ampc.evaluate()
+        np.testing.assert_allclose(metrics['mean_absolute_error'], np.mean(np.abs(u - labels), axis=1))
+        np.testing.assert_allclose(metrics['max_absolute_error'], np.max(np.abs(u - labels), axis=1))
+        np.testing.assert_allclose(metrics['root_mean_squared_error'], np.sqrt(np.mean((u - labels) ** 2, axis=1)))
+        self.assertAlmostEqual(metrics['max_constraint_violation'], np.max(np.abs(u)) - 1.)
+        self.assertAlmostEqual(metrics['constraint_violation_rate'], np.mean(np.abs(u) > 1. + 1e-6))
+        self.assertGreater(metrics['constraint_violation_rate'], 0.)
+        self.assertIs(ampc.metrics, metrics)
+
+        k = np.argmax(np.abs(u))
+        np.testing.assert_allclose(ampc.optimize(features[:2, k], cp=features[2, k]), u[:, k:k + 1])
+        ampc = ApproximateMPC(self.nmpc, approximator=ann, saturate=True)
+        np.testing.assert_allclose(ampc.optimize(features[:2, k], cp=features[2, k]), np.sign(u[:, k:k + 1]))
@@ -0,0 +1,231 @@
+from unittest import TestCase
+
+import casadi as ca
+import numpy as np
+
+from hilo_mpc import Model, KF, EnKF
+from hilo_mpc.modules.estimator.enkf import _gaspari_cohn
+
+
+def _linear_model():
+    """
+
+    :return:
+    """
+    model = Model(plot_backend='bokeh', discrete=True)
+    x = model.set_dynamical_states(['x_1', 'x_2'])
+    u = model.set_inputs('u')
+    model.set_measurements('y')
+    model.set_dynamical_equations([.9 * x[0] + u, .1 * x[0] + .8 * x[1]])
+    model.set_measurement_equations(x[1])
+    model.setup(dt=1.)
+    return model
+
+
+def _chain_model(n_x, measurement=None):
+    """
+
+    :param n_x:
+    :param measurement:
+    :return:
+    """
+    model = Model(plot_backend='bokeh', discrete=True)
+    x = model.set_dynamical_states([f'x_{k}' for k in range(n_x)])
+    model.set_dynamical_equations(x - .01 * x ** 2)
+    if measurement is None:
+        model.set_measurements('y')
+        model.set_measurement_equations(x[-1])
+    else:
+        y = measurement(x)
+        model.set_measurements([f'y_{k}' for k in range(y.numel())])
+        model.set_measurement_equations(y)
+    model.setup(dt=1.)
+    return model
+
+
+class TestEnsembleKalmanFilterInitialization(TestCase):
+    """"""
+    def test_ensemble_kalman_filter_linear_model_warning(self) -> None:
+        """
+
+        :return:
+        """
+        model = _linear_model()
+        with self.assertWarns(UserWarning) as context:
+            EnKF(model, plot_backend='bokeh')
+        self.assertEqual(
+            str(context.warnings[0].message),
+            "The supplied model is linear. For better efficiency use an observer targeted at the estimation of linear "
+            "systems."
+        )
+
+    def test_ensemble_kalman_filter_initial_tuning_parameters(self) -> None:
+        """
+
+        :return:
+        """
+        enkf = EnKF(_chain_model(3), plot_backend='bokeh')
+        self.assertEqual(enkf.type, 'ensemble Kalman filter')
+        self.assertEqual(enkf.ensemble_size, 50)
+        self.assertEqual(enkf.inflation, 1.)
+        self.assertIsNone(enkf.ensemble)
+
+    def test_ensemble_kalman_filter_invalid_tuning_parameters(self) -> None:
+        """
+
+        :return:
+        """
+        model = _chain_model(3)
+        with self.assertRaises(ValueError):
+            EnKF(model, plot_backend='bokeh', ensemble_size=1)
+        with self.assertRaises(ValueError):
+            EnKF(model, plot_backend='bokeh', inflation=0.)
+        with self.assertRaises(ValueError):
+            EnKF(model, plot_backend='bokeh', parallelization='gpu')
+        enkf = EnKF(model, plot_backend='bokeh')
+        with self.assertRaises(ValueError):
+            enkf.set_localization(-1.)
+
+
+class TestEnsembleKalmanFilterEstimation(TestCase):
+    """"""
+    def test_ensemble_kalman_filter_large_ensemble(self) -> None:
+        """
+
+        :return:
+        """
+        kf = KF(_linear_model(), plot_backend='bokeh')
+        with self.assertWarns(UserWarning):
+            enkf = EnKF(_linear_model(), plot_backend='bokeh', ensemble_size=5000, seed=1)
+        for estimator in [kf, enkf]:
+            estimator.setup()
+            estimator.Q = [.01, .01]
+            estimator.R = .064
+            estimator.set_initial_guess([.8, 0.], P0=[1., 1.])
+            for k in range(10):
+                estimator.estimate(y=.3 + .05 * k, u=.8)
+
+        # NOTE: For linear systems the ensemble Kalman filter converges to the Kalman filter for large ensembles
+        P = np.asarray(kf.solution['P:f']).reshape(2, 2)
+        np.testing.assert_allclose(enkf.solution['x:f'], kf.solution['x:f'], rtol=5e-2)
+        np.testing.assert_allclose(enkf.solution['P:f'], np.diag(P)[:, None], rtol=2e-1)
+        np.testing.assert_allclose(enkf.P, P, rtol=2e-1, atol=1e-2)
+
+    def test_ensemble_kalman_filter_multi_step(self) -> None:
+        """
+
+        :return:
+        """
+        enkf = EnKF(_chain_model(4), plot_backend='bokeh', ensemble_size=20, seed=0)
+        enkf.setup()
+        enkf.Q = 4 * [.001]
+        enkf.R = .01
+        enkf.set_initial_guess(4 * [1.], P0=4 * [.1])
+        enkf.estimate(y=ca.DM([[.9, .95, 1.]]), steps=3)
+
+        self.assertEqual(enkf.solution['x'].shape, (4, 4))
+        self.assertEqual(enkf.solution['P'].shape, (4, 4))
+        self.assertEqual(enkf.ensemble.shape, (4, 20))
+        np.testing.assert_allclose(enkf.solution['x:f'], ca.sum2(enkf.ensemble) / 20)
+
+    def test_ensemble_kalman_filter_ensemble_space(self) -> None:
+        """
+
+        :return:
+        """
+        model = _chain_model(6, measurement=lambda x: x)
+        estimators = []
+        for ensemble_space in [True, False]:
+            enkf = EnKF(model, plot_backend='bokeh', ensemble_size=4)
+            enkf.setup()
+            self.assertTrue(enkf._ensemble_space)
+            if not ensemble_space:
+                enkf._ensemble_space = False
+                enkf._setup_update()
+            estimators.append(enkf)
+
+        rng = np.random.default_rng(0)
+        R = np.diag(rng.uniform(.1, 1., 6))
+        args = {
+            'X': rng.normal(size=(6, 4)),
+            'y': rng.normal(size=6),
+            'p': [],
+            'E': rng.normal(size=(6, 4)),
+            'R': R,
+            'R_inv': np.linalg.inv(R),
+            'inflation': 1.1
+        }
+        # NOTE: The analysis in the space of the ensemble members is exact (Woodbury identity)
+        np.testing.assert_allclose(estimators[0]._update_function(**args)['X_up'],
+                                   estimators[1]._update_function(**args)['X_up'])
+
+    def test_ensemble_kalman_filter_parallelization(self) -> None:
+        """
+
+        :return:
+        """
+        estimates = []
+        for parallelization in ['serial', 'thread']:
+            enkf = EnKF(_chain_model(4), plot_backend='bokeh', ensemble_size=20, parallelization=parallelization,
+                        seed=0)
+            enkf.setup()
+            enkf.Q = 4 * [.001]
+            enkf.R = .01
+            enkf.set_initial_guess(4 * [1.], P0=4 * [.1])
+            for _ in range(3):
+                enkf.estimate(y=.9)
+            estimates.append(enkf.ensemble)
+        np.testing.assert_allclose(estimates[1], estimates[0])
+
+
+class TestEnsembleKalmanFilterLocalization(TestCase):
+    """"""
+    def test_gaspari_cohn(self) -> None:
+        """
+
+        :return:
+        """
+        rho = _gaspari_cohn(np.array([0., .5, 1., 1.5, 2., 3.]), 2.)
+        self.assertEqual(rho[0], 1.)
+        self.assertTrue(np.all(np.diff(rho[:5]) < 0.))
+        np.testing.assert_allclose(rho[4:], 0., atol=1e-12)
+
+    def test_ensemble_kalman_filter_localization(self) -> None:
+        """
+
+        :return:
+        """
+        updates = []
+        for radius in [None, 3.]:
+            enkf = EnKF(_chain_model(10), plot_backend='bokeh', ensemble_size=10, seed=0)
+            if radius is not None:
+                enkf.set_localization(radius)
+            enkf.setup()
+            enkf.R = .01
+            enkf.set_initial_guess(10 * [1.], P0=10 * [.1])
+            enkf._initial_ensemble()
+            prediction = enkf._predict_function(enkf.ensemble, [], ca.DM.zeros(10, 10))
+            enkf.estimate(y=.5)
+            updates.append(np.asarray(enkf.ensemble - prediction))
+
+        # NOTE: Without localization the small ensemble introduces spurious correlations between the measured last state
+        #  and the first states
+        self.assertTrue(np.all(np.abs(updates[0][:7]).max(axis=1) > 0.))
+        np.testing.assert_allclose(updates[1][:7], 0., atol=1e-12)
+        self.assertTrue(np.all(np.abs(updates[1][7:]).max(axis=1) > 0.))
+
+    def test_ensemble_kalman_filter_localization_coordinates(self) -> None:
+        """
+
+        :return:
+        """
+        model = _chain_model(4, measurement=lambda x: x[0] + x[1])
+        for kwargs in [{}, {'x_coordinates': [0., 1.], 'y_coordinates': [.5]}]:
+            enkf = EnKF(model, plot_backend='bokeh')
+            enkf.set_localization(2., **kwargs)
+            with self.assertRaises(ValueError):
+                enkf.setup()
+
+        enkf = EnKF(model, plot_backend='bokeh')
+        enkf.set_localization(2., y_coordinates=[.5])
+        enkf.setup()
@@ -621,6 +621,105 @@ class TestGaussianProcessSetupAndModelFitting(TestCase):
         np.testing.assert_allclose(noise_variance.value, np.array([[1.406995]]))
 
 
+class TestGaussianProcessRestarts(TestCase):
+    """"""
+    def setUp(self) -> None:
+        """
+
+        :return:
+        """
+        rng = np.random.default_rng(0)
+        X_train = rng.uniform(-3., 3., size=(1, 30))
+        y_train = np.sin(3. * X_train) + .1 * rng.normal(size=(1, 30))
+
+        gp = GP(['x'], 'y', solver='ipopt')
+        gp.set_training_data(X_train, y_train)
+        gp.setup()
+        # NOTE: Starting from a large length scale, the optimization converges to a local optimum that explains the
+        #  data as noise
+        gp.get_hyperparameter_by_name('SE.length_scales').value = 100.
+
+        self.gp = gp
+
+    def test_gaussian_process_restarts(self) -> None:
+        """
+
+        :return:
+        """
+        gp = self.gp
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            gp.fit_model()
+        log_marginal_likelihood = gp.log_marginal_likelihood()
+        self.assertEqual(len(gp.restart_stats), 1)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            gp.get_hyperparameter_by_name('SE.length_scales').value = 100.
+            gp.get_hyperparameter_by_name('SE.signal_variance').value = 1.
+            gp.get_hyperparameter_by_name('GP.noise_variance').value = 1.
+            gp.fit_model(restarts=8, seed=1)
+        self.assertEqual(len(gp.restart_stats), 9)
+        np.testing.assert_allclose(gp.restart_stats[0]['x0'][1], np.log(100.))
+        best = max(restart['log_marginal_likelihood'] for restart in gp.restart_stats if restart['success'])
+        self.assertAlmostEqual(gp.log_marginal_likelihood(), best)
+        self.assertGreater(gp.log_marginal_likelihood(), log_marginal_likelihood + 1.)
+
+        with self.assertRaises(ValueError):
+            gp.fit_model(restarts=-1)
+
+    def test_gaussian_process_restarts_processes(self) -> None:
+        """
+
+        :return:
+        """
+        import multiprocessing
+
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            self.skipTest("Worker processes require the 'fork' start method")
+
+        gp = self.gp
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            gp.fit_model(restarts=3, processes=2, seed=1)
+        parallel = [restart['x'] for restart in gp.restart_stats]
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            gp.get_hyperparameter_by_name('SE.length_scales').value = 100.
+            gp.get_hyperparameter_by_name('SE.signal_variance').value = 1.
+            gp.get_hyperparameter_by_name('GP.noise_variance').value = 1.
+            gp.fit_model(restarts=3, seed=1)
+        serial = [restart['x'] for restart in gp.restart_stats]
+        np.testing.assert_allclose(parallel, serial, rtol=1e-8)
+
+    def test_hyperparameter_sample(self) -> None:
+        """
+
+        :return:
+        """
+        from hilo_mpc.util.machine_learning import Hyperparameter
+        from hilo_mpc.util.probability import Prior
+
+        rng = np.random.default_rng(0)
+        samples = Hyperparameter('length_scales', value=[1., 2.], bounds=(.1, 10.)).sample(1000, rng=rng)
+        self.assertEqual(samples.shape, (1000, 2))
+        self.assertTrue(np.all((samples >= .1) & (samples <= 10.)))
+        samples = Hyperparameter('signal_variance', value=4.).sample(1000, rng=rng)
+        self.assertTrue(np.all(samples > 0.))
+        self.assertAlmostEqual(np.median(np.log(samples)), np.log(4.), delta=.2)
+        samples = Hyperparameter('offset', value=0., positive=False, bounds=(-1., 1.)).sample(1000, rng=rng)
+        self.assertTrue(np.all((samples >= -1.) & (samples <= 1.)))
+
+        for prior in [Prior.gaussian(mean=1., variance=4.), Prior.laplace(mean=1., variance=4.)]:
+            samples = prior.sample(100000, rng=rng)
+            self.assertAlmostEqual(np.mean(samples), 1., delta=.05)
+            self.assertAlmostEqual(np.var(samples), 4., delta=.4)
+        with self.assertRaises(NotImplementedError):
+            Prior.delta().sample(1)
+
+
 class TestGaussianProcessPrediction(TestCase):
     """"""
     def setUp(self) -> None:
@@ -665,6 +764,53 @@ class TestGaussianProcessPrediction(TestCase):
         np.testing.assert_allclose(mean, mean_nf)
         np.testing.assert_array_less(var_nf, var)
 
+    def test_gaussian_process_predict_batches(self) -> None:
+        """
+
+        :return:
+        """
+        gp = self.gp
+
+        X_test = np.array([[.25, .6, .75, .9, .4], [.9, .75, .6, .25, -.5]])
+        mean, var = gp.predict(X_test)
+        self.assertEqual(mean.shape, (1, 5))
+        self.assertEqual(var.shape, (1, 5))
+
+        # NOTE: The CasADi graph of the GP is evaluated point-wise
+        prediction = gp._function(X=X_test, x0=gp._gp_args['x0'], p=gp._gp_args['p'])
+        np.testing.assert_allclose(mean, prediction['mean'])
+        np.testing.assert_allclose(var, prediction['variance'] + gp.noise_variance.value)
+
+        mean_batch, var_batch = gp.predict(X_test, batch_size=2)
+        np.testing.assert_allclose(mean_batch, mean)
+        np.testing.assert_allclose(var_batch, var)
+
+        with self.assertRaises(ValueError):
+            gp.predict(X_test.T)
+
+    def test_gaussian_process_predict_full_covariance(self) -> None:
+        """
+
+        :return:
+        """
+        import casadi as ca
+
+        gp = self.gp
+
+        X_test = np.array([[.25, .6, .75, .9, .4], [.9, .75, .6, .25, -.5]])
+        mean, var = gp.predict(X_test, noise_free=True)
+        mean_full, cov = gp.predict(X_test, noise_free=True, full_cov=True, batch_size=2)
+        self.assertEqual(cov.shape, (5, 5))
+        np.testing.assert_allclose(mean_full, mean)
+        np.testing.assert_allclose(np.diag(cov), var.flatten())
+        np.testing.assert_allclose(cov, cov.T, atol=1e-12)
+
+        _, cov_noisy = gp.predict(X_test, full_cov=True)
+        np.testing.assert_allclose(cov_noisy - cov, float(gp.noise_variance.value) * np.eye(5), atol=1e-12)
+
+        with self.assertRaises(ValueError):
+            gp.predict(ca.SX.sym('X', 2), full_cov=True)
+
     def test_gaussian_process_predict_symbolic(self) -> None:
         """
 
@@ -698,6 +844,25 @@ class TestGaussianProcessPrediction(TestCase):
         np.testing.assert_allclose(var, var_mx)
         np.testing.assert_allclose(var_sx, var_mx)
 
+    def test_gaussian_process_embedding(self) -> None:
+        """
+
+        :return:
+        """
+        import casadi as ca
+
+        gp = self.gp
+
+        X_test = np.array([[.25], [.9]])
+        mean, _ = gp.predict(X_test)
+        X = ca.SX.sym('X', 2)
+        jacobian = ca.Function('jacobian', [X], [ca.jacobian(gp.predict(X)[0], X)])(X_test)
+        for embedding in ['expression', 'function', 'callback']:
+            gp.embedding = embedding
+            function = gp.to_function()
+            np.testing.assert_allclose(function(X_test), mean)
+            np.testing.assert_allclose(ca.Function('f', [X], [ca.jacobian(function(X), X)])(X_test), jacobian)
+
     def test_gaussian_process_predict_quantiles_test_data(self) -> None:
         """
 
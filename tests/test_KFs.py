@@ -1,5 +1,6 @@
 from unittest import TestCase
 
+import casadi as ca
 import numpy as np
 
 from hilo_mpc import Model, KF, EKF, UKF
@@ -522,6 +523,133 @@ class TestKalmanFilterEstimation(TestCase):
         np.testing.assert_allclose(y_pred, np.array([[.4]]))
 
 
+class TestKalmanFilterSteadyStateAndJosephForm(TestCase):
+    """"""
+    @staticmethod
+    def _model(discrete):
+        """
+
+        :param discrete:
+        :return:
+        """
+        model = Model(plot_backend='bokeh', discrete=discrete)
+        x = model.set_dynamical_states(['x_1', 'x_2'])
+        u = model.set_inputs('u')
+        k = model.set_parameters(['k_1', 'k_2'])
+        model.set_measurements('y')
+        model.set_measurement_equations(x[1])
+        if discrete:
+            model.set_dynamical_equations([.9 * x[0] + u, .1 * x[0] + .8 * x[1]])
+        else:
+            model.set_dynamical_equations([-k[0] * x[0] + u, k[0] * x[0] - k[1] * x[1]])
+        model.setup(dt=1.)
+        return model
+
+    def _run(self, discrete, steps=60, **kwargs):
+        """
+
+        :param discrete:
+        :param steps:
+        :param kwargs:
+        :return:
+        """
+        kf = KF(self._model(discrete), plot_backend='bokeh', **kwargs)
+        kf.setup()
+        kf.Q = [.01, .01]
+        kf.R = .064
+        kf.set_initial_guess([.8, 0.], P0=[1., 1.])
+        kf.set_initial_parameter_values([.5, .4])
+        for k in range(steps):
+            kf.estimate(y=.3 + .01 * k, u=.8)
+        return kf
+
+    def test_kalman_filter_steady_state(self) -> None:
+        """
+
+        :return:
+        """
+        for discrete in [False, True]:
+            with self.subTest(discrete=discrete):
+                kf = self._run(discrete)
+                kf_ss = self._run(discrete, steady_state=True)
+                self.assertTrue(kf_ss.steady_state)
+                self.assertEqual(kf_ss.gain.shape, (2, 1))
+                # NOTE: The error covariance of the Kalman filter converges to the solution of the algebraic Riccati
+                #  equation, while the remaining difference in the estimates comes from the initial transient
+                np.testing.assert_allclose(kf_ss.solution['P:f'], kf.solution['P:f'], rtol=1e-4, atol=1e-8)
+                np.testing.assert_allclose(kf_ss.solution['x:f'], kf.solution['x:f'], rtol=1e-3)
+
+    def test_kalman_filter_steady_state_gain_updated(self) -> None:
+        """
+
+        :return:
+        """
+        kf = self._run(True, steps=1, steady_state=True)
+        K = kf.gain
+        kf.estimate(y=.3, u=.8)
+        self.assertIs(kf.gain, K)
+        kf.R = 1.
+        kf.estimate(y=.3, u=.8)
+        self.assertTrue(np.all(np.asarray(kf.gain) < np.asarray(K)))
+
+    def test_kalman_filter_steady_state_prediction(self) -> None:
+        """
+
+        :return:
+        """
+        for discrete in [False, True]:
+            with self.subTest(discrete=discrete):
+                model = Model(plot_backend='bokeh', discrete=discrete,
+                              solver_options=None if discrete else {'abstol': 1e-12, 'reltol': 1e-12})
+                x = model.set_dynamical_states(['x_1', 'x_2'])
+                u = model.set_inputs('u')
+                k = model.set_parameters('k')
+                model.set_measurements('y')
+                model.set_measurement_equations(x[1])
+                model.set_dynamical_equations([-k * x[0] + .5 * x[1] + u + .2, .3 * x[0] - .4 * x[1] - .1])
+                model.setup(dt=.5)
+
+                kf = KF(model, plot_backend='bokeh', steady_state=True)
+                kf.setup()
+                kf.Q = [.01, .01]
+                kf.R = .064
+                solution = kf._solve_steady_state(ca.DM(.7))
+
+                # NOTE: The steady-state Kalman filter propagates the mean with the discretized system matrices, which
+                #  needs to coincide with the integrator of the model
+                x0 = ca.DM([.8, -.3])
+                up = ca.DM([1.5, .7])
+                x_pred = kf._predict_function(x0, up, solution['A'], solution['B'], solution['c'])
+                np.testing.assert_allclose(x_pred, model(x0=x0, p=up)['xf'], rtol=1e-9, atol=1e-10)
+
+    def test_kalman_filter_steady_state_time_variant_model(self) -> None:
+        """
+
+        :return:
+        """
+        model = Model(plot_backend='bokeh')
+        model.set_dynamical_states('x')
+        model.set_dynamical_equations('-t*x')
+        model.setup(dt=1.)
+        with self.assertRaises(ValueError) as context:
+            KF(model, steady_state=True)
+        self.assertEqual(str(context.exception), "The steady-state Kalman filter requires a time-invariant model.")
+
+    def test_kalman_filter_joseph_form(self) -> None:
+        """
+
+        :return:
+        """
+        for discrete in [False, True]:
+            with self.subTest(discrete=discrete):
+                kf = self._run(discrete, steps=5)
+                kf_joseph = self._run(discrete, steps=5, joseph_form=True)
+                P = np.asarray(kf_joseph.solution['P:f']).reshape(2, 2)
+                np.testing.assert_allclose(kf_joseph.solution['x:f'], kf.solution['x:f'])
+                np.testing.assert_allclose(kf_joseph.solution['P:f'], kf.solution['P:f'], rtol=1e-8, atol=1e-12)
+                np.testing.assert_array_equal(P, P.T)
+
+
 class TestExtendedKalmanFilter(TestCase):
     """"""
     def test_extended_kalman_filter_initialization_linear_model_warning(self) -> None:
@@ -754,3 +882,109 @@ class UnscentedKalmanFilterSigmaPoints(TestCase):
                                                      [0.245549, -2.03814e-06, 0.00990874, -0.000819447],
                                                      [19.9597, 1.56415e-06, -0.000819447, 0.997286]]), atol=1e-3)
         np.testing.assert_allclose(y_pred, np.array([[299.925], [.219434]]), atol=1e-3)
+
+
+class UnscentedKalmanFilterSquareRootForm(TestCase):
+    """"""
+    def setUp(self) -> None:
+        """
+
+        :return:
+        """
+        model = Model(plot_backend='bokeh', discrete=True)
+        x = model.set_dynamical_states(['x_1', 'x_2', 'x_3'])
+        u = model.set_inputs('u')
+        model.set_measurements(['y_1', 'y_2'])
+        model.set_dynamical_equations([.9 * x[0] + .1 * x[1] ** 2 + u, .8 * x[1] + .1 * ca.sin(x[0]) + .05 * x[2],
+                                       .95 * x[2] + .1 * x[0] * x[1]])
+        model.set_measurement_equations([x[0] * x[1], ca.sin(x[2])])
+        model.setup(dt=1.)
+        self.model = model
+        self.P0 = np.array([[1., .3, .1], [.3, .5, .05], [.1, .05, .8]])
+
+    def _estimate(self, **kwargs):
+        """
+
+        :param kwargs:
+        :return:
+        """
+        ukf = UKF(self.model, plot_backend='bokeh', **kwargs)
+        ukf.setup()
+        ukf.Q = .01 * np.eye(3) + .002
+        ukf.R = [.1, .05]
+        ukf.set_initial_guess([1., 1., .5], P0=self.P0)
+        for y in np.linspace(1., 1.4, 10):
+            ukf.estimate(y=[y, .4], u=.1)
+        return ukf.solution.get_by_id('x:f'), ukf.solution.get_by_id('P:f')
+
+    def test_unscented_kalman_filter_square_root_form(self) -> None:
+        """
+
+        :return:
+        """
+        for alpha in [1., .001]:
+            with self.subTest(alpha=alpha):
+                x, P = self._estimate(alpha=alpha)
+                x_sqrt, P_sqrt = self._estimate(alpha=alpha, square_root_form=True)
+                np.testing.assert_allclose(x_sqrt, x, rtol=1e-8)
+                np.testing.assert_allclose(P_sqrt, P, rtol=1e-6, atol=1e-10)
+
+    def test_unscented_kalman_filter_square_root_form_predict_only(self) -> None:
+        """
+
+        :return:
+        """
+        ukf = UKF(self.model, alpha=1., square_root_form=True, plot_backend='bokeh')
+        ukf.setup()
+
+        x = np.array([[1.], [1.], [.5]])
+        S = np.linalg.cholesky(self.P0)
+        S_Q = .1 * np.eye(3)
+        prediction = np.asarray(ukf.predict(np.append(x, S, axis=1), .1, S_Q))
+        S_pred = prediction[:, 1:4]
+
+        ukf = UKF(self.model, alpha=1., plot_backend='bokeh')
+        ukf.setup()
+        reference = np.asarray(ukf.predict(np.append(x, self.P0, axis=1), .1, S_Q @ S_Q.T))
+
+        np.testing.assert_allclose(prediction[:, 0], reference[:, 0])
+        np.testing.assert_allclose(S_pred, np.tril(S_pred))
+        np.testing.assert_allclose(S_pred @ S_pred.T, reference[:, 1:4])
+
+    def test_unscented_kalman_filter_parallelization(self) -> None:
+        """
+
+        :return:
+        """
+        x, P = self._estimate(alpha=1.)
+        x_thread, P_thread = self._estimate(alpha=1., parallelization='thread')
+        np.testing.assert_allclose(x_thread, x)
+        np.testing.assert_allclose(P_thread, P)
+
+        with self.assertRaises(ValueError):
+            UKF(self.model, plot_backend='bokeh', parallelization='gpu')
+
+    def test_unscented_kalman_filter_correlated_error_covariance(self) -> None:
+        """
+
+        :return:
+        """
+        A = np.array([[1., .5], [0., 1.]])
+        model = Model(plot_backend='bokeh', discrete=True)
+        model.A = A
+        model.C = np.array([[1., 0.]])
+        model.setup(dt=1.)
+        P = np.array([[2., .8], [.8, 1.]])
+
+        for square_root_form in [False, True]:
+            with self.subTest(square_root_form=square_root_form):
+                with self.assertWarns(UserWarning):
+                    ukf = UKF(model, alpha=1., square_root_form=square_root_form, plot_backend='bokeh')
+                ukf.setup()
+                arg = np.linalg.cholesky(P) if square_root_form else P
+                prediction = np.asarray(ukf.predict(np.append(np.ones((2, 1)), arg, axis=1), [], np.zeros((2, 2))))
+                P_pred = prediction[:, 1:3]
+                if square_root_form:
+                    P_pred = P_pred @ P_pred.T
+                # NOTE: The unscented transformation is exact for linear systems
+                np.testing.assert_allclose(P_pred, A @ P @ A.T)
@@ -1,9 +1,19 @@
+import ctypes
+import importlib.util
+import os
+import shutil
+import subprocess
+import tempfile
 import unittest
 from hilo_mpc import Model, LMPC, SimpleControlLoop, NMPC
+from hilo_mpc.modules.embedded.explicit_mpc import ExplicitSolution
 import numpy as np
 import casadi as ca
 
 
+HAS_GCC = shutil.which('gcc') is not None
+
+
 class MyTestCase(unittest.TestCase):
     def test_already_linear_model(self):
         model = Model(plot_backend='bokeh', discrete=True)
@@ -91,5 +101,120 @@ class MyTestCase(unittest.TestCase):
         mpc.optimize(x0=x0)
 
 
+def _double_integrator():
+    """
+
+    :return:
+    """
+    model = Model(plot_backend='bokeh', discrete=True)
+    model.A = np.array([[1, model.dt], [0, 1]])
+    model.B = np.array([[model.dt ** 2 / 2], [model.dt]])
+    model.setup(dt=.5)
+    return model
+
+
+class TestExplicitLMPC(unittest.TestCase):
+    """"""
+    def setUp(self) -> None:
+        """
+
+        :return:
+        """
+        controllers = {}
+        for nlp_solver in ['qpoases', 'explicit']:
+            mpc = LMPC(_double_integrator())
+            mpc.Q = np.eye(2)
+            mpc.R = 1.
+            mpc.horizon = 5
+            mpc.set_box_constraints(x_lb=[-5., -5.], x_ub=[5., 5.], u_lb=[-1.], u_ub=[1.])
+            mpc.setup(nlp_solver=nlp_solver)
+            controllers[nlp_solver] = mpc
+        self.controllers = controllers
+
+        rng = np.random.default_rng(0)
+        self.states = rng.uniform(-5., 5., size=(100, 2))
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        """
+
+        :return:
+        """
+        self.directory.cleanup()
+
+    def test_explicit_solution(self) -> None:
+        """
+
+        :return:
+        """
+        solution = self.controllers['explicit'].explicit_solution
+        self.assertIsNone(self.controllers['qpoases'].explicit_solution)
+        self.assertGreater(solution.n_regions, 1)
+
+        n_feasible = 0
+        for x in self.states:
+            if solution.locate(x) < 0:
+                # NOTE: States that are not contained in any critical region are infeasible
+                with self.assertRaises(ValueError):
+                    self.controllers['explicit'].optimize(x0=x)
+                continue
+            n_feasible += 1
+            np.testing.assert_allclose(self.controllers['explicit'].optimize(x0=x),
+                                       self.controllers['qpoases'].optimize(x0=x), atol=1e-6)
+        self.assertGreater(n_feasible, 0)
+
+    def test_explicit_solution_unbounded_region(self) -> None:
+        """
+
+        :return:
+        """
+        mpc = LMPC(_double_integrator())
+        mpc.Q = np.eye(2)
+        mpc.R = 1.
+        mpc.horizon = 5
+        mpc.set_box_constraints(u_lb=[-1.], u_ub=[1.])
+        with self.assertRaises(ValueError):
+            mpc.setup(nlp_solver='explicit')
+        mpc.setup(nlp_solver='explicit', solver_options={'region_lb': [-1., -1.], 'region_ub': [1., 1.]})
+        # NOTE: The input saturates at its lower bound
+        np.testing.assert_allclose(mpc.optimize(x0=[1., 1.]), -1.)
+
+    @unittest.skipUnless(HAS_GCC, "No compiler available")
+    def test_explicit_solution_export(self) -> None:
+        """
+
+        :return:
+        """
+        solution = self.controllers['explicit'].explicit_solution
+        path = self.directory.name
+
+        solution.save(os.path.join(path, 'solution.npz'))
+        loaded = ExplicitSolution.load(os.path.join(path, 'solution.npz'))
+
+        solution.export(name='empc', path=path, target='numpy')
+        spec = importlib.util.spec_from_file_location('empc', os.path.join(path, 'empc.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        solution.export(name='empc', path=path, target='c')
+        library = os.path.join(path, 'empc.so')
+        subprocess.check_call(['gcc', '-O2', '-shared', '-fPIC', '-o', library, os.path.join(path, 'empc.c')])
+        evaluate = ctypes.CDLL(library).empc_evaluate
+        evaluate.restype = ctypes.c_int
+        evaluate.argtypes = [ctypes.POINTER(ctypes.c_double), ctypes.POINTER(ctypes.c_double)]
+
+        for x in self.states:
+            region = solution.locate(x)
+            u = (ctypes.c_double * 1)()
+            self.assertEqual(evaluate((ctypes.c_double * 2)(*x), u), region)
+            self.assertEqual(loaded.locate(x), region)
+            if region < 0:
+                self.assertIsNone(module.evaluate(x))
+            else:
+                np.testing.assert_allclose(u[0], solution(x)[0])
+                np.testing.assert_allclose(module.evaluate(x), solution(x))
+                np.testing.assert_allclose(loaded(x), solution(x))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,7 @@
+import os
+from tempfile import TemporaryDirectory
 import unittest
-from unittest import skip
+from unittest import skip, skipUnless
 
 import casadi as ca
 import numpy as np
@@ -759,3 +761,164 @@ class TestTimeVariantSys(unittest.TestCase):
         # p_tot.append(p)
         #
         # show(gridplot(p_tot, ncols=3))
+
+
+class TestFilteringArrivalCost(unittest.TestCase):
+    """"""
+    def setUp(self) -> None:
+        """
+
+        :return:
+        """
+        model = Model(plot_backend='bokeh', discrete=True)
+        x = model.set_dynamical_states(['x_1', 'x_2'])
+        u = model.set_inputs('u')
+        model.set_measurements('y')
+        model.set_dynamical_equations([.9 * x[0] + .2 * x[1] + u, .1 * x[0] + .8 * x[1]])
+        model.set_measurement_equations(x[1])
+        model.setup(dt=1.)
+        self.model = model
+
+        self.y = [.3 + .05 * k + .1 * np.sin(k) for k in range(8)]
+        self.u = [.1 * k for k in range(8)]
+
+    def _run_mhe(self, horizon):
+        """
+
+        :param horizon:
+        :return:
+        """
+        mhe = MHE(self.model, plot_backend='bokeh')
+        mhe.horizon = horizon
+        mhe.quad_stage_cost.add_measurements(weights=[1 / .064])
+        mhe.quad_stage_cost.add_state_noise(weights=[100., 50.])
+        mhe.quad_arrival_cost.add_states(weights=[1., 2.], guess=[.8, 0.])
+        mhe.set_nlp_options(arrival_guess_update='filtering', print_level=0)
+        mhe.setup(options={'print_time': False, 'ipopt.print_level': 0})
+
+        x_est = []
+        for y, u in zip(self.y, self.u):
+            mhe.add_measurements(y, u_meas=u)
+            x, _ = mhe.estimate()
+            x_est.append(x)
+        return x_est
+
+    def test_filtering_arrival_cost_linear_system(self) -> None:
+        """
+
+        :return:
+        """
+        A = np.array([[.9, .2], [.1, .8]])
+        C = np.array([[0., 1.]])
+        Q = np.diag([.01, .02])
+        R = np.array([[.064]])
+        x = np.array([.8, 0.])
+        P = np.diag([1., .5])
+
+        x_kf = []
+        for y, u in zip(self.y, self.u):
+            K = P @ C.T @ np.linalg.inv(C @ P @ C.T + R)
+            x = x + K @ (y - C @ x)
+            P = (np.eye(2) - K @ C) @ P
+            x = A @ x + np.array([u, 0.])
+            P = A @ P @ A.T + Q
+            x_kf.append(x)
+
+        # NOTE: For linear systems without active constraints the MHE with the filtering update of the arrival cost is
+        #  equivalent to the Kalman filter, independent of the horizon length
+        for horizon in [2, 4]:
+            x_est = self._run_mhe(horizon)
+            self.assertTrue(all(x is None for x in x_est[:horizon - 1]))
+            for k in range(horizon - 1, len(self.y)):
+                np.testing.assert_allclose(np.asarray(x_est[k]).flatten(), x_kf[k], rtol=1e-6)
+
+    def test_filtering_arrival_cost_without_states(self) -> None:
+        """
+
+        :return:
+        """
+        mhe = MHE(self.model, plot_backend='bokeh')
+        mhe.horizon = 2
+        mhe.quad_stage_cost.add_measurements(weights=[1.])
+        mhe.set_nlp_options(arrival_guess_update='filtering')
+        with self.assertRaises(ValueError):
+            mhe.setup()
+
+
+class TestMeasurementWindow(unittest.TestCase):
+    """"""
+    def setUp(self) -> None:
+        """
+
+        :return:
+        """
+        model = Model(plot_backend='bokeh')
+        x = model.set_dynamical_states(['x'])
+        model.set_measurements(['y'])
+        model.set_measurement_equations(x)
+        model.set_dynamical_equations(-.5 * x)
+        model.setup(dt=.5)
+        self.model = model
+
+    def _mhe(self, integration_method):
+        """
+
+        :param integration_method:
+        :return:
+        """
+        mhe = MHE(self.model, plot_backend='bokeh')
+        mhe.horizon = 4
+        mhe.quad_stage_cost.add_measurements(weights=[100.])
+        mhe.quad_arrival_cost.add_states(weights=[1e-3], guess=[1.])
+        mhe.set_nlp_options(integration_method=integration_method, print_level=0)
+        mhe.setup(options={'print_time': False, 'ipopt.print_level': 0})
+        return mhe
+
+    def test_irregular_time_stamps(self) -> None:
+        """
+
+        :return:
+        """
+        for integration_method in ['collocation', 'multiple_shooting']:
+            mhe = self._mhe(integration_method)
+            # NOTE: The measurement at t = 1 is missing
+            for t in [0., .5, 1.5, 1.75, 3.]:
+                mhe.add_measurements(2. * np.exp(-.5 * t), time=t)
+                x_est, _ = mhe.estimate()
+
+            np.testing.assert_allclose(mhe.solution['t'], [[2.25, 3.5]])
+            np.testing.assert_allclose(x_est, 2. * np.exp(-.5 * 3.5), rtol=1e-4)
+
+    def test_window_order(self) -> None:
+        """
+
+        :return:
+        """
+        mhe = self._mhe('collocation')
+        for k in range(7):
+            mhe.add_measurements(float(k))
+        k = mhe._meas_counter % mhe.horizon
+        np.testing.assert_array_equal(mhe._y_window[:, k:k + mhe.horizon], [[3., 4., 5., 6.]])
+        np.testing.assert_allclose(mhe._t_window[k:k + mhe.horizon], [1.5, 2., 2.5, 3.])
+
+        with self.assertRaises(ValueError):
+            mhe.add_measurements(7., time=3.)
+
+    @skipUnless(hasattr(ca, 'global_pickle_context'), "saving requires CasADi 3.7.1 or higher")
+    def test_save_and_load(self) -> None:
+        """
+
+        :return:
+        """
+        with TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'mhe.pkl')
+            mhe = self._mhe('collocation')
+            mhe.save(file)
+            loaded = MHE.load(file)
+
+            for t in [0., .5, 1., 1.5, 2.]:
+                for estimator in [mhe, loaded]:
+                    estimator.add_measurements(2. * np.exp(-.5 * t), time=t)
+                    x_est, _ = estimator.estimate()
+            self.assertIsNotNone(x_est)
+            np.testing.assert_allclose(loaded.solution['x'], mhe.solution['x'], atol=1e-8)
@@ -1,9 +1,13 @@
-from unittest import TestCase, skip
+import os
+import pickle
+from tempfile import TemporaryDirectory
+from unittest import TestCase, skip, skipUnless
 
 import casadi as ca
 import numpy as np
 
 from hilo_mpc import NMPC, Model, SimpleControlLoop
+from hilo_mpc.util.optimizer import IpoptDebugger
 
 
 class TestNMPC(TestCase):
@@ -1863,6 +1867,68 @@ class TestNMPCOptions(TestCase):
         print(cm.exception)
 
 
+class TestStageStructure(TestCase):
+    def setUp(self) -> None:
+        model = Model(plot_backend='bokeh')
+        x = model.set_dynamical_states(['x', 'v'])
+        u = model.set_inputs('u')
+        model.set_equations(ode=[x[1], u - ca.sin(x[0])])
+        model.setup(dt=.1)
+
+        self.model = model
+        self.x0 = [1., 0.]
+
+    def _nmpc(self, integration_method, solver='ipopt', stage_structure=False):
+        nmpc = NMPC(self.model)
+        nmpc.horizon = 20
+        nmpc.quad_stage_cost.add_states(names=['x', 'v'], weights=[1., 1.])
+        nmpc.quad_stage_cost.add_inputs(names='u', weights=.1)
+        nmpc.quad_terminal_cost.add_states(names=['x', 'v'], weights=[10., 10.])
+        nmpc.set_box_constraints(u_lb=[-3.], u_ub=[3.])
+        nmpc.set_stage_constraints(self.model.x[1] + self.model.u, lb=[-1.5], ub=[1.5])
+        nmpc.set_terminal_constraints(self.model.x[0], lb=[-.05], ub=[.05])
+        nmpc.set_scaling(x_scaling=[2., 2.], u_scaling=[3.])
+        nmpc.set_nlp_options({'print_level': 0, 'integration_method': integration_method, 'solver': solver,
+                              'stage_structure': stage_structure})
+        nmpc.setup()
+        return nmpc
+
+    def _assert_same_solution(self, nmpc, reference, rtol=1e-6, atol=1e-7):
+        u = nmpc.optimize(self.x0)
+        u_ref = reference.optimize(self.x0)
+        np.testing.assert_allclose(u, u_ref, rtol=rtol, atol=atol)
+        for pred, pred_ref in zip(nmpc.return_prediction()[:2], reference.return_prediction()[:2]):
+            np.testing.assert_allclose(pred, pred_ref, rtol=rtol, atol=atol)
+
+    def test_stage_structure_ipopt(self) -> None:
+        for integration_method in ['collocation', 'rk4']:
+            with self.subTest(integration_method=integration_method):
+                nmpc = self._nmpc(integration_method, stage_structure=True)
+                reference = self._nmpc(integration_method)
+                self.assertIsNotNone(nmpc._stage_structure)
+                self._assert_same_solution(nmpc, reference)
+
+    @skipUnless(ca.has_nlpsol('fatrop'), "fatrop is not available")
+    def test_fatrop(self) -> None:
+        for integration_method in ['collocation', 'rk4']:
+            with self.subTest(integration_method=integration_method):
+                nmpc = self._nmpc(integration_method, solver='fatrop')
+                reference = self._nmpc(integration_method)
+                self.assertTrue(nmpc._nlp_options['stage_structure'])
+                # NOTE: fatrop and IPOPT only agree up to their convergence tolerances
+                self._assert_same_solution(nmpc, reference, rtol=1e-4, atol=1e-4)
+                self.assertEqual(nmpc._solver_status_code, 1)
+
+    def test_unsupported(self) -> None:
+        nmpc = NMPC(self.model)
+        nmpc.horizon = 10
+        nmpc.quad_stage_cost.add_states(names=['x', 'v'], weights=[1., 1.])
+        nmpc.set_stage_constraints(self.model.x[1] + self.model.u, lb=[-1.5], ub=[1.5], is_soft=True)
+        nmpc.set_nlp_options({'print_level': 0, 'stage_structure': True})
+        with self.assertRaises(ValueError):
+            nmpc.setup()
+
+
 class TestDAE(TestCase):
     def setUp(self) -> None:
         model = Model(plot_backend='bokeh')
@@ -2906,3 +2972,171 @@ class TestTimeVaryingWeights(TestCase):
         # model.solution.plot()
         #
         # nmpc.solution.to_mat('t', 'x', 'extime', 'niterations', 'solvstatus', file_name='results/test.mat')
+
+
+class TestIpoptDebugger(TestCase):
+    """"""
+    def setUp(self) -> None:
+        """
+
+        :return:
+        """
+        model = Model(plot_backend='bokeh')
+        x = model.set_dynamical_states(['x', 'v'])
+        u = model.set_inputs('F')
+        model.set_equations(ode=[x[1], -ca.sin(x[0]) + u])
+        model.setup(dt=.1)
+        self.model = model
+
+    def _nmpc(self, **kwargs):
+        """
+
+        :param kwargs:
+        :return:
+        """
+        nmpc = NMPC(self.model)
+        nmpc.quad_stage_cost.add_states(names=['x', 'v'], weights=[10., 1.])
+        nmpc.quad_stage_cost.add_inputs(names='F', weights=.1)
+        nmpc.horizon = 10
+        nmpc.set_box_constraints(u_lb=[-2.], u_ub=[2.])
+        nmpc.setup(options={'ipopt_debugger': True, 'ipopt_debugger_options': kwargs},
+                   solver_options={'ipopt.print_level': 0, 'print_time': False})
+        return nmpc
+
+    def test_ipopt_debugger_iterates(self) -> None:
+        """
+
+        :return:
+        """
+        nmpc = self._nmpc()
+        for _ in range(2):
+            nmpc.optimize([1., 0.])
+            debugger = nmpc.debugger
+            n_iter = len(debugger.f_sols)
+            self.assertGreater(n_iter, 1)
+            np.testing.assert_array_equal(debugger.iter, np.arange(n_iter))
+            self.assertEqual(debugger.x_sols.shape, (n_iter, nmpc._n_v))
+            self.assertEqual(debugger.g_sols.shape, (n_iter, nmpc._g.shape[0]))
+            np.testing.assert_allclose(debugger.x_sols[-1], nmpc._nlp_solution['x'].full().ravel())
+            np.testing.assert_allclose(debugger.f_sols[-1], float(nmpc._nlp_solution['f']))
+
+    def test_ipopt_debugger_bounded_storage(self) -> None:
+        """
+
+        :return:
+        """
+        nmpc = self._nmpc(buffer_size=3, record_every=2, dtype=np.float32, variables=['u'])
+        nmpc.optimize([1., 0.])
+        debugger = nmpc.debugger
+        self.assertEqual(len(debugger.iter), 3)
+        self.assertTrue(np.all(np.diff(debugger.iter) == 2))
+        self.assertEqual(debugger.x_sols.dtype, np.float32)
+
+        u_ind = np.ravel(nmpc._u_ind)
+        mask = np.zeros(nmpc._n_v, dtype=bool)
+        mask[u_ind] = True
+        self.assertTrue(np.all(np.isnan(debugger.x_sols[:, ~mask])))
+        self.assertFalse(np.any(np.isnan(debugger.x_sols[:, mask])))
+
+    def test_ipopt_debugger_memory_map(self) -> None:
+        """
+
+        :return:
+        """
+        with TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'debugger')
+            nmpc = self._nmpc(buffer_size=4, file_name=file_name)
+            nmpc.optimize([1., 0.])
+            debugger = nmpc.debugger
+            debugger.flush()
+
+            solution = IpoptDebugger.load(file_name)
+            np.testing.assert_array_equal(solution['iter'], debugger.iter)
+            np.testing.assert_array_equal(solution['x'], debugger.x_sols)
+            np.testing.assert_array_equal(solution['lam_g'], debugger.lam_g_sols)
+
+
+@skipUnless(hasattr(ca, 'global_pickle_context'), "saving requires CasADi 3.7.1 or higher")
+class TestSaveAndLoad(TestCase):
+    """"""
+    def setUp(self) -> None:
+        """
+
+        :return:
+        """
+        model = Model(plot_backend='bokeh')
+        x = model.set_dynamical_states(['x', 'v'])
+        u = model.set_inputs('F')
+        model.set_measurements('y')
+        model.set_equations(ode=[x[1], -ca.sin(x[0]) + u], meas=[x[0]])
+        model.setup(dt=.1)
+        self.model = model
+
+        self.directory = TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, 'saved.pkl')
+
+    def tearDown(self) -> None:
+        """
+
+        :return:
+        """
+        self.directory.cleanup()
+
+    def test_save_and_load_model(self) -> None:
+        """
+
+        :return:
+        """
+        self.model.save(self.file)
+        model = Model.load(self.file)
+
+        for mod in [self.model, model]:
+            mod.set_initial_conditions([1., 0.])
+            mod.simulate(u=.5, steps=5)
+        np.testing.assert_allclose(model.solution['x'], self.model.solution['x'])
+        np.testing.assert_allclose(model.solution['y'], self.model.solution['y'])
+        self.assertEqual(model.dynamical_state_names, ['x', 'v'])
+
+    def test_save_and_load_nmpc(self) -> None:
+        """
+
+        :return:
+        """
+        nmpc = NMPC(self.model)
+        nmpc.quad_stage_cost.add_states(names=['x', 'v'], weights=[10., 1.])
+        nmpc.quad_stage_cost.add_inputs(names='F', weights=.1)
+        nmpc.horizon = 10
+        nmpc.set_box_constraints(u_lb=[-2.], u_ub=[2.])
+        nmpc.setup(solver_options={'ipopt.print_level': 0, 'print_time': False})
+        nmpc.save(self.file)
+
+        loaded = NMPC.load(self.file)
+        np.testing.assert_allclose(loaded.optimize([1., 0.]), nmpc.optimize([1., 0.]), atol=1e-8)
+        np.testing.assert_array_equal(loaded._x_ind, nmpc._x_ind)
+        np.testing.assert_array_equal(loaded._u_ind, nmpc._u_ind)
+
+        with self.assertRaises(TypeError):
+            Model.load(self.file)
+
+    def test_save_and_load_check(self) -> None:
+        """
+
+        :return:
+        """
+        self.model.save(self.file)
+        with open(self.file, 'rb') as file:
+            header = pickle.load(file)
+            payload = file.read()
+
+        with open(self.file, 'wb') as file:
+            pickle.dump(header, file)
+            file.write(payload[:-1] + bytes([(payload[-1] + 1) % 256]))
+        with self.assertRaises(RuntimeError):
+            Model.load(self.file)
+
+        header['versions']['casadi'] = '0.0.0'
+        with open(self.file, 'wb') as file:
+            pickle.dump(header, file)
+            file.write(payload)
+        with self.assertRaises(RuntimeError):
+            Model.load(self.file)
@@ -0,0 +1,302 @@
+from unittest import TestCase, skipIf, skipUnless
+
+import casadi as ca
+import numpy as np
+
+from hilo_mpc import ANN, Dense, Model, NMPC
+from hilo_mpc.util.machine_learning import net_forward_pass
+from hilo_mpc.util.util import SX_CALL_NODES
+
+
+class _Scaler:
+    """"""
+    def __init__(self, mean, scale):
+        """Constructor method"""
+        self.mean_ = mean
+        self.scale_ = scale
+
+
+class TestArtificialNeuralNetworkPredict(TestCase):
+    """"""
+    def setUp(self) -> None:
+        """
+
+        :return:
+        """
+        rng = np.random.default_rng(0)
+        ann = ANN(['x_1', 'x_2', 'x_3'], ['y_1', 'y_2'])
+        ann.add_layers(Dense(10, activation='sigmoid'))
+        ann.add_layers(Dense(5, activation='relu'))
+        ann.add_layers(Dense(4, activation='softmax'))
+        ann._scaler_x = _Scaler(rng.normal(size=3), rng.uniform(1., 2., 3))
+        ann._scaler_y = _Scaler(rng.normal(size=2), rng.uniform(1., 2., 2))
+        self.weights = [rng.normal(size=(10, 3)), rng.normal(size=(5, 10)), rng.normal(size=(4, 5)),
+                        rng.normal(size=(2, 4))]
+        self.bias = [rng.normal(size=10), rng.normal(size=5), rng.normal(size=4), rng.normal(size=2)]
+        ann.build_graph(weights=self.weights, bias=self.bias)
+        self.ann = ann
+        self.X = rng.normal(size=(3, 50))
+
+    def test_predict_numpy(self) -> None:
+        """
+
+        :return:
+        """
+        y = self.ann.predict(self.X)
+        self.assertIsInstance(y, np.ndarray)
+        self.assertEqual(y.shape, (2, 50))
+        np.testing.assert_allclose(y, self.ann._function.map(50)(self.X)[0], rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(self.ann.predict(self.X, batch_size=7), y, rtol=1e-12, atol=1e-12)
+
+    def test_predict_casadi(self) -> None:
+        """
+
+        :return:
+        """
+        y = self.ann.predict(self.X)
+        y_dm = self.ann.predict(ca.DM(self.X[:, 0]))
+        self.assertIsInstance(y_dm, ca.DM)
+        np.testing.assert_allclose(y_dm, y[:, :1], rtol=1e-12, atol=1e-12)
+        self.assertIsInstance(self.ann.predict(list(self.X[:, 0])), ca.DM)
+
+        x = ca.SX.sym('x', 3)
+        self.assertIsInstance(self.ann.predict(x), ca.SX)
+        np.testing.assert_allclose(ca.Function('f', [x], [self.ann.predict(x)])(self.X), y, rtol=1e-12, atol=1e-12)
+
+    def test_predict_errors(self) -> None:
+        """
+
+        :return:
+        """
+        with self.assertRaises(ValueError):
+            self.ann.predict(np.ones((2, 5)))
+        with self.assertRaises(RuntimeError):
+            ANN(['x'], ['y']).predict(np.ones((1, 5)))
+
+    def test_net_forward_pass_linear(self) -> None:
+        """
+
+        :return:
+        """
+        # NOTE: Without hidden layers the network is an affine function
+        ann = ANN(['x_1', 'x_2'], ['y'])
+        ann.build_graph(weights=[np.array([[1., 2.]])], bias=[np.array([3.])])
+        np.testing.assert_allclose(ann.predict(np.array([[1., 0.], [1., 1.]])), [[6., 5.]])
+        np.testing.assert_allclose(ann.predict(ca.DM([1., 1.])), 6.)
+        np.testing.assert_allclose(net_forward_pass({'weights': self.weights, 'bias': self.bias}, self.X[:, :1],
+                                                    self.ann._layers, input_scaling=self.ann._scaler_x,
+                                                    output_scaling=self.ann._scaler_y),
+                                   self.ann.predict(self.X[:, :1]))
+
+
+class TestArtificialNeuralNetworkGraph(TestCase):
+    """"""
+    @staticmethod
+    def _ann(width, use_sx=None, activation='tanh'):
+        """
+
+        :param width:
+        :param use_sx:
+        :param activation:
+        :return:
+        """
+        rng = np.random.default_rng(0)
+        ann = ANN(['x_1', 'x_2', 'u'], ['d_1', 'd_2'], use_sx=use_sx)
+        ann.add_layers(Dense(width, activation=activation))
+        ann.add_layers(Dense(width, activation=activation))
+        weights = [rng.normal(scale=.1, size=(width, 3)), rng.normal(scale=.1, size=(width, width)),
+                   rng.normal(scale=.1, size=(2, width))]
+        bias = [rng.normal(scale=.01, size=width), rng.normal(scale=.01, size=width), rng.normal(scale=.01, size=2)]
+        ann.build_graph(weights=weights, bias=bias)
+        return ann
+
+    @staticmethod
+    def _model(ann):
+        """
+
+        :param ann:
+        :return:
+        """
+        model = Model()
+        x = model.set_dynamical_states(['x_1', 'x_2'])
+        u = model.set_inputs('u')
+        model.set_dynamical_equations([x[1], -x[0] + u])
+        model += ann
+        model.setup(dt=.1)
+        return model
+
+    def test_graph_type_selection(self) -> None:
+        """
+
+        :return:
+        """
+        ann = self._ann(8)
+        self.assertIsNone(ann.use_sx)
+        self.assertTrue(ann._function.is_a('SXFunction'))
+        # NOTE: Without SX call nodes, MX graphs would be inlined into SX expressions anyway
+        self.assertEqual(self._ann(32)._function.is_a('MXFunction'), SX_CALL_NODES)
+        self.assertTrue(self._ann(32, use_sx=True)._function.is_a('SXFunction'))
+        self.assertTrue(self._ann(8, use_sx=False)._function.is_a('MXFunction'))
+
+    @skipUnless(SX_CALL_NODES, "SX call nodes require CasADi 3.7 or higher")
+    def test_graph_type_prediction(self) -> None:
+        """
+
+        :return:
+        """
+        ann_sx, ann_mx = self._ann(32, use_sx=True), self._ann(32)
+        X = np.random.default_rng(1).normal(size=(3, 10))
+        np.testing.assert_allclose(ann_mx.predict(X), ann_sx.predict(X), rtol=1e-12, atol=1e-12)
+
+        # NOTE: The MX graph is embedded as a single call node into symbolic expressions
+        x = ca.SX.sym('x', 3)
+        f_sx = ca.Function('f', [x], [ann_sx.predict(x)])
+        f_mx = ca.Function('f', [x], [ann_mx.predict(x)])
+        self.assertLess(f_mx.n_instructions(), f_sx.n_instructions())
+        np.testing.assert_allclose(f_mx(X), f_sx(X), rtol=1e-12, atol=1e-12)
+
+    def test_graph_type_hybrid_model(self) -> None:
+        """
+
+        :return:
+        """
+        solutions = []
+        for use_sx in [True, False]:
+            model = self._model(self._ann(32, use_sx=use_sx))
+            self.assertFalse(model.is_linear())
+            model.set_initial_conditions([1., 0.])
+            model.simulate(u=.5, steps=3)
+            linearized_model = model.linearize()
+            self.assertTrue(linearized_model.is_linear())
+
+            nmpc = NMPC(model)
+            nmpc.horizon = 10
+            nmpc.quad_stage_cost.add_states(names=['x_1', 'x_2'], weights=[1., 1.], ref=[0., 0.])
+            nmpc.quad_stage_cost.add_inputs(names='u', weights=.1)
+            nmpc.set_box_constraints(u_lb=[-1.], u_ub=[1.])
+            nmpc.setup(options={'print_level': 0})
+            solutions.append((model.solution['x:f'], nmpc.optimize([1., 0.])))
+
+        np.testing.assert_allclose(solutions[1][0], solutions[0][0], rtol=1e-10)
+        np.testing.assert_allclose(solutions[1][1], solutions[0][1], rtol=1e-6)
+
+    def test_graph_type_hybrid_model_relu(self) -> None:
+        """
+
+        :return:
+        """
+        # NOTE: The Hessian of a ReLU network is zero almost everywhere, but the network is still nonlinear
+        for use_sx in [True, False]:
+            model = self._model(self._ann(32, use_sx=use_sx, activation='relu'))
+            self.assertFalse(model.is_linear())
+            linearized_model = model.linearize()
+            self.assertTrue(linearized_model.is_linear())
+
+
+class TestArtificialNeuralNetworkEmbedding(TestCase):
+    """"""
+    def test_embedding_errors(self) -> None:
+        """
+
+        :return:
+        """
+        with self.assertRaises(ValueError):
+            ANN(['x'], ['y'], embedding='inline')
+        ann = ANN(['x'], ['y'])
+        self.assertEqual(ann.embedding, 'expression')
+        with self.assertRaises(ValueError):
+            ann.embedding = 'inline'
+
+    @skipUnless(SX_CALL_NODES, "SX call nodes require CasADi 3.7 or higher")
+    def test_embedding_functions(self) -> None:
+        """
+
+        :return:
+        """
+        ann = TestArtificialNeuralNetworkGraph._ann(8)
+        X = np.random.default_rng(1).normal(size=(3, 1))
+        y = ann.predict(X)
+        x = ca.SX.sym('x', 3)
+        jacobian = ca.Function('jacobian', [x], [ca.jacobian(ann.predict(x), x)])(X)
+        for embedding in ['expression', 'function', 'callback']:
+            function = ann.to_function(embedding=embedding)
+            np.testing.assert_allclose(function(X), y, rtol=1e-12, atol=1e-12)
+
+            f = ca.Function('f', [x], [function(x), ca.jacobian(function(x), x)])
+            np.testing.assert_allclose(f(X)[1], jacobian, rtol=1e-10)
+            n_calls = sum(f.instruction_id(k) == ca.OP_CALL for k in range(f.n_instructions()))
+            if embedding == 'expression':
+                self.assertEqual(n_calls, 0)
+            else:
+                self.assertGreater(n_calls, 0)
+
+    @skipIf(SX_CALL_NODES, "SX call nodes are available")
+    def test_embedding_fallback(self) -> None:
+        """
+
+        :return:
+        """
+        ann = TestArtificialNeuralNetworkGraph._ann(8)
+        x = ca.SX.sym('x', 3)
+        for embedding in ['function', 'callback']:
+            with self.assertWarns(UserWarning):
+                function = ann.to_function(embedding=embedding)
+            f = ca.Function('f', [x], [function(x)])
+            self.assertEqual(sum(f.instruction_id(k) == ca.OP_CALL for k in range(f.n_instructions())), 0)
+
+    @skipUnless(SX_CALL_NODES, "SX call nodes require CasADi 3.7 or higher")
+    def test_callback_cached(self) -> None:
+        """
+
+        :return:
+        """
+        ann = TestArtificialNeuralNetworkGraph._ann(8)
+        X = np.random.default_rng(1).normal(size=(3, 1))
+        x = ca.SX.sym('x', 3)
+        y = ann.predict(X)
+        jacobian = ca.Function('jacobian', [x], [ca.jacobian(ann.predict(x), x)])(X)
+        callback = ann.to_function(embedding='callback')
+        self.assertIs(ann.to_function(embedding='callback'), callback)
+
+        weights = [2. * k for k in ann._weights]
+        ann.build_graph(weights=weights, bias=ann._bias)
+        function = ann.to_function(embedding='callback')
+        self.assertIsNot(function, callback)
+        np.testing.assert_allclose(function(X), ann.predict(X), rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(ca.Function('f', [x], [ca.jacobian(function(x), x)])(X),
+                                   ca.Function('jacobian', [x], [ca.jacobian(ann.predict(x), x)])(X), rtol=1e-10)
+
+        # NOTE: The expired callback still evaluates the network with the weights it was created with
+        np.testing.assert_allclose(callback(X), y, rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(ca.Function('f', [x], [ca.jacobian(callback(x), x)])(X), jacobian, rtol=1e-10)
+
+        self.assertEqual(len(ann._expired_callbacks), 1)
+        del callback
+        ann.to_function(embedding='callback')
+        self.assertEqual(len(ann._expired_callbacks), 0)
+
+    def test_embedding_hybrid_model(self) -> None:
+        """
+
+        :return:
+        """
+        solutions = []
+        for embedding in ['expression', 'function', 'callback']:
+            ann = TestArtificialNeuralNetworkGraph._ann(8)
+            ann.embedding = embedding
+            model = TestArtificialNeuralNetworkGraph._model(ann)
+            model.set_initial_conditions([1., 0.])
+            model.simulate(u=.5, steps=3)
+
+            nmpc = NMPC(model)
+            nmpc.horizon = 5
+            nmpc.quad_stage_cost.add_states(names=['x_1', 'x_2'], weights=[1., 1.], ref=[0., 0.])
+            nmpc.quad_stage_cost.add_inputs(names='u', weights=.1)
+            nmpc.set_box_constraints(u_lb=[-1.], u_ub=[1.])
+            nmpc.set_nlp_options({'integration_method': 'rk4'})
+            nmpc.setup(options={'print_level': 0})
+            solutions.append((model.solution['x:f'], nmpc.optimize([1., 0.])))
+
+        for solution in solutions[1:]:
+            np.testing.assert_allclose(solution[0], solutions[0][0], rtol=1e-10)
+            np.testing.assert_allclose(solution[1], solutions[0][1], rtol=1e-6)
@@ -0,0 +1,215 @@
+import platform
+import shutil
+import tempfile
+from unittest import TestCase, skipUnless
+
+import casadi as ca
+import numpy as np
+
+from hilo_mpc import Model, NMPC, LMPC, MHE, KF, EKF, UKF, PF
+
+
+HAS_SHELL_COMPILER = platform.system() == 'Linux' and ca.Importer.has_plugin('shell') and shutil.which('gcc')
+
+
+def _nonlinear_model(discrete=False):
+    """
+
+    :param discrete:
+    :return:
+    """
+    model = Model(plot_backend='bokeh', discrete=discrete)
+    x = model.set_dynamical_states(['x_1', 'x_2'])
+    u = model.set_inputs('u')
+    model.set_measurements('y')
+    model.set_measurement_equations(x[1])
+    if discrete:
+        model.set_dynamical_equations([.9 * x[0] + .1 * x[1] ** 2 + u, .8 * x[1] + .1 * ca.sin(x[0])])
+        model.setup(dt=1.)
+    else:
+        model.set_dynamical_equations([-x[0] + x[1] ** 2 + u, -x[1] + ca.sin(x[0])])
+        model.setup(dt=.1)
+    model.set_initial_conditions(x0=[1., .5])
+    return model
+
+
+def _linear_model():
+    """
+
+    :return:
+    """
+    model = Model(plot_backend='bokeh', discrete=True)
+    model.A = np.array([[1, model.dt], [0, 1]])
+    model.B = np.array([[model.dt ** 2 / 2], [model.dt]])
+    model.C = np.array([[1., 0.]])
+    model.setup(dt=.5)
+    model.set_initial_conditions(x0=[1., 1.])
+    return model
+
+
+@skipUnless(HAS_SHELL_COMPILER, "No compiler available")
+class TestCodeGeneration(TestCase):
+    """"""
+    def setUp(self) -> None:
+        """
+
+        :return:
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.gen_path = self.directory.name + '/'
+
+    def tearDown(self) -> None:
+        """
+
+        :return:
+        """
+        self.directory.cleanup()
+
+    def _nmpc(self, method=None, compiler=None):
+        """
+
+        :param method:
+        :param compiler:
+        :return:
+        """
+        nmpc = NMPC(_nonlinear_model())
+        nmpc.horizon = 10
+        nmpc.quad_stage_cost.add_states(names=['x_1', 'x_2'], weights=[1., 1.])
+        nmpc.quad_stage_cost.add_inputs(names=['u'], weights=[.1])
+        nmpc.set_box_constraints(u_lb=[-1.], u_ub=[1.])
+        nmpc.set_nlp_options({'print_level': 0})
+        if method is None:
+            nmpc.setup(solver_options={'ipopt.print_level': 0, 'print_time': False})
+        else:
+            nmpc.set_compiler(method, compiler)
+            nmpc.setup(solver_options={'ipopt.print_level': 0, 'print_time': False}, c_code=True,
+                       gen_path=self.gen_path)
+        return nmpc
+
+    def test_nmpc_jit(self) -> None:
+        """
+
+        :return:
+        """
+        reference = self._nmpc()
+        nmpc = self._nmpc('jit', 'shell')
+        self.assertEqual(nmpc._solver.get_function('nlp_hess_l').class_name(), 'External')
+        np.testing.assert_allclose(nmpc.optimize([1., .5]), reference.optimize([1., .5]), rtol=1e-6, atol=1e-8)
+
+    def test_nmpc_aot(self) -> None:
+        """
+
+        :return:
+        """
+        reference = self._nmpc()
+        nmpc = self._nmpc('aot', 'gcc')
+        self.assertEqual(nmpc._solver.get_function('nlp_jac_g').class_name(), 'External')
+        np.testing.assert_allclose(nmpc.optimize([1., .5]), reference.optimize([1., .5]), rtol=1e-6, atol=1e-8)
+
+    def test_nmpc_no_compiler(self) -> None:
+        """
+
+        :return:
+        """
+        nmpc = NMPC(_nonlinear_model())
+        nmpc.horizon = 5
+        nmpc.quad_stage_cost.add_states(names=['x_1', 'x_2'], weights=[1., 1.])
+        nmpc.set_nlp_options({'print_level': 0})
+        nmpc._compiler_opts.clear()
+        with self.assertWarns(UserWarning):
+            nmpc.setup(solver_options={'ipopt.print_level': 0, 'print_time': False}, c_code=True,
+                       gen_path=self.gen_path)
+        self.assertNotEqual(nmpc._solver.get_function('nlp_hess_l').class_name(), 'External')
+
+    def test_lmpc(self) -> None:
+        """
+
+        :return:
+        """
+        controllers = []
+        for c_code in (False, True):
+            lmpc = LMPC(_linear_model())
+            lmpc.Q = np.eye(2)
+            lmpc.R = 1.
+            lmpc.horizon = 10
+            lmpc.set_box_constraints(x_lb=[-5., -5.], x_ub=[5., 5.], u_lb=[-1.], u_ub=[1.])
+            lmpc.set_compiler('jit', 'shell')
+            lmpc.setup(solver_options={'printLevel': 'none'}, c_code=c_code, gen_path=self.gen_path)
+            controllers.append(lmpc)
+        self.assertEqual(controllers[1]._constraint_matrix_function.class_name(), 'External')
+        np.testing.assert_allclose(controllers[1].optimize(x0=[1., 1.]), controllers[0].optimize(x0=[1., 1.]))
+
+    def test_mhe(self) -> None:
+        """
+
+        :return:
+        """
+        model = _nonlinear_model()
+        measurements = []
+        for _ in range(6):
+            model.simulate(u=.1)
+            measurements.append(model.solution['y:f'])
+
+        estimates = []
+        for c_code in (False, True):
+            mhe = MHE(_nonlinear_model())
+            mhe.horizon = 5
+            mhe.quad_stage_cost.add_measurements(weights=[10.])
+            mhe.quad_arrival_cost.add_states(weights=[1., 1.], guess=[1., .5])
+            mhe.set_nlp_options({'print_level': 0})
+            mhe.set_compiler('jit', 'shell')
+            mhe.setup(c_code=c_code, gen_path=self.gen_path)
+            for y in measurements:
+                mhe.add_measurements(y, u_meas=.1)
+            estimates.append(mhe.estimate()[0])
+        np.testing.assert_allclose(estimates[1], estimates[0], rtol=1e-6, atol=1e-8)
+
+    def test_kalman_filters(self) -> None:
+        """
+
+        :return:
+        """
+        for cls, model in ((KF, _linear_model), (EKF, lambda: _nonlinear_model(discrete=True)),
+                           (UKF, lambda: _nonlinear_model(discrete=True))):
+            with self.subTest(filter=cls.__name__):
+                estimates = []
+                for c_code in (False, True):
+                    estimator = cls(model(), plot_backend='bokeh')
+                    estimator.set_compiler('jit', 'shell')
+                    estimator.setup(c_code=c_code, gen_path=self.gen_path)
+                    estimator.Q = .01 * np.eye(2)
+                    estimator.R = .1
+                    estimator.set_initial_guess([1., 1.], P0=[1., 1.])
+                    for _ in range(3):
+                        estimator.estimate(y=1.2, u=.1)
+                    estimates.append(estimator.solution['x:f'])
+                    self.assertEqual(estimator._function.class_name() == 'External', c_code)
+                np.testing.assert_allclose(estimates[1], estimates[0])
+
+    def test_particle_filter(self) -> None:
+        """
+
+        :return:
+        """
+        functions = []
+        for c_code in (False, True):
+            pf = PF(_nonlinear_model(discrete=True), plot_backend='bokeh')
+            pf.sample_size = 20
+            pf.set_compiler('aot', 'gcc')
+            pf.setup(c_code=c_code, gen_path=self.gen_path)
+            functions.append(pf._function)
+        self.assertEqual(functions[1].class_name(), 'External')
+
+        rng = np.random.default_rng(0)
+        args = {
+            'X': rng.uniform(size=(2, 20)),
+            'y': 1.,
+            'p': .1,
+            'w': rng.normal(size=(2, 20)),
+            'v': rng.normal(size=(1, 20)),
+            'R': .1
+        }
+        reference = functions[0](**args)
+        result = functions[1](**args)
+        for key in ('X_prop', 'Y', 'q'):
+            np.testing.assert_allclose(result[key], reference[key])
@@ -0,0 +1,200 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from hilo_mpc import ANN
+from hilo_mpc.util.data import ChunkedArray, ChunkedDataSet, DataSet, EuclideanDistanceFilter
+
+
+def _reference_selection(inputs, distance_threshold):
+    """Quadratic reference implementation of the greedy data selection by Euclidean distance"""
+    index = []
+    for k in range(inputs.shape[1]):
+        if all(np.linalg.norm(inputs[:, k] - inputs[:, j]) >= distance_threshold for j in index):
+            index.append(k)
+    return index
+
+
+class TestEuclideanDistanceSelection(unittest.TestCase):
+    """"""
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.features = rng.uniform(-1., 1., size=(2, 500))
+        self.labels = np.sin(self.features[0:1, :]) * self.features[1:2, :]
+        self.features[:, 10] = self.features[:, 3]
+
+        self.data_set = DataSet(['x_1', 'x_2'], ['y'], plot_backend='bokeh')
+        self.data_set.set_data(self.features, self.labels)
+
+    def test_select_train_data(self):
+        for distance_threshold in [.01, .1, .5]:
+            self.data_set.select_train_data('euclidean_distance', distance_threshold=distance_threshold)
+            np.testing.assert_array_equal(self.data_set._train_index,
+                                          _reference_selection(self.features, distance_threshold))
+            x_train, y_train = self.data_set.train_data
+            self.assertEqual(x_train.shape[1], y_train.shape[1])
+
+    def test_select_test_data(self):
+        self.data_set.select_test_data('euclidean distance', distance_threshold=.2)
+        np.testing.assert_array_equal(self.data_set._test_index, _reference_selection(self.features, .2))
+
+    def test_downsample(self):
+        self.data_set.select_train_data('downsample', downsample_factor=7)
+        np.testing.assert_array_equal(self.data_set._train_index, np.arange(0, 500, 7))
+
+    def test_streaming(self):
+        data_filter = EuclideanDistanceFilter(.1)
+        keep = np.concatenate([data_filter.update(chunk) for chunk in np.array_split(self.features, 7, axis=1)])
+        reference = _reference_selection(self.features, .1)
+        np.testing.assert_array_equal(np.flatnonzero(keep), reference)
+        np.testing.assert_array_equal(data_filter.index, reference)
+        self.assertEqual(len(data_filter), len(reference))
+        self.assertEqual(data_filter.n_seen, 500)
+
+        self.assertFalse(data_filter.update(self.features[:, 0]).any())
+        with self.assertRaises(ValueError):
+            data_filter.update(np.zeros((3, 1)))
+
+        data_filter.reset()
+        self.assertTrue(data_filter.update(self.features[:, 0]).all())
+
+    def test_streaming_many_features(self):
+        rng = np.random.default_rng(1)
+        features = rng.uniform(size=(8, 200))
+        data_filter = EuclideanDistanceFilter(.8)
+        data_filter.update(features)
+        np.testing.assert_array_equal(data_filter.index, _reference_selection(features, .8))
+
+
+
+class _IncrementalScaler:
+    """Scaler supporting incremental fitting similar to sklearn.preprocessing.StandardScaler"""
+    def __init__(self):
+        self._data = []
+
+    def partial_fit(self, data):
+        self._data.append(data)
+        data = np.concatenate(self._data)
+        self.mean_ = data.mean(axis=0)
+        self.scale_ = data.std(axis=0)
+
+    def fit(self, data):
+        self._data = []
+        self.partial_fit(data)
+
+    def transform(self, data):
+        return (data - self.mean_) / self.scale_
+
+
+class _Scaler(_IncrementalScaler):
+    """Scaler without incremental fitting"""
+    partial_fit = None
+
+
+class TestChunkedDataSet(unittest.TestCase):
+    """"""
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.features = rng.uniform(-1., 1., size=(2, 250))
+        self.labels = self.features.sum(axis=0, keepdims=True)
+
+        self.data_set = ChunkedDataSet(['x_1', 'x_2'], ['y'], self.directory.name, chunk_size=40)
+        self.data_set.add_data(self.features[:, :15], self.labels[:, :15])
+        self.data_set.add_data(self.features[:, 15:], self.labels[:, 15:])
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_storage(self):
+        self.assertEqual(len(self.data_set), 250)
+        self.assertEqual(self.data_set.n_chunks, 7)
+        x_data, y_data = self.data_set.raw_data
+        self.assertIsInstance(x_data, ChunkedArray)
+        self.assertEqual(x_data.shape, (250, 2))
+        np.testing.assert_array_equal(np.asarray(x_data), self.features.T)
+        np.testing.assert_array_equal(np.asarray(y_data), self.labels.T)
+
+        reopened = ChunkedDataSet(['x_1', 'x_2'], ['y'], self.directory.name)
+        self.assertEqual(len(reopened), 250)
+        self.assertEqual(reopened.chunk_size, 40)
+        reopened.add_data(self.features[:, 0], self.labels[:, 0])
+        np.testing.assert_array_equal(reopened.raw_data[0][-1], self.features[:, 0])
+
+        with self.assertRaises(ValueError):
+            ChunkedDataSet(['x_1'], ['y'], self.directory.name)
+        with self.assertRaises(ValueError):
+            reopened.add_data(self.features, self.labels[:, :10])
+
+    def test_lazy_views(self):
+        x_data, _ = self.data_set.raw_data
+        np.testing.assert_array_equal(x_data[37:45], self.features[:, 37:45].T)
+        np.testing.assert_array_equal(x_data[[200, 3, 41, -1]], self.features[:, [200, 3, 41, -1]].T)
+        np.testing.assert_array_equal(x_data[5, 1], self.features[1, 5])
+        with self.assertRaises(IndexError):
+            x_data[250]
+
+        index = np.array([249, 0, 120, 80, 81])
+        view = x_data.take(index)
+        np.testing.assert_array_equal(view[1:], self.features[:, index[1:]].T)
+        np.testing.assert_array_equal(view.take([2, 0])[:], self.features[:, [120, 249]].T)
+        np.testing.assert_array_equal(view.with_transform(lambda x: 2. * x)[:], 2. * self.features[:, index].T)
+
+        blocks = list(x_data.iter_chunks())
+        self.assertEqual(len(blocks), 7)
+        np.testing.assert_array_equal(np.concatenate(list(view.iter_chunks(chunk_size=2))), self.features[:, index].T)
+
+        concatenated = ChunkedArray.concatenate([x_data, x_data])
+        self.assertEqual(len(concatenated), 500)
+        np.testing.assert_array_equal(concatenated[[0, 250]], self.features[:, [0, 0]].T)
+
+    def test_select_data(self):
+        data_set = DataSet(['x_1', 'x_2'], ['y'], plot_backend='bokeh')
+        data_set.set_data(self.features, self.labels)
+        data_set.select_train_data('euclidean_distance', distance_threshold=.1)
+        self.data_set.select_train_data('euclidean_distance', distance_threshold=.1)
+        np.testing.assert_array_equal(self.data_set.train_data[0][:], data_set.train_data[0].T)
+
+        self.data_set.select_test_data('downsample', downsample_factor=3)
+        np.testing.assert_array_equal(self.data_set.test_data[1][:], self.labels[:, ::3].T)
+
+    def test_from_data_set(self):
+        data_set = DataSet(['x_1', 'x_2'], ['y'], plot_backend='bokeh')
+        data_set.set_data(self.features, self.labels)
+        with tempfile.TemporaryDirectory() as directory:
+            chunked_data_set = ChunkedDataSet.from_data_set(data_set, directory, chunk_size=100)
+            self.assertEqual(chunked_data_set.n_chunks, 3)
+            np.testing.assert_array_equal(chunked_data_set.raw_data[0][:], self.features.T)
+
+    def test_neural_network_data(self):
+        ann = ANN(['x_1', 'x_2'], ['y'], seed=0)
+        ann.add_data_set(self.data_set)
+        ann.set_scaling(_IncrementalScaler)
+        ann.prepare_data_set(train_split=.8, validation_split=.1)
+
+        x_train, y_train = ann._train_data
+        self.assertIsInstance(x_train, ChunkedArray)
+        self.assertEqual((len(x_train), len(ann._validate_data[0]), len(ann._test_data[0])), (200, 25, 25))
+
+        in_memory = ANN(['x_1', 'x_2'], ['y'], seed=0)
+        data_set = DataSet(['x_1', 'x_2'], ['y'], plot_backend='bokeh')
+        data_set.set_data(self.features, self.labels)
+        in_memory.add_data_set(data_set)
+        in_memory.set_scaling(_IncrementalScaler)
+        in_memory.prepare_data_set(train_split=.8, validation_split=.1)
+
+        np.testing.assert_allclose(x_train[:], in_memory._train_data[0])
+        np.testing.assert_allclose(y_train[:], in_memory._train_data[1])
+        np.testing.assert_allclose(ann._test_data[0][:], in_memory._test_data[0])
+
+    def test_neural_network_data_scaler_not_incremental(self):
+        ann = ANN(['x_1', 'x_2'], ['y'], seed=0)
+        ann.add_data_set(self.data_set)
+        ann.set_scaling(_Scaler)
+        with self.assertRaises(TypeError):
+            ann.prepare_data_set()
+
+
+if __name__ == '__main__':
+    unittest.main()
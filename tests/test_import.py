@@ -0,0 +1,49 @@
+import subprocess
+import sys
+import unittest
+
+import hilo_mpc
+
+
+class TestLazyImport(unittest.TestCase):
+    """"""
+    def _loaded_modules(self, statement):
+        """
+
+        :param statement:
+        :return:
+        """
+        code = f"import sys; {statement}; print(' '.join(sorted(sys.modules)))"
+        output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+        return set(output.split())
+
+    def test_import_package(self):
+        modules = self._loaded_modules('import hilo_mpc')
+        self.assertNotIn('casadi', modules)
+        self.assertNotIn('hilo_mpc.modules.dynamic_model.dynamic_model', modules)
+
+    def test_import_model(self):
+        modules = self._loaded_modules('from hilo_mpc import Model')
+        self.assertIn('hilo_mpc.modules.dynamic_model.dynamic_model', modules)
+        self.assertNotIn('hilo_mpc.modules.controller.mpc', modules)
+        self.assertNotIn('hilo_mpc.modules.estimator.pf', modules)
+        self.assertNotIn('hilo_mpc.modules.machine_learning.gp.gp', modules)
+        self.assertNotIn('scipy.stats', modules)
+        self.assertNotIn('scipy.optimize', modules)
+        for backend in ['bokeh', 'matplotlib', 'torch', 'tensorflow', 'sklearn']:
+            self.assertNotIn(backend, modules)
+
+    def test_public_names(self):
+        for name in hilo_mpc.__all__:
+            self.assertIsNotNone(getattr(hilo_mpc, name))
+        self.assertIs(hilo_mpc.NMPC, hilo_mpc.modules.controller.mpc.NMPC)
+        self.assertIs(hilo_mpc.MHE, hilo_mpc.MovingHorizonEstimator)
+        self.assertTrue(set(hilo_mpc.__all__).issubset(dir(hilo_mpc)))
+
+    def test_unknown_name(self):
+        with self.assertRaises(AttributeError):
+            hilo_mpc.NotExisting
+
+
+if __name__ == '__main__':
+    unittest.main()
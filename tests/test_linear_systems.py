@@ -82,9 +82,10 @@ class TestODESystem(TestCase):
             else:
                 self.model.simulate(u=u)
 
-            np.testing.assert_allclose(self.model.solution.get_by_id('x:f'), [[5.016586321846274], [.00627089461146664],
-                                                                              [6.160937724223938], [1.2708949868233719],
-                                                                              [-86.50514360918245]])
+            # NOTE: Linear time-invariant models are simulated in closed form (exact zero-order hold discretization)
+            np.testing.assert_allclose(self.model.solution.get_by_id('x:f'), [[5.016587249406305], [.0062708734521326],
+                                                                              [6.160931701641559], [1.2708966771597467],
+                                                                              [-86.5051204430927]])
         elif self.scenario in [3, 4]:
             # NOTE: Parameters are initialized before states, since measurements depend on parameters
             self.model.set_initial_parameter_values([.5, .25, .1, .3])
@@ -92,10 +93,10 @@ class TestODESystem(TestCase):
 
             self.model.simulate()
 
-            np.testing.assert_allclose(self.model.solution.get_by_id('x:f'), [[2.517059337383009], [2.208782390915479],
-                                                                              [1.1051709515096617]])
+            np.testing.assert_allclose(self.model.solution.get_by_id('x:f'), [[2.5169951890820492], [2.2087276844461496],
+                                                                              [1.1051709180756477]])
             np.testing.assert_approx_equal(self.model.solution.get_by_id('y:0'), .3)
-            np.testing.assert_approx_equal(self.model.solution.get_by_id('y:f'), .6626347172746436)
+            np.testing.assert_approx_equal(self.model.solution.get_by_id('y:f'), .6626183053338449)
 
     def test_initialization_1(self):
         """
@@ -752,3 +753,181 @@ class TestDAESystem(TestCase):
             self.model.setup(dt=1.)
         self.assertEqual("Only algebraic equations were supplied for the DAE system. ODE's are still missing.",
                          str(context.exception))
+
+
+class TestClosedFormSimulation(TestCase):
+    """"""
+    @staticmethod
+    def _model(discrete: bool, parameters: bool = False) -> Model:
+        """
+
+        :param discrete:
+        :param parameters:
+        :return:
+        """
+        if discrete:
+            model = Model(plot_backend='bokeh', discrete=True)
+        else:
+            model = Model(plot_backend='bokeh', solver_options={'abstol': 1e-12, 'reltol': 1e-12})
+        x = model.set_dynamical_states(['x_1', 'x_2'])
+        u = model.set_inputs('u')
+        model.set_measurements('y')
+        k = model.set_parameters('k') if parameters else .5
+        if discrete:
+            model.set_dynamical_equations([.9 * x[0] + .1 * x[1] + u, -.1 * k * x[0] + .8 * x[1] + 1.])
+        else:
+            model.set_dynamical_equations([x[1], -k * x[0] - .3 * x[1] + u + .2])
+        model.set_measurement_equations(x[0] + 2. * u)
+        model.setup(dt=.1)
+        model.set_initial_conditions([1., 0.])
+        if parameters:
+            model.set_initial_parameter_values(.5)
+        return model
+
+    def _compare(self, discrete: bool, parameters: bool = False, p=None) -> None:
+        """
+
+        :param discrete:
+        :param parameters:
+        :param p:
+        :return:
+        """
+        solutions = []
+        for closed_form in [True, False]:
+            model = self._model(discrete, parameters=parameters)
+            kwargs = {} if p is None else {'p': p}
+            model.simulate(u=np.sin(np.arange(50) / 5.)[None, :], steps=50, closed_form=closed_form, **kwargs)
+            for _ in range(5):
+                model.simulate(u=1., closed_form=closed_form)
+            solutions.append(model.solution)
+        for name in ['t', 'x', 'y']:
+            np.testing.assert_allclose(solutions[0][name], solutions[1][name], atol=1e-8)
+
+    def test_closed_form_simulation_continuous(self) -> None:
+        """
+
+        :return:
+        """
+        self._compare(False)
+        self._compare(False, parameters=True)
+
+    def test_closed_form_simulation_discrete(self) -> None:
+        """
+
+        :return:
+        """
+        self._compare(True)
+        self._compare(True, parameters=True)
+
+    def test_closed_form_simulation_varying_parameters(self) -> None:
+        """
+
+        :return:
+        """
+        self._compare(False, parameters=True, p=np.linspace(.5, 1., 50)[None, :])
+
+    def test_closed_form_simulation_availability(self) -> None:
+        """
+
+        :return:
+        """
+        self.assertTrue(self._model(False)._lti_simulation_is_possible())
+        self.assertTrue(self._model(True)._lti_simulation_is_possible())
+
+        model = Model(plot_backend='bokeh', solver='rk')
+        x = model.set_dynamical_states('x')
+        model.set_dynamical_equations(-x)
+        model.setup(dt=.1)
+        # NOTE: Fixed-step integrators don't return the exact solution of the linear system
+        self.assertFalse(model._lti_simulation_is_possible())
+
+        model = Model(plot_backend='bokeh')
+        x = model.set_dynamical_states('x')
+        model.set_dynamical_equations(-x ** 2)
+        model.setup(dt=.1)
+        self.assertFalse(model._lti_simulation_is_possible())
+
+
+class TestModelCopy(TestCase):
+    """"""
+    def setUp(self) -> None:
+        """
+
+        :return:
+        """
+        model = Model(plot_backend='bokeh', name='original')
+        x = model.set_dynamical_states(['x_1', 'x_2'])
+        u = model.set_inputs('u')
+        k = model.set_parameters('k')
+        model.set_measurements('y')
+        model.set_dynamical_equations([x[1], -k * x[0] - .3 * x[1] + u])
+        model.set_measurement_equations(x[0])
+        model.setup(dt=.1)
+        model.set_initial_conditions([1., 0.])
+        model.set_initial_parameter_values(.5)
+        self.model = model
+
+    def test_copy_shares_functions(self) -> None:
+        """
+
+        :return:
+        """
+        model = self.model.copy(setup=True)
+        self.assertTrue(model.is_setup())
+        self.assertIs(model._integrator_function, self.model._integrator_function)
+        self.assertIs(model._meas_function, self.model._meas_function)
+        self.assertNotEqual(model.id, self.model.id)
+        self.assertEqual(model.name, 'original')
+        self.assertEqual(model.solution.dt, .1)
+        self.assertTrue(model.solution['x'].is_empty())
+
+    def test_copy_is_independent(self) -> None:
+        """
+
+        :return:
+        """
+        model = self.model.copy(setup=True)
+        model.set_initial_conditions([2., 1.])
+        model.set_initial_parameter_values(1.)
+        model.simulate(u=1., steps=5)
+        np.testing.assert_allclose(self.model.solution['x'], [[1.], [0.]])
+        np.testing.assert_allclose(self.model.solution['p'], [[.5]])
+
+        self.model.simulate(u=1., steps=5)
+        self.assertEqual(model.solution['x'].shape, (2, 6))
+        self.assertFalse(np.allclose(model.solution['x'], self.model.solution['x']))
+
+    def test_copy_without_setup(self) -> None:
+        """
+
+        :return:
+        """
+        model = self.model.copy(setup=False, name='clone')
+        self.assertFalse(model.is_setup())
+        self.assertEqual(model.name, 'clone')
+        model.add_dynamical_states('x_3')
+        model.add_dynamical_equations(-model.x[2])
+        self.assertEqual(model.n_x, 3)
+        self.assertEqual(self.model.n_x, 2)
+        self.assertEqual(self.model.dynamical_state_names, ['x_1', 'x_2'])
+        self.assertEqual(self.model.dynamical_equations.numel(), 2)
+
+        model.setup(dt=.2)
+        self.assertEqual(model.solution.dt, .2)
+        self.assertEqual(self.model.solution.dt, .1)
+
+    def test_copy_with_new_sampling_time(self) -> None:
+        """
+
+        :return:
+        """
+        model = self.model.copy(setup=True, dt=.5)
+        self.assertIsNot(model._integrator_function, self.model._integrator_function)
+        self.assertEqual(model.solution.dt, .5)
+        for m in [model, self.model]:
+            m.set_initial_conditions([1., 0.])
+            m.set_initial_parameter_values(.5)
+        model.simulate(u=1.)
+        for _ in range(5):
+            self.model.simulate(u=1.)
+        np.testing.assert_allclose(model.solution['x'][:, -1], self.model.solution['x'][:, -1], rtol=1e-6)
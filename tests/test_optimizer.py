@@ -0,0 +1,45 @@
+from unittest import TestCase
+
+import casadi as ca
+import numpy as np
+
+from hilo_mpc.util.optimizer import SciPyOptimizer
+
+
+class TestSciPyOptimizer(TestCase):
+    """"""
+    def setUp(self) -> None:
+        """
+
+        :return:
+        """
+        x = ca.SX.sym('x', 2)
+        p = ca.SX.sym('p')
+        self.problem = {'x': x, 'p': p, 'f': (1. - x[0]) ** 2 + p * (x[1] - x[0] ** 2) ** 2}
+
+    def test_scipy_optimizer_solvers(self) -> None:
+        """
+
+        :return:
+        """
+        for solver in ['CG', 'BFGS', 'Newton-CG', 'L-BFGS-B', 'Nelder-Mead', 'Powell']:
+            with self.subTest(solver=solver):
+                optimizer = SciPyOptimizer('rosenbrock', solver, self.problem)
+                solution = optimizer(x0=[-1.2, 1.], p=10.)
+                self.assertTrue(optimizer.stats()['success'])
+                np.testing.assert_allclose(solution['x'], [1., 1.], atol=1e-3)
+
+    def test_scipy_optimizer_fused_gradient(self) -> None:
+        """
+
+        :return:
+        """
+        optimizer = SciPyOptimizer('rosenbrock', 'BFGS', self.problem)
+        optimizer(x0=[-1.2, 1.], p=10.)
+        stats = optimizer.stats()
+        # NOTE: The objective value and the gradient are returned by the same evaluation
+        self.assertEqual(stats['n_eval_f'], stats['n_eval_grad_f'])
+
+        optimizer = SciPyOptimizer('rosenbrock', 'Newton-CG', self.problem)
+        optimizer(x0=[-1.2, 1.], p=10.)
+        self.assertGreater(optimizer.stats()['n_eval_hess_f'], 0)
@@ -0,0 +1,160 @@
+import importlib.util
+import os
+from tempfile import TemporaryDirectory
+import unittest
+
+import casadi as ca
+import numpy as np
+
+from hilo_mpc.modules.base import SeriesKey, TimeSeries, Vector
+from hilo_mpc.util.io import SeriesReader, SeriesWriter
+
+
+HAS_H5PY = importlib.util.find_spec('h5py') is not None
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+class TestVectorIndex(unittest.TestCase):
+    """"""
+    def test_index(self):
+        vector = Vector(ca.DM, values_or_names=['a', 'b', 'c'], shape=(3, 0))
+        self.assertEqual(vector.index('b'), [1])
+        self.assertEqual(vector.index(['c', 'a', 'd']), [2, 0])
+        self.assertEqual(vector.index('d'), [])
+        self.assertIn('c', vector)
+        self.assertNotIn('d', vector)
+
+    def test_index_after_update(self):
+        vector = Vector(ca.SX, values_or_names=ca.SX.sym('x', 2))
+        self.assertEqual(vector.index('x_1'), [1])
+        vector.add(ca.SX.sym('y'))
+        self.assertEqual(vector.index('y'), [2])
+        vector.remove(0)
+        self.assertEqual(vector.index(['x_1', 'y']), [0, 1])
+        self.assertEqual(vector.index('x_0'), [])
+
+
+class TestSeriesIndex(unittest.TestCase):
+    """"""
+    def setUp(self) -> None:
+        series = TimeSeries(backend='bokeh')
+        kwargs = {
+            'x': {'data_format': ca.DM, 'values_or_names': ['x_0', 'x_1'], 'shape': (2, 0)},
+            'u': {'data_format': ca.DM, 'values_or_names': ['u'], 'shape': (1, 0)}
+        }
+        series.setup('x', 'u', **kwargs)
+        series.add('x', [1., 2.])
+        series.add('x', [3., 4.])
+        series.add('u', 5.)
+        series.add('u', 6.)
+        series.set('x_ref', np.array([[7., 8.], [9., 10.]]))
+        self.series = series
+
+    def test_get_by_name(self):
+        np.testing.assert_array_equal(self.series['x_1'], [[2., 4.]])
+        np.testing.assert_array_equal(self.series.get_by_name('x_1:0'), [[2.]])
+        np.testing.assert_array_equal(self.series.get_by_name('u:f'), [[6.]])
+        self.assertIsNone(self.series.get_by_name('y'))
+        self.assertEqual(self.series.get_id('x_0'), 'x')
+        self.assertEqual(self.series.get_id('u'), 'u')
+        np.testing.assert_array_equal(self.series.get_ref_by_name('x_1'), [[9., 10.]])
+
+    def test_get_by_key(self):
+        key = self.series.get_key('x:f')
+        self.assertEqual(key, SeriesKey('x', 'f', ''))
+        np.testing.assert_array_equal(self.series.get_by_id(key), self.series.get_by_id('x:f'))
+        np.testing.assert_array_equal(self.series.get_by_id(self.series.get_key('x_ref')), [[7., 8.], [9., 10.]])
+        with self.assertRaises(ValueError):
+            self.series.get_key('x:1')
+
+    def test_clear(self):
+        self.series.clear()
+        self.assertIsNone(self.series.get_id('x_0'))
+        self.assertIsNone(self.series.get_by_name('x_0'))
+
+
+
+class TestSeriesWriter(unittest.TestCase):
+    """"""
+    def setUp(self) -> None:
+        series = TimeSeries(backend='bokeh')
+        kwargs = {
+            'dt': .5,
+            't': {'data_format': ca.DM, 'values_or_names': ['t'], 'shape': (1, 0)},
+            'x': {'data_format': ca.DM, 'values_or_names': ['x_0', 'x_1'], 'units': ['m', 'm/s'], 'shape': (2, 0)},
+            'u': {'data_format': ca.DM, 'values_or_names': ['u'], 'shape': (1, 0)}
+        }
+        series.setup('dt', 't', 'x', 'u', **kwargs)
+        self.series = series
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _run(self, writer, steps):
+        for k in range(steps):
+            self.series.add('t', .5 * k)
+            self.series.add('x', [float(k), -float(k)])
+            self.series.add('u', k ** 2)
+            if k % 3 == 2:
+                writer.write(self.series)
+        writer.write(self.series)
+
+    def _check(self, path_to_file, file_format):
+        with SeriesReader(path_to_file) as reader:
+            self.assertEqual(reader.format, file_format)
+            self.assertEqual(reader.dt, .5)
+            self.assertEqual(reader.names, ['t', 'x_0', 'x_1', 'u'])
+            self.assertEqual(reader.get_units('x'), ['m', 'm/s'])
+            np.testing.assert_array_equal(reader['x_1'][:], self.series['x_1'].full().ravel())
+            np.testing.assert_array_equal(reader['x'], self.series['x'])
+            np.testing.assert_array_equal(reader['u'][:], np.arange(10) ** 2)
+
+    def test_npy(self):
+        path = os.path.join(self.directory.name, 'run')
+        with SeriesWriter(path) as writer:
+            self._run(writer, 10)
+        self._check(path, 'npy')
+        # NOTE: The columns are plain .npy files, that can be memory-mapped by NumPy
+        column = np.load(os.path.join(path, 'x', 'x_0.npy'), mmap_mode='r')
+        self.assertIsInstance(column, np.memmap)
+        np.testing.assert_array_equal(column, np.arange(10))
+
+    @unittest.skipUnless(HAS_H5PY, "h5py is not installed")
+    def test_hdf5(self):
+        path = os.path.join(self.directory.name, 'run.h5')
+        with SeriesWriter(path, format='hdf5', chunk_size=4) as writer:
+            self._run(writer, 10)
+        self._check(path, 'hdf5')
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+    def test_parquet(self):
+        path = os.path.join(self.directory.name, 'run')
+        with SeriesWriter(path, format='parquet', compression='zstd') as writer:
+            self._run(writer, 10)
+        self._check(path, 'parquet')
+
+    def test_to_file(self):
+        path = os.path.join(self.directory.name, 'run')
+        for k in range(3):
+            self.series.add('x', [float(k), -float(k)])
+        self.series.to_file('x', file_name=path)
+        with SeriesReader(path) as reader:
+            self.assertEqual(list(reader), ['x'])
+            np.testing.assert_array_equal(reader['x'], self.series['x'])
+
+    def test_write_after_clear(self):
+        path = os.path.join(self.directory.name, 'run')
+        writer = SeriesWriter(path)
+        self._run(writer, 3)
+        self.series.clear()
+        self.series.setup('x', x={'data_format': ca.DM, 'values_or_names': ['x_0', 'x_1'], 'shape': (2, 0)})
+        with self.assertRaises(ValueError):
+            writer.write(self.series, 'x')
+        writer.close()
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            SeriesWriter(os.path.join(self.directory.name, 'run'), format='csv')
+
+
+if __name__ == '__main__':
+    unittest.main()